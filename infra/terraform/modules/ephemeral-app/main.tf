@@ -13,13 +13,18 @@ locals {
 }
 
 resource "docker_image" "app" {
-  name = "nginx:alpine"
+  name = var.image
 }
 
 resource "docker_container" "app" {
   name  = local.app_name
   image = docker_image.app.image_id
 
+  # Límites de recursos para evitar vecinos ruidosos (null = sin límite)
+  memory      = var.memory_limit_mb
+  memory_swap = var.memory_limit_mb
+  cpus        = var.cpu_limit
+
   ports {
     internal = 80
     external = local.app_port
@@ -29,9 +34,10 @@ resource "docker_container" "app" {
     name = var.network_name
   }
 
-  env = [
-    "PR_NUMBER=${var.pr_number}"
-  ]
+  env = concat(
+    ["PR_NUMBER=${var.pr_number}"],
+    [for name, value in var.env : "${name}=${value}"]
+  )
 
   labels {
     label = "pr_number"
@@ -42,4 +48,9 @@ resource "docker_container" "app" {
     label = "environment"
     value = "ephemeral"
   }
+
+  labels {
+    label = "component"
+    value = "app"
+  }
 }
\ No newline at end of file
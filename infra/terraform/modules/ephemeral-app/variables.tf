@@ -14,7 +14,36 @@ variable "app_port" {
   description = "Puerto base para la aplicación"
 }
 
+variable "image" {
+  type        = string
+  default     = "nginx:alpine"
+  description = "Imagen Docker de la aplicación"
+}
+
+variable "env" {
+  type        = map(string)
+  default     = {}
+  description = "Variables de entorno adicionales de la aplicación"
+}
+
 variable "network_name" {
   type        = string
   description = "Nombre de la red Docker para conectar contenedores"
-}
\ No newline at end of file
+}
+
+variable "memory_limit_mb" {
+  type        = number
+  default     = null
+  description = "Límite de memoria del contenedor en MB (null = sin límite)"
+
+  validation {
+    condition     = var.memory_limit_mb == null || try(var.memory_limit_mb >= 6, false)
+    error_message = "El límite de memoria debe ser al menos 6 MB."
+  }
+}
+
+variable "cpu_limit" {
+  type        = string
+  default     = null
+  description = "CPUs máximas del contenedor, ej: \"0.5\" (null = sin límite)"
+}
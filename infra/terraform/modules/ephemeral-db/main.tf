@@ -33,6 +33,11 @@ resource "docker_container" "db" {
   name  = local.db_name
   image = docker_image.db.image_id
 
+  # Límites de recursos para evitar vecinos ruidosos (null = sin límite)
+  memory      = var.memory_limit_mb
+  memory_swap = var.memory_limit_mb
+  cpus        = var.cpu_limit
+
   ports {
     internal = 5432
     external = local.db_port
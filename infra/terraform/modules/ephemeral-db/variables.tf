@@ -16,4 +16,21 @@ variable "db_port" {
 variable "network_name" {
   type        = string
   description = "Nombre de la red Docker para conectar contenedores"
-}
\ No newline at end of file
+}
+
+variable "memory_limit_mb" {
+  type        = number
+  default     = null
+  description = "Límite de memoria del contenedor en MB (null = sin límite)"
+
+  validation {
+    condition     = var.memory_limit_mb == null || try(var.memory_limit_mb >= 6, false)
+    error_message = "El límite de memoria debe ser al menos 6 MB."
+  }
+}
+
+variable "cpu_limit" {
+  type        = string
+  default     = null
+  description = "CPUs máximas del contenedor, ej: \"0.5\" (null = sin límite)"
+}
@@ -11,17 +11,19 @@ locals {
   proxy_name = "ephemeral-pr-${var.pr_number}-proxy"
   proxy_port = var.proxy_port + (var.pr_number % 100)
 
+  # El upstream se resuelve en cada petición con el DNS interno de Docker para
+  # que el proxy siga funcionando cuando la app se hiberna y vuelve a arrancar
   nginx_config = <<-EOT
-    upstream app {
-        server ${var.app_container_name}:80;
-    }
+    resolver 127.0.0.11 valid=10s ipv6=off;
 
     server {
         listen 80;
         server_name _;
 
+        set $app_upstream http://${var.app_container_name}:80;
+
         location / {
-            proxy_pass http://app;
+            proxy_pass $app_upstream;
             proxy_set_header Host $host;
             proxy_set_header X-Real-IP $remote_addr;
             proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;
@@ -32,6 +34,17 @@ locals {
             return 200 "healthy\n";
             add_header Content-Type text/plain;
         }
+
+        # App hibernada: la petición queda en el access log y el monitor
+        # despierta el stack; el navegador reintenta automáticamente
+        error_page 502 503 504 = @hibernated;
+
+        location @hibernated {
+            add_header Retry-After ${var.wake_retry_seconds} always;
+            add_header Refresh ${var.wake_retry_seconds} always;
+            default_type text/plain;
+            return 503 "Entorno en hibernacion, despertando...\n";
+        }
     }
   EOT
 }
@@ -44,6 +57,11 @@ resource "docker_container" "proxy" {
   name  = local.proxy_name
   image = docker_image.proxy.image_id
 
+  # Límites de recursos para evitar vecinos ruidosos (null = sin límite)
+  memory      = var.memory_limit_mb
+  memory_swap = var.memory_limit_mb
+  cpus        = var.cpu_limit
+
   ports {
     internal = 80
     external = local.proxy_port
@@ -27,4 +27,27 @@ variable "network_name" {
 variable "app_container_name" {
   type        = string
   description = "Nombre del contenedor de la aplicación para proxy reverso"
-}
\ No newline at end of file
+}
+
+variable "wake_retry_seconds" {
+  description = "Segundos que el navegador espera antes de reintentar mientras el stack despierta"
+  type        = number
+  default     = 5
+}
+
+variable "memory_limit_mb" {
+  type        = number
+  default     = null
+  description = "Límite de memoria del contenedor en MB (null = sin límite)"
+
+  validation {
+    condition     = var.memory_limit_mb == null || try(var.memory_limit_mb >= 6, false)
+    error_message = "El límite de memoria debe ser al menos 6 MB."
+  }
+}
+
+variable "cpu_limit" {
+  type        = string
+  default     = null
+  description = "CPUs máximas del contenedor, ej: \"0.5\" (null = sin límite)"
+}
@@ -12,7 +12,10 @@ terraform {
   }
 }
 
-provider "docker" {}
+# Host elegido por el scheduler de placement (null = DOCKER_HOST o socket local)
+provider "docker" {
+  host = var.docker_host
+}
 
 locals {
   stack_name   = "ephemeral-pr-${var.pr_number}"
@@ -32,9 +35,13 @@ resource "docker_network" "stack_network" {
 }
 
 module "app" {
-  source       = "../../modules/ephemeral-app"
-  pr_number    = var.pr_number
-  network_name = docker_network.stack_network.name
+  source          = "../../modules/ephemeral-app"
+  pr_number       = var.pr_number
+  image           = var.app_image
+  env             = var.app_env
+  network_name    = docker_network.stack_network.name
+  memory_limit_mb = try(var.resource_limits["app"].memory_mb, null)
+  cpu_limit       = try(var.resource_limits["app"].cpus, null)
 }
 
 module "proxy" {
@@ -43,11 +50,15 @@ module "proxy" {
   app_port           = module.app.port
   app_container_name = module.app.container_name
   network_name       = docker_network.stack_network.name
+  memory_limit_mb    = try(var.resource_limits["proxy"].memory_mb, null)
+  cpu_limit          = try(var.resource_limits["proxy"].cpus, null)
   depends_on         = [module.app]
 }
 
 module "db" {
-  source       = "../../modules/ephemeral-db"
-  pr_number    = var.pr_number
-  network_name = docker_network.stack_network.name
+  source          = "../../modules/ephemeral-db"
+  pr_number       = var.pr_number
+  network_name    = docker_network.stack_network.name
+  memory_limit_mb = try(var.resource_limits["db"].memory_mb, null)
+  cpu_limit       = try(var.resource_limits["db"].cpus, null)
 }
\ No newline at end of file
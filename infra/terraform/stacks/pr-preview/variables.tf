@@ -6,4 +6,36 @@ variable "pr_number" {
     condition     = var.pr_number > 0
     error_message = "PR number debe ser positivo"
   }
-}
\ No newline at end of file
+}
+
+variable "app_image" {
+  type        = string
+  default     = "nginx:alpine"
+  description = "Imagen Docker de la aplicación del PR"
+}
+
+variable "app_env" {
+  type        = map(string)
+  default     = {}
+  description = "Variables de entorno adicionales de la aplicación"
+}
+
+variable "resource_limits" {
+  type = map(object({
+    memory_mb = optional(number)
+    cpus      = optional(string)
+  }))
+  default     = {}
+  description = "Límites por componente (app, db, proxy); ver scripts/rightsize-limits.py"
+
+  validation {
+    condition     = alltrue([for name in keys(var.resource_limits) : contains(["app", "db", "proxy"], name)])
+    error_message = "Componentes válidos: app, db, proxy."
+  }
+}
+
+variable "docker_host" {
+  type        = string
+  default     = null
+  description = "Daemon Docker donde se despliega el stack (ver src/placement.py)"
+}
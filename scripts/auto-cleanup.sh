@@ -2,6 +2,7 @@
 
 # Script de limpieza automática de stacks antiguos
 # Uso: ./scripts/auto-cleanup.sh [max_age_hours] [--dry-run]
+# Traza de comandos: TRACE_FILE=trace.json ./scripts/auto-cleanup.sh
 
 set -e
 
@@ -27,6 +28,9 @@ done
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 TERRAFORM_DIR="$SCRIPT_DIR/../infra/terraform/stacks/pr-preview"
 
+# Con TRACE_FILE cada llamada a docker/terraform/gh/jq queda en la traza
+source "$SCRIPT_DIR/lib/trace.sh"
+
 # Colores
 RED='\033[0;31m'
 GREEN='\033[0;32m'
@@ -136,40 +140,35 @@ cleanup_stack() {
     if [ -d "$TERRAFORM_DIR" ]; then
         log_info "Ejecutando terraform destroy para PR #$pr_number..."
         
-        cd "$TERRAFORM_DIR"
-        if terraform destroy -auto-approve -var="pr_number=$pr_number" 2>/dev/null; then
+        # En el host donde se desplegó el stack, no necesariamente el daemon local
+        if python3 "$SCRIPT_DIR/terraform-destroy.py" --dir "$TERRAFORM_DIR" \
+            --pr "$pr_number" 2>/dev/null; then
             log_success "Terraform destroy exitoso para PR #$pr_number"
         else
             log_warning "Terraform destroy falló para PR #$pr_number, procediendo con limpieza manual"
         fi
-        cd - > /dev/null
     fi
+}
+
+# Teardown por lotes de todos los PRs: contenedores, luego volúmenes, luego redes
+batched_teardown() {
+    local prs=$(echo "$1" | xargs | tr ' ' ',')
     
-    # Limpieza manual de recursos Docker
-    log_info "Limpieza manual de recursos Docker para PR #$pr_number..."
-    
-    # Limpiar contenedores
-    local containers=$(docker ps -a --filter "label=pr_number=$pr_number" --format "{{.Names}}" 2>/dev/null || true)
-    if [ -n "$containers" ]; then
-        log_info "Eliminando contenedores: $containers"
-        docker rm -f $containers 2>/dev/null || true
+    if [ -z "$prs" ]; then
+        return 0
     fi
     
-    # Limpiar volúmenes
-    local volumes=$(docker volume ls --filter "name=ephemeral-pr-$pr_number" --format "{{.Name}}" 2>/dev/null || true)
-    if [ -n "$volumes" ]; then
-        log_info "Eliminando volúmenes: $volumes"
-        docker volume rm $volumes 2>/dev/null || true
+    if [ "$DRY_RUN" = true ]; then
+        python3 "$SCRIPT_DIR/cleanup-monitor.py" --teardown --prs "$prs" --dry-run
+        return 0
     fi
     
-    # Limpiar redes
-    local networks=$(docker network ls --filter "name=ephemeral-pr-$pr_number" --format "{{.Name}}" 2>/dev/null | grep -v -E '^(bridge|host|none)$' || true)
-    if [ -n "$networks" ]; then
-        log_info "Eliminando redes: $networks"
-        docker network rm $networks 2>/dev/null || true
+    log_info "Teardown por lotes de recursos Docker para PRs: $prs"
+    if python3 "$SCRIPT_DIR/cleanup-monitor.py" --teardown --prs "$prs"; then
+        log_success "Teardown por lotes completado"
+    else
+        log_warning "Algunos recursos no se pudieron eliminar"
     fi
-    
-    log_success "Limpieza completada para PR #$pr_number"
 }
 
 # Función para verificar limpieza completa
@@ -219,6 +218,7 @@ main_cleanup() {
     
     local cleaned_count=0
     local total_count=0
+    local doomed_prs=""
     
     for pr_num in $old_prs; do
         total_count=$((total_count + 1))
@@ -259,16 +259,22 @@ main_cleanup() {
         
         if [ "$should_cleanup" = true ]; then
             cleanup_stack $pr_num "$cleanup_reason"
-            
-            if [ "$DRY_RUN" = false ]; then
-                if verify_cleanup $pr_num; then
-                    cleaned_count=$((cleaned_count + 1))
-                fi
-            else
+            doomed_prs="$doomed_prs $pr_num"
+        else
+            log_info "Saltando limpieza de PR #$pr_num"
+        fi
+    done
+    
+    # Un solo plan para todos los PRs en lugar de comandos por PR
+    batched_teardown "$doomed_prs"
+    
+    for pr_num in $doomed_prs; do
+        if [ "$DRY_RUN" = false ]; then
+            if verify_cleanup $pr_num; then
                 cleaned_count=$((cleaned_count + 1))
             fi
         else
-            log_info "Saltando limpieza de PR #$pr_num"
+            cleaned_count=$((cleaned_count + 1))
         fi
     done
     
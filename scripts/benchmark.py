@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks de CleanupMonitor y TrendsAnalyzer a escala de flota.
+Genera salidas sintéticas de Docker e historiales de métricas, mide cada
+caso y compara contra un baseline guardado.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+from contextlib import ExitStack
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPTS_DIR.parent))
+
+from src.benchmarks import (  # noqa: E402
+    PROFILES,
+    api_cases,
+    cassette_cases,
+    compare,
+    load_baseline,
+    monitor_cases,
+    run_suite,
+    save_baseline,
+    trends_cases,
+)
+from src.fake_docker import FakeDockerDaemon  # noqa: E402
+from src.synthetic import synthetic_fleet  # noqa: E402
+
+
+def load_script(filename: str, module_name: str):
+    """Carga un script hermano (nombre con guiones) como módulo."""
+    spec = importlib.util.spec_from_file_location(module_name, SCRIPTS_DIR / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def parse_sizes(value: str):
+    return tuple(int(v) for v in value.split(",") if v.strip())
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmarks de CleanupMonitor y TrendsAnalyzer"
+    )
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="quick")
+    parser.add_argument(
+        "--resources", type=parse_sizes, help="Tamaños de flota (ej: 1000,10000)"
+    )
+    parser.add_argument(
+        "--events", type=parse_sizes, help="Tamaños de historial (ej: 10000,100000)"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Repeticiones por caso")
+    parser.add_argument(
+        "--baseline",
+        default="benchmarks/baseline.json",
+        help="Archivo de baseline",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Aumento relativo tolerado del tiempo mínimo (0.25 = 25%%)",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Guardar los resultados como nuevo baseline",
+    )
+    parser.add_argument(
+        "--fake-daemon",
+        action="store_true",
+        help="Medir también el escaneo por Engine API contra un daemon falso",
+    )
+    parser.add_argument(
+        "--latency-ms", type=float, default=0, help="Latencia del daemon falso"
+    )
+    parser.add_argument(
+        "--cassette",
+        action="append",
+        default=[],
+        help="Medir el monitor reproduciendo un cassette grabado con COMMAND_MODE=record",
+    )
+    parser.add_argument("--output", help="Guardar resultados en JSON")
+
+    args = parser.parse_args()
+
+    profile = PROFILES[args.profile]
+    monitor_module = load_script("cleanup-monitor.py", "cleanup_monitor")
+    dashboard_module = load_script("generate-dashboard.py", "generate_dashboard")
+
+    with ExitStack() as stack:
+        workdir = stack.enter_context(tempfile.TemporaryDirectory(prefix="bench-"))
+        cases = {}
+        for resources in args.resources or profile["resources"]:
+            cases.update(monitor_cases(monitor_module, resources))
+            if args.fake_daemon:
+                daemon = stack.enter_context(
+                    FakeDockerDaemon(
+                        os.path.join(workdir, f"docker-{resources}.sock"),
+                        synthetic_fleet(resources),
+                        latency=args.latency_ms / 1000,
+                    )
+                )
+                cases.update(api_cases(monitor_module, daemon.docker_host, resources))
+        for cassette in args.cassette:
+            cases.update(cassette_cases(monitor_module, cassette))
+        for events in args.events or profile["events"]:
+            cases.update(trends_cases(dashboard_module, events, workdir))
+
+        results = run_suite(
+            cases,
+            args.repeat,
+            progress=lambda name, r: print(
+                f"{name:<40} mediana {r['median'] * 1000:10.1f} ms "
+                f"(min {r['min'] * 1000:.1f} ms)"
+            ),
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    baseline = load_baseline(args.baseline)
+    if args.update_baseline:
+        save_baseline(args.baseline, results, baseline)
+        print(f"\nBaseline actualizado: {args.baseline}")
+        return
+
+    if not baseline:
+        print(f"\nSin baseline en {args.baseline}; generar con --update-baseline")
+        return
+
+    comparisons = compare(results, baseline, args.threshold)
+    regressions = [c for c in comparisons if c["regression"]]
+    print(f"\nComparación contra baseline (umbral +{args.threshold:.0%}):")
+    for c in comparisons:
+        mark = "REGRESIÓN" if c["regression"] else "ok"
+        print(f"  {c['name']:<40} x{c['ratio']:.2f}  {mark}")
+
+    if regressions:
+        print(f"\n{len(regressions)} caso(s) superan el umbral", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
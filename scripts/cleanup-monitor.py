@@ -4,21 +4,82 @@ Monitor de limpieza para stacks efímeros.
 Proporciona análisis y alertas sobre recursos huérfanos.
 """
 
+import io
 import json
+import os
+import re
+import signal
 import subprocess
 import argparse
-from datetime import datetime
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
 from typing import Dict, List, Optional
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.cleanup_report import RENDERERS, write_report  # noqa: E402
+from src.docker_api import DockerAPIClient, DockerAPIError  # noqa: E402
+from src.eviction import EvictionEngine, freed_capacity, parse_weights  # noqa: E402
+from src.federation import (  # noqa: E402
+    HOSTS_ENV,
+    candidates_by_host,
+    parse_hosts,
+    scan_hosts,
+    split_by_host,
+)
+from src.hibernation import ActivityTracker, HibernationPolicy  # noqa: E402
+from src.monitor_daemon import (  # noqa: E402
+    DEFAULT_SOCKET,
+    MonitorClient,
+    MonitorDaemon,
+    MonitorDaemonError,
+    format_analysis,
+    format_summary,
+)
+from src.resource_index import ResourceIndex, label_fields  # noqa: E402
+from src.resource_usage import (  # noqa: E402
+    aggregate_by_pr,
+    cgroup_stats,
+    find_cgroup_dir,
+    parse_labels,
+    parse_stats_lines,
+    parse_system_df,
+    read_cgroup_sample,
+)
+from src.rightsizing import append_samples, usage_samples  # noqa: E402
+from src import commands, tracing  # noqa: E402
+from src.teardown import APIRemover, CLIRemover, TeardownPlan, execute_plan  # noqa: E402
+from src.units import format_size, parse_size  # noqa: E402
+
 
 class CleanupMonitor:
     """Monitor para análisis de recursos y necesidades de limpieza."""
 
-    def __init__(self):
+    def __init__(
+        self,
+        docker_host: Optional[str] = None,
+        docker_hosts: Optional[Dict[str, str]] = None,
+    ):
         self.current_time = datetime.now()
+        # Con docker_host el inventario se lee de la Engine API y no del CLI
+        self.api = DockerAPIClient(docker_host) if docker_host else None
+        # Con docker_hosts ({nombre: endpoint}) el inventario se federa:
+        # un monitor por host, escaneados en paralelo
+        self.hosts = {
+            name: CleanupMonitor(endpoint) for name, endpoint in (docker_hosts or {}).items()
+        }
 
+    @tracing.operation("scan")
     def scan_ephemeral_resources(self) -> Dict[str, List[Dict]]:
-        """Escanea todos los recursos efímeros en el sistema."""
+        """Escanea todos los recursos efímeros en el sistema (o en todos los hosts)."""
+        if self.hosts:
+            return self._scan_hosts()
+        if self.api is not None:
+            return self._scan_via_api()
+
         return {
             "containers": self._scan_containers(),
             "volumes": self._scan_volumes(),
@@ -37,7 +98,7 @@ class CleanupMonitor:
                 "--format",
                 "{{.Names}}\t{{.Status}}\t{{.CreatedAt}}\t{{.Labels}}",
             ]
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            result = commands.run(cmd, capture_output=True, text=True, check=True)
 
             containers = []
             for line in result.stdout.strip().split("\n"):
@@ -46,12 +107,13 @@ class CleanupMonitor:
 
                 parts = line.split("\t")
                 if len(parts) >= 3:
+                    labels = parse_labels(parts[3] if len(parts) > 3 else "")
                     container_info = {
                         "name": parts[0],
                         "status": parts[1],
                         "created_at": parts[2],
-                        "labels": parts[3] if len(parts) > 3 else "",
-                        "pr_number": self._extract_pr_number(parts[0]),
+                        "labels": labels,
+                        **label_fields(parts[0], labels),
                         "age_hours": self._calculate_age_hours(parts[2]),
                     }
                     containers.append(container_info)
@@ -72,7 +134,7 @@ class CleanupMonitor:
                 "--format",
                 "{{.Name}}\t{{.Driver}}\t{{.CreatedAt}}",
             ]
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            result = commands.run(cmd, capture_output=True, text=True, check=True)
 
             volumes = []
             for line in result.stdout.strip().split("\n"):
@@ -110,7 +172,7 @@ class CleanupMonitor:
                 "--format",
                 "{{.Name}}\t{{.Driver}}\t{{.CreatedAt}}",
             ]
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            result = commands.run(cmd, capture_output=True, text=True, check=True)
 
             networks = []
             for line in result.stdout.strip().split("\n"):
@@ -136,10 +198,90 @@ class CleanupMonitor:
         except subprocess.CalledProcessError:
             return []
 
+    def _scan_hosts(self) -> Dict:
+        """Inventario combinado de todos los hosts, con el estado de cada uno en `hosts`."""
+
+        def scanner(monitor: "CleanupMonitor"):
+            def scan() -> Dict[str, List[Dict]]:
+                # Todas las edades se calculan respecto al mismo instante
+                monitor.current_time = self.current_time
+                return monitor._collect_via_api()
+
+            return scan
+
+        return scan_hosts({name: scanner(m) for name, m in self.hosts.items()})
+
+    def _scan_via_api(self) -> Dict[str, List[Dict]]:
+        """Escanea recursos efímeros con la Engine API (mismos campos que el CLI)."""
+        resources = {"containers": [], "volumes": [], "networks": []}
+        try:
+            self._collect_via_api(resources)
+        except (OSError, DockerAPIError):
+            pass
+        return resources
+
+    def _collect_via_api(self, resources: Optional[Dict[str, List[Dict]]] = None) -> Dict:
+        """Como `_scan_via_api`, pero propaga los errores de conexión o de la API."""
+        if resources is None:
+            resources = {"containers": [], "volumes": [], "networks": []}
+
+        for c in self.api.containers(filters={"label": ["environment=ephemeral"]}):
+            name = (c.get("Names") or ["/"])[0].lstrip("/")
+            created_at = self._api_time(c.get("Created"))
+            labels = dict(c.get("Labels") or {})
+            resources["containers"].append(
+                {
+                    "name": name,
+                    "status": c.get("Status", ""),
+                    "created_at": created_at,
+                    "labels": labels,
+                    **label_fields(name, labels),
+                    "age_hours": self._calculate_age_hours(created_at),
+                }
+            )
+
+        for kind, items, created_key in (
+            ("volumes", self.api.volumes(filters={"name": ["ephemeral-pr-"]}), "CreatedAt"),
+            ("networks", self.api.networks(filters={"name": ["ephemeral-pr-"]}), "Created"),
+        ):
+            for item in items:
+                if item["Name"] in ("bridge", "host", "none"):
+                    continue
+                created_at = self._api_time(item.get(created_key))
+                resources[kind].append(
+                    {
+                        "name": item["Name"],
+                        "driver": item.get("Driver", ""),
+                        "created_at": created_at,
+                        "pr_number": self._extract_pr_number(item["Name"]),
+                        "age_hours": self._calculate_age_hours(created_at),
+                    }
+                )
+
+        return resources
+
+    @staticmethod
+    def _api_time(value) -> str:
+        """Convierte fechas de la API (epoch o RFC 3339 con nanosegundos) al formato del CLI."""
+        try:
+            if isinstance(value, (int, float)):
+                created = datetime.fromtimestamp(value, timezone.utc)
+            else:
+                created = datetime.fromisoformat(
+                    re.sub(r"\.\d+", "", str(value)).replace("Z", "+00:00")
+                )
+        except (TypeError, ValueError):
+            return "unknown"
+        return created.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M:%S +0000")
+
+    def build_index(self, resources: Optional[Dict[str, List[Dict]]] = None) -> ResourceIndex:
+        """Índice por PR, componente y entorno del inventario (lo escanea si no se pasa)."""
+        if resources is None:
+            resources = self.scan_ephemeral_resources()
+        return ResourceIndex(resources)
+
     def _extract_pr_number(self, name: str) -> Optional[int]:
         """Extrae número de PR del nombre del recurso."""
-        import re
-
         match = re.search(r"ephemeral-pr-(\d+)", name)
         return int(match.group(1)) if match else None
 
@@ -148,6 +290,9 @@ class CleanupMonitor:
         if not created_at or created_at == "unknown":
             return None
 
+        # `docker ps` agrega la abreviatura de zona: "2026-10-19 10:00:00 +0000 UTC"
+        created_at = re.sub(r" [A-Z]{2,5}$", "", created_at)
+
         try:
             # Manejar diferentes formatos de fecha de Docker
             for fmt in [
@@ -171,9 +316,167 @@ class CleanupMonitor:
         except Exception:
             return None
 
-    def analyze_cleanup_needs(self, max_age_hours: int = 72) -> Dict[str, any]:
-        """Analiza qué recursos necesitan limpieza."""
-        resources = self.scan_ephemeral_resources()
+    def _collect_docker_stats(self, containers: List[Dict]) -> List[Dict]:
+        """Stats de todos los contenedores en ejecución en una sola llamada."""
+        names = [c["name"] for c in containers if "Up" in c.get("status", "")]
+        if not names:
+            return []
+
+        cmd = ["docker", "stats", "--no-stream", "--no-trunc", "--format", "{{json .}}"]
+        try:
+            with commands.stream(cmd + names) as lines:
+                return parse_stats_lines(lines)
+        except subprocess.CalledProcessError:
+            return []
+
+    def _collect_cgroup_stats(
+        self, cgroup_root: str = "/sys/fs/cgroup", sample_seconds: float = 0.5
+    ) -> List[Dict]:
+        """Stats leídos de cgroup v2 sin pasar por el daemon de Docker."""
+        cmd = [
+            "docker",
+            "ps",
+            "--no-trunc",
+            "--filter",
+            "label=environment=ephemeral",
+            "--format",
+            "{{.ID}}\t{{.Names}}",
+        ]
+        try:
+            result = commands.run(cmd, capture_output=True, text=True, check=True)
+        except subprocess.CalledProcessError:
+            return []
+
+        cgroup_dirs = {}
+        for line in result.stdout.splitlines():
+            parts = line.split("\t")
+            if len(parts) == 2:
+                cgroup_dir = find_cgroup_dir(parts[0], cgroup_root)
+                if cgroup_dir:
+                    cgroup_dirs[parts[1]] = cgroup_dir
+
+        def sample() -> Dict[str, Dict[str, int]]:
+            samples = {}
+            for name, cgroup_dir in cgroup_dirs.items():
+                values = read_cgroup_sample(cgroup_dir)
+                if values:
+                    samples[name] = values
+            return samples
+
+        first = sample()
+        start = time.monotonic()
+        time.sleep(sample_seconds)
+        second = sample()
+        return cgroup_stats(first, second, time.monotonic() - start)
+
+    @tracing.operation("usage")
+    def collect_resource_usage(
+        self, source: str = "stats", cgroup_root: str = "/sys/fs/cgroup"
+    ) -> Dict:
+        """
+        Obtiene CPU, memoria y disco agregados por PR.
+
+        Args:
+            source: `stats` (API de Docker) o `cgroup` (archivos cgroup v2)
+            cgroup_root: Raíz de cgroup v2 para `source="cgroup"`
+        """
+        containers = self._scan_containers()
+        if source == "cgroup":
+            stats = self._collect_cgroup_stats(cgroup_root)
+        else:
+            stats = self._collect_docker_stats(containers)
+
+        cmd = ["docker", "system", "df", "-v", "--format", "{{json .}}"]
+        try:
+            system_df = commands.run(cmd, capture_output=True, text=True, check=True).stdout
+        except subprocess.CalledProcessError:
+            # Sin `system df` (o con timeout) el uso de disco queda en 0
+            system_df = ""
+
+        usage = aggregate_by_pr(containers, stats, parse_system_df(system_df))
+        usage["source"] = source
+        return usage
+
+    def _collect_footprints(self) -> Dict[int, Dict[str, int]]:
+        """Memoria y disco por PR para el motor de desalojo."""
+        usage = self.collect_resource_usage()
+        return {
+            stack["pr_number"]: {
+                "memory_bytes": stack["memory_bytes"],
+                "disk_bytes": stack["disk_bytes"],
+            }
+            for stack in usage["stacks"]
+        }
+
+    def build_stack_profiles(
+        self,
+        resources: Dict[str, List[Dict]],
+        tracker: Optional[ActivityTracker] = None,
+        check_pr_state: bool = False,
+        footprints: Optional[Dict[int, Dict[str, int]]] = None,
+    ) -> List[Dict]:
+        """Agrupa los recursos por PR en perfiles para el motor de desalojo."""
+        now = datetime.now(timezone.utc)
+        profiles: Dict[int, Dict] = {}
+
+        for resource in (
+            resources["containers"] + resources["volumes"] + resources["networks"]
+        ):
+            pr_number = resource["pr_number"]
+            if pr_number is None:
+                continue
+            profile = profiles.setdefault(
+                pr_number,
+                {
+                    "pr_number": pr_number,
+                    "age_hours": None,
+                    "idle_hours": None,
+                    "pr_state": "UNKNOWN",
+                    "memory_bytes": 0,
+                    "disk_bytes": 0,
+                },
+            )
+            age = resource["age_hours"]
+            if age is not None and (profile["age_hours"] is None or age > profile["age_hours"]):
+                profile["age_hours"] = age
+
+        for pr_number, profile in profiles.items():
+            profile["idle_hours"] = profile["age_hours"]
+            last_request = tracker.last_request(pr_number) if tracker else None
+            if last_request is not None:
+                profile["idle_hours"] = (now - last_request).total_seconds() / 3600
+            if check_pr_state:
+                profile["pr_state"] = self.check_pr_status(pr_number) or "NOT_FOUND"
+            profile.update((footprints or {}).get(pr_number, {}))
+
+        return sorted(profiles.values(), key=lambda p: p["pr_number"])
+
+    @tracing.operation("analyze")
+    def analyze_cleanup_needs(
+        self,
+        max_age_hours: int = 72,
+        engine: Optional[EvictionEngine] = None,
+        tracker: Optional[ActivityTracker] = None,
+        check_pr_state: bool = False,
+        resources: Optional[Dict[str, List[Dict]]] = None,
+    ) -> Dict[str, any]:
+        """
+        Analiza qué recursos necesitan limpieza.
+
+        Sin `engine` aplica el umbral fijo de edad; con `engine` desaloja
+        stacks completos según sus políticas y presupuestos. `resources`
+        evita un segundo escaneo si el inventario ya está disponible.
+        """
+        if resources is None:
+            resources = self.scan_ephemeral_resources()
+
+        if engine is not None:
+            return self._with_host_breakdown(
+                resources,
+                self._analyze_with_engine(
+                    resources, engine, tracker, check_pr_state, max_age_hours
+                ),
+            )
 
         cleanup_candidates = {
             "containers": [],
@@ -205,6 +508,59 @@ class CleanupMonitor:
 
         cleanup_candidates["pr_numbers"] = list(cleanup_candidates["pr_numbers"])
 
+        return self._with_host_breakdown(
+            resources,
+            {
+                "total_resources": {
+                    "containers": len(resources["containers"]),
+                    "volumes": len(resources["volumes"]),
+                    "networks": len(resources["networks"]),
+                },
+                "cleanup_candidates": cleanup_candidates,
+                "analysis_time": self.current_time.isoformat(),
+                "max_age_hours": max_age_hours,
+            },
+        )
+
+    @staticmethod
+    def _with_host_breakdown(resources: Dict, analysis: Dict) -> Dict:
+        """Agrega al análisis de un inventario federado los candidatos por host."""
+        if "hosts" in resources:
+            breakdown = candidates_by_host(analysis["cleanup_candidates"], resources["hosts"])
+            for name, entry in breakdown.items():
+                entry["status"] = resources["hosts"].get(name, {}).get("status", "ok")
+            analysis["hosts"] = breakdown
+        return analysis
+
+    def _analyze_with_engine(
+        self,
+        resources: Dict[str, List[Dict]],
+        engine: EvictionEngine,
+        tracker: Optional[ActivityTracker],
+        check_pr_state: bool,
+        max_age_hours: int,
+    ) -> Dict[str, any]:
+        """Selecciona stacks completos a desalojar con el motor de políticas."""
+        footprints = (
+            self._collect_footprints()
+            if engine.memory_budget or engine.disk_budget
+            else None
+        )
+        profiles = self.build_stack_profiles(
+            resources, tracker, check_pr_state, footprints
+        )
+        eviction = engine.select(profiles)
+        doomed = set(eviction["evict"])
+        freed_memory, freed_disk = freed_capacity(profiles, eviction["evict"])
+        eviction["freed_memory_bytes"] = freed_memory
+        eviction["freed_disk_bytes"] = freed_disk
+
+        cleanup_candidates = {
+            kind: [r for r in resources[kind] if r["pr_number"] in doomed]
+            for kind in ("containers", "volumes", "networks")
+        }
+        cleanup_candidates["pr_numbers"] = eviction["evict"]
+
         return {
             "total_resources": {
                 "containers": len(resources["containers"]),
@@ -214,58 +570,143 @@ class CleanupMonitor:
             "cleanup_candidates": cleanup_candidates,
             "analysis_time": self.current_time.isoformat(),
             "max_age_hours": max_age_hours,
+            "eviction": eviction,
         }
 
-    def generate_cleanup_report(self, max_age_hours: int = 72) -> str:
-        """Genera reporte de análisis de limpieza."""
-        analysis = self.analyze_cleanup_needs(max_age_hours)
-
-        report = "# Reporte de Análisis de Limpieza\n\n"
-        report += f"**Fecha de análisis**: {analysis['analysis_time']}\n"
-        report += f"**Edad máxima permitida**: {max_age_hours} horas\n\n"
-        report += "## Resumen de Recursos\n\n"
-        report += f"- **Contenedores efímeros**: {analysis['total_resources']['containers']}\n"
-        report += (
-            f"- **Volúmenes efímeros**: {analysis['total_resources']['volumes']}\n"
+    def write_cleanup_report(
+        self,
+        out,
+        max_age_hours: int = 72,
+        resources: Optional[Dict[str, List[Dict]]] = None,
+        fmt: str = "markdown",
+    ) -> Dict:
+        """Escribe el reporte de limpieza en `out` (archivo o stdout) en streaming."""
+        if resources is None:
+            resources = self.scan_ephemeral_resources()
+        return write_report(
+            out, resources, max_age_hours, fmt, self.current_time.isoformat()
         )
-        report += f"- **Redes efímeras**: {analysis['total_resources']['networks']}\n\n"
-        report += "## Candidatos para Limpieza\n\n"
-        num_containers = len(analysis["cleanup_candidates"]["containers"])
-        report += f"- **Contenedores antiguos**: {num_containers}\n"
-        num_volumes = len(analysis["cleanup_candidates"]["volumes"])
-        report += f"- **Volúmenes antiguos**: {num_volumes}\n"
-        num_networks = len(analysis["cleanup_candidates"]["networks"])
-        report += f"- **Redes antigas**: {num_networks}\n"
-        num_prs = len(analysis["cleanup_candidates"]["pr_numbers"])
-        report += f"- **PRs afectados**: {num_prs}\n\n"
-
-        if analysis["cleanup_candidates"]["pr_numbers"]:
-            report += "### PRs con Recursos Antiguos\n\n"
-            for pr_num in sorted(analysis["cleanup_candidates"]["pr_numbers"]):
-                report += f"- PR #{pr_num}\n"
-            report += "\n"
-
-        if analysis["cleanup_candidates"]["containers"]:
-            report += "### Contenedores para Limpiar\n\n"
-            report += "| Nombre | Estado | Edad (h) | PR |\n"
-            report += "|--------|---------|----------|----|\n"
-            for container in analysis["cleanup_candidates"]["containers"]:
-                age = (
-                    f"{container['age_hours']: .1f}"
-                    if container["age_hours"]
-                    else "N/A"
-                )
-                pr = f"#{container['pr_number']}" if container["pr_number"] else "N/A"
-                report += (
-                    f"| {container['name']} | {container['status']} | {age} | {pr} |\n"
-                )
-            report += "\n"
 
-        if not analysis["cleanup_candidates"]["pr_numbers"]:
-            report += "  **No se encontraron recursos que requieran limpieza.**\n"
+    def generate_cleanup_report(
+        self,
+        max_age_hours: int = 72,
+        resources: Optional[Dict[str, List[Dict]]] = None,
+        fmt: str = "markdown",
+    ) -> str:
+        """Genera reporte de análisis de limpieza."""
+        buffer = io.StringIO()
+        self.write_cleanup_report(buffer, max_age_hours, resources, fmt)
+        return buffer.getvalue()
+
+    @tracing.operation("teardown")
+    def teardown(
+        self,
+        pr_numbers: List[int],
+        resources: Optional[Dict[str, List[Dict]]] = None,
+        dry_run: bool = False,
+        batch_size: int = 100,
+        retries: int = 2,
+    ) -> Dict:
+        """
+        Elimina los recursos de varios PRs con un único plan por capas.
 
+        Todos los contenedores se eliminan en lotes antes que los volúmenes y
+        las redes; solo se reintentan los recursos que fallaron.
+        """
+        if resources is None:
+            resources = self.scan_ephemeral_resources()
+        if self.hosts:
+            return self._teardown_hosts(pr_numbers, resources, dry_run, batch_size, retries)
+        plan = TeardownPlan.from_resources(resources, pr_numbers)
+
+        if dry_run:
+            return {
+                "pr_numbers": sorted(pr_numbers),
+                "layers": [
+                    {"kind": kind, "items": len(names), "names": names}
+                    for kind, names in plan.layers()
+                ],
+            }
+
+        remover = APIRemover(self.api) if self.api is not None else CLIRemover()
+        report = execute_plan(plan, remover, batch_size, retries)
+        report["pr_numbers"] = sorted(pr_numbers)
         return report
 
+    def _teardown_hosts(
+        self,
+        pr_numbers: List[int],
+        resources: Dict,
+        dry_run: bool,
+        batch_size: int,
+        retries: int,
+    ) -> Dict:
+        """
+        Un plan por host, ejecutados en paralelo; el reporte suma los de cada host.
+
+        Los recursos fallidos u omitidos se identifican como `host/nombre`;
+        el reporte de cada host queda además en `hosts`.
+        """
+        start = time.monotonic()
+        per_host = {
+            name: split
+            for name, split in split_by_host(resources).items()
+            if name in self.hosts and len(TeardownPlan.from_resources(split, pr_numbers))
+        }
+        with ThreadPoolExecutor(max_workers=max(len(per_host), 1)) as pool:
+            futures = {
+                name: pool.submit(
+                    self.hosts[name].teardown,
+                    pr_numbers, split, dry_run, batch_size, retries,
+                )
+                for name, split in per_host.items()
+            }
+            reports = {name: future.result() for name, future in futures.items()}
+
+        layers: Dict[str, Dict] = {}
+        for report in reports.values():
+            for layer in report["layers"]:
+                merged = layers.setdefault(layer["kind"], {"kind": layer["kind"], "items": 0})
+                for key, value in layer.items():
+                    if key == "names":
+                        merged.setdefault("names", []).extend(value)
+                    elif key == "attempts":
+                        merged["attempts"] = max(merged.get("attempts", 0), value)
+                    elif key != "kind":
+                        merged[key] = merged.get(key, 0) + value
+        kinds = ("containers", "volumes", "networks")
+        combined = {
+            "pr_numbers": sorted(pr_numbers),
+            "layers": [layers[kind] for kind in kinds if kind in layers],
+            "hosts": reports,
+        }
+        if dry_run:
+            return combined
+
+        elapsed = time.monotonic() - start
+        removed = {kind: sum(r["removed"][kind] for r in reports.values()) for kind in kinds}
+        host_commands = [r["commands"] for r in reports.values() if r.get("commands") is not None]
+        combined.update(
+            {
+                "removed": removed,
+                "failed": {
+                    f"{host}/{name}": error
+                    for host, r in reports.items()
+                    for name, error in r["failed"].items()
+                },
+                "blocked": [
+                    f"{host}/{name}" for host, r in reports.items() for name in r["blocked"]
+                ],
+                "commands": sum(host_commands) if host_commands else None,
+                "elapsed_seconds": round(elapsed, 3),
+                "items_per_second": (
+                    round(sum(removed.values()) / elapsed, 1) if elapsed > 0 else 0.0
+                ),
+            }
+        )
+        return combined
+
+    @tracing.operation("check_pr_status")
     def check_pr_status(self, pr_number: int) -> str:
         """Verifica estado de PR usando GitHub CLI."""
         try:
@@ -279,16 +720,20 @@ class CleanupMonitor:
                 "--jq",
                 ".state",
             ]
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            return result.stdout.strip() if result.returncode == 0 else "UNKNOWN"
+            result = commands.run(cmd, capture_output=True, text=True, check=True)
+            return result.stdout.strip()
         except subprocess.CalledProcessError:
             return "UNKNOWN"
 
-    def get_resource_summary(self) -> Dict[str, int]:
-        """Obtiene resumen rápido de recursos."""
-        resources = self.scan_ephemeral_resources()
+    @tracing.operation("summary")
+    def get_resource_summary(
+        self, resources: Optional[Dict[str, List[Dict]]] = None
+    ) -> Dict[str, int]:
+        """Obtiene resumen rápido de recursos (con desglose por host si está federado)."""
+        if resources is None:
+            resources = self.scan_ephemeral_resources()
 
-        return {
+        summary = {
             "total_containers": len(resources["containers"]),
             "running_containers": len(
                 [c for c in resources["containers"] if "Up" in c["status"]]
@@ -305,6 +750,243 @@ class CleanupMonitor:
                 )
             ),
         }
+        if "hosts" in resources:
+            summary["hosts"] = {
+                name: {
+                    **self.get_resource_summary(split),
+                    "status": resources["hosts"].get(name, {}).get("status", "ok"),
+                    "error": resources["hosts"].get(name, {}).get("error"),
+                }
+                for name, split in split_by_host(resources).items()
+            }
+        return summary
+
+    def collect_stack_activity(
+        self,
+        tracker: ActivityTracker,
+        containers: Optional[List[Dict]] = None,
+        access_log: Optional[str] = None,
+    ) -> int:
+        """Actualiza la última petición por stack desde los access logs."""
+        if containers is None:
+            containers = self._scan_containers()
+
+        recorded = 0
+        for container in containers:
+            pr_number = container["pr_number"]
+            if pr_number is None or not container["name"].endswith("-proxy"):
+                continue
+
+            # Solo leer lo nuevo desde la última petición conocida
+            cmd = ["docker", "logs", "--timestamps"]
+            last_request = tracker.last_request(pr_number)
+            if last_request is not None:
+                cmd += ["--since", last_request.strftime("%Y-%m-%dT%H:%M:%SZ")]
+            cmd.append(container["name"])
+
+            try:
+                result = commands.run(cmd, capture_output=True, text=True, check=True)
+            except subprocess.CalledProcessError:
+                continue
+            recorded += tracker.ingest_log_lines(result.stdout.splitlines(), pr_number)
+
+        # Log del ingress compartido: el PR se deduce de cada línea
+        if access_log:
+            try:
+                with open(access_log, "r") as f:
+                    recorded += tracker.ingest_log_lines(f)
+            except OSError:
+                pass
+
+        return recorded
+
+    @staticmethod
+    def _succeeds(cmd: List[str]) -> bool:
+        """True si el comando terminó con código 0 (un timeout cuenta como fallo)."""
+        try:
+            return commands.run(cmd, capture_output=True, text=True).returncode == 0
+        except subprocess.CalledProcessError:
+            return False
+
+    @tracing.operation("hibernate")
+    def apply_hibernation(
+        self,
+        policy: HibernationPolicy,
+        tracker: ActivityTracker,
+        dry_run: bool = False,
+        access_log: Optional[str] = None,
+    ) -> Dict[str, List[int]]:
+        """Hiberna stacks inactivos y despierta los que recibieron peticiones."""
+        now = datetime.now(timezone.utc)
+        containers = self._scan_containers()
+
+        stacks = {}
+        for container in containers:
+            pr_number = container["pr_number"]
+            if pr_number is None:
+                continue
+            # Sin fecha de creación el stack se considera recién creado
+            age_hours = container["age_hours"] or 0
+            created = now - timedelta(hours=age_hours)
+            stacks[pr_number] = min(stacks.get(pr_number, created), created)
+
+        # Olvidar stacks que ya fueron destruidos
+        tracker.forget(
+            [int(pr) for pr in list(tracker.stacks) if int(pr) not in stacks]
+        )
+
+        self.collect_stack_activity(tracker, containers, access_log)
+        plan = policy.plan(stacks, tracker, now)
+        plan["failed"] = []
+
+        if not dry_run:
+            for pr_number in plan["wake"]:
+                mode = tracker.hibernation_mode(pr_number) or policy.mode
+                cmd = policy.wake_command(pr_number, mode)
+                if self._succeeds(cmd):
+                    tracker.mark_awake(pr_number)
+                else:
+                    plan["failed"].append(pr_number)
+
+            for pr_number in plan["hibernate"]:
+                cmd = policy.hibernate_command(pr_number)
+                if self._succeeds(cmd):
+                    tracker.mark_hibernated(pr_number, now, policy.mode)
+                else:
+                    plan["failed"].append(pr_number)
+
+            tracker.save()
+
+        return plan
+
+
+def run_hibernation(monitor: CleanupMonitor, args) -> Dict[str, List[int]]:
+    """Ejecuta una pasada de hibernación y muestra el resultado."""
+    policy = HibernationPolicy(args.idle_minutes, args.hibernate_mode)
+    tracker = ActivityTracker(args.activity_file)
+    plan = monitor.apply_hibernation(policy, tracker, args.dry_run, args.access_log)
+
+    if args.json:
+        print(json.dumps(plan, indent=2))
+    else:
+        prefix = "[DRY-RUN] " if args.dry_run else ""
+        print(f"{prefix}Stacks hibernados: {len(plan['hibernate'])}")
+        print(f"{prefix}Stacks despertados: {len(plan['wake'])}")
+        for pr_num in plan["hibernate"]:
+            print(f"  - PR #{pr_num} -> {args.hibernate_mode}")
+        for pr_num in plan["wake"]:
+            print(f"  + PR #{pr_num} despierto")
+        for pr_num in plan["failed"]:
+            print(f"  ! PR #{pr_num} falló la transición")
+
+    return plan
+
+
+def run_teardown(monitor: CleanupMonitor, args) -> Dict:
+    """Ejecuta el teardown por lotes de los PRs indicados o de los candidatos."""
+    if args.prs:
+        pr_numbers = [int(pr) for pr in args.prs.split(",") if pr.strip()]
+        resources = None
+    else:
+        resources = monitor.scan_ephemeral_resources()
+        analysis = monitor.analyze_cleanup_needs(args.max_age, resources=resources)
+        pr_numbers = analysis["cleanup_candidates"]["pr_numbers"]
+
+    report = monitor.teardown(
+        pr_numbers, resources, args.dry_run, args.batch_size, args.retries
+    )
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    elif args.dry_run:
+        print(f"[DRY-RUN] Plan de teardown para {len(pr_numbers)} PRs:")
+        for layer in report["layers"]:
+            print(f"  {layer['kind']}: {layer['items']}")
+    else:
+        removed = report["removed"]
+        print(f"Teardown de {len(pr_numbers)} PRs en {report['elapsed_seconds']}s")
+        print(
+            f"  Eliminados: {removed['containers']} contenedores, "
+            f"{removed['volumes']} volúmenes, {removed['networks']} redes"
+        )
+        print(f"  Throughput: {report['items_per_second']} recursos/s")
+        for name, error in report["failed"].items():
+            print(f"  ! {name}: {error}")
+        if report["blocked"]:
+            print(f"  Omitidos por dependencias fallidas: {len(report['blocked'])}")
+
+    return report
+
+
+def run_find(monitor: CleanupMonitor, args, use_daemon: bool) -> None:
+    """Consulta el índice de recursos: filtros de --find o stacks sin --missing."""
+    if args.missing:
+        queries = [{"component": args.missing}]
+        method = "missing"
+    else:
+        params = {
+            "kind": args.kind,
+            "component": args.component,
+            "older_than": args.older_than,
+        }
+        # Una consulta por PR: el índice por PR es el más selectivo
+        pr_numbers = [int(pr) for pr in (args.prs or "").split(",") if pr.strip()]
+        queries = [dict(params, pr_number=pr) for pr in pr_numbers] or [params]
+        method = "find"
+
+    results = []
+    for query in queries if use_daemon else []:
+        results.append(query_daemon(args, method, **query))
+        if results[-1] is None:
+            break
+    if not results or results[-1] is None:
+        index = monitor.build_index()
+        search = index.missing if args.missing else index.find
+        results = [search(**q) for q in queries]
+    result = [item for r in results for item in r]
+
+    if args.json:
+        print(json.dumps(result, indent=2, default=str))
+    elif args.missing:
+        print(f"Stacks sin {args.missing}: {len(result)}")
+        for pr_number in result:
+            print(f"  - PR #{pr_number}")
+    else:
+        print(f"Recursos encontrados: {len(result)}")
+        for resource in result:
+            age = resource.get("age_hours")
+            print(
+                f"  {resource['name']:<40} {resource.get('component') or '-':<8} "
+                f"{f'{age:.1f}h' if age is not None else 'edad desconocida':>8}"
+                f"{'  [' + resource['host'] + ']' if resource.get('host') else ''}"
+            )
+
+
+def query_daemon(args, method: str, **params):
+    """Consulta al daemon residente; None si no responde (se escanea localmente)."""
+    try:
+        return MonitorClient(args.socket).call(method, **params)
+    except MonitorDaemonError as e:
+        print(f"Aviso: {e}; se escanea localmente", file=sys.stderr)
+        return None
+
+
+def run_daemon(args) -> None:
+    """Sirve consultas desde un inventario caliente hasta recibir SIGINT/SIGTERM."""
+    daemon = MonitorDaemon(
+        CleanupMonitor(args.docker_host, args.docker_hosts), args.socket, args.scan_interval
+    )
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    with daemon:
+        print(
+            f"Daemon del monitor en {args.socket} "
+            f"(escaneo cada {args.scan_interval}s, {daemon.status()['last_scan_seconds']}s/escaneo)"
+        )
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
 
 
 def main():
@@ -324,44 +1006,274 @@ def main():
         "--summary", action="store_true", help="Mostrar resumen de recursos"
     )
     parser.add_argument("--json", action="store_true", help="Salida en formato JSON")
+    parser.add_argument(
+        "--report-format",
+        choices=sorted(RENDERERS),
+        default="markdown",
+        help="Formato de --report",
+    )
+    parser.add_argument("--output", help="Escribir --report en este archivo (default: stdout)")
+    parser.add_argument(
+        "--hibernate",
+        action="store_true",
+        help="Hibernar stacks inactivos y despertar los que recibieron peticiones",
+    )
+    parser.add_argument(
+        "--idle-minutes",
+        type=int,
+        default=30,
+        help="Minutos sin peticiones antes de hibernar un stack",
+    )
+    parser.add_argument(
+        "--hibernate-mode",
+        choices=["stop", "pause"],
+        default="stop",
+        help="stop libera memoria; pause solo congela CPU",
+    )
+    parser.add_argument(
+        "--activity-file",
+        default="metrics/hibernation.json",
+        help="Archivo de estado de actividad/hibernación",
+    )
+    parser.add_argument(
+        "--access-log", help="Access log del ingress compartido (opcional)"
+    )
+    parser.add_argument(
+        "--watch",
+        type=int,
+        metavar="SECONDS",
+        help="Repetir la hibernación cada N segundos",
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Solo mostrar transiciones"
+    )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="Usar el motor de políticas de desalojo en lugar de la edad fija",
+    )
+    parser.add_argument(
+        "--memory-budget", help="Presupuesto de memoria de la flota (ej: 8GiB)"
+    )
+    parser.add_argument(
+        "--disk-budget", help="Presupuesto de disco de la flota (ej: 50GiB)"
+    )
+    parser.add_argument(
+        "--policy-weights",
+        help="Pesos de políticas, ej: lru=1,pr_state=2,footprint=1,age=0.5",
+    )
+    parser.add_argument(
+        "--usage",
+        action="store_true",
+        help="Mostrar CPU, memoria y disco por stack",
+    )
+    parser.add_argument(
+        "--usage-source",
+        choices=["stats", "cgroup"],
+        default="stats",
+        help="Origen de las métricas de uso",
+    )
+    parser.add_argument(
+        "--usage-output",
+        help="Guardar snapshot de uso en JSON (para el dashboard)",
+    )
+    parser.add_argument(
+        "--usage-history",
+        help="Agregar muestras por componente a un historial NDJSON (right-sizing)",
+    )
+    parser.add_argument(
+        "--teardown",
+        action="store_true",
+        help="Eliminar en lotes los recursos de los PRs candidatos (o de --prs)",
+    )
+    parser.add_argument("--prs", help="PRs a eliminar con --teardown, ej: 12,15,20")
+    parser.add_argument(
+        "--batch-size", type=int, default=100, help="Recursos por comando de borrado"
+    )
+    parser.add_argument(
+        "--retries", type=int, default=2, help="Reintentos de los recursos fallidos"
+    )
+    parser.add_argument(
+        "--docker-host",
+        help="Daemon de Docker (unix://...); el inventario se lee por la Engine API",
+    )
+    parser.add_argument(
+        "--docker-hosts",
+        default=os.environ.get(HOSTS_ENV, ""),
+        help=(
+            "Inventario federado: lista nombre=unix:///ruta separada por comas, "
+            f"escaneada en paralelo (default: ${HOSTS_ENV})"
+        ),
+    )
+    parser.add_argument(
+        "--find",
+        action="store_true",
+        help="Buscar recursos en el índice por --component, --older-than y --prs",
+    )
+    parser.add_argument(
+        "--kind",
+        choices=["containers", "volumes", "networks"],
+        default="containers",
+        help="Tipo de recurso para --find",
+    )
+    parser.add_argument("--component", help="Componente para --find (app, db, proxy)")
+    parser.add_argument(
+        "--older-than", type=float, metavar="HOURS", help="Edad mínima en horas para --find"
+    )
+    parser.add_argument(
+        "--missing", metavar="COMPONENT", help="Listar stacks sin contenedor de ese componente"
+    )
+    parser.add_argument(
+        "--check-pr-state",
+        action="store_true",
+        help="Consultar el estado de cada PR con GitHub CLI",
+    )
+
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Daemon residente: inventario caliente servido por un socket unix",
+    )
+    parser.add_argument(
+        "--socket",
+        help=f"Socket del daemon; --summary/--report/análisis lo consultan (ej: {DEFAULT_SOCKET})",
+    )
+    parser.add_argument(
+        "--scan-interval", type=float, default=30, help="Segundos entre escaneos del daemon"
+    )
+
+    tracing.add_arguments(parser)
 
     args = parser.parse_args()
+    tracing.start(args.trace, args.trace_format, "cleanup-monitor")
+    try:
+        args.docker_hosts = parse_hosts(args.docker_hosts)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.docker_hosts and (args.hibernate or args.usage):
+        # Hibernación y uso leen el CLI y los cgroups locales
+        parser.error("--hibernate y --usage no soportan --docker-hosts (solo el host local)")
+
+    if args.daemon:
+        args.socket = args.socket or DEFAULT_SOCKET
+    # Las consultas al daemon solo aplican al análisis por edad sin GitHub CLI
+    use_daemon = bool(args.socket) and not args.daemon
+
+    if args.docker_host:
+        # Los comandos del CLI (stats, logs, stop) apuntan al mismo daemon
+        os.environ["DOCKER_HOST"] = args.docker_host
+    monitor = CleanupMonitor(args.docker_host, args.docker_hosts)
+
+    if args.daemon:
+        try:
+            run_daemon(args)
+        except MonitorDaemonError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    elif args.hibernate:
+        run_hibernation(monitor, args)
+        while args.watch:
+            time.sleep(args.watch)
+            run_hibernation(CleanupMonitor(), args)
 
-    monitor = CleanupMonitor()
+    elif args.teardown:
+        report = run_teardown(monitor, args)
+        if report.get("failed"):
+            sys.exit(1)
 
-    if args.summary:
-        summary = monitor.get_resource_summary()
+    elif args.usage:
+        usage = monitor.collect_resource_usage(args.usage_source)
+        if args.usage_output:
+            output_dir = os.path.dirname(args.usage_output)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+            with open(args.usage_output, "w") as f:
+                json.dump(usage, f, indent=2)
+        if args.usage_history:
+            append_samples(args.usage_history, usage_samples(usage))
+
+        if args.json:
+            print(json.dumps(usage, indent=2))
+        else:
+            print(f"{'PR':>6} {'Cont.':>5} {'CPU %':>7} {'Memoria':>10} {'Disco':>10}")
+            for stack in usage["stacks"]:
+                print(
+                    f"{'#' + str(stack['pr_number']):>6} {stack['containers']:>5} "
+                    f"{stack['cpu_percent']:>7.2f} {format_size(stack['memory_bytes']):>10} "
+                    f"{format_size(stack['disk_bytes']):>10}"
+                )
+            totals = usage["totals"]
+            print(
+                f"Total: {totals['cpu_percent']:.2f}% CPU, "
+                f"{format_size(totals['memory_bytes'])} RAM, "
+                f"{format_size(totals['disk_bytes'])} disco"
+            )
+
+    elif args.find or args.missing:
+        run_find(monitor, args, use_daemon)
+
+    elif args.summary:
+        summary = query_daemon(args, "summary") if use_daemon else None
+        if summary is None:
+            summary = monitor.get_resource_summary()
         if args.json:
             print(json.dumps(summary, indent=2))
         else:
-            total = summary["total_containers"]
-            running = summary["running_containers"]
-            print(f"Contenedores: {total} (ejecutándose: {running})")
-            print(f"Volúmenes: {summary['total_volumes']}")
-            print(f"Redes: {summary['total_networks']}")
-            print(f"PRs únicos: {summary['unique_prs']}")
+            print(format_summary(summary))
 
     elif args.report:
-        report = monitor.generate_cleanup_report(args.max_age)
-        print(report)
+        report = None
+        if use_daemon:
+            report = query_daemon(
+                args, "report", max_age_hours=args.max_age, fmt=args.report_format
+            )
+        out = open(args.output, "w") if args.output else sys.stdout
+        try:
+            if report is not None:
+                out.write(report)
+            else:
+                monitor.write_cleanup_report(out, args.max_age, fmt=args.report_format)
+        finally:
+            if args.output:
+                out.close()
 
     else:
-        analysis = monitor.analyze_cleanup_needs(args.max_age)
+        engine = None
+        tracker = None
+        if args.adaptive or args.memory_budget or args.disk_budget:
+            engine = EvictionEngine(
+                weights=parse_weights(args.policy_weights) if args.policy_weights else None,
+                memory_budget=parse_size(args.memory_budget) if args.memory_budget else None,
+                disk_budget=parse_size(args.disk_budget) if args.disk_budget else None,
+                max_age_hours=args.max_age,
+            )
+            tracker = ActivityTracker(args.activity_file)
+
+        analysis = None
+        if use_daemon and engine is None and not args.check_pr_state:
+            analysis = query_daemon(args, "analysis", max_age_hours=args.max_age)
+        if analysis is None:
+            analysis = monitor.analyze_cleanup_needs(
+                args.max_age, engine, tracker, args.check_pr_state
+            )
         if args.json:
             print(json.dumps(analysis, indent=2, default=str))
         else:
-            candidates = analysis["cleanup_candidates"]
-            max_age = args.max_age
-            print(f"Recursos que requieren limpieza (>{max_age}h)")
-            print(f"  Contenedores: {len(candidates['containers'])}")
-            print(f"  Volúmenes: {len(candidates['volumes'])}")
-            print(f"  Redes: {len(candidates['networks'])}")
-            print(f"  PRs afectados: {len(candidates['pr_numbers'])}")
-
-            if candidates["pr_numbers"]:
+            print(format_analysis(analysis))
+
+            eviction = analysis.get("eviction")
+            if eviction:
+                print(
+                    f"  Presión: {eviction['pressure_before']:.2f} -> "
+                    f"{eviction['pressure_after']:.2f}"
+                )
                 print(
-                    f"  PRs: {', '.join(f'#{pr}' for pr in sorted(candidates['pr_numbers']))}"
+                    f"  Liberado: {format_size(eviction['freed_memory_bytes'])} RAM, "
+                    f"{format_size(eviction['freed_disk_bytes'])} disco"
                 )
+                for pr_num in eviction["evict"]:
+                    print(f"    PR #{pr_num}: {eviction['reasons'][pr_num]}")
 
 
 if __name__ == "__main__":
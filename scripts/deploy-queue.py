@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Cola de despliegues de PRs delante de TerraformProvisioner.
+
+`serve` atiende la cola por un socket unix; `submit`, `metrics` y `history`
+son clientes ligeros (una petición JSON por consulta).
+"""
+
+import argparse
+import json
+import os
+import signal
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.deploy_queue import DEFAULT_QUEUE_SOCKET, DeployQueue, DeployQueueDaemon  # noqa: E402
+from src.federation import HOSTS_ENV, parse_hosts  # noqa: E402
+from src.monitor_daemon import MonitorClient, MonitorDaemonError  # noqa: E402
+from src.placement import PlacementScheduler  # noqa: E402
+from src.provisioner import TerraformProvisioner, parse_var  # noqa: E402
+
+
+def format_metrics(metrics: dict) -> str:
+    """Resumen legible de `DeployQueue.metrics()`."""
+    counters, running = metrics["counters"], metrics["running"]
+    prs = f" (PRs: {', '.join(f'#{pr}' for pr in running)})" if running else ""
+    lines = [
+        f"En espera: {metrics['depth']} "
+        f"(espera más antigua: {metrics['oldest_wait_seconds']:.1f}s)",
+        f"Ejecutando: {len(running)}/{metrics['max_concurrent']}{prs}",
+        f"Peticiones: {counters['submitted']} (coalescidas: {counters['coalesced']}, "
+        f"rechazadas: {counters['rejected']})",
+        f"Completados: {counters['completed']} (fallidos: {counters['failed']})",
+    ]
+    for action, wait in metrics["wait_seconds"].items():
+        if wait["count"]:
+            lines.append(
+                f"Espera {action}: p50 {wait['p50']:.1f}s, p95 {wait['p95']:.1f}s, "
+                f"p99 {wait['p99']:.1f}s ({wait['count']})"
+            )
+    return "\n".join(lines)
+
+
+def serve(args) -> None:
+    hosts = parse_hosts(args.docker_hosts)
+    scheduler = PlacementScheduler(hosts) if hosts else None
+
+    def provisioner_for(pr: int) -> TerraformProvisioner:
+        # Un workspace (state) por PR: un apply no toca los stacks de otros PRs
+        return TerraformProvisioner(
+            args.dir, mirror_dir=args.mirror, scheduler=scheduler, workspace=f"pr-{pr}"
+        )
+
+    queue = DeployQueue.for_provisioner(
+        provisioner_for,
+        max_concurrent=args.max_concurrent,
+        debounce=args.debounce,
+        max_pending=args.max_pending,
+    )
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    with DeployQueueDaemon(queue, args.socket):
+        print(
+            f"Cola de despliegues en {args.socket} (máx. {args.max_concurrent} "
+            f"concurrentes, debounce {args.debounce}s)"
+        )
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cola de despliegues de PRs")
+    parser.add_argument("command", choices=["serve", "submit", "metrics", "history"])
+    parser.add_argument("--socket", default=DEFAULT_QUEUE_SOCKET, help="Socket de la cola")
+    parser.add_argument("--pr", type=int, help="Número de PR (submit)")
+    parser.add_argument(
+        "--action", choices=["deploy", "destroy"], default="deploy", help="Acción (submit)"
+    )
+    parser.add_argument(
+        "--var", type=parse_var, action="append", default=[], help="Variable nombre=valor"
+    )
+    parser.add_argument(
+        "--dir", default="infra/terraform/stacks/pr-preview", help="Directorio del stack"
+    )
+    parser.add_argument("--mirror", help="Mirror local de providers (filesystem_mirror)")
+    parser.add_argument(
+        "--docker-hosts",
+        default=os.environ.get(HOSTS_ENV, ""),
+        help=f"Hosts para el placement de stacks nuevos (default: ${HOSTS_ENV})",
+    )
+    parser.add_argument(
+        "--max-concurrent",
+        type=int,
+        default=1,
+        help="Applies simultáneos (cada PR usa su propio workspace)",
+    )
+    parser.add_argument(
+        "--debounce", type=float, default=10, help="Segundos sin pushes antes de desplegar"
+    )
+    parser.add_argument(
+        "--max-pending", type=int, default=50, help="PRs en espera antes de rechazar deploys"
+    )
+    parser.add_argument("--timeout", type=float, default=5, help="Timeout en segundos")
+    parser.add_argument("--json", action="store_true", help="Salida en formato JSON")
+
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        try:
+            serve(args)
+        except (MonitorDaemonError, ValueError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        return
+
+    if args.command == "submit" and args.pr is None:
+        parser.error("submit requiere --pr")
+    params = (
+        {"pr_number": args.pr, "action": args.action, "variables": dict(args.var)}
+        if args.command == "submit"
+        else {}
+    )
+    try:
+        result = MonitorClient(args.socket, args.timeout).call(args.command, **params)
+    except MonitorDaemonError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.json or args.command == "history":
+        print(json.dumps(result, indent=2, default=str))
+    elif args.command == "metrics":
+        print(format_metrics(result))
+    else:
+        print(
+            f"PR #{result['pr_number']} ({result['action']}): {result['status']}, "
+            f"{result['depth']} en espera"
+        )
+        if result["status"] == "rejected":
+            sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Daemon falso de la Docker Engine API para pruebas de carga sin Docker.
+Simula miles de contenedores, volúmenes y redes efímeras etiquetadas en un
+socket unix, con latencia y fallos configurables.
+
+Uso:
+    python3 scripts/fake-docker-daemon.py --socket /tmp/fake-docker.sock --resources 5000
+    DOCKER_HOST=unix:///tmp/fake-docker.sock docker ps
+    python3 scripts/cleanup-monitor.py --docker-host unix:///tmp/fake-docker.sock --summary
+"""
+
+import argparse
+import signal
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.fake_docker import FakeDockerDaemon  # noqa: E402
+from src.synthetic import synthetic_fleet  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Daemon falso de la Docker Engine API")
+    parser.add_argument("--socket", default="/tmp/fake-docker.sock", help="Socket unix")
+    parser.add_argument(
+        "--resources", type=int, default=1000, help="Recursos efímeros a simular"
+    )
+    parser.add_argument(
+        "--max-age", type=float, default=240, help="Edad máxima de los stacks (horas)"
+    )
+    parser.add_argument(
+        "--latency-ms", type=float, default=0, help="Latencia fija por petición"
+    )
+    parser.add_argument(
+        "--jitter-ms", type=float, default=0, help="Latencia aleatoria adicional"
+    )
+    parser.add_argument(
+        "--failure-rate",
+        type=float,
+        default=0,
+        help="Probabilidad de responder 500 (0-1)",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Semilla de la simulación")
+
+    args = parser.parse_args()
+
+    if not 0 <= args.failure_rate <= 1:
+        parser.error("--failure-rate debe estar entre 0 y 1")
+
+    daemon = FakeDockerDaemon(
+        args.socket,
+        synthetic_fleet(args.resources, max_age_hours=args.max_age, seed=args.seed),
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        failure_rate=args.failure_rate,
+        seed=args.seed,
+    )
+    daemon.start()
+    print(
+        f"Daemon falso en {daemon.docker_host}: {len(daemon.containers)} contenedores, "
+        f"{len(daemon.volumes)} volúmenes, {len(daemon.networks)} redes"
+    )
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    try:
+        stop.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.stop()
+        total = sum(daemon.requests.values())
+        print(f"Peticiones atendidas: {total} (fallos inyectados: {daemon.failures_injected})")
+
+
+if __name__ == "__main__":
+    main()
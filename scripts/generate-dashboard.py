@@ -4,6 +4,7 @@ Generador de dashboard de trends para métricas de IaC.
 Crea visualizaciones y reportes de tendencias de provisionado.
 """
 
+import html
 import json
 import os
 import sys
@@ -11,36 +12,284 @@ import argparse
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.dashboard_shards import ShardWriter, day_key  # noqa: E402
+from src.metrics_archive import DEFAULT_ARCHIVE_DIR, KINDS, load_metrics  # noqa: E402
+from src.metrics_store import MetricsStore  # noqa: E402
+from src.latency_sketches import DailySketches  # noqa: E402
+from src.quantile_sketch import DDSketch  # noqa: E402
+from src.regression import RegressionMonitor  # noqa: E402
+from src.units import format_size  # noqa: E402
+
+# Historial paginado por mes: el shell descarga `index.json` y luego solo el
+# shard del mes o del día que se está mirando.
+HISTORY_SCRIPT = """
+<script>
+(function () {
+    const section = document.getElementById("history");
+    const base = section.dataset.url.replace(/\\/$/, "");
+    const cache = {};
+    let months = [];
+    let page = 0;
+
+    function load(name) {
+        if (!cache[name]) {
+            cache[name] = fetch(base + "/" + name).then(function (r) {
+                if (!r.ok) { throw new Error(name + ": HTTP " + r.status); }
+                return r.json();
+            });
+        }
+        return cache[name];
+    }
+
+    function cell(row, value, cls) {
+        const td = row.insertCell();
+        td.textContent = value === null || value === undefined ? "-" : value;
+        if (cls) { td.className = cls; }
+        return td;
+    }
+
+    function table(target, headers) {
+        target.replaceChildren();
+        const t = document.createElement("table");
+        const head = t.insertRow();
+        headers.forEach(function (h) {
+            const th = document.createElement("th");
+            th.textContent = h;
+            head.appendChild(th);
+        });
+        target.appendChild(t);
+        return t;
+    }
+
+    function showDay(date) {
+        const target = document.getElementById("history-day");
+        target.textContent = "Cargando " + date + "...";
+        load("days/" + date + ".json").then(function (day) {
+            const t = table(target, ["Hora", "Evento", "PR", "Duración (s)", "Estado"]);
+            day.operations.concat(day.drift_checks)
+                .sort(function (a, b) { return a.timestamp < b.timestamp ? -1 : 1; })
+                .forEach(function (e) {
+                    const row = t.insertRow();
+                    cell(row, e.timestamp.slice(11, 19));
+                    cell(row, e.operation || ("drift " + e.drift_percent + "%"));
+                    cell(row, e.pr_number ? "#" + e.pr_number : null);
+                    cell(row, e.duration_seconds);
+                    cell(row, e.status, e.status === "failed" ? "error" : "");
+                });
+            const caption = t.createCaption();
+            caption.textContent = "Eventos del " + date;
+        }).catch(function (err) { target.textContent = err.message; });
+    }
+
+    function showMonth() {
+        const info = months[page];
+        document.getElementById("history-month").textContent =
+            info.month + " (" + info.operations + " operaciones, " +
+            info.drift_checks + " verificaciones de drift)";
+        document.getElementById("history-prev").disabled = page >= months.length - 1;
+        document.getElementById("history-next").disabled = page === 0;
+        const target = document.getElementById("history-table");
+        load("months/" + info.month + ".json").then(function (month) {
+            const t = table(target, [
+                "Fecha", "Deploys", "Destroys", "Fallos", "Deploy medio (s)",
+                "Verificaciones", "0% Drift", "Compliance %"
+            ]);
+            month.days.slice().reverse().forEach(function (day) {
+                const row = t.insertRow();
+                const link = document.createElement("a");
+                link.href = "#" + day.date;
+                link.textContent = day.date;
+                link.onclick = function (ev) { ev.preventDefault(); showDay(day.date); };
+                cell(row, "").appendChild(link);
+                cell(row, day.deploys);
+                cell(row, day.destroys);
+                cell(row, day.failures, day.failures > 0 ? "error" : "success");
+                cell(row, day.deploy_mean_seconds);
+                cell(row, day.total_checks);
+                cell(row, day.zero_drift);
+                cell(row, day.compliance_rate,
+                     day.compliance_rate === null ? "" :
+                     day.compliance_rate >= 90 ? "success" : "warning");
+            });
+        }).catch(function (err) { target.textContent = err.message; });
+    }
+
+    document.getElementById("history-prev").onclick = function () { page++; showMonth(); };
+    document.getElementById("history-next").onclick = function () { page--; showMonth(); };
+
+    load("index.json").then(function (index) {
+        months = index.months;
+        if (!months.length) {
+            document.getElementById("history-month").textContent = "No hay datos disponibles";
+            return;
+        }
+        showMonth();
+    }).catch(function (err) {
+        document.getElementById("history-month").textContent =
+            "No se pudo cargar el historial (" + err.message + "). " +
+            "Servir el directorio por HTTP: python3 -m http.server -d dashboard";
+    });
+})();
+</script>"""
 
 
 class TrendsAnalyzer:
     """Analizador de tendencias para métricas de IaC."""
 
-    def __init__(self, metrics_file: str):
+    # Percentiles de latencia reportados para deploy/destroy
+    LATENCY_PERCENTILES = (50, 90, 95, 99)
+
+    def __init__(
+        self,
+        metrics_file: str,
+        relative_accuracy: float = 0.01,
+        archive_dir: Optional[str] = None,
+        since: Optional[str] = None,
+        store: Optional[MetricsStore] = None,
+        sketch_state: Optional[str] = None,
+    ):
+        """
+        Args:
+            metrics_file: `operations.json` (nivel caliente)
+            relative_accuracy: Precisión de los sketches de latencia
+            archive_dir: Segmentos archivados (`metrics-archive.py compact`)
+            since: Día YYYY-MM-DD desde el cual leer el archivo; sin él se
+                lee el historial completo
+            store: Base SQLite ya sincronizada (`metrics-db.py sync`) para
+                las consultas por PR, lentitud y rachas de fallos
+            sketch_state: Estado de los sketches diarios (`DailySketches`);
+                con él solo se procesan las operaciones nuevas y el estado
+                actualizado se guarda ahí
+        """
         self.metrics_file = metrics_file
-        self.data = self._load_metrics()
+        self.relative_accuracy = relative_accuracy
+        self.archive_dir = archive_dir
+        self.store = store
+        self.sketch_state = sketch_state
+        self.data = self._load_metrics(since)
+        # Días desde los cuales `data` está completo (None: historial entero)
+        self.complete_since = self.data.pop("complete_since", None)
+        # Un sketch de duración por (operación, día) de las operaciones exitosas
+        self.latency = self._update_sketches()
+
+    def _update_sketches(self) -> DailySketches:
+        if not self.sketch_state:
+            latency = DailySketches(self.relative_accuracy)
+            latency.update(self.data)
+            return latency
+
+        latency = DailySketches.load(self.sketch_state, self.relative_accuracy)
+        if self.complete_since:
+            # `data` no es contiguo: se leen las operaciones desde lo ya procesado
+            data = self._operations_since(latency.seen)
+            if data["archived"]["operations"] < latency.seen:
+                # Historial acortado: se recalcula desde el principio
+                latency = DailySketches(self.relative_accuracy)
+                data = self._operations_since(0)
+            latency.update(data)
+        else:
+            latency.update(self.data)
+        latency.save(self.sketch_state)
+        return latency
+
+    def _operations_since(self, seq: int) -> Dict[str, List]:
+        # Las verificaciones de drift no se usan: se saltean todas
+        return load_metrics(
+            self.metrics_file,
+            self.archive_dir,
+            since_seq={"operations": seq, "drift_checks": sys.maxsize},
+        )
 
-    def _load_metrics(self) -> Dict[str, List]:
-        """Carga datos de métricas desde archivo JSON."""
-        if not os.path.exists(self.metrics_file):
-            return {"operations": [], "drift_checks": []}
+    def ingest(self, op: Dict) -> None:
+        """
+        Agrega una operación al historial en memoria y actualiza su sketch diario.
+
+        `op` debe ser la siguiente de operations.json; el estado se guarda
+        con `save_sketches`.
+        """
+        self.data.setdefault("operations", []).append(op)
+        self.latency.add(op)
+
+    def save_sketches(self) -> None:
+        """Guarda los sketches diarios en `sketch_state` (si se configuró)."""
+        if self.sketch_state:
+            self.latency.save(self.sketch_state)
+
+    def latency_sketch(
+        self, operation: str, since: Optional[str] = None, until: Optional[str] = None
+    ) -> DDSketch:
+        """
+        Sketch de duración de `operation` entre dos fechas YYYY-MM-DD (inclusive).
+
+        Combina los sketches diarios de la ventana, sin recorrer los eventos.
+        """
+        return self.latency.window(operation, since, until)
+
+    @staticmethod
+    def _window_start(days: int) -> str:
+        # Primer día calendario de una ventana de `days` días que incluye hoy
+        return (datetime.now() - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+
+    def latency_percentiles(self, operation: str, days: int = 30) -> Dict[str, float]:
+        """Percentiles de duración en los últimos `days` días calendario (incluye hoy)."""
+        sketch = self.latency_sketch(operation, since=self._window_start(days))
+        return sketch.percentiles(self.LATENCY_PERCENTILES) if sketch.count else {}
+
+    def _load_metrics(self, since: Optional[str] = None) -> Dict[str, List]:
+        """Carga operations.json y, con `archive_dir`, los eventos archivados desde `since`."""
+        return load_metrics(self.metrics_file, self.archive_dir, since=since)
+
+    def history(self, complete: bool = False) -> Dict[str, List]:
+        """Eventos cargados; con `complete` incluye todo el archivo aunque se usó `since`."""
+        if complete and self.complete_since:
+            return load_metrics(self.metrics_file, self.archive_dir)
+        return self.data
+
+    def pr_history(self, pr_number: int) -> List[Dict]:
+        """
+        Deploys, destroys y verificaciones de drift de un PR, en orden cronológico.
+
+        Usa los índices de `store` si está disponible; si no, filtra el
+        historial completo.
+        """
+        if self.store is not None:
+            return self.store.pr_timeline(pr_number)
+
+        data = self.history(complete=True)
+        offsets = data.get("archived") or {}
+        events = []
+        for kind, label in zip(KINDS, ("operation", "drift_check")):
+            for index, event in enumerate(data.get(kind, [])):
+                if event.get("pr_number") == pr_number:
+                    events.append({"kind": label, "seq": offsets.get(kind, 0) + index, **event})
+        events.sort(
+            key=lambda e: (self._parse_timestamp(e["timestamp"]), e["kind"], e["seq"])
+        )
+        return events
 
-        try:
-            with open(self.metrics_file, "r") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            return {"operations": [], "drift_checks": []}
+    def get_pr_insights(self, days: int = 30, limit: int = 10) -> Optional[Dict[str, Any]]:
+        """Deploys más lentos y rachas de fallos del período (requiere `store`)."""
+        if self.store is None:
+            return None
+        since = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+        return {
+            "slowest_deploys": self.store.slowest("deploy", limit, since=since),
+            "failure_streaks": self.store.failure_streaks(limit=limit, since=since),
+        }
 
     def get_operation_trends(self, days: int = 30) -> Dict[str, Any]:
-        """Analiza tendencias de operaciones en los últimos N días."""
-        cutoff_date = datetime.now() - timedelta(days=days)
+        """
+        Analiza tendencias de operaciones en los últimos N días calendario (incluye hoy).
 
-        recent_ops = [
-            op
-            for op in self.data.get("operations", [])
-            if datetime.fromisoformat(op["timestamp"].replace("Z", "+00:00"))
-            > cutoff_date
-        ]
+        Es la misma ventana de los percentiles y de `daily_operations`, así
+        que media, mediana y p50 se calculan sobre las mismas operaciones.
+        """
+        since = self._window_start(days)
+        recent_ops = [op for op in self.data.get("operations", []) if day_key(op) >= since]
 
         deploy_times = [
             op["duration_seconds"]
@@ -55,15 +304,44 @@ class TrendsAnalyzer:
 
         success_rate = self._calculate_success_rate(recent_ops)
 
+        deploy_stats = self._calculate_stats(deploy_times)
+        destroy_stats = self._calculate_stats(destroy_times)
+        if deploy_stats:
+            deploy_stats.update(self.latency_percentiles("deploy", days))
+        if destroy_stats:
+            destroy_stats.update(self.latency_percentiles("destroy", days))
+
         return {
             "period_days": days,
             "total_operations": len(recent_ops),
-            "deploy_stats": self._calculate_stats(deploy_times),
-            "destroy_stats": self._calculate_stats(destroy_times),
+            "deploy_stats": deploy_stats,
+            "destroy_stats": destroy_stats,
             "success_rate": success_rate,
             "daily_operations": self._group_operations_by_day(recent_ops, days),
         }
 
+    def get_latency_regressions(self, state_file: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Regresiones de latencia (deploy, destroy y drift check) sobre el historial.
+
+        Con `state_file` el detector continúa desde la ejecución anterior y
+        solo procesa los eventos nuevos; el estado actualizado se guarda ahí.
+        """
+        monitor = RegressionMonitor.load(state_file) if state_file else RegressionMonitor()
+        if self.complete_since:
+            # `data` no es contiguo: se leen los eventos desde lo ya procesado
+            data = load_metrics(self.metrics_file, self.archive_dir, since_seq=monitor.seen)
+            if any(data["archived"][kind] < seen for kind, seen in monitor.seen.items()):
+                # Historial acortado: se recalcula desde el principio
+                monitor = RegressionMonitor()
+                data = load_metrics(self.metrics_file, self.archive_dir)
+            monitor.update(data)
+        else:
+            monitor.update(self.data)
+        if state_file:
+            monitor.save(state_file)
+        return monitor.alerts()
+
     def get_drift_trends(self, days: int = 30) -> Dict[str, Any]:
         """Analiza tendencias de drift en los últimos N días."""
         cutoff_date = datetime.now() - timedelta(days=days)
@@ -71,8 +349,7 @@ class TrendsAnalyzer:
         recent_checks = [
             check
             for check in self.data.get("drift_checks", [])
-            if datetime.fromisoformat(check["timestamp"].replace("Z", "+00:00"))
-            > cutoff_date
+            if self._parse_timestamp(check["timestamp"]) > cutoff_date
         ]
 
         drift_percentages = [
@@ -99,6 +376,14 @@ class TrendsAnalyzer:
             "daily_drift": self._group_drift_by_day(recent_checks, days),
         }
 
+    @staticmethod
+    def _parse_timestamp(timestamp: str) -> datetime:
+        """Parsea timestamps ISO como hora local naive (`date -Iseconds` incluye offset)."""
+        parsed = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone().replace(tzinfo=None)
+        return parsed
+
     def _calculate_stats(self, values: List[float]) -> Optional[Dict[str, float]]:
         """Calcula estadísticas básicas para una lista de valores."""
         if not values:
@@ -173,19 +458,72 @@ class TrendsAnalyzer:
         return list(daily_data.values())
 
 
+def _load_usage(usage_file: Optional[str]) -> Optional[Dict]:
+    """Carga el snapshot de uso por stack si existe."""
+    if not usage_file or not os.path.exists(usage_file):
+        return None
+    try:
+        with open(usage_file, "r") as f:
+            return json.load(f)
+    except (json.JSONDecodeError, OSError):
+        return None
+
+
 class DashboardGenerator:
     """Generador de dashboard HTML."""
 
-    def __init__(self, analyzer: TrendsAnalyzer):
+    def __init__(
+        self,
+        analyzer: TrendsAnalyzer,
+        usage: Optional[Dict] = None,
+        regressions: Optional[Dict] = None,
+    ):
         self.analyzer = analyzer
+        self.usage = usage
+        self.regressions = regressions
+        self.pr_insights: Optional[Dict] = None
+
+    def generate_html_dashboard(
+        self,
+        output_file: str,
+        days: int = 30,
+        data_dir: Optional[str] = None,
+        rebuild: bool = False,
+    ) -> str:
+        """
+        Genera el shell HTML del dashboard y actualiza los shards del historial.
 
-    def generate_html_dashboard(self, output_file: str, days: int = 30) -> str:
-        """Genera dashboard HTML completo."""
+        El HTML solo contiene el resumen del período; las tablas diarias se
+        cargan desde `data_dir` (por defecto `data/` junto al HTML) a medida
+        que se navegan los meses. Los shards se reescriben solo si cambiaron.
+        """
         operation_trends = self.analyzer.get_operation_trends(days)
         drift_trends = self.analyzer.get_drift_trends(days)
+        self.pr_insights = self.analyzer.get_pr_insights(days)
+        if self.regressions is None:
+            self.regressions = self.analyzer.get_latency_regressions()
+
+        output_dir = os.path.dirname(os.path.abspath(output_file))
+        data_dir = data_dir or os.path.join(output_dir, "data")
+        writer = ShardWriter(data_dir)
+        # Con el archivo cargado parcialmente, los shards de días anteriores
+        # se conservan; si no hay shards previos se lee el historial completo
+        keep_before = self.analyzer.complete_since
+        if keep_before and (rebuild or not writer.load_index()):
+            keep_before = None
+        history = self.analyzer.history(complete=keep_before is None)
+        self.shard_stats = writer.write(
+            history.get("operations", []),
+            history.get("drift_checks", []),
+            force=rebuild,
+            keep_before=keep_before,
+        )
 
         html_content = self._generate_html_template(
-            operation_trends, drift_trends, days
+            operation_trends,
+            drift_trends,
+            days,
+            Path(os.path.relpath(data_dir, output_dir)).as_posix(),
         )
 
         with open(output_file, "w") as f:
@@ -194,12 +532,13 @@ class DashboardGenerator:
         return output_file
 
     def _generate_html_template(
-        self, operation_trends: Dict, drift_trends: Dict, days: int
+        self, operation_trends: Dict, drift_trends: Dict, days: int, data_url: str = "data"
     ) -> str:
-        """Genera template HTML para el dashboard."""
+        """Genera el shell HTML del dashboard (sin tablas diarias embebidas)."""
         return f"""<!DOCTYPE html>
 <html>
 <head>
+    <meta charset="utf-8">
     <title>Dashboard IaC Metrics</title>
     <style>
         body {{ font-family: Arial, sans-serif; margin: 20px; }}
@@ -207,6 +546,7 @@ class DashboardGenerator:
         table {{ border-collapse: collapse; width: 100%; margin: 10px 0; }}
         th, td {{ border: 1px solid #ccc; padding: 8px; text-align: left; }}
         th {{ background-color: #f2f2f2; }}
+        caption {{ text-align: left; font-weight: bold; padding: 4px 0; }}
         .metric {{ margin: 10px 0; padding: 10px; border: 1px solid #ddd; }}
         .success {{ color: green; }}
         .warning {{ color: orange; }}
@@ -228,33 +568,27 @@ class DashboardGenerator:
         <strong>Compliance Drift:</strong> <span class="{'success' if drift_trends.get('compliance_rate', 0) >= 90 else 'warning'}">{drift_trends.get('compliance_rate', 0):.1f}%</span>
     </div>
     
+    {self._generate_regressions_section()}
+
     <h2>Estadísticas de Deploy</h2>
     {self._generate_stats_table(operation_trends.get('deploy_stats'))}
     
     <h2>Estadísticas de Destroy</h2>
     {self._generate_stats_table(operation_trends.get('destroy_stats'))}
     
-    <h2>Operaciones por Día (últimos 14 días)</h2>
-    <table>
-        <tr>
-            <th>Fecha</th>
-            <th>Deploys</th>
-            <th>Destroys</th>
-            <th>Fallos</th>
-        </tr>
-        {self._generate_daily_ops_rows(operation_trends.get('daily_operations', []))}
-    </table>
-    
-    <h2>Drift por Día (últimos 14 días)</h2>
-    <table>
-        <tr>
-            <th>Fecha</th>
-            <th>Verificaciones</th>
-            <th>0% Drift</th>
-            <th>Compliance %</th>
-        </tr>
-        {self._generate_daily_drift_rows(drift_trends.get('daily_drift', []))}
-    </table>
+    <h2>Historial por Día</h2>
+    <section id="history" data-url="{html.escape(data_url)}">
+        <p>
+            <button id="history-prev">&larr; Mes anterior</button>
+            <strong id="history-month">Cargando historial...</strong>
+            <button id="history-next">Mes siguiente &rarr;</button>
+        </p>
+        <div id="history-table"></div>
+        <div id="history-day"></div>
+    </section>
+    {self._generate_pr_insights_section()}
+    {self._generate_usage_section()}
+{HISTORY_SCRIPT}
 </body>
 </html>"""
 
@@ -270,36 +604,144 @@ class DashboardGenerator:
             <tr><td>Mediana</td><td>{stats.get('median', 0):.1f}s</td></tr>
             <tr><td>Mínimo</td><td>{stats.get('min', 0):.1f}s</td></tr>
             <tr><td>Máximo</td><td>{stats.get('max', 0):.1f}s</td></tr>
+            {"".join(
+                f"<tr><td>{name}</td><td>{stats[name]:.1f}s</td></tr>"
+                for name in ("p90", "p95", "p99")
+                if stats.get(name) is not None
+            )}
         </table>"""
 
-    def _generate_daily_ops_rows(self, daily_ops: List[Dict]) -> str:
-        """Genera filas para tabla de operaciones diarias."""
+    def _generate_regressions_section(self, recent: int = 10) -> str:
+        """Genera tabla de regresiones de latencia activas y recientes."""
+        if not self.regressions:
+            return ""
+        regressions = self.regressions.get("regressions", [])[:recent]
+        if not regressions:
+            return """<h2>Regresiones de Latencia</h2>
+    <p class="success">Sin regresiones de latencia detectadas</p>"""
+
         rows = []
-        for day in daily_ops[-14:]:
+        for r in regressions:
+            status = "error" if r["status"] == "open" else "success"
+            label = "activa" if r["status"] == "open" else "resuelta"
+            started = html.escape(f"{r['started_at']} ({r.get('started_commit') or '-'})")
+            detected = html.escape(f"{r['detected_at']} ({r.get('detected_commit') or '-'})")
             rows.append(
                 f"""<tr>
-                <td>{day['date']}</td>
-                <td>{day['deploys']}</td>
-                <td>{day['destroys']}</td>
-                <td><span class="{'error' if day['failures'] > 0 else 'success'}">{day['failures']}</span></td>
+                <td>{html.escape(r['series'])}</td>
+                <td><span class="{status}">{label}</span></td>
+                <td>{started}</td>
+                <td>{detected}</td>
+                <td>{r['baseline_seconds']:.1f}s &rarr; {r['current_seconds']:.1f}s</td>
+                <td>+{(r['ratio'] - 1) * 100:.0f}%</td>
             </tr>"""
             )
-        return "\n".join(rows)
+        active = len(self.regressions.get("active", []))
+        return f"""<h2>Regresiones de Latencia</h2>
+    <p><span class="{'error' if active else 'success'}">{active} activas</span></p>
+    <table>
+        <tr>
+            <th>Serie</th>
+            <th>Estado</th>
+            <th>Inicio (commit)</th>
+            <th>Detectada (commit)</th>
+            <th>Duración</th>
+            <th>Cambio</th>
+        </tr>
+        {"".join(rows)}
+    </table>"""
+
+    def _generate_pr_insights_section(self) -> str:
+        """Genera tablas de deploys más lentos y rachas de fallos por PR."""
+        insights = self.pr_insights
+        if not insights:
+            return ""
+
+        slow_rows = "".join(
+            f"""<tr>
+                <td>#{html.escape(str(op.get('pr_number', '-')))}</td>
+                <td>{html.escape(str(op['timestamp']))}</td>
+                <td>{op['duration_seconds']:.1f}s</td>
+                <td>{html.escape(str(op.get('commit') or '-'))}</td>
+            </tr>"""
+            for op in insights["slowest_deploys"]
+        )
+        streak_rows = ""
+        for s in insights["failure_streaks"]:
+            status = "error" if s["open"] else "success"
+            label = "abierta" if s["open"] else "cerrada"
+            period = f"{html.escape(str(s['started_at']))} &rarr; {html.escape(str(s['ended_at']))}"
+            streak_rows += f"""<tr>
+                <td>#{html.escape(str(s['pr_number']))}</td>
+                <td>{s['length']}</td>
+                <td>{html.escape(', '.join(s['operations']))}</td>
+                <td>{period}</td>
+                <td><span class="{status}">{label}</span></td>
+            </tr>"""
+        slowest = (
+            f"""<table>
+        <tr><th>PR</th><th>Inicio</th><th>Duración</th><th>Commit</th></tr>
+        {slow_rows}
+    </table>"""
+            if slow_rows
+            else "<p>No hay datos disponibles</p>"
+        )
+        streaks = (
+            f"""<table>
+        <tr>
+            <th>PR</th><th>Fallos seguidos</th><th>Operaciones</th><th>Período</th><th>Estado</th>
+        </tr>
+        {streak_rows}
+    </table>"""
+            if streak_rows
+            else '<p class="success">Sin rachas de fallos</p>'
+        )
+        return f"""<h2>Deploys Más Lentos</h2>
+    {slowest}
+    <h2>Rachas de Fallos por PR</h2>
+    {streaks}"""
+
+    def _generate_usage_section(self, top: int = 20) -> str:
+        """Genera tabla de consumo por stack (snapshot de cleanup-monitor.py --usage)."""
+        if not self.usage:
+            return ""
 
-    def _generate_daily_drift_rows(self, daily_drift: List[Dict]) -> str:
-        """Genera filas para tabla de drift diario."""
         rows = []
-        for day in daily_drift[-14:]:
-            compliance = day.get("compliance_rate", 0)
+        for stack in self.usage.get("stacks", [])[:top]:
+            components = ", ".join(
+                f"{name}: {format_size(values.get('memory_bytes', 0))}"
+                for name, values in sorted(stack.get("components", {}).items())
+            )
             rows.append(
                 f"""<tr>
-                <td>{day['date']}</td>
-                <td>{day['total_checks']}</td>
-                <td>{day['zero_drift']}</td>
-                <td><span class="{'success' if compliance >= 90 else 'warning'}">{compliance:.1f}%</span></td>
+                <td>#{stack['pr_number']}</td>
+                <td>{stack['containers']}</td>
+                <td>{stack['cpu_percent']:.2f}%</td>
+                <td>{format_size(stack['memory_bytes'])}</td>
+                <td>{format_size(stack['disk_bytes'])}</td>
+                <td>{components}</td>
             </tr>"""
             )
-        return "\n".join(rows)
+
+        totals = self.usage.get("totals", {})
+        total = (
+            f"{totals.get('cpu_percent', 0):.2f}% CPU, "
+            f"{format_size(totals.get('memory_bytes', 0))} RAM, "
+            f"{format_size(totals.get('disk_bytes', 0))} disco"
+        )
+        return f"""<h2>Consumo por Stack (top {top})</h2>
+    <p>Snapshot: {self.usage.get('collected_at', 'N/A')} | Total: {total}</p>
+    <table>
+        <tr>
+            <th>PR</th>
+            <th>Contenedores</th>
+            <th>CPU</th>
+            <th>Memoria</th>
+            <th>Disco</th>
+            <th>Memoria por componente</th>
+        </tr>
+        {"".join(rows)}
+    </table>"""
 
 
 def main():
@@ -313,17 +755,78 @@ def main():
         "--output", default="dashboard/trends.html", help="Archivo de salida HTML"
     )
     parser.add_argument("--days", type=int, default=30, help="Días a analizar")
+    parser.add_argument(
+        "--usage-file",
+        default="metrics/resource_usage.json",
+        help="Snapshot de consumo por stack (cleanup-monitor.py --usage-output)",
+    )
 
-    args = parser.parse_args()
+    parser.add_argument(
+        "--archive-dir",
+        default=DEFAULT_ARCHIVE_DIR,
+        help="Segmentos archivados (solo se leen los días del período)",
+    )
+    parser.add_argument(
+        "--data-dir",
+        help="Directorio de shards JSON del historial (por defecto: data/ junto al HTML)",
+    )
+    parser.add_argument(
+        "--rebuild", action="store_true", help="Reescribir todos los shards del historial"
+    )
+    parser.add_argument(
+        "--regression-state",
+        default="metrics/regression_state.json",
+        help="Estado del detector de regresiones (procesa solo eventos nuevos)",
+    )
+    parser.add_argument(
+        "--sketch-state",
+        default="metrics/latency_sketches.json",
+        help="Sketches diarios de latencia (procesa solo operaciones nuevas)",
+    )
+    parser.add_argument(
+        "--metrics-db",
+        help="Base SQLite indexada (metrics-db.py); agrega deploys lentos y rachas de fallos",
+    )
 
-    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    args = parser.parse_args()
 
-    analyzer = TrendsAnalyzer(args.metrics_file)
-    generator = DashboardGenerator(analyzer)
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+
+    since = (datetime.now() - timedelta(days=args.days)).strftime("%Y-%m-%d")
+    store = None
+    if args.metrics_db:
+        store = MetricsStore(args.metrics_db)
+        store.sync(args.metrics_file, args.archive_dir)
+    analyzer = TrendsAnalyzer(
+        args.metrics_file,
+        archive_dir=args.archive_dir,
+        since=since,
+        store=store,
+        sketch_state=args.sketch_state,
+    )
+    generator = DashboardGenerator(
+        analyzer,
+        _load_usage(args.usage_file),
+        analyzer.get_latency_regressions(args.regression_state),
+    )
 
-    output_file = generator.generate_html_dashboard(args.output, args.days)
+    output_file = generator.generate_html_dashboard(
+        args.output, args.days, data_dir=args.data_dir, rebuild=args.rebuild
+    )
+    if store is not None:
+        store.close()
 
+    stats = generator.shard_stats
     print(f"Dashboard generado: {output_file}")
+    print(
+        f"Shards del historial: {stats['written']} escritos, "
+        f"{stats['unchanged']} sin cambios, {stats['removed']} eliminados"
+    )
+    for regression in generator.regressions.get("active", []):
+        print(
+            f"Regresión de latencia activa: {regression['series']} "
+            f"+{(regression['ratio'] - 1) * 100:.0f}% desde {regression['started_at']}"
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Detecta regresiones de latencia de deploy, destroy y drift check.
+Procesa incrementalmente operations.json y escribe alertas en JSON.
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.metrics_archive import DEFAULT_ARCHIVE_DIR  # noqa: E402
+from src.regression import RegressionMonitor, load_history  # noqa: E402
+
+
+def format_regression(regression: dict) -> str:
+    """Línea de texto de una regresión."""
+    status = "ACTIVA" if regression["status"] == "open" else "resuelta"
+    return (
+        f"[{status}] {regression['series']}: {regression['baseline_seconds']:.1f}s -> "
+        f"{regression['current_seconds']:.1f}s (+{(regression['ratio'] - 1) * 100:.0f}%) "
+        f"desde {regression['started_at']} ({regression.get('started_commit') or 'sin commit'}), "
+        f"detectada {regression['detected_at']}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detector de regresiones de latencia")
+    parser.add_argument(
+        "--metrics-file", default="metrics/operations.json", help="Archivo de métricas JSON"
+    )
+    parser.add_argument(
+        "--archive-dir",
+        default=DEFAULT_ARCHIVE_DIR,
+        help="Segmentos archivados (metrics-archive.py compact)",
+    )
+    parser.add_argument(
+        "--state-file",
+        default="metrics/regression_state.json",
+        help="Estado del detector entre ejecuciones",
+    )
+    parser.add_argument("--output", help="Archivo JSON de alertas")
+    parser.add_argument(
+        "--reset", action="store_true", help="Ignorar el estado y recorrer todo el historial"
+    )
+    parser.add_argument(
+        "--fail-on-regression",
+        action="store_true",
+        help="Exit code 1 si hay regresiones activas",
+    )
+    parser.add_argument("--json", action="store_true", help="Salida en formato JSON")
+
+    args = parser.parse_args()
+
+    monitor = RegressionMonitor() if args.reset else RegressionMonitor.load(args.state_file)
+    changed = monitor.update(load_history(args.metrics_file, args.archive_dir, monitor.seen))
+    monitor.save(args.state_file)
+    alerts = monitor.alerts()
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(alerts, f, indent=2)
+
+    if args.json:
+        print(json.dumps(alerts, indent=2))
+    else:
+        for series, info in alerts["series"].items():
+            print(
+                f"{series}: {info['observations']} observaciones, "
+                f"base {info['baseline_seconds']}s"
+            )
+        for regression in changed:
+            print(f"Nuevo: {format_regression(regression)}")
+        for regression in alerts["active"]:
+            print(format_regression(regression))
+        if not alerts["active"]:
+            print("Sin regresiones de latencia activas")
+
+    if args.fail_on_regression and alerts["active"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/bin/bash
+
+# Tracing de comandos externos para los scripts de shell (ver src/tracing.py)
+# Uso: source "$SCRIPT_DIR/lib/trace.sh"
+#
+# Con TRACE_FILE, cada llamada a docker, terraform, gh o jq queda como un span
+# y al salir se exporta la traza a TRACE_FILE (TRACE_FORMAT: chrome u otlp).
+# Si el script lo lanzó un proceso con traza activa (TRACE_SPANS heredado),
+# los spans se agregan a la traza de ese proceso. Sin ninguna de las dos
+# variables no se define nada y los comandos se ejecutan tal cual.
+
+trace_id() {
+    od -An -N"$1" -tx1 /dev/urandom | tr -d ' \n'
+}
+
+trace_now() {
+    date +%s%N
+}
+
+# Escapa un valor para usarlo dentro de un string JSON
+trace_json_escape() {
+    local value=$1
+    value=${value//\\/\\\\}
+    value=${value//\"/\\\"}
+    value=${value//$'\n'/\\n}
+    value=${value//$'\t'/\\t}
+    printf '%s' "$value"
+}
+
+trace_json_argv() {
+    local arg out="" sep=""
+    for arg in "$@"; do
+        out+="$sep\"$(trace_json_escape "$arg")\""
+        sep=","
+    done
+    printf '[%s]' "$out"
+}
+
+# trace_span NAME KIND PARENT_ID SPAN_ID START_NS END_NS STATUS ATTRIBUTES_JSON
+trace_span() {
+    printf '{"trace_id":"%s","span_id":"%s","parent_id":"%s","name":"%s","kind":"%s","start_ns":%s,"end_ns":%s,"status":"%s","attributes":%s,"pid":%s,"tid":%s}\n' \
+        "$TRACE_ID" "$4" "$3" "$(trace_json_escape "$1")" "$2" "$5" "$6" "$7" "$8" "$$" \
+        "$BASHPID" >> "$TRACE_SPANS"
+}
+
+# Ejecuta un comando registrando argv, duración y exit code. La salida no se
+# intercepta: un `terraform destroy` largo se ve a medida que avanza
+trace_cmd() {
+    local span_id start end rc=0 name arg
+    span_id=$(trace_id 8)
+    start=$(trace_now)
+    TRACE_PARENT=$span_id command "$@" || rc=$?
+    end=$(trace_now)
+
+    name=$1
+    for arg in "${@:2}"; do
+        case $arg in
+            -*) ;;
+            *) name="$1 $arg"; break ;;
+        esac
+    done
+    trace_span "$name" command "$TRACE_SCRIPT_SPAN" "$span_id" "$start" "$end" \
+        "$([ $rc -eq 0 ] && echo ok || echo error)" \
+        "{\"command.argv\":$(trace_json_argv "$@"),\"command.exit_code\":$rc}"
+    return $rc
+}
+
+trace_finish() {
+    local rc=$?
+    trace_span "$(basename "$0")" operation "$TRACE_SCRIPT_PARENT" "$TRACE_SCRIPT_SPAN" \
+        "$TRACE_SCRIPT_START" "$(trace_now)" "$([ $rc -eq 0 ] && echo ok || echo error)" \
+        "{\"argv\":$(trace_json_argv "${TRACE_SCRIPT_ARGS[@]}")}"
+    if [ "$TRACE_OWNER" = true ]; then
+        python3 "$TRACE_LIB_DIR/../trace-export.py" "$TRACE_SPANS" --output "$TRACE_FILE" \
+            --format "${TRACE_FORMAT:-chrome}" && rm -f "$TRACE_SPANS"
+    fi
+}
+
+if [ -n "${TRACE_SPANS:-}" ] || [ -n "${TRACE_FILE:-}" ]; then
+    TRACE_LIB_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+    TRACE_OWNER=false
+    if [ -z "${TRACE_SPANS:-}" ]; then
+        TRACE_OWNER=true
+        # Ruta absoluta: los scripts cambian de directorio antes de salir
+        mkdir -p "$(dirname "$TRACE_FILE")"
+        TRACE_FILE="$(cd "$(dirname "$TRACE_FILE")" && pwd)/$(basename "$TRACE_FILE")"
+        export TRACE_SPANS="$TRACE_FILE.spans.ndjson"
+        export TRACE_ID
+        TRACE_ID=$(trace_id 16)
+        TRACE_PARENT=""
+        : > "$TRACE_SPANS"
+    fi
+    TRACE_SCRIPT_ARGS=("$@")
+    TRACE_SCRIPT_PARENT=${TRACE_PARENT:-}
+    TRACE_SCRIPT_SPAN=$(trace_id 8)
+    TRACE_SCRIPT_START=$(trace_now)
+    # Los procesos hijos (p. ej. cleanup-monitor.py) cuelgan del span del script
+    export TRACE_PARENT=$TRACE_SCRIPT_SPAN
+    trap trace_finish EXIT
+
+    # Solo se envuelven las herramientas instaladas: `command -v` sigue fallando si faltan
+    for trace_tool in docker terraform gh jq; do
+        if type -P "$trace_tool" > /dev/null; then
+            eval "$trace_tool() { trace_cmd $trace_tool \"\$@\"; }"
+        fi
+    done
+fi
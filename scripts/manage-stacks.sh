@@ -1,7 +1,7 @@
 #!/bin/bash
 
 # Script para gestión manual de stacks efímeros
-# Uso: ./scripts/manage-stacks.sh [deploy|destroy|list|cleanup] [PR_NUMBER]
+# Uso: ./scripts/manage-stacks.sh [deploy|redeploy|destroy|list|cleanup] [PR_NUMBER]
 
 set -e
 
@@ -63,9 +63,15 @@ validate_pr_number() {
 
 terraform_init() {
     log_info "Inicializando Terraform..."
-    cd "$TERRAFORM_DIR"
-    terraform init
-    cd - > /dev/null
+    # Reutiliza .terraform y el cache de plugins si el lock file y los módulos no cambiaron
+    if command -v python3 &> /dev/null; then
+        python3 "$SCRIPT_DIR/terraform-init.py" --dir "$TERRAFORM_DIR" \
+            ${TF_PROVIDER_MIRROR:+--mirror "$TF_PROVIDER_MIRROR"}
+    else
+        cd "$TERRAFORM_DIR"
+        terraform init
+        cd - > /dev/null
+    fi
 }
 
 deploy_stack() {
@@ -79,11 +85,19 @@ deploy_stack() {
     terraform fmt -check -recursive
     terraform validate
     
-    log_info "Generando plan..."
-    terraform plan -var="pr_number=$pr_number" -out=tfplan
-    
-    log_info "Aplicando cambios..."
-    terraform apply -auto-approve tfplan
+    if command -v python3 &> /dev/null; then
+        # Plan cacheado y apply solo si hay cambios; registra el despliegue
+        # para que los siguientes redeploy sean incrementales
+        if ! python3 "$SCRIPT_DIR/terraform-redeploy.py" --dir . --pr "$pr_number"; then
+            log_error "Falló el despliegue"
+            exit 1
+        fi
+    else
+        log_info "Generando plan..."
+        terraform plan -var="pr_number=$pr_number" -out=tfplan
+        log_info "Aplicando cambios..."
+        terraform apply -auto-approve tfplan
+    fi
     
     log_success "Stack desplegado exitosamente!"
     echo ""
@@ -94,35 +108,62 @@ deploy_stack() {
     cd - > /dev/null
 }
 
-destroy_stack() {
+redeploy_stack() {
     local pr_number=$1
+    shift
     validate_pr_number "$pr_number"
     
-    log_warning "Destruyendo stack para PR #$pr_number..."
+    log_info "Redespliegue incremental del stack para PR #$pr_number..."
     
-    cd "$TERRAFORM_DIR"
+    # Solo se reemplazan los componentes con entradas nuevas; db, red y proxy se conservan
+    local var_args=()
+    for assignment in "$@"; do
+        var_args+=(--var "$assignment")
+    done
+    python3 "$SCRIPT_DIR/terraform-redeploy.py" --dir "$TERRAFORM_DIR" --pr "$pr_number" \
+        "${var_args[@]}"
     
-    terraform destroy -auto-approve -var="pr_number=$pr_number"
+    log_success "Stack actualizado"
+}
+
+destroy_stack() {
+    local pr_number=$1
+    local result docker_host
+    validate_pr_number "$pr_number"
     
-    log_info "Verificando limpieza..."
+    log_warning "Destruyendo stack para PR #$pr_number..."
     
-    containers=$(docker ps -a --filter "label=pr_number=$pr_number" --format "{{.Names}}" || true)
-    if [ -n "$containers" ]; then
-        log_warning "Contenedores restantes encontrados: $containers"
-        log_info "Limpiando contenedores..."
-        docker rm -f $containers || true
-    fi
+    # En el host donde se desplegó el stack, no necesariamente el daemon local
+    result=$(python3 "$SCRIPT_DIR/terraform-destroy.py" --dir "$TERRAFORM_DIR" \
+        --pr "$pr_number" --json)
+    docker_host=$(echo "$result" | python3 -c \
+        'import json, sys; print(json.load(sys.stdin)["docker_host"] or "")')
     
-    volumes=$(docker volume ls --filter "name=ephemeral-pr-$pr_number" --format "{{.Name}}" || true)
-    if [ -n "$volumes" ]; then
-        log_warning "Volúmenes restantes encontrados: $volumes"
-        log_info "Limpiando volúmenes..."
-        docker volume rm $volumes || true
-    fi
+    log_info "Verificando limpieza en ${docker_host:-el daemon local}..."
     
-    log_success "Stack destruido exitosamente!"
+    # Los restos se buscan en el mismo host; el subshell no deja DOCKER_HOST
+    # exportado para los siguientes stacks
+    (
+        if [ -n "$docker_host" ]; then
+            export DOCKER_HOST="$docker_host"
+        fi
+        
+        containers=$(docker ps -a --filter "label=pr_number=$pr_number" --format "{{.Names}}" || true)
+        if [ -n "$containers" ]; then
+            log_warning "Contenedores restantes encontrados: $containers"
+            log_info "Limpiando contenedores..."
+            docker rm -f $containers || true
+        fi
+        
+        volumes=$(docker volume ls --filter "name=ephemeral-pr-$pr_number" --format "{{.Name}}" || true)
+        if [ -n "$volumes" ]; then
+            log_warning "Volúmenes restantes encontrados: $volumes"
+            log_info "Limpiando volúmenes..."
+            docker volume rm $volumes || true
+        fi
+    )
     
-    cd - > /dev/null
+    log_success "Stack destruido exitosamente!"
 }
 
 list_stacks() {
@@ -194,6 +235,8 @@ show_help() {
     echo ""
     echo "Comandos disponibles:"
     echo "  deploy PR_NUMBER     Despliega stack para el PR especificado"
+    echo "  redeploy PR_NUMBER [VAR=VALOR...]"
+    echo "                       Redespliega solo los componentes con cambios"
     echo "  destroy PR_NUMBER    Destruye stack para el PR especificado"
     echo "  list                 Lista todos los stacks activos"
     echo "  cleanup [HOURS]      Limpia stacks con más de HOURS horas (default: 72)"
@@ -201,6 +244,7 @@ show_help() {
     echo ""
     echo "Ejemplos:"
     echo "  $0 deploy 123        # Despliega stack para PR #123"
+    echo "  $0 redeploy 123 app_image=nginx:1.27-alpine  # Reemplaza solo la app"
     echo "  $0 destroy 123       # Destruye stack para PR #123"
     echo "  $0 list              # Lista stacks activos"
     echo "  $0 cleanup 48        # Limpia stacks con más de 48 horas"
@@ -215,6 +259,11 @@ main() {
             terraform_init
             deploy_stack "$2"
             ;;
+        redeploy)
+            check_dependencies
+            shift
+            redeploy_stack "$@"
+            ;;
         destroy)
             check_dependencies
             terraform_init
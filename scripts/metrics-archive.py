@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Archivo por niveles de metrics/operations.json.
+
+`compact` mueve a segmentos columnares los eventos fuera de la ventana
+caliente; `info` resume el archivo y `query` calcula percentiles sobre un
+rango de días leyendo solo las columnas necesarias.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.metrics_archive import (  # noqa: E402
+    DEFAULT_ARCHIVE_DIR,
+    KINDS,
+    SCHEMAS,
+    MetricsArchive,
+    read_metrics,
+)
+from src.quantile_sketch import DDSketch  # noqa: E402
+from src.units import format_size  # noqa: E402
+
+
+def parse_where(raw: str):
+    """campo=valor -> (campo, valor)."""
+    field, sep, value = raw.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"Filtro inválido (se espera campo=valor): {raw}")
+    return field, value
+
+
+def query(archive: MetricsArchive, metrics_file: str, args) -> dict:
+    """Percentiles de `args.field` en el archivo más el nivel caliente."""
+    where = dict(args.where)
+    columns = archive.scan(args.kind, [args.field], args.since, args.until, where)
+    values = [v for v in columns[args.field] if v is not None]
+    for event in read_metrics(metrics_file).get(args.kind, []):
+        day = str(event.get("timestamp", ""))[:10]
+        if (args.since and day < args.since) or (args.until and day > args.until):
+            continue
+        if all(event.get(field) == value for field, value in where.items()):
+            if isinstance(event.get(args.field), (int, float)):
+                values.append(event[args.field])
+
+    sketch = DDSketch().update(float(v) for v in values)
+    return {
+        "kind": args.kind,
+        "field": args.field,
+        "since": args.since,
+        "until": args.until,
+        "where": where,
+        "count": sketch.count,
+        "mean": round(sketch.mean, 3) if sketch.count else None,
+        **(sketch.percentiles((50, 90, 95, 99)) if sketch.count else {}),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archivo del historial de métricas")
+    parser.add_argument("command", choices=["compact", "info", "query"])
+    parser.add_argument(
+        "--metrics-file", default="metrics/operations.json", help="Archivo de métricas JSON"
+    )
+    parser.add_argument("--archive-dir", default=DEFAULT_ARCHIVE_DIR, help="Directorio del archivo")
+    parser.add_argument(
+        "--hot-days", type=int, default=30, help="Días que quedan en operations.json (compact)"
+    )
+    parser.add_argument(
+        "--fanout", type=int, default=4, help="Segmentos de un nivel que se fusionan (compact)"
+    )
+    parser.add_argument("--kind", choices=KINDS, default="operations", help="Lista (query)")
+    parser.add_argument("--field", default="duration_seconds", help="Campo numérico (query)")
+    parser.add_argument("--since", help="Día inicial YYYY-MM-DD (query)")
+    parser.add_argument("--until", help="Día final YYYY-MM-DD, inclusive (query)")
+    parser.add_argument(
+        "--where",
+        type=parse_where,
+        action="append",
+        default=[],
+        help="Filtro campo=valor sobre campos de texto (query)",
+    )
+    parser.add_argument("--json", action="store_true", help="Salida en formato JSON")
+
+    args = parser.parse_args()
+    archive = MetricsArchive(args.archive_dir, fanout=args.fanout)
+
+    if args.command == "query":
+        schema = SCHEMAS[args.kind]
+        numeric = [field for field, field_type in schema.items() if field_type != "str"]
+        if args.field not in numeric:
+            parser.error(f"--field debe ser un campo numérico: {', '.join(numeric)}")
+        unknown = [field for field, _ in args.where if schema.get(field) != "str"]
+        if unknown:
+            parser.error(f"--where solo admite campos de texto: {', '.join(unknown)}")
+
+    try:
+        if args.command == "compact":
+            result = archive.compact(args.metrics_file, args.hot_days)
+        elif args.command == "info":
+            result = archive.info()
+        else:
+            result = query(archive, args.metrics_file, args)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    elif args.command == "compact":
+        for kind, stats in result.items():
+            print(
+                f"{kind}: {stats['archived']} archivados, {stats['hot']} en operations.json, "
+                f"{stats['merged']} segmentos fusionados"
+            )
+    elif args.command == "info":
+        for kind, info in result.items():
+            days = f"{info['days'][0]} a {info['days'][1]}" if info["days"] else "sin eventos"
+            tiers = ", ".join(f"nivel {tier}: {n}" for tier, n in info["tiers"].items())
+            print(
+                f"{kind}: {info['events']} eventos en {info['segments']} segmentos "
+                f"({tiers or 'ninguno'}), {format_size(info['bytes'])}, {days}"
+            )
+    else:
+        if not result["count"]:
+            print("Sin eventos en el rango")
+            return
+        print(
+            f"{result['kind']}.{result['field']}: {result['count']} eventos, "
+            f"media {result['mean']}, p50 {result['p50']:.1f}, p90 {result['p90']:.1f}, "
+            f"p95 {result['p95']:.1f}, p99 {result['p99']:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
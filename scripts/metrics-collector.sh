@@ -42,6 +42,11 @@ ensure_metrics_dir() {
     fi
 }
 
+# Commit que se está desplegando (para ubicar regresiones de latencia)
+current_commit() {
+    echo "${GITHUB_SHA:-$(git -C "$SCRIPT_DIR" rev-parse --short HEAD 2>/dev/null)}"
+}
+
 # Registrar operación en métricas
 record_operation() {
     local operation=$1
@@ -51,9 +56,11 @@ record_operation() {
     local resource_count=${5:-0}
     
     local timestamp=$(date -Iseconds)
+    local commit=$(current_commit)
     local entry=$(cat <<EOF
 {
   "timestamp": "$timestamp",
+  "commit": "$commit",
   "operation": "$operation",
   "pr_number": $pr_number,
   "duration_seconds": $duration,
@@ -134,9 +141,11 @@ record_drift_check() {
     local status=$4
     
     local timestamp=$(date -Iseconds)
+    local commit=$(current_commit)
     local entry=$(cat <<EOF
 {
   "timestamp": "$timestamp",
+  "commit": "$commit",
   "pr_number": $pr_number,
   "drift_percent": $drift_percent,
   "check_duration_seconds": $duration,
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Consultas indexadas sobre el historial de métricas.
+
+`sync` incorpora a la base SQLite los eventos nuevos de operations.json (y
+del archivo de segmentos); `pr` muestra la línea de tiempo de un PR,
+`slowest` las operaciones más lentas y `streaks` las rachas de fallos.
+Las consultas sincronizan antes salvo con `--no-sync`.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.metrics_store import DEFAULT_DB, MetricsStore  # noqa: E402
+
+
+def describe(event: dict) -> str:
+    """Línea legible de un evento de la línea de tiempo."""
+    if event["kind"] == "drift_check":
+        drift = event.get("drift_percent")
+        detail = f"drift {drift}%" if drift is not None else "drift"
+        return f"{event['timestamp']}  {detail:<18} {event.get('status', '-')}"
+    duration = event.get("duration_seconds")
+    took = f"{duration:.1f}s" if duration is not None else "-"
+    return (
+        f"{event['timestamp']}  {event.get('operation', '-'):<18} "
+        f"{event.get('status', '-'):<8} {took}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Historial de métricas indexado")
+    parser.add_argument("command", choices=["sync", "pr", "slowest", "streaks"])
+    parser.add_argument("--db", default=DEFAULT_DB, help="Base SQLite")
+    parser.add_argument(
+        "--metrics-file", default="metrics/operations.json", help="Archivo de métricas JSON"
+    )
+    parser.add_argument("--archive-dir", help="Directorio del archivo de segmentos")
+    parser.add_argument("--no-sync", action="store_true", help="Consultar sin sincronizar")
+    parser.add_argument("--pr", type=int, help="Número de PR (pr, streaks)")
+    parser.add_argument("--operation", default="deploy", help="Operación (slowest)")
+    parser.add_argument("--limit", type=int, default=10, help="Máximo de resultados")
+    parser.add_argument("--since", help="Día inicial YYYY-MM-DD")
+    parser.add_argument("--until", help="Día final YYYY-MM-DD, inclusive (slowest)")
+    parser.add_argument(
+        "--min-length", type=int, default=2, help="Fallos consecutivos mínimos (streaks)"
+    )
+    parser.add_argument("--json", action="store_true", help="Salida en formato JSON")
+
+    args = parser.parse_args()
+    if args.command == "pr" and args.pr is None:
+        parser.error("pr requiere --pr")
+
+    with MetricsStore(args.db) as store:
+        if args.command == "sync" or not args.no_sync:
+            try:
+                inserted = store.sync(args.metrics_file, args.archive_dir)
+            except ValueError as e:
+                print(f"Error: {e}", file=sys.stderr)
+                sys.exit(1)
+
+        if args.command == "sync":
+            result = {"inserted": inserted, "total": store.counts()}
+        elif args.command == "pr":
+            result = {
+                "summary": store.pr_summary(args.pr),
+                "timeline": store.pr_timeline(args.pr, args.limit),
+            }
+        elif args.command == "slowest":
+            result = store.slowest(args.operation, args.limit, args.since, args.until)
+        else:
+            result = store.failure_streaks(args.min_length, args.limit, args.since, args.pr)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    elif args.command == "sync":
+        for kind, count in result["inserted"].items():
+            print(f"{kind}: {count} nuevos, {result['total'][kind]} en total")
+    elif args.command == "pr":
+        summary = result["summary"]
+        if not result["timeline"]:
+            print(f"Sin eventos para el PR #{args.pr}")
+            return
+        print(f"PR #{args.pr}")
+        for operation, stats in summary["operations"].items():
+            statuses = ", ".join(f"{s}: {n}" for s, n in stats["statuses"].items())
+            mean = stats.get("mean_seconds")
+            mean_text = f", media {mean:.1f}s" if mean is not None else ""
+            print(f"  {operation}: {stats['count']} ({statuses}){mean_text}")
+        print(f"  Verificaciones de drift: {summary['drift_checks']}")
+        print(f"\nÚltimos {len(result['timeline'])} eventos:")
+        for event in result["timeline"]:
+            print(f"  {describe(event)}")
+    elif args.command == "slowest":
+        if not result:
+            print("Sin operaciones en el rango")
+        for event in result:
+            print(f"PR #{event.get('pr_number', '-')}  {describe(event)}")
+    else:
+        if not result:
+            print("Sin rachas de fallos")
+        for streak in result:
+            state = "abierta" if streak["open"] else "cerrada"
+            print(
+                f"PR #{streak['pr_number']}: {streak['length']} fallos seguidos "
+                f"({', '.join(streak['operations'])}) "
+                f"{streak['started_at']} a {streak['ended_at']}, {state}"
+            )
+
+
+if __name__ == "__main__":
+    main()
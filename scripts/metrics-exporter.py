@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Exportador Prometheus/OpenMetrics de stacks efímeros y métricas de IaC.
+Escanea Docker en segundo plano con CleanupMonitor y lee operations.json
+con TrendsAnalyzer; cada scrape se sirve desde la caché en memoria.
+"""
+
+import argparse
+import importlib.util
+import sys
+from pathlib import Path
+from typing import Optional
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPTS_DIR.parent))
+
+from src.inventory_cache import InventoryCache  # noqa: E402
+from src.metrics_archive import DEFAULT_ARCHIVE_DIR  # noqa: E402
+from src.metrics_exporter import (  # noqa: E402
+    MetricsExporter,
+    OperationsIngestor,
+    create_server,
+)
+
+
+def load_script(filename: str, module_name: str):
+    """Carga un script hermano (nombre con guiones) como módulo."""
+    spec = importlib.util.spec_from_file_location(module_name, SCRIPTS_DIR / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def build_exporter(
+    metrics_file: str, interval: float, archive_dir: Optional[str] = None
+) -> MetricsExporter:
+    """Construye el exportador sobre CleanupMonitor y TrendsAnalyzer."""
+    monitor_module = load_script("cleanup-monitor.py", "cleanup_monitor")
+    dashboard_module = load_script("generate-dashboard.py", "generate_dashboard")
+
+    monitor = monitor_module.CleanupMonitor()
+
+    def scan():
+        # La edad se calcula contra el momento del escaneo, no el de arranque
+        monitor.current_time = monitor_module.datetime.now()
+        return monitor.scan_ephemeral_resources()
+
+    cache = InventoryCache(scan, interval=interval)
+    ingestor = OperationsIngestor(
+        metrics_file, lambda path: dashboard_module.TrendsAnalyzer(path).data, archive_dir
+    )
+    return MetricsExporter(cache, ingestor)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Exportador Prometheus de stacks efímeros"
+    )
+    parser.add_argument("--host", default="0.0.0.0", help="Dirección de escucha")
+    parser.add_argument("--port", type=int, default=9108, help="Puerto de escucha")
+    parser.add_argument(
+        "--metrics-file",
+        default="metrics/operations.json",
+        help="Archivo de métricas de metrics-collector.sh",
+    )
+    parser.add_argument(
+        "--archive-dir",
+        default=DEFAULT_ARCHIVE_DIR,
+        help="Segmentos archivados (metrics-archive.py compact)",
+    )
+    parser.add_argument(
+        "--scan-interval",
+        type=float,
+        default=30,
+        help="Segundos entre escaneos de Docker",
+    )
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="Escanear una vez, imprimir las métricas y salir",
+    )
+
+    args = parser.parse_args()
+
+    exporter = build_exporter(args.metrics_file, args.scan_interval, args.archive_dir)
+
+    if args.once:
+        exporter.cache.refresh()
+        print(exporter.render(), end="")
+        return
+
+    exporter.cache.start()
+    server = create_server(exporter, args.host, args.port)
+    print(f"Sirviendo métricas en http://{args.host}:{args.port}/metrics")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        exporter.cache.stop()
+
+
+if __name__ == "__main__":
+    main()
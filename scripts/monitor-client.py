@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Cliente ligero del daemon del monitor (cleanup-monitor.py --daemon).
+Solo importa la biblioteca estándar y src.monitor_daemon: responde en milisegundos.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.monitor_daemon import (  # noqa: E402
+    DEFAULT_SOCKET,
+    MonitorClient,
+    MonitorDaemonError,
+    format_analysis,
+    format_summary,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consultas al daemon del monitor de limpieza")
+    parser.add_argument(
+        "method",
+        choices=[
+            "summary", "analysis", "report", "inventory", "find", "missing",
+            "status", "refresh", "ping",
+        ],
+    )
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="Socket del daemon")
+    parser.add_argument("--max-age", type=int, default=72, help="Edad máxima en horas")
+    parser.add_argument(
+        "--format",
+        choices=["markdown", "csv", "ndjson", "html"],
+        default="markdown",
+        help="Formato de report",
+    )
+    parser.add_argument(
+        "--kind", choices=["containers", "volumes", "networks"], default="containers",
+        help="Tipo de recurso (find)",
+    )
+    parser.add_argument("--component", help="Componente: app, db, proxy (find, missing)")
+    parser.add_argument("--pr", type=int, help="Número de PR (find)")
+    parser.add_argument("--older-than", type=float, metavar="HOURS", help="Edad mínima (find)")
+    parser.add_argument("--timeout", type=float, default=5, help="Timeout en segundos")
+    parser.add_argument("--json", action="store_true", help="Salida en formato JSON")
+
+    args = parser.parse_args()
+
+    params = {"max_age_hours": args.max_age} if args.method in ("analysis", "report") else {}
+    if args.method == "report":
+        params["fmt"] = args.format
+    elif args.method == "find":
+        params = {
+            "kind": args.kind,
+            "pr_number": args.pr,
+            "component": args.component,
+            "older_than": args.older_than,
+        }
+    elif args.method == "missing":
+        if not args.component:
+            parser.error("missing requiere --component")
+        params = {"component": args.component}
+    try:
+        result = MonitorClient(args.socket, args.timeout).call(args.method, **params)
+    except MonitorDaemonError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.json or args.method in ("inventory", "find", "missing", "status", "refresh"):
+        print(json.dumps(result, indent=2, default=str))
+    elif args.method == "summary":
+        print(format_summary(result))
+    elif args.method == "analysis":
+        print(format_analysis(result))
+    else:
+        sys.stdout.write(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Propone límites de CPU/memoria por componente a partir del uso histórico.
+Lee las muestras que guarda cleanup-monitor.py --usage-history.
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.rightsizing import load_samples, propose_limits, render_tfvars  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Right-sizing de límites por componente de los stacks efímeros"
+    )
+    parser.add_argument(
+        "--samples",
+        default="metrics/usage_samples.jsonl",
+        help="Historial NDJSON de muestras por componente",
+    )
+    parser.add_argument(
+        "--percentile", type=float, default=95, help="Percentil de uso a cubrir"
+    )
+    parser.add_argument(
+        "--headroom", type=float, default=1.3, help="Margen multiplicativo sobre el percentil"
+    )
+    parser.add_argument(
+        "--min-samples",
+        type=int,
+        default=10,
+        help="Muestras mínimas para proponer límites de un componente",
+    )
+    parser.add_argument(
+        "--format", choices=["table", "json", "tfvars"], default="table"
+    )
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.samples):
+        print(f"No se encontró historial de uso: {args.samples}", file=sys.stderr)
+        print(
+            "Generar con: python3 scripts/cleanup-monitor.py --usage "
+            f"--usage-history {args.samples}",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    limits = propose_limits(
+        load_samples(args.samples),
+        pct=args.percentile,
+        headroom=args.headroom,
+        min_samples=args.min_samples,
+    )
+
+    if not limits:
+        print("Muestras insuficientes para proponer límites", file=sys.stderr)
+        sys.exit(1)
+
+    if args.format == "json":
+        print(json.dumps(limits, indent=2))
+    elif args.format == "tfvars":
+        print(
+            render_tfvars(
+                limits,
+                f"p{args.percentile:g} x {args.headroom} de {args.samples}",
+            ),
+            end="",
+        )
+    else:
+        print(
+            f"{'Componente':<10} {'Muestras':>8} {'p mem':>9} {'max mem':>9} "
+            f"{'p CPU':>7} {'Límite mem':>11} {'Límite CPU':>11}"
+        )
+        for component, values in limits.items():
+            print(
+                f"{component:<10} {values['samples']:>8} "
+                f"{values['memory_p_mb']:>7.1f}MB {values['memory_max_mb']:>7.1f}MB "
+                f"{values['cpu_p_percent']:>6.2f}% {values['memory_mb']:>9}MB "
+                f"{values['cpus']:>11}"
+            )
+
+
+if __name__ == "__main__":
+    main()
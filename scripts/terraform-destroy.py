@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Destruye el stack de un PR en el host Docker donde se desplegó (registro del
+último despliegue o, con --docker-hosts, el host donde está el stack).
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src import tracing  # noqa: E402
+from src.federation import HOSTS_ENV, parse_hosts  # noqa: E402
+from src.placement import PlacementScheduler  # noqa: E402
+from src.provisioner import TerraformError, TerraformProvisioner, parse_var  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Destruir el stack de un PR")
+    parser.add_argument("--pr", type=int, required=True, help="Número de PR")
+    parser.add_argument(
+        "--dir", default="infra/terraform/stacks/pr-preview", help="Directorio del stack"
+    )
+    parser.add_argument(
+        "--var", type=parse_var, action="append", default=[], help="Variable nombre=valor"
+    )
+    parser.add_argument("--mirror", help="Mirror local de providers (filesystem_mirror)")
+    parser.add_argument(
+        "--docker-hosts",
+        default=os.environ.get(HOSTS_ENV, ""),
+        help=f"Hosts nombre=unix:///ruta,... donde buscar el stack (default: ${HOSTS_ENV})",
+    )
+    parser.add_argument("--json", action="store_true", help="Salida en JSON")
+
+    tracing.add_arguments(parser)
+
+    args = parser.parse_args()
+    tracing.start(args.trace, args.trace_format, "terraform-destroy")
+
+    try:
+        hosts = parse_hosts(args.docker_hosts)
+    except ValueError as e:
+        parser.error(str(e))
+    scheduler = PlacementScheduler(hosts) if hosts else None
+    provisioner = TerraformProvisioner(args.dir, mirror_dir=args.mirror, scheduler=scheduler)
+    try:
+        result = provisioner.destroy(args.pr, dict(args.var))
+    except TerraformError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        host = result["docker_host"] or "daemon por defecto"
+        print(f"PR #{args.pr}: stack destruido en {host} ({result['duration_seconds']:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Inicializa Terraform reutilizando .terraform, el cache de plugins y el mirror local.
+Omite `terraform init` si el lock file y los módulos no cambiaron.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src import tracing  # noqa: E402
+from src.provisioner import TerraformError, TerraformProvisioner  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="terraform init con cache de plugins, mirror de providers y reutilización"
+    )
+    parser.add_argument(
+        "--dir", default="infra/terraform/stacks/pr-preview", help="Directorio del stack"
+    )
+    parser.add_argument(
+        "--plugin-cache",
+        help="Cache de plugins compartido (default: $TF_PLUGIN_CACHE_DIR o "
+        "~/.terraform.d/plugin-cache)",
+    )
+    parser.add_argument("--mirror", help="Mirror local de providers (filesystem_mirror)")
+    parser.add_argument(
+        "--populate-mirror",
+        action="store_true",
+        help="Poblar el mirror con `terraform providers mirror` antes del init",
+    )
+    parser.add_argument("--force", action="store_true", help="Ejecutar init siempre")
+    parser.add_argument(
+        "--measure",
+        action="store_true",
+        help="Medir init en frío, con cache caliente y reutilizado (borra .terraform)",
+    )
+    parser.add_argument("--json", action="store_true", help="Salida en JSON")
+
+    tracing.add_arguments(parser)
+
+    args = parser.parse_args()
+    tracing.start(args.trace, args.trace_format, "terraform-init")
+
+    provisioner = TerraformProvisioner(args.dir, args.plugin_cache, args.mirror)
+    try:
+        if args.populate_mirror:
+            mirrored = provisioner.mirror_providers()
+            if not args.json:
+                print(
+                    f"Mirror actualizado ({len(mirrored['providers'])} providers, "
+                    f"{mirrored['duration_seconds']:.2f}s)"
+                )
+        result = provisioner.measure_init() if args.measure else provisioner.init(args.force)
+    except TerraformError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    elif args.measure:
+        print("Tiempo de terraform init:")
+        for phase, outcome in result.items():
+            print(f"  {phase:<6} {outcome['duration_seconds']:>8.2f}s  ({outcome['status']})")
+        if result["warm"]["duration_seconds"] > 0:
+            speedup = result["cold"]["duration_seconds"] / result["warm"]["duration_seconds"]
+            print(f"  Cache caliente: {speedup:.1f}x más rápido que en frío")
+    elif result["status"] == "skipped":
+        print(f"terraform init omitido: lock file y módulos sin cambios ({args.dir})")
+    else:
+        print(f"terraform init completado en {result['duration_seconds']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
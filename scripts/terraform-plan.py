@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Plan de Terraform por PR con cache: si módulos, variables y state no cambiaron
+reutiliza el plan guardado (o reporta "sin cambios") sin ejecutar `terraform plan`.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src import tracing  # noqa: E402
+from src.federation import HOSTS_ENV, parse_hosts  # noqa: E402
+from src.placement import PlacementError, PlacementScheduler  # noqa: E402
+from src.provisioner import TerraformError, TerraformProvisioner, parse_var  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="terraform plan con cache por PR")
+    parser.add_argument("--pr", type=int, required=True, help="Número de PR")
+    parser.add_argument(
+        "--dir", default="infra/terraform/stacks/pr-preview", help="Directorio del stack"
+    )
+    parser.add_argument(
+        "--var", type=parse_var, action="append", default=[], help="Variable nombre=valor"
+    )
+    parser.add_argument("--out", help="Copiar el plan guardado a esta ruta (p. ej. tfplan)")
+    parser.add_argument("--show", help="Copiar la salida de `terraform show` a esta ruta")
+    parser.add_argument("--mirror", help="Mirror local de providers (filesystem_mirror)")
+    parser.add_argument(
+        "--docker-hosts",
+        default=os.environ.get(HOSTS_ENV, ""),
+        help=f"Hosts candidatos nombre=unix:///ruta,... para el placement (default: ${HOSTS_ENV})",
+    )
+    parser.add_argument(
+        "--saturation", type=float, default=0.85, help="Presión máxima de un host (0-1)"
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Planificar siempre")
+    parser.add_argument("--clear-cache", action="store_true", help="Borrar el plan cacheado")
+    parser.add_argument(
+        "--detailed-exitcode",
+        action="store_true",
+        help="Como terraform: 0 sin cambios, 2 con cambios, 1 error",
+    )
+    parser.add_argument("--json", action="store_true", help="Salida en JSON")
+
+    tracing.add_arguments(parser)
+
+    args = parser.parse_args()
+    tracing.start(args.trace, args.trace_format, "terraform-plan")
+
+    try:
+        hosts = parse_hosts(args.docker_hosts)
+    except ValueError as e:
+        parser.error(str(e))
+    scheduler = PlacementScheduler(hosts, args.saturation) if hosts else None
+    provisioner = TerraformProvisioner(args.dir, mirror_dir=args.mirror, scheduler=scheduler)
+    if args.clear_cache:
+        provisioner.clear_plan_cache(args.pr)
+        print(f"Plan cacheado del PR #{args.pr} eliminado")
+        return
+
+    try:
+        result = provisioner.plan(
+            args.pr, dict(args.var), out=args.out, use_cache=not args.no_cache
+        )
+    except (TerraformError, PlacementError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if provisioner.last_placement and not args.json:
+        placement = provisioner.last_placement
+        print(f"PR #{args.pr}: host {placement['host']} ({placement['reason']})")
+
+    if args.show:
+        shutil.copyfile(result["plan_output"], args.show)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        messages = {
+            "planned": "plan generado",
+            "cached": "plan reutilizado del cache (entradas sin cambios)",
+            "no_changes": "sin cambios (entradas sin cambios desde el último plan)",
+        }
+        changes = "con cambios" if result["has_changes"] else "sin cambios"
+        print(
+            f"PR #{args.pr}: {messages[result['status']]}, {changes} "
+            f"({result['duration_seconds']:.2f}s)"
+        )
+
+    if args.detailed_exitcode and result["has_changes"]:
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
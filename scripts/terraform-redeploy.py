@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Redespliegue incremental de un stack de PR: aplica solo los componentes cuyas
+entradas cambiaron (p. ej. imagen de la app) y conserva db, red y proxy.
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src import tracing  # noqa: E402
+from src.federation import HOSTS_ENV, parse_hosts  # noqa: E402
+from src.placement import PlacementError, PlacementScheduler  # noqa: E402
+from src.provisioner import TerraformError, TerraformProvisioner, parse_var  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Redespliegue incremental del stack de un PR")
+    parser.add_argument("--pr", type=int, required=True, help="Número de PR")
+    parser.add_argument(
+        "--dir", default="infra/terraform/stacks/pr-preview", help="Directorio del stack"
+    )
+    parser.add_argument(
+        "--var", type=parse_var, action="append", default=[], help="Variable nombre=valor"
+    )
+    parser.add_argument("--mirror", help="Mirror local de providers (filesystem_mirror)")
+    parser.add_argument(
+        "--docker-hosts",
+        default=os.environ.get(HOSTS_ENV, ""),
+        help=f"Hosts candidatos nombre=unix:///ruta,... para el placement (default: ${HOSTS_ENV})",
+    )
+    parser.add_argument(
+        "--saturation", type=float, default=0.85, help="Presión máxima de un host (0-1)"
+    )
+    parser.add_argument("--json", action="store_true", help="Salida en JSON")
+
+    tracing.add_arguments(parser)
+
+    args = parser.parse_args()
+    tracing.start(args.trace, args.trace_format, "terraform-redeploy")
+
+    try:
+        hosts = parse_hosts(args.docker_hosts)
+    except ValueError as e:
+        parser.error(str(e))
+    scheduler = PlacementScheduler(hosts, args.saturation) if hosts else None
+    provisioner = TerraformProvisioner(args.dir, mirror_dir=args.mirror, scheduler=scheduler)
+    try:
+        result = provisioner.redeploy(args.pr, dict(args.var))
+    except (TerraformError, PlacementError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if provisioner.last_placement and not args.json:
+        placement = provisioner.last_placement
+        print(f"PR #{args.pr}: host {placement['host']} ({placement['reason']})")
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    elif result["mode"] == "unchanged":
+        print(f"PR #{args.pr}: sin cambios, nada que redesplegar")
+    elif result["mode"] == "incremental":
+        print(
+            f"PR #{args.pr}: redespliegue incremental de {', '.join(result['components'])} "
+            f"({result['duration_seconds']:.2f}s)"
+        )
+    else:
+        print(f"PR #{args.pr}: apply completo ({result['duration_seconds']:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Exporta los spans de comandos externos (NDJSON de TRACE_SPANS) a Chrome trace
+u OTLP-JSON y resume dónde se fue el tiempo (también de una traza chrome ya
+exportada). Lo usa scripts/lib/trace.sh al salir de un script con TRACE_FILE.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.tracing import FORMATS, load_trace, summarize, write_trace  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exportar spans de comandos externos")
+    parser.add_argument("spans", help="NDJSON con un span por línea o traza en formato chrome")
+    parser.add_argument("--output", help="Archivo de la traza")
+    parser.add_argument("--format", choices=FORMATS, default="chrome", help="Formato de la traza")
+    parser.add_argument("--summary", action="store_true", help="Tiempo total por comando")
+    parser.add_argument("--json", action="store_true", help="Resumen en formato JSON")
+
+    args = parser.parse_args()
+    if not args.output and not args.summary:
+        parser.error("indica --output y/o --summary")
+
+    spans = load_trace(args.spans)
+    if args.output:
+        write_trace(args.output, spans, args.format)
+
+    if args.summary:
+        summary = summarize(spans)
+        if args.json:
+            print(json.dumps(summary, indent=2))
+            return
+        print(f"{'Comando':<24} {'Llamadas':>8} {'Total':>9} {'Máx.':>8} {'Errores':>7}")
+        for entry in summary:
+            print(
+                f"{entry['command']:<24} {entry['calls']:>8} "
+                f"{entry['total_seconds']:>8.2f}s {entry['max_seconds']:>7.2f}s "
+                f"{entry['errors']:>7}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -77,8 +77,9 @@ if [ $? -eq 0 ]; then
         fi
         
         echo ""
-        echo "Para ver el dashboard completo:"
-        echo "  file://$(realpath "$DASHBOARD_FILE")"
+        echo "Para ver el dashboard completo (el historial se carga por HTTP):"
+        echo "  python3 -m http.server -d $(realpath "$DASHBOARD_DIR") 8000"
+        echo "  http://localhost:8000/$(basename "$DASHBOARD_FILE")"
     fi
 else
     log_error "Error generando dashboard"
@@ -8,6 +8,9 @@ set -e
 PR_NUMBER=$1
 TERRAFORM_DIR=${2:-"infra/terraform/stacks/pr-preview"}
 
+# Con TRACE_FILE cada llamada a docker/terraform queda en la traza
+source "$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)/lib/trace.sh"
+
 # Colores para output
 RED='\033[0;31m'
 GREEN='\033[0;32m'
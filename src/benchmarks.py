@@ -0,0 +1,217 @@
+"""Micro-benchmarks de CleanupMonitor y TrendsAnalyzer con datos sintéticos."""
+
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+from unittest import mock
+
+from src.commands import CommandRunner, set_runner
+from src.synthetic import cli_outputs, synthetic_fleet, write_metrics_history
+
+PROFILES = {
+    "quick": {"resources": (1_000,), "events": (10_000,)},
+    "full": {"resources": (1_000, 10_000, 100_000), "events": (10_000, 100_000, 1_000_000)},
+}
+
+# Por debajo de este tiempo el ruido domina y no se reportan regresiones
+NOISE_FLOOR_SECONDS = 0.005
+
+
+def measure(fn: Callable[[], object], repeat: int = 3, warmup: int = 1) -> Dict[str, float]:
+    """Ejecuta `fn` `repeat` veces (tras `warmup` corridas descartadas); retorna min/mediana/max."""
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "max": max(timings),
+        "runs": repeat,
+    }
+
+
+@contextmanager
+def fake_docker_cli(outputs: Dict[str, str]):
+    """Reemplaza `subprocess.run` para que `docker ps/volume/network` devuelvan `outputs`."""
+
+    def run(cmd, *args, **kwargs):
+        stdout = outputs.get(cmd[1], "") if len(cmd) > 1 and cmd[0] == "docker" else ""
+        return subprocess.CompletedProcess(cmd, 0, stdout=stdout, stderr="")
+
+    with mock.patch.object(subprocess, "run", run):
+        yield
+
+
+def monitor_cases(monitor_module, resources: int) -> Dict[str, Callable]:
+    """Casos de CleanupMonitor sobre una flota sintética de `resources` recursos."""
+    now = datetime.now(timezone.utc)
+    outputs = cli_outputs(synthetic_fleet(resources, now=now), now=now)
+
+    def case(method: str, *args):
+        def run():
+            with fake_docker_cli(outputs):
+                return getattr(monitor_module.CleanupMonitor(), method)(*args)
+
+        return run
+
+    return {
+        f"scan_ephemeral_resources[{resources}]": case("scan_ephemeral_resources"),
+        f"analyze_cleanup_needs[{resources}]": case("analyze_cleanup_needs", 72),
+        f"generate_cleanup_report[{resources}]": case("generate_cleanup_report", 72),
+    }
+
+
+@contextmanager
+def replay_commands(runner: CommandRunner):
+    """Los comandos del monitor se responden desde el cassette de `runner`."""
+    previous = set_runner(runner)
+    try:
+        yield
+    finally:
+        set_runner(previous)
+
+
+def cassette_cases(monitor_module, cassette: str) -> Dict[str, Callable]:
+    """
+    Casos de CleanupMonitor sobre salidas reales de docker grabadas en un
+    cassette (COMMAND_MODE=record), reproducidas sin ejecutar comandos.
+    """
+    runner = CommandRunner("replay", cassette)
+    label = os.path.splitext(os.path.basename(cassette))[0]
+
+    def case(method: str, *args):
+        def run():
+            with replay_commands(runner):
+                return getattr(monitor_module.CleanupMonitor(), method)(*args)
+
+        return run
+
+    return {
+        f"scan_ephemeral_resources[{label}]": case("scan_ephemeral_resources"),
+        f"analyze_cleanup_needs[{label}]": case("analyze_cleanup_needs", 72),
+        f"generate_cleanup_report[{label}]": case("generate_cleanup_report", 72),
+    }
+
+
+def api_cases(monitor_module, docker_host: str, resources: int) -> Dict[str, Callable]:
+    """Casos de CleanupMonitor leyendo el inventario por la Engine API (daemon falso)."""
+    return {
+        f"scan_ephemeral_resources_api[{resources}]": lambda: monitor_module.CleanupMonitor(
+            docker_host
+        ).scan_ephemeral_resources(),
+    }
+
+
+def trends_cases(dashboard_module, events: int, workdir: str) -> Dict[str, Callable]:
+    """Casos de TrendsAnalyzer/DashboardGenerator sobre `events` operaciones y checks."""
+    metrics_file = os.path.join(workdir, f"operations-{events}.json")
+    if not os.path.exists(metrics_file):
+        write_metrics_history(metrics_file, events, events // 10)
+
+    analyzer = dashboard_module.TrendsAnalyzer(metrics_file)
+    output = os.path.join(workdir, f"trends-{events}.html")
+
+    return {
+        f"load_metrics[{events}]": lambda: dashboard_module.TrendsAnalyzer(metrics_file),
+        f"get_operation_trends[{events}]": lambda: analyzer.get_operation_trends(30),
+        f"latency_percentiles[{events}]": lambda: analyzer.latency_percentiles("deploy", 30),
+        f"generate_html_dashboard[{events}]": lambda: dashboard_module.DashboardGenerator(
+            analyzer
+        ).generate_html_dashboard(output, 30),
+    }
+
+
+def run_suite(
+    cases: Dict[str, Callable],
+    repeat: int = 3,
+    progress: Optional[Callable[[str, Dict], None]] = None,
+    warmup: int = 1,
+) -> Dict[str, Dict[str, float]]:
+    """Mide todos los casos en orden."""
+    results = {}
+    for name, fn in cases.items():
+        results[name] = measure(fn, repeat, warmup)
+        if progress:
+            progress(name, results[name])
+    return results
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    threshold: float = 0.25,
+) -> List[Dict]:
+    """
+    Compara el tiempo mínimo de cada caso (el menos ruidoso) contra el baseline.
+
+    Args:
+        results: Resultados actuales de `run_suite`
+        baseline: Resultados guardados
+        threshold: Aumento relativo tolerado (0.25 = 25%)
+
+    Returns:
+        Lista de casos comparables con `ratio` y `regression`
+    """
+    comparisons = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous or previous.get("min", 0) <= 0:
+            continue
+
+        ratio = current["min"] / previous["min"]
+        comparisons.append(
+            {
+                "name": name,
+                "baseline": previous["min"],
+                "current": current["min"],
+                "ratio": ratio,
+                "regression": ratio > 1 + threshold
+                and current["min"] >= NOISE_FLOOR_SECONDS,
+            }
+        )
+    return comparisons
+
+
+def load_baseline(path: str) -> Dict[str, Dict[str, float]]:
+    """Lee los resultados de un baseline guardado (vacío si no existe)."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f).get("results", {})
+
+
+def save_baseline(
+    path: str,
+    results: Dict[str, Dict[str, float]],
+    previous: Optional[Dict[str, Dict[str, float]]] = None,
+) -> None:
+    """Guarda resultados con metadatos del host; conserva los casos de `previous` no medidos."""
+    merged = dict(previous or {})
+    merged.update(results)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(
+            {
+                "recorded_at": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "results": merged,
+            },
+            f,
+            indent=2,
+            sort_keys=True,
+        )
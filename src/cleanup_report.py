@@ -0,0 +1,243 @@
+"""Reporte de limpieza en streaming: Markdown, CSV, NDJSON y HTML sobre las mismas filas."""
+
+import csv
+import html
+import json
+from typing import Dict, Iterator, List, Optional, TextIO
+
+KINDS = ("containers", "volumes", "networks")
+COLUMNS = ("kind", "name", "state", "age_hours", "pr_number", "created_at", "host")
+
+SECTIONS = {
+    "containers": ("Contenedores para Limpiar", "Estado"),
+    "volumes": ("Volúmenes para Limpiar", "Driver"),
+    "networks": ("Redes para Limpiar", "Driver"),
+}
+
+
+def candidate_rows(resources: Dict[str, List[Dict]], max_age_hours: float) -> Iterator[Dict]:
+    """
+    Recorre el inventario y emite una fila por recurso más antiguo que `max_age_hours`.
+
+    Las filas se generan bajo demanda, agrupadas por tipo en el orden de
+    `KINDS`; no se construye ninguna lista intermedia.
+    """
+    for kind in KINDS:
+        for resource in resources.get(kind, []):
+            age = resource.get("age_hours")
+            if age and age > max_age_hours:
+                yield {
+                    "kind": kind,
+                    "name": resource["name"],
+                    "state": resource.get("status") or resource.get("driver") or "",
+                    "age_hours": age,
+                    "pr_number": resource.get("pr_number"),
+                    "created_at": resource.get("created_at", ""),
+                    "host": resource.get("host", ""),
+                }
+
+
+def summarize(
+    resources: Dict[str, List[Dict]],
+    max_age_hours: float,
+    analysis_time: Optional[str] = None,
+) -> Dict:
+    """Totales y conteo de candidatos en una pasada (sin guardar las filas)."""
+    candidates = {kind: 0 for kind in KINDS}
+    pr_numbers = set()
+    for row in candidate_rows(resources, max_age_hours):
+        candidates[row["kind"]] += 1
+        if row["pr_number"]:
+            pr_numbers.add(row["pr_number"])
+    return {
+        "analysis_time": analysis_time,
+        "max_age_hours": max_age_hours,
+        "totals": {kind: len(resources.get(kind, [])) for kind in KINDS},
+        "candidates": candidates,
+        "pr_numbers": sorted(pr_numbers),
+        "hosts": resources.get("hosts", {}),
+    }
+
+
+def _age(row: Dict) -> str:
+    return f"{row['age_hours']: .1f}" if row["age_hours"] else "N/A"
+
+
+def _name(row: Dict) -> str:
+    # En un inventario federado el mismo nombre puede existir en varios hosts
+    return f"{row['host']}/{row['name']}" if row["host"] else row["name"]
+
+
+def _pr(row: Dict) -> str:
+    return f"#{row['pr_number']}" if row["pr_number"] else "N/A"
+
+
+class ReportRenderer:
+    """Renderer base: `start` con el resumen, `row` por candidato y `finish`."""
+
+    # Los formatos con encabezado de totales requieren una pasada previa de conteo
+    needs_summary = True
+
+    def __init__(self, out: TextIO):
+        self.out = out
+
+    def start(self, summary: Optional[Dict]) -> None:
+        pass
+
+    def row(self, row: Dict) -> None:
+        raise NotImplementedError
+
+    def finish(self, summary: Optional[Dict]) -> None:
+        pass
+
+
+class MarkdownRenderer(ReportRenderer):
+    """Reporte Markdown con una tabla por tipo de recurso."""
+
+    def __init__(self, out: TextIO):
+        super().__init__(out)
+        self._kind = None
+
+    def start(self, summary: Dict) -> None:
+        totals, candidates = summary["totals"], summary["candidates"]
+        write = self.out.write
+        write("# Reporte de Análisis de Limpieza\n\n")
+        write(f"**Fecha de análisis**: {summary['analysis_time']}\n")
+        write(f"**Edad máxima permitida**: {summary['max_age_hours']} horas\n\n")
+        write("## Resumen de Recursos\n\n")
+        write(f"- **Contenedores efímeros**: {totals['containers']}\n")
+        write(f"- **Volúmenes efímeros**: {totals['volumes']}\n")
+        write(f"- **Redes efímeras**: {totals['networks']}\n\n")
+        if summary["hosts"]:
+            write("## Hosts\n\n")
+            for name, host in sorted(summary["hosts"].items()):
+                state = "OK" if host["status"] == "ok" else f"ERROR ({host['error']})"
+                write(f"- **{name}**: {state}, {host['containers']} contenedores\n")
+            write("\n")
+        write("## Candidatos para Limpieza\n\n")
+        write(f"- **Contenedores antiguos**: {candidates['containers']}\n")
+        write(f"- **Volúmenes antiguos**: {candidates['volumes']}\n")
+        write(f"- **Redes antiguas**: {candidates['networks']}\n")
+        write(f"- **PRs afectados**: {len(summary['pr_numbers'])}\n\n")
+
+        if summary["pr_numbers"]:
+            write("### PRs con Recursos Antiguos\n\n")
+            for pr_number in summary["pr_numbers"]:
+                write(f"- PR #{pr_number}\n")
+            write("\n")
+
+    def row(self, row: Dict) -> None:
+        if row["kind"] != self._kind:
+            if self._kind is not None:
+                self.out.write("\n")
+            self._kind = row["kind"]
+            title, state = SECTIONS[row["kind"]]
+            self.out.write(f"### {title}\n\n")
+            self.out.write(f"| Nombre | {state} | Edad (h) | PR |\n")
+            self.out.write("|--------|---------|----------|----|\n")
+        self.out.write(f"| {_name(row)} | {row['state']} | {_age(row)} | {_pr(row)} |\n")
+
+    def finish(self, summary: Dict) -> None:
+        if self._kind is not None:
+            self.out.write("\n")
+        if not summary["pr_numbers"]:
+            self.out.write("  **No se encontraron recursos que requieran limpieza.**\n")
+
+
+class CSVRenderer(ReportRenderer):
+    """Una fila CSV por candidato, con encabezado."""
+
+    needs_summary = False
+
+    def start(self, summary: Optional[Dict]) -> None:
+        self.writer = csv.DictWriter(self.out, fieldnames=COLUMNS, lineterminator="\n")
+        self.writer.writeheader()
+
+    def row(self, row: Dict) -> None:
+        self.writer.writerow(row)
+
+
+class NDJSONRenderer(ReportRenderer):
+    """Un objeto JSON por línea y por candidato."""
+
+    needs_summary = False
+
+    def row(self, row: Dict) -> None:
+        self.out.write(json.dumps(row, default=str) + "\n")
+
+
+class HTMLRenderer(ReportRenderer):
+    """Página HTML autocontenida con una única tabla de candidatos."""
+
+    def start(self, summary: Dict) -> None:
+        totals, candidates = summary["totals"], summary["candidates"]
+        self.out.write(
+            "<!DOCTYPE html>\n<html lang=\"es\">\n<head>\n<meta charset=\"utf-8\">\n"
+            "<title>Reporte de Análisis de Limpieza</title>\n"
+            "<style>body{font-family:sans-serif}table{border-collapse:collapse}"
+            "td,th{border:1px solid #ccc;padding:4px 8px}</style>\n</head>\n<body>\n"
+            "<h1>Reporte de Análisis de Limpieza</h1>\n"
+            f"<p>Fecha de análisis: {html.escape(str(summary['analysis_time']))}<br>"
+            f"Edad máxima permitida: {summary['max_age_hours']} horas</p>\n"
+            "<table>\n<tr><th></th><th>Total</th><th>Candidatos</th></tr>\n"
+        )
+        for kind, (title, _) in SECTIONS.items():
+            self.out.write(
+                f"<tr><td>{title.split()[0]}</td><td>{totals[kind]}</td>"
+                f"<td>{candidates[kind]}</td></tr>\n"
+            )
+        self.out.write(
+            f"</table>\n<p>PRs afectados: {len(summary['pr_numbers'])}</p>\n"
+            "<table>\n<tr><th>Tipo</th><th>Nombre</th><th>Estado</th>"
+            "<th>Edad (h)</th><th>PR</th></tr>\n"
+        )
+
+    def row(self, row: Dict) -> None:
+        cells = (row["kind"], _name(row), row["state"], _age(row), _pr(row))
+        self.out.write(
+            "<tr>" + "".join(f"<td>{html.escape(str(cell))}</td>" for cell in cells) + "</tr>\n"
+        )
+
+    def finish(self, summary: Dict) -> None:
+        self.out.write("</table>\n</body>\n</html>\n")
+
+
+RENDERERS = {
+    "markdown": MarkdownRenderer,
+    "csv": CSVRenderer,
+    "ndjson": NDJSONRenderer,
+    "html": HTMLRenderer,
+}
+
+
+def write_report(
+    out: TextIO,
+    resources: Dict[str, List[Dict]],
+    max_age_hours: float,
+    fmt: str = "markdown",
+    analysis_time: Optional[str] = None,
+) -> int:
+    """
+    Escribe el reporte de limpieza en `out` fila por fila.
+
+    CSV y NDJSON se escriben en una sola pasada con memoria constante.
+    Markdown y HTML hacen antes una pasada de conteo para el encabezado, que
+    solo guarda el conjunto de PRs afectados. En ningún caso se arma el
+    reporte completo en memoria.
+
+    Returns:
+        Número de candidatos escritos
+    """
+    if fmt not in RENDERERS:
+        raise ValueError(f"Formato de reporte inválido: {fmt}")
+    renderer = RENDERERS[fmt](out)
+    summary = (
+        summarize(resources, max_age_hours, analysis_time) if renderer.needs_summary else None
+    )
+    renderer.start(summary)
+    written = 0
+    for row in candidate_rows(resources, max_age_hours):
+        renderer.row(row)
+        written += 1
+    renderer.finish(summary)
+    return written
@@ -0,0 +1,340 @@
+"""
+Capa única de ejecución de comandos externos (docker, terraform, gh, jq).
+
+- Timeout por llamada, por defecto según la herramienta: un `docker` colgado
+  ya no bloquea el monitor. El corte se reporta como `CommandTimeout`, que es
+  un `subprocess.CalledProcessError` para que los `except` existentes lo atrapen.
+- Semáforo global: como mucho N comandos a la vez en todo el proceso, aunque
+  los lancen varios hilos (teardown por lotes, escaneo federado).
+- Tracing: cada comando queda como span (src/tracing.py).
+- Cassettes: en modo `record` se guardan argv y salidas de cada comando; en
+  `replay` se responden desde el cassette sin ejecutar nada, para tests y
+  benchmarks rápidos y deterministas.
+"""
+
+import atexit
+import io
+import json
+import os
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from src import tracing
+
+MODE_ENV = "COMMAND_MODE"
+CASSETTE_ENV = "COMMAND_CASSETTE"
+CONCURRENCY_ENV = "COMMAND_CONCURRENCY"
+TIMEOUT_ENV = "COMMAND_TIMEOUT"
+MODES = ("live", "record", "replay")
+DEFAULT_CONCURRENCY = 8
+# Segundos por herramienta; terraform apply/destroy puede tardar varios minutos
+DEFAULT_TIMEOUTS = {"docker": 60.0, "gh": 30.0, "jq": 30.0, "terraform": 1800.0}
+FALLBACK_TIMEOUT = 300.0
+
+_runner: Optional["CommandRunner"] = None
+_runner_lock = threading.Lock()
+
+
+class CommandTimeout(subprocess.CalledProcessError):
+    """Comando cortado por exceder su timeout (proceso terminado con SIGKILL)."""
+
+    def __init__(self, cmd: List[str], timeout: float, output=None, stderr=None):
+        super().__init__(-9, cmd, output, stderr)
+        self.timeout = timeout
+
+    def __str__(self) -> str:
+        return f"{' '.join(self.cmd)} excedió el timeout de {self.timeout:g}s"
+
+
+class CommandNotFound(subprocess.CalledProcessError, FileNotFoundError):
+    """Herramienta no instalada: exit code 127 como en la shell (también es FileNotFoundError)."""
+
+    def __init__(self, cmd: List[str]):
+        subprocess.CalledProcessError.__init__(self, 127, cmd)
+
+    def __str__(self) -> str:
+        return f"{self.cmd[0]}: no está instalado o no está en el PATH"
+
+
+class CommandNotRecorded(LookupError):
+    """Comando sin grabación en el cassette (modo replay)."""
+
+
+def _argv(cmd) -> List[str]:
+    return cmd.split() if isinstance(cmd, str) else [str(arg) for arg in cmd]
+
+
+def _as_text(output) -> Optional[str]:
+    if isinstance(output, bytes):
+        return output.decode("utf-8", errors="surrogateescape")
+    return output if isinstance(output, str) else None
+
+
+class Cassette:
+    """
+    Interacciones grabadas (argv -> exit code, stdout, stderr) en orden.
+
+    En replay, las llamadas repetidas a un mismo argv reciben sus
+    grabaciones en orden y, agotadas, la última (p. ej. el modo --watch).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.interactions: List[Dict] = []
+        self._played: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        try:
+            with open(path, "r") as f:
+                self.interactions = json.load(f)["interactions"]
+        except (OSError, json.JSONDecodeError, KeyError):
+            pass
+
+    @staticmethod
+    def key(argv: List[str]) -> str:
+        return json.dumps(argv)
+
+    def record(self, argv: List[str], **interaction) -> None:
+        with self._lock:
+            self.interactions.append({"argv": argv, **interaction})
+
+    def replay(self, argv: List[str]) -> Dict:
+        key = self.key(argv)
+        with self._lock:
+            matches = [i for i in self.interactions if self.key(i["argv"]) == key]
+            if not matches:
+                raise CommandNotRecorded(f"Comando sin grabar en {self.path}: {' '.join(argv)}")
+            played = self._played.get(key, 0)
+            self._played[key] = played + 1
+            return matches[min(played, len(matches) - 1)]
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"version": 1, "interactions": self.interactions}, f, indent=1)
+        os.replace(tmp, self.path)
+
+
+class CommandRunner:
+    """Ejecuta comandos con timeout, límite de concurrencia, spans y cassettes."""
+
+    def __init__(
+        self,
+        mode: str = "live",
+        cassette: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        timeouts: Optional[Dict[str, float]] = None,
+        default_timeout: Optional[float] = None,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Modo desconocido: {mode} (válidos: {', '.join(MODES)})")
+        if mode != "live" and not cassette:
+            raise ValueError(f"El modo {mode} requiere un cassette")
+        self.mode = mode
+        self.cassette = Cassette(cassette) if cassette else None
+        self.max_concurrency = max_concurrency or DEFAULT_CONCURRENCY
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self.timeouts = dict(DEFAULT_TIMEOUTS, **(timeouts or {}))
+        self.default_timeout = default_timeout or FALLBACK_TIMEOUT
+        # Comandos en curso y máximo observado (para verificar el semáforo)
+        self.active = 0
+        self.peak = 0
+        self._count_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "CommandRunner":
+        """Runner según COMMAND_MODE, COMMAND_CASSETTE, COMMAND_CONCURRENCY y COMMAND_TIMEOUT."""
+        concurrency = os.environ.get(CONCURRENCY_ENV)
+        timeout = os.environ.get(TIMEOUT_ENV)
+        return cls(
+            os.environ.get(MODE_ENV, "live"),
+            os.environ.get(CASSETTE_ENV),
+            int(concurrency) if concurrency else None,
+            # Un COMMAND_TIMEOUT explícito vale para todas las herramientas
+            {tool: float(timeout) for tool in DEFAULT_TIMEOUTS} if timeout else None,
+            float(timeout) if timeout else None,
+        )
+
+    def timeout_for(self, argv: List[str]) -> float:
+        return self.timeouts.get(os.path.basename(argv[0]), self.default_timeout)
+
+    @contextmanager
+    def _slot(self) -> Iterator[None]:
+        with self._slots:
+            with self._count_lock:
+                self.active += 1
+                self.peak = max(self.peak, self.active)
+            try:
+                yield
+            finally:
+                with self._count_lock:
+                    self.active -= 1
+
+    def run(self, cmd, timeout: Optional[float] = None, check: bool = False, **kwargs):
+        """
+        Como `subprocess.run(cmd, **kwargs)`, con el timeout de la herramienta
+        si no se indica `timeout`.
+
+        Raises:
+            CommandTimeout: si el comando excede el timeout
+            CommandNotFound: si la herramienta no está instalada
+            subprocess.CalledProcessError: con `check=True` y exit code distinto de 0
+            CommandNotRecorded: en replay, si el comando no está en el cassette
+        """
+        argv = _argv(cmd)
+        timeout = timeout or self.timeout_for(argv)
+        with tracing.command(argv) as attributes:
+            if self.mode == "replay":
+                attributes["command.replayed"] = True
+                result = self._replay(argv, kwargs)
+            else:
+                started = time.monotonic()
+                try:
+                    with self._slot():
+                        result = subprocess.run(cmd, timeout=timeout, **kwargs)
+                except subprocess.TimeoutExpired as e:
+                    self._record_error(argv, "timeout", timeout)
+                    raise CommandTimeout(argv, timeout, e.output, e.stderr) from None
+                except FileNotFoundError:
+                    self._record_error(argv, "not_found")
+                    raise CommandNotFound(argv) from None
+                if self.mode == "record":
+                    self.cassette.record(
+                        argv,
+                        returncode=result.returncode,
+                        stdout=_as_text(result.stdout),
+                        stderr=_as_text(result.stderr),
+                        duration_seconds=round(time.monotonic() - started, 3),
+                    )
+            tracing.record_result(attributes, result)
+
+        if check and result.returncode != 0:
+            raise subprocess.CalledProcessError(
+                result.returncode, argv, result.stdout, result.stderr
+            )
+        return result
+
+    def _record_error(self, argv: List[str], error: str, timeout: Optional[float] = None) -> None:
+        if self.mode == "record":
+            self.cassette.record(argv, error=error, timeout=timeout, returncode=None)
+
+    def _replay(self, argv: List[str], kwargs: Dict) -> subprocess.CompletedProcess:
+        interaction = self.cassette.replay(argv)
+        if interaction.get("error") == "timeout":
+            raise CommandTimeout(argv, interaction["timeout"])
+        if interaction.get("error") == "not_found":
+            raise CommandNotFound(argv)
+        captured = kwargs.get("capture_output") or kwargs.get("stdout") == subprocess.PIPE
+        text = kwargs.get("text") or kwargs.get("universal_newlines")
+
+        def output(value: Optional[str]):
+            if not captured or value is None:
+                return None
+            return value if text else value.encode("utf-8", errors="surrogateescape")
+
+        return subprocess.CompletedProcess(
+            argv,
+            interaction["returncode"],
+            output(interaction.get("stdout")),
+            output(interaction.get("stderr")),
+        )
+
+    @contextmanager
+    def stream(self, cmd, timeout: Optional[float] = None) -> Iterator[Iterator[str]]:
+        """
+        stdout de un comando línea a línea (p. ej. `docker stats`) mientras corre.
+
+        Si el comando excede el timeout se mata y, al salir del bloque, se
+        lanza `CommandTimeout`; si termina con exit code distinto de 0 se
+        lanza `subprocess.CalledProcessError` (como `run(check=True)`).
+        stderr se descarta.
+        """
+        argv = _argv(cmd)
+        timeout = timeout or self.timeout_for(argv)
+        with tracing.command(argv) as attributes:
+            if self.mode == "replay":
+                attributes["command.replayed"] = True
+                result = self._replay(argv, {"capture_output": True, "text": True})
+                yield io.StringIO(result.stdout or "")
+                attributes["command.exit_code"] = result.returncode
+                if result.returncode != 0:
+                    raise subprocess.CalledProcessError(result.returncode, argv, result.stdout)
+                return
+
+            expired = threading.Event()
+            with self._slot():
+                started = time.monotonic()
+                try:
+                    proc = subprocess.Popen(
+                        cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+                    )
+                except FileNotFoundError:
+                    self._record_error(argv, "not_found")
+                    raise CommandNotFound(argv) from None
+                with proc:
+
+                    def kill():
+                        expired.set()
+                        proc.kill()
+
+                    timer = threading.Timer(timeout, kill)
+                    timer.start()
+                    try:
+                        if self.mode == "record":
+                            output = proc.stdout.read()
+                            yield io.StringIO(output)
+                        else:
+                            yield proc.stdout
+                    finally:
+                        timer.cancel()
+
+            if expired.is_set():
+                self._record_error(argv, "timeout", timeout)
+                raise CommandTimeout(argv, timeout)
+            attributes["command.exit_code"] = proc.returncode
+            if self.mode == "record":
+                self.cassette.record(
+                    argv,
+                    returncode=proc.returncode,
+                    stdout=output,
+                    stderr=None,
+                    duration_seconds=round(time.monotonic() - started, 3),
+                )
+            if proc.returncode != 0:
+                raise subprocess.CalledProcessError(proc.returncode, argv)
+
+    def save(self) -> None:
+        """Escribe el cassette (solo en modo record)."""
+        if self.mode == "record":
+            self.cassette.save()
+
+
+def get_runner() -> CommandRunner:
+    """Runner del proceso; se crea desde el entorno en el primer uso."""
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = CommandRunner.from_env()
+            atexit.register(_runner.save)
+        return _runner
+
+
+def set_runner(runner: Optional[CommandRunner]) -> Optional[CommandRunner]:
+    """Reemplaza el runner del proceso (None: se recrea desde el entorno). Retorna el anterior."""
+    global _runner
+    with _runner_lock:
+        previous, _runner = _runner, runner
+    return previous
+
+
+def run(cmd, **kwargs):
+    """`CommandRunner.run` del runner del proceso."""
+    return get_runner().run(cmd, **kwargs)
+
+
+def stream(cmd, timeout: Optional[float] = None):
+    """`CommandRunner.stream` del runner del proceso."""
+    return get_runner().stream(cmd, timeout)
@@ -0,0 +1,192 @@
+"""Shards JSON por día y por mes para el dashboard de trends (carga bajo demanda)."""
+
+import hashlib
+import json
+import os
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+INDEX_FILE = "index.json"
+# Versión del formato de los shards: cambiarla fuerza la reescritura completa
+SHARD_FORMAT = 1
+
+
+def day_key(event: Dict) -> str:
+    """Fecha (YYYY-MM-DD) del evento, igual que la agrupación diaria del analizador."""
+    return event["timestamp"][:10]
+
+
+def _digest(payload: Dict) -> str:
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+def _day_totals(operations: List[Dict], checks: List[Dict]) -> Dict:
+    """Agregados de un día: una fila de la tabla mensual."""
+    deploy_times = [
+        op["duration_seconds"]
+        for op in operations
+        if op["operation"] == "deploy" and op["status"] == "success"
+    ]
+    zero_drift = sum(1 for check in checks if check["drift_percent"] == 0)
+    return {
+        "operations": len(operations),
+        "deploys": sum(1 for op in operations if op["operation"] == "deploy"),
+        "destroys": sum(1 for op in operations if op["operation"] == "destroy"),
+        "failures": sum(1 for op in operations if op["status"] == "failed"),
+        "deploy_mean_seconds": (
+            round(sum(deploy_times) / len(deploy_times), 1) if deploy_times else None
+        ),
+        "total_checks": len(checks),
+        "zero_drift": zero_drift,
+        "compliance_rate": round(zero_drift / len(checks) * 100, 1) if checks else None,
+    }
+
+
+class ShardWriter:
+    """
+    Escribe el historial de métricas como shards JSON bajo `data_dir`.
+
+    - `days/YYYY-MM-DD.json`: eventos crudos del día (operaciones y drift)
+    - `months/YYYY-MM.json`: una fila agregada por día con datos
+    - `index.json`: meses disponibles con totales y el hash de cada shard
+
+    La escritura es incremental: un shard se reescribe solo si cambió el
+    hash de su contenido respecto del índice anterior, y los shards de días
+    que ya no tienen eventos se eliminan.
+    """
+
+    def __init__(self, data_dir: str):
+        self.data_dir = data_dir
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.data_dir, name)
+
+    def load_index(self) -> Dict:
+        """Índice de la generación anterior (vacío si no existe o es de otro formato)."""
+        try:
+            with open(self._path(INDEX_FILE), "r") as f:
+                index = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+        return index if index.get("format") == SHARD_FORMAT else {}
+
+    def _write_json(self, name: str, payload: Dict) -> None:
+        path = self._path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(payload, f, separators=(",", ":"), default=str)
+        os.replace(tmp, path)
+
+    def _load_month(self, month: str) -> List[Dict]:
+        try:
+            with open(self._path(f"months/{month}.json"), "r") as f:
+                return json.load(f).get("days", [])
+        except (OSError, json.JSONDecodeError):
+            return []
+
+    @staticmethod
+    def group(operations: Iterable[Dict], drift_checks: Iterable[Dict]) -> Dict[str, Dict]:
+        """Agrupa los eventos por día, ordenados por timestamp."""
+        days: Dict[str, Dict] = defaultdict(lambda: {"operations": [], "drift_checks": []})
+        for op in operations:
+            days[day_key(op)]["operations"].append(op)
+        for check in drift_checks:
+            days[day_key(check)]["drift_checks"].append(check)
+        for events in days.values():
+            events["operations"].sort(key=lambda e: e["timestamp"])
+            events["drift_checks"].sort(key=lambda e: e["timestamp"])
+        return days
+
+    def write(
+        self,
+        operations: Iterable[Dict],
+        drift_checks: Iterable[Dict],
+        force: bool = False,
+        generated_at: Optional[str] = None,
+        keep_before: Optional[str] = None,
+    ) -> Dict[str, int]:
+        """
+        Genera o actualiza los shards a partir del historial completo.
+
+        Args:
+            operations: Operaciones deploy/destroy (formato de operations.json)
+            drift_checks: Verificaciones de drift
+            force: Reescribir todos los shards aunque no hayan cambiado
+            generated_at: Timestamp a registrar en el índice
+            keep_before: Día YYYY-MM-DD; los días anteriores sin eventos en
+                la entrada conservan su shard (historial archivado que no se
+                cargó) y su fila del shard mensual
+
+        Returns:
+            Cantidad de shards escritos, sin cambios y eliminados
+        """
+        previous = {} if force else self.load_index().get("shards", {})
+        days = self.group(operations, drift_checks)
+
+        shards: Dict[str, Dict] = {}
+        months: Dict[str, Dict] = defaultdict(dict)
+        for date, events in days.items():
+            totals = _day_totals(events["operations"], events["drift_checks"])
+            shards[f"days/{date}.json"] = {"date": date, "totals": totals, **events}
+            months[date[:7]][date] = totals
+
+        kept: Dict[str, str] = {}
+        if keep_before:
+            kept = {
+                name: digest
+                for name, digest in previous.items()
+                if name.startswith("days/")
+                and name[5:15] < keep_before
+                and name[5:15] not in days
+                and os.path.exists(self._path(name))
+            }
+            for month in sorted({name[5:12] for name in kept}):
+                for row in self._load_month(month):
+                    if f"days/{row['date']}.json" in kept:
+                        months[month][row["date"]] = {k: v for k, v in row.items() if k != "date"}
+
+        month_index = []
+        for month, month_days in months.items():
+            rows = [{"date": date, **month_days[date]} for date in sorted(month_days)]
+            shards[f"months/{month}.json"] = {"month": month, "days": rows}
+            month_index.append(
+                {
+                    "month": month,
+                    "days": len(rows),
+                    "operations": sum(row["operations"] for row in rows),
+                    "failures": sum(row["failures"] for row in rows),
+                    "drift_checks": sum(row["total_checks"] for row in rows),
+                }
+            )
+
+        stats = {"written": 0, "unchanged": 0, "removed": 0}
+        hashes = dict(kept)
+        stats["unchanged"] += len(kept)
+        for name, payload in shards.items():
+            hashes[name] = _digest(payload)
+            if previous.get(name) == hashes[name] and os.path.exists(self._path(name)):
+                stats["unchanged"] += 1
+                continue
+            self._write_json(name, payload)
+            stats["written"] += 1
+
+        for name in set(previous) - set(hashes):
+            try:
+                os.unlink(self._path(name))
+                stats["removed"] += 1
+            except FileNotFoundError:
+                pass
+
+        self._write_json(
+            INDEX_FILE,
+            {
+                "format": SHARD_FORMAT,
+                "generated_at": generated_at or datetime.now().isoformat(timespec="seconds"),
+                "months": sorted(month_index, key=lambda m: m["month"], reverse=True),
+                "shards": hashes,
+            },
+        )
+        return stats
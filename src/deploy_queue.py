@@ -0,0 +1,290 @@
+"""Cola de despliegues por PR: coalescencia, prioridades y límite de applies concurrentes."""
+
+import os
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.monitor_daemon import MonitorDaemonError, SocketRPCServer
+from src.quantile_sketch import DDSketch
+
+DEFAULT_QUEUE_SOCKET = os.environ.get("EPHEMERAL_DEPLOY_QUEUE_SOCKET", "/tmp/ephemeral-deploy.sock")
+ACTIONS = ("destroy", "deploy")
+# Menor valor = mayor prioridad: un destroy libera capacidad para los deploys
+PRIORITY = {"destroy": 0, "deploy": 1}
+
+
+class DeployQueue:
+    """
+    Cola delante de `TerraformProvisioner`.
+
+    - Coalescencia: un PR tiene a lo sumo un trabajo pendiente; una nueva
+      petición lo reemplaza (gana la última) y conserva su antigüedad.
+    - Debounce: un deploy espera `debounce` segundos sin pushes nuevos antes
+      de ejecutarse; los destroys no esperan.
+    - Un PR nunca tiene dos applies simultáneos; lo que llega mientras corre
+      queda pendiente para después.
+    - Como máximo `max_concurrent` trabajos a la vez; primero los destroys,
+      después los deploys por orden de llegada.
+    - Admisión: con `max_pending` PRs en espera se rechazan deploys de PRs
+      nuevos (los destroys y las coalescencias se admiten siempre).
+
+    Args:
+        handlers: `{"deploy": fn(pr, variables), "destroy": fn(pr, variables)}`
+        max_concurrent: Trabajos ejecutándose a la vez
+        debounce: Segundos de espera de un deploy desde su última petición
+        max_pending: PRs en espera antes de rechazar deploys nuevos
+        clock: Reloj monotónico (inyectable en tests)
+    """
+
+    def __init__(
+        self,
+        handlers: Dict[str, Callable[[int, Dict], Optional[Dict]]],
+        max_concurrent: int = 1,
+        debounce: float = 10.0,
+        max_pending: int = 50,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent debe ser al menos 1")
+        self.handlers = handlers
+        self.max_concurrent = max_concurrent
+        self.debounce = debounce
+        self.max_pending = max_pending
+        self.clock = clock
+        self.pending: Dict[int, Dict] = {}
+        self.running: Dict[int, Dict] = {}
+        self.counters: Counter = Counter()
+        self.wait_seconds = {action: DDSketch() for action in ACTIONS}
+        self.history: deque = deque(maxlen=100)
+        self._cond = threading.Condition()
+        self._workers: List[threading.Thread] = []
+        self._stopping = False
+
+    @classmethod
+    def for_provisioner(
+        cls, provisioner_for: Callable[[int], Any], **options
+    ) -> "DeployQueue":
+        """
+        Cola que despliega con `redeploy` (incremental) y destruye con `destroy`.
+
+        `provisioner_for(pr)` crea el provisioner de cada trabajo; debe usar un
+        workspace por PR (`workspace=f"pr-{pr}"`) para que cada stack tenga su
+        propio state y un apply no reemplace los recursos de otro PR.
+        """
+        return cls(
+            {
+                "deploy": lambda pr, variables: provisioner_for(pr).redeploy(pr, variables),
+                "destroy": lambda pr, variables: provisioner_for(pr).destroy(pr, variables),
+            },
+            **options,
+        )
+
+    def submit(
+        self, pr_number: int, action: str = "deploy", variables: Optional[Dict] = None
+    ) -> Dict:
+        """
+        Encola una petición.
+
+        Returns:
+            Dict con `status` (`queued`, `coalesced` o `rejected`), `pr_number`,
+            `action` y `depth` (PRs en espera)
+        """
+        if action not in ACTIONS:
+            raise ValueError(f"Acción inválida: {action}")
+        pr_number = int(pr_number)
+        now = self.clock()
+        with self._cond:
+            self.counters["submitted"] += 1
+            job = self.pending.get(pr_number)
+            if job is None and action == "deploy" and len(self.pending) >= self.max_pending:
+                self.counters["rejected"] += 1
+                return self._receipt("rejected", pr_number, action)
+
+            if job is None:
+                job = {"pr_number": pr_number, "enqueued_at": now, "requests": 0}
+                self.pending[pr_number] = job
+                status = "queued"
+            else:
+                self.counters["coalesced"] += 1
+                status = "coalesced"
+            job.update(
+                {
+                    "action": action,
+                    "variables": dict(variables or {}),
+                    "ready_at": now + (self.debounce if action == "deploy" else 0),
+                }
+            )
+            job["requests"] += 1
+            self._cond.notify_all()
+            return self._receipt(status, pr_number, action)
+
+    def _receipt(self, status: str, pr_number: int, action: str) -> Dict:
+        return {
+            "status": status,
+            "pr_number": pr_number,
+            "action": action,
+            "depth": len(self.pending),
+        }
+
+    def _take(self) -> Tuple[Optional[Dict], Optional[float]]:
+        """Siguiente trabajo ejecutable, o el tiempo hasta que alguno lo sea."""
+        if len(self.running) >= self.max_concurrent:
+            return None, None
+        now = self.clock()
+        ready, next_at = [], None
+        for pr_number, job in self.pending.items():
+            if pr_number in self.running:
+                continue
+            if job["ready_at"] <= now:
+                ready.append(job)
+            elif next_at is None or job["ready_at"] < next_at:
+                next_at = job["ready_at"]
+        if not ready:
+            return None, (next_at - now) if next_at is not None else None
+        job = min(ready, key=lambda j: (PRIORITY[j["action"]], j["enqueued_at"], j["pr_number"]))
+        del self.pending[job["pr_number"]]
+        job["started_at"] = now
+        self.running[job["pr_number"]] = job
+        return job, None
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                job = None
+                while job is None:
+                    if self._stopping and not self.pending:
+                        return
+                    job, delay = self._take()
+                    if job is None:
+                        self._cond.wait(delay)
+            self._run(job)
+
+    def _run(self, job: Dict) -> None:
+        wait = job["started_at"] - job["enqueued_at"]
+        error, result = None, None
+        try:
+            result = self.handlers[job["action"]](job["pr_number"], job["variables"])
+        except Exception as e:  # noqa: BLE001 - un fallo no debe detener la cola
+            error = f"{type(e).__name__}: {e}"
+        duration = self.clock() - job["started_at"]
+
+        with self._cond:
+            del self.running[job["pr_number"]]
+            self.wait_seconds[job["action"]].add(wait)
+            self.counters["failed" if error else "completed"] += 1
+            self.history.append(
+                {
+                    "pr_number": job["pr_number"],
+                    "action": job["action"],
+                    "requests": job["requests"],
+                    "wait_seconds": round(wait, 3),
+                    "duration_seconds": round(duration, 3),
+                    "error": error,
+                    "result": result,
+                }
+            )
+            self._cond.notify_all()
+
+    def start(self) -> "DeployQueue":
+        """Inicia `max_concurrent` workers."""
+        self._stopping = False
+        self._workers = [
+            threading.Thread(target=self._worker, name=f"deploy-queue-{i}", daemon=True)
+            for i in range(self.max_concurrent)
+        ]
+        for worker in self._workers:
+            worker.start()
+        return self
+
+    def stop(self, drain: bool = True, timeout: Optional[float] = None) -> None:
+        """Detiene los workers; con `drain` antes ejecuta lo pendiente sin esperar el debounce."""
+        with self._cond:
+            if drain:
+                for job in self.pending.values():
+                    job["ready_at"] = min(job["ready_at"], self.clock())
+            else:
+                self.pending.clear()
+            self._stopping = True
+            self._cond.notify_all()
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que no queden trabajos pendientes ni en ejecución."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self.pending or self.running:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def metrics(self) -> Dict:
+        """Profundidad, trabajos en curso, contadores y percentiles del tiempo de espera."""
+        with self._cond:
+            now = self.clock()
+            return {
+                "depth": len(self.pending),
+                "depth_by_action": dict(Counter(j["action"] for j in self.pending.values())),
+                "running": sorted(self.running),
+                "max_concurrent": self.max_concurrent,
+                "oldest_wait_seconds": round(
+                    max((now - j["enqueued_at"] for j in self.pending.values()), default=0), 3
+                ),
+                "counters": {
+                    key: self.counters[key]
+                    for key in ("submitted", "coalesced", "rejected", "completed", "failed")
+                },
+                "wait_seconds": {
+                    action: dict(
+                        sketch.percentiles((50, 95, 99)),
+                        count=sketch.count,
+                        mean=round(sketch.mean, 3) if sketch.count else None,
+                    )
+                    for action, sketch in self.wait_seconds.items()
+                },
+            }
+
+    def __enter__(self) -> "DeployQueue":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+class DeployQueueDaemon(SocketRPCServer):
+    """Expone una `DeployQueue` por socket unix (métodos `submit`, `metrics`, `history`)."""
+
+    thread_name = "deploy-queue"
+
+    def __init__(self, queue: DeployQueue, socket_path: str = DEFAULT_QUEUE_SOCKET):
+        super().__init__(socket_path)
+        self.queue = queue
+        self.methods.update(
+            {
+                "submit": self._submit,
+                "metrics": self.queue.metrics,
+                "history": lambda limit=20: list(self.queue.history)[-int(limit):],
+            }
+        )
+
+    def _submit(self, pr_number, action="deploy", variables=None) -> Dict:
+        try:
+            return self.queue.submit(int(pr_number), action, variables)
+        except ValueError as e:
+            raise MonitorDaemonError(str(e))
+
+    def start(self) -> "DeployQueueDaemon":
+        """Abre el socket e inicia los workers."""
+        super().start()
+        self.queue.start()
+        return self
+
+    def stop(self) -> None:
+        """Cierra el socket y termina lo pendiente."""
+        super().stop()
+        self.queue.stop(drain=True)
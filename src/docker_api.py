@@ -0,0 +1,129 @@
+"""Cliente mínimo de la Docker Engine API sobre socket unix (sin dependencias)."""
+
+import http.client
+import json
+import socket
+from typing import Dict, List, Optional
+from urllib.parse import quote, urlencode
+
+DEFAULT_DOCKER_HOST = "unix:///var/run/docker.sock"
+API_VERSION = "v1.43"
+
+
+class DockerAPIError(Exception):
+    """Error devuelto por la Engine API (status HTTP y mensaje)."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+        self.message = message
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection que conecta a un socket unix."""
+
+    def __init__(self, socket_path: str, timeout: float = 10):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+
+def _filters(filters: Optional[Dict[str, List[str]]]) -> Dict[str, str]:
+    return {"filters": json.dumps(filters)} if filters else {}
+
+
+class DockerAPIClient:
+    """
+    Cliente de la Engine API para los endpoints que usan las herramientas.
+
+    Solo soporta `unix://`; una conexión por petición, como el CLI de Docker.
+    """
+
+    def __init__(self, docker_host: str = DEFAULT_DOCKER_HOST, timeout: float = 10):
+        if not docker_host.startswith("unix://"):
+            raise ValueError(f"Solo se soportan hosts unix://, recibido: {docker_host}")
+        self.socket_path = docker_host[len("unix://"):]
+        self.timeout = timeout
+
+    def request(self, method: str, path: str, query: Optional[Dict] = None):
+        """Ejecuta una petición y retorna el JSON de respuesta (o None)."""
+        url = f"/{API_VERSION}{path}"
+        if query:
+            url += "?" + urlencode(query)
+
+        conn = UnixHTTPConnection(self.socket_path, self.timeout)
+        try:
+            conn.request(method, url)
+            response = conn.getresponse()
+            body = response.read()
+        finally:
+            conn.close()
+
+        if response.status >= 400:
+            try:
+                message = json.loads(body).get("message", "")
+            except (json.JSONDecodeError, AttributeError):
+                message = body.decode("utf-8", "replace")
+            raise DockerAPIError(response.status, message)
+
+        if not body:
+            return None
+        try:
+            return json.loads(body)
+        except json.JSONDecodeError:
+            return body.decode("utf-8", "replace")
+
+    def ping(self) -> bool:
+        """Verifica que el daemon responda."""
+        try:
+            return self.request("GET", "/_ping") == "OK"
+        except (OSError, DockerAPIError):
+            return False
+
+    def info(self) -> Dict:
+        """`GET /info` (memoria total, CPUs, contenedores)."""
+        return self.request("GET", "/info") or {}
+
+    def container_stats(self, container: str) -> Dict:
+        """`GET /containers/{id}/stats` con una sola muestra (`stream=0`)."""
+        return self.request("GET", f"/containers/{quote(container)}/stats", {"stream": "0"}) or {}
+
+    def containers(
+        self, include_stopped: bool = True, filters: Optional[Dict[str, List[str]]] = None
+    ) -> List[Dict]:
+        """`GET /containers/json` (`all=1` salvo `include_stopped=False`)."""
+        query = {"all": "1" if include_stopped else "0", **_filters(filters)}
+        return self.request("GET", "/containers/json", query) or []
+
+    def volumes(self, filters: Optional[Dict[str, List[str]]] = None) -> List[Dict]:
+        """`GET /volumes` (solo la lista de volúmenes)."""
+        return (self.request("GET", "/volumes", _filters(filters)) or {}).get(
+            "Volumes"
+        ) or []
+
+    def networks(self, filters: Optional[Dict[str, List[str]]] = None) -> List[Dict]:
+        """`GET /networks`."""
+        return self.request("GET", "/networks", _filters(filters)) or []
+
+    def container_action(self, container: str, action: str) -> None:
+        """`POST /containers/{id}/{stop|start|pause|unpause}`."""
+        self.request("POST", f"/containers/{quote(container)}/{action}")
+
+    def remove_container(self, container: str, force: bool = True) -> None:
+        """`DELETE /containers/{id}`."""
+        self.request(
+            "DELETE", f"/containers/{quote(container)}", {"force": "1" if force else "0"}
+        )
+
+    def remove_volume(self, name: str) -> None:
+        """`DELETE /volumes/{name}`."""
+        self.request("DELETE", f"/volumes/{quote(name)}")
+
+    def remove_network(self, network: str) -> None:
+        """`DELETE /networks/{id}`."""
+        self.request("DELETE", f"/networks/{quote(network)}")
@@ -0,0 +1,242 @@
+"""Motor de políticas de desalojo para la limpieza de stacks efímeros."""
+
+from typing import Dict, List, Optional, Tuple
+
+# Estados de PR cuyo stack ya no tiene dueño
+DEAD_PR_STATES = ("CLOSED", "MERGED", "NOT_FOUND")
+
+PR_STATE_SCORES = {
+    "CLOSED": 1.0,
+    "MERGED": 1.0,
+    "NOT_FOUND": 1.0,
+    "UNKNOWN": 0.5,
+    "OPEN": 0.0,
+}
+
+
+class EvictionPolicy:
+    """
+    Política base: puntúa un stack entre 0 (conservar) y 1 (desalojar).
+
+    Cada stack es un dict con `pr_number`, `age_hours`, `idle_hours`,
+    `pr_state`, `memory_bytes` y `disk_bytes`. `prepare` recibe la flota
+    completa una vez por ranking para precalcular normalizaciones.
+    """
+
+    name = "base"
+
+    def prepare(self, fleet: List[Dict]):
+        pass
+
+    def score(self, stack: Dict) -> float:
+        raise NotImplementedError
+
+
+class _NormalizedPolicy(EvictionPolicy):
+    """Puntúa un campo numérico relativo al máximo de la flota."""
+
+    field = ""
+
+    def __init__(self, field: Optional[str] = None):
+        if field:
+            self.field = field
+        self.top = 0
+
+    def prepare(self, fleet: List[Dict]):
+        self.top = max((s.get(self.field) or 0 for s in fleet), default=0)
+
+    def score(self, stack: Dict) -> float:
+        return (stack.get(self.field) or 0) / self.top if self.top > 0 else 0.0
+
+
+class LRUPolicy(_NormalizedPolicy):
+    """Prioriza los stacks que llevan más tiempo sin peticiones."""
+
+    name = "lru"
+    field = "idle_hours"
+
+
+class AgePolicy(_NormalizedPolicy):
+    """Prioriza los stacks más antiguos."""
+
+    name = "age"
+    field = "age_hours"
+
+
+class PRStatePolicy(EvictionPolicy):
+    """Prioriza stacks de PRs cerrados, mergeados o inexistentes."""
+
+    name = "pr_state"
+
+    def score(self, stack: Dict) -> float:
+        return PR_STATE_SCORES.get(stack.get("pr_state", "UNKNOWN"), 0.5)
+
+
+class FootprintPolicy(EvictionPolicy):
+    """Prioriza los stacks que más memoria y disco ocupan."""
+
+    name = "footprint"
+
+    def prepare(self, fleet: List[Dict]):
+        self.memory = _NormalizedPolicy("memory_bytes")
+        self.memory.prepare(fleet)
+        self.disk = _NormalizedPolicy("disk_bytes")
+        self.disk.prepare(fleet)
+
+    def score(self, stack: Dict) -> float:
+        return max(self.memory.score(stack), self.disk.score(stack))
+
+
+POLICIES = {
+    policy.name: policy
+    for policy in (LRUPolicy, PRStatePolicy, FootprintPolicy, AgePolicy)
+}
+
+DEFAULT_WEIGHTS = {"lru": 1.0, "pr_state": 2.0, "footprint": 1.0, "age": 0.5}
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """
+    Parsea pesos de políticas en formato `lru=1,pr_state=2`.
+
+    Raises:
+        ValueError: Si una política no existe o el peso no es numérico
+    """
+    weights = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = item.partition("=")
+        if name not in POLICIES:
+            raise ValueError(
+                f"Política desconocida: {name} (disponibles: {', '.join(POLICIES)})"
+            )
+        weights[name] = float(value)
+    return weights
+
+
+class EvictionEngine:
+    """
+    Combina políticas ponderadas y desaloja stacks hasta cumplir un presupuesto.
+
+    Los stacks de PRs muertos o por encima de `max_age_hours` se desalojan
+    siempre. Si el uso restante supera el presupuesto de memoria o disco, se
+    desalojan stacks por ranking; con más presión pesa más el tamaño, de modo
+    que cada borrado libere la mayor capacidad posible.
+    """
+
+    def __init__(
+        self,
+        weights: Optional[Dict[str, float]] = None,
+        memory_budget: Optional[int] = None,
+        disk_budget: Optional[int] = None,
+        max_age_hours: Optional[float] = 72,
+        policies: Optional[List[EvictionPolicy]] = None,
+    ):
+        self.weights = dict(DEFAULT_WEIGHTS if weights is None else weights)
+        self.memory_budget = memory_budget
+        self.disk_budget = disk_budget
+        self.max_age_hours = max_age_hours
+        self.policies = policies or [
+            POLICIES[name]() for name in self.weights if name in POLICIES
+        ]
+
+    def pressure(self, stacks: List[Dict]) -> float:
+        """Uso de la flota relativo al presupuesto más ajustado (1.0 = lleno)."""
+        ratios = [0.0]
+        if self.memory_budget:
+            used = sum(s.get("memory_bytes", 0) for s in stacks)
+            ratios.append(used / self.memory_budget)
+        if self.disk_budget:
+            used = sum(s.get("disk_bytes", 0) for s in stacks)
+            ratios.append(used / self.disk_budget)
+        return max(ratios)
+
+    def rank(self, stacks: List[Dict]) -> List[Dict]:
+        """Ordena los stacks de mayor a menor prioridad de desalojo."""
+        pressure = self.pressure(stacks)
+        for policy in self.policies:
+            policy.prepare(stacks)
+
+        ranked = []
+        for stack in stacks:
+            breakdown = {}
+            total = 0.0
+            for policy in self.policies:
+                weight = self.weights.get(policy.name, 1.0)
+                if policy.name == FootprintPolicy.name:
+                    weight *= max(1.0, pressure)
+                breakdown[policy.name] = round(policy.score(stack), 4)
+                total += weight * breakdown[policy.name]
+            ranked.append({**stack, "score": round(total, 4), "scores": breakdown})
+
+        ranked.sort(key=lambda s: (-s["score"], s["pr_number"]))
+        return ranked
+
+    def _mandatory_reason(self, stack: Dict) -> Optional[str]:
+        if stack.get("pr_state") in DEAD_PR_STATES:
+            return f"PR {stack['pr_state']}"
+        age = stack.get("age_hours")
+        if self.max_age_hours is not None and age and age > self.max_age_hours:
+            return f"edad > {self.max_age_hours}h"
+        return None
+
+    def _over_budget(self, memory: int, disk: int) -> bool:
+        if self.memory_budget and memory > self.memory_budget:
+            return True
+        return bool(self.disk_budget and disk > self.disk_budget)
+
+    def select(self, stacks: List[Dict]) -> Dict:
+        """
+        Decide qué stacks desalojar.
+
+        Returns:
+            Dict con `evict` (PRs en orden), `reasons`, `ranking`,
+            `pressure_before` y `pressure_after`
+        """
+        ranking = self.rank(stacks)
+        evict: List[int] = []
+        reasons: Dict[int, str] = {}
+        remaining: List[Dict] = []
+
+        for stack in ranking:
+            reason = self._mandatory_reason(stack)
+            if reason:
+                evict.append(stack["pr_number"])
+                reasons[stack["pr_number"]] = reason
+            else:
+                remaining.append(stack)
+
+        # Desalojar por ranking hasta volver al presupuesto
+        memory = sum(s.get("memory_bytes", 0) for s in remaining)
+        disk = sum(s.get("disk_bytes", 0) for s in remaining)
+        evicted = 0
+        while evicted < len(remaining) and self._over_budget(memory, disk):
+            stack = remaining[evicted]
+            evicted += 1
+            memory -= stack.get("memory_bytes", 0)
+            disk -= stack.get("disk_bytes", 0)
+            evict.append(stack["pr_number"])
+            reasons[stack["pr_number"]] = f"presión de recursos (score {stack['score']})"
+        remaining = remaining[evicted:]
+
+        return {
+            "evict": evict,
+            "reasons": reasons,
+            "ranking": [
+                {
+                    "pr_number": s["pr_number"],
+                    "score": s["score"],
+                    "scores": s["scores"],
+                }
+                for s in ranking
+            ],
+            "pressure_before": round(self.pressure(stacks), 4),
+            "pressure_after": round(self.pressure(remaining), 4),
+        }
+
+
+def freed_capacity(stacks: List[Dict], evicted: List[int]) -> Tuple[int, int]:
+    """Memoria y disco (bytes) liberados al desalojar los PRs indicados."""
+    doomed = set(evicted)
+    memory = sum(s.get("memory_bytes", 0) for s in stacks if s["pr_number"] in doomed)
+    disk = sum(s.get("disk_bytes", 0) for s in stacks if s["pr_number"] in doomed)
+    return memory, disk
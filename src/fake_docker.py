@@ -0,0 +1,469 @@
+"""Daemon falso de la Docker Engine API sobre socket unix, para pruebas de carga."""
+
+import json
+import os
+import random
+import re
+import socketserver
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlparse
+
+from src.synthetic import api_containers, api_networks, api_volumes
+
+API_VERSION = "1.43"
+VERSION_PREFIX_RE = re.compile(r"^/v\d+\.\d+")
+CONTAINER_ACTIONS = {
+    "stop": "exited",
+    "kill": "exited",
+    "start": "running",
+    "restart": "running",
+    "pause": "paused",
+    "unpause": "running",
+}
+STATE_STATUS = {
+    "running": "Up Less than a second",
+    "exited": "Exited (0) Less than a second ago",
+    "paused": "Up Less than a second (Paused)",
+}
+
+
+class FakeDockerError(Exception):
+    """Error que el daemon responde como `{"message": ...}`."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _matches_labels(labels: Dict[str, str], wanted: List[str]) -> bool:
+    for item in wanted:
+        key, sep, value = item.partition("=")
+        if key not in labels or (sep and labels[key] != value):
+            return False
+    return True
+
+
+def _name_of(resource: Dict) -> str:
+    names = resource.get("Names")
+    return names[0].lstrip("/") if names else resource.get("Name", "")
+
+
+def _matches(resource: Dict, filters: Dict[str, List[str]]) -> bool:
+    """Semántica de filtros de Docker: labels en AND, el resto de valores en OR."""
+    for key, values in filters.items():
+        if key == "label":
+            if not _matches_labels(resource.get("Labels") or {}, values):
+                return False
+        elif key == "name":
+            if not any(v in _name_of(resource) for v in values):
+                return False
+        elif key == "status":
+            if resource.get("State") not in values:
+                return False
+        elif key == "id":
+            ident = resource.get("Id", "")
+            if not any(ident.startswith(v) for v in values):
+                return False
+    return True
+
+
+def _parse_filters(query: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    raw = query.get("filters", ["{}"])[0]
+    try:
+        filters = json.loads(raw)
+    except json.JSONDecodeError:
+        raise FakeDockerError(400, f"filtros inválidos: {raw}")
+    # El CLI antiguo envía {"label": {"k=v": true}}
+    return {
+        key: list(value) if isinstance(value, (dict, list)) else [value]
+        for key, value in filters.items()
+    }
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+    # Como dockerd, admite ráfagas de conexiones concurrentes (el default es 5)
+    request_queue_size = 128
+
+
+class FakeDockerDaemon:
+    """
+    Simula un daemon de Docker con una flota de recursos efímeros.
+
+    Implementa los endpoints que usan el CLI (`ps`, `volume ls`,
+    `network ls`, `stop/start/pause/rm`) y el cliente `DockerAPIClient`.
+    Volúmenes y redes en uso no se pueden borrar, como en Docker.
+
+    Args:
+        socket_path: Ruta del socket unix a crear
+        fleet: Flota de `synthetic_fleet` (vacía si se omite)
+        latency: Segundos de espera por petición
+        jitter: Segundos extra aleatorios (uniforme 0..jitter)
+        failure_rate: Probabilidad de responder 500 a cualquier petición
+        seed: Semilla de latencia y fallos (resultados deterministas)
+        mem_total: Memoria del host reportada por `/info` (bytes)
+        ncpus: CPUs del host reportadas por `/info`
+    """
+
+    def __init__(
+        self,
+        socket_path: str,
+        fleet: Optional[Dict[str, List[Dict]]] = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        failure_rate: float = 0.0,
+        seed: int = 0,
+        mem_total: int = 8 << 30,
+        ncpus: int = 4,
+    ):
+        self.socket_path = socket_path
+        self.mem_total = mem_total
+        self.ncpus = ncpus
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.requests: Counter = Counter()
+        self.failures_injected = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._scripted: List[Dict] = []
+        self._server: Optional[socketserver.ThreadingUnixStreamServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+        fleet = fleet or {"containers": [], "volumes": [], "networks": []}
+        self.containers: Dict[str, Dict] = {c["Id"]: c for c in api_containers(fleet)}
+        # Uso (memoria, % CPU) que reporta `/stats` mientras el contenedor corre
+        self.usage: Dict[str, tuple] = {
+            c["id"]: c.get("usage", (0, 0.0)) for c in fleet["containers"]
+        }
+        self.volumes: Dict[str, Dict] = {
+            v["Name"]: v for v in api_volumes(fleet)["Volumes"]
+        }
+        self.networks: Dict[str, Dict] = {n["Id"]: n for n in api_networks(fleet)}
+
+        # Índices para que búsquedas y borrados no recorran la flota
+        self._container_names = {_name_of(c): c["Id"] for c in self.containers.values()}
+        self._network_names = {n["Name"]: n["Id"] for n in self.networks.values()}
+        self._volume_refs: Counter = Counter()
+        self._network_refs: Counter = Counter()
+        for container in self.containers.values():
+            self._track_refs(container, 1)
+
+    @property
+    def docker_host(self) -> str:
+        """Valor para `DOCKER_HOST` o `DockerAPIClient`."""
+        return f"unix://{self.socket_path}"
+
+    def inject_failure(
+        self, method: str, path_pattern: str, times: int = 1, status: int = 500
+    ) -> None:
+        """Hace fallar las próximas `times` peticiones que coincidan con método y regex."""
+        with self._lock:
+            self._scripted.append(
+                {
+                    "method": method.upper(),
+                    "pattern": re.compile(path_pattern),
+                    "remaining": times,
+                    "status": status,
+                }
+            )
+
+    def _injected_status(self, method: str, path: str) -> Optional[int]:
+        with self._lock:
+            for rule in self._scripted:
+                if rule["remaining"] > 0 and rule["method"] == method and rule[
+                    "pattern"
+                ].search(path):
+                    rule["remaining"] -= 1
+                    self.failures_injected += 1
+                    return rule["status"]
+            if self.failure_rate and self._rng.random() < self.failure_rate:
+                self.failures_injected += 1
+                return 500
+        return None
+
+    def _delay(self) -> float:
+        if not self.latency and not self.jitter:
+            return 0.0
+        with self._lock:
+            return self.latency + self._rng.uniform(0, self.jitter)
+
+    # -- Recursos -----------------------------------------------------------
+
+    def _track_refs(self, container: Dict, delta: int) -> None:
+        for mount in container.get("Mounts", []):
+            self._volume_refs[mount.get("Name")] += delta
+        for network in container.get("NetworkSettings", {}).get("Networks", {}):
+            self._network_refs[network] += delta
+
+    def _find_container(self, ref: str) -> Dict:
+        container_id = ref if ref in self.containers else self._container_names.get(ref)
+        if container_id:
+            return self.containers[container_id]
+        for candidate in self.containers.values():
+            if candidate["Id"].startswith(ref):
+                return candidate
+        raise FakeDockerError(404, f"No such container: {ref}")
+
+    def _find_network(self, ref: str) -> Dict:
+        network_id = ref if ref in self.networks else self._network_names.get(ref)
+        if network_id:
+            return self.networks[network_id]
+        for candidate in self.networks.values():
+            if candidate["Id"].startswith(ref):
+                return candidate
+        raise FakeDockerError(404, f"network {ref} not found")
+
+    def handle(self, method: str, raw_path: str) -> Tuple[int, object]:
+        """Resuelve una petición y retorna `(status, cuerpo)`."""
+        url = urlparse(raw_path)
+        path = VERSION_PREFIX_RE.sub("", unquote(url.path))
+        query = parse_qs(url.query)
+        parts = [p for p in path.split("/") if p]
+
+        with self._lock:
+            self.requests[(method, "/" + "/".join(parts[:1]))] += 1
+
+        status = self._injected_status(method, path)
+        if status:
+            return status, {"message": "fallo inyectado por el daemon falso"}
+
+        try:
+            return self._route(method, parts, query)
+        except FakeDockerError as e:
+            return e.status, {"message": e.message}
+
+    def _route(self, method: str, parts: List[str], query: Dict) -> Tuple[int, object]:
+        with self._lock:
+            if parts == ["_ping"]:
+                return 200, "OK"
+            if parts == ["version"]:
+                return 200, {
+                    "Version": "fake",
+                    "ApiVersion": API_VERSION,
+                    "MinAPIVersion": "1.24",
+                    "Os": "linux",
+                    "Arch": "amd64",
+                }
+            if parts == ["info"]:
+                running = sum(1 for c in self.containers.values() if c["State"] == "running")
+                return 200, {
+                    "Containers": len(self.containers),
+                    "ContainersRunning": running,
+                    "Name": "fake-docker",
+                    "MemTotal": self.mem_total,
+                    "NCPU": self.ncpus,
+                }
+            if parts[:1] == ["containers"]:
+                return self._containers(method, parts[1:], query)
+            if parts[:1] == ["volumes"]:
+                return self._volumes(method, parts[1:], query)
+            if parts[:1] == ["networks"]:
+                return self._networks(method, parts[1:], query)
+            if parts == ["system", "df"]:
+                return 200, {
+                    "Containers": [
+                        dict(c, SizeRw=4096, SizeRootFs=50_000_000)
+                        for c in self.containers.values()
+                    ],
+                    "Volumes": [
+                        dict(v, UsageData={"Size": 10_000_000, "RefCount": 1})
+                        for v in self.volumes.values()
+                    ],
+                    "Images": [],
+                }
+        raise FakeDockerError(404, "page not found")
+
+    def _containers(self, method: str, parts: List[str], query: Dict):
+        if method == "GET" and parts == ["json"]:
+            filters = _parse_filters(query)
+            include_all = query.get("all", ["0"])[0] in ("1", "true", "True")
+            return 200, [
+                c
+                for c in self.containers.values()
+                if (include_all or c["State"] == "running") and _matches(c, filters)
+            ]
+
+        if not parts:
+            raise FakeDockerError(404, "page not found")
+        container = self._find_container(parts[0])
+
+        if method == "GET" and parts[1:] == ["json"]:
+            return 200, {
+                "Id": container["Id"],
+                "Name": "/" + _name_of(container),
+                "Created": datetime.fromtimestamp(
+                    container["Created"], timezone.utc
+                ).isoformat(),
+                "State": {
+                    "Status": container["State"],
+                    "Running": container["State"] == "running",
+                    "Paused": container["State"] == "paused",
+                },
+                "Config": {"Labels": container["Labels"], "Image": container["Image"]},
+                "Mounts": container.get("Mounts", []),
+                "NetworkSettings": container.get("NetworkSettings", {}),
+            }
+
+        if method == "GET" and parts[1:] == ["stats"]:
+            return 200, self._stats(container)
+
+        if method == "POST" and len(parts) == 2 and parts[1] in CONTAINER_ACTIONS:
+            container["State"] = CONTAINER_ACTIONS[parts[1]]
+            container["Status"] = STATE_STATUS[container["State"]]
+            return 204, None
+
+        if method == "DELETE" and len(parts) == 1:
+            force = query.get("force", ["0"])[0] in ("1", "true", "True")
+            if container["State"] in ("running", "paused") and not force:
+                raise FakeDockerError(
+                    409, f"cannot remove container {_name_of(container)}: container is running"
+                )
+            del self.containers[container["Id"]]
+            del self._container_names[_name_of(container)]
+            self._track_refs(container, -1)
+            return 204, None
+
+        raise FakeDockerError(404, "page not found")
+
+    def _stats(self, container: Dict) -> Dict:
+        """Muestra de `/stats`: dos lecturas de CPU separadas por un segundo de sistema."""
+        if container["State"] != "running":
+            return {"memory_stats": {}, "cpu_stats": {}, "precpu_stats": {}}
+        memory, cpu_percent = self.usage.get(container["Id"], (0, 0.0))
+        system = 10**9 * self.ncpus
+        return {
+            "memory_stats": {"usage": memory, "stats": {"inactive_file": 0}},
+            "cpu_stats": {
+                "cpu_usage": {"total_usage": 10**12 + int(cpu_percent / 100 * 10**9)},
+                "system_cpu_usage": 10**13 + system,
+                "online_cpus": self.ncpus,
+            },
+            "precpu_stats": {
+                "cpu_usage": {"total_usage": 10**12},
+                "system_cpu_usage": 10**13,
+            },
+        }
+
+    def _volumes(self, method: str, parts: List[str], query: Dict):
+        if method == "GET" and not parts:
+            filters = _parse_filters(query)
+            return 200, {
+                "Volumes": [v for v in self.volumes.values() if _matches(v, filters)],
+                "Warnings": None,
+            }
+
+        if method == "DELETE" and len(parts) == 1:
+            name = parts[0]
+            if name not in self.volumes:
+                raise FakeDockerError(404, f"get {name}: no such volume")
+            if self._volume_refs[name] > 0:
+                raise FakeDockerError(409, f"remove {name}: volume is in use")
+            del self.volumes[name]
+            return 204, None
+
+        raise FakeDockerError(404, "page not found")
+
+    def _networks(self, method: str, parts: List[str], query: Dict):
+        if method == "GET" and not parts:
+            filters = _parse_filters(query)
+            return 200, [n for n in self.networks.values() if _matches(n, filters)]
+
+        if len(parts) == 1:
+            network = self._find_network(parts[0])
+            if method == "GET":
+                return 200, network
+            if method == "DELETE":
+                if self._network_refs[network["Name"]] > 0:
+                    raise FakeDockerError(
+                        403,
+                        f"error while removing network: network {network['Name']} "
+                        f"id {network['Id']} has active endpoints",
+                    )
+                del self.networks[network["Id"]]
+                del self._network_names[network["Name"]]
+                return 204, None
+
+        raise FakeDockerError(404, "page not found")
+
+    # -- Servidor -----------------------------------------------------------
+
+    def _handler(self):
+        daemon = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _serve(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+
+                delay = daemon._delay()
+                if delay:
+                    time.sleep(delay)
+
+                status, body = daemon.handle(self.command, self.path)
+                if body is None:
+                    payload, content_type = b"", "application/json"
+                elif isinstance(body, str):
+                    payload, content_type = body.encode(), "text/plain; charset=utf-8"
+                else:
+                    payload, content_type = json.dumps(body).encode(), "application/json"
+
+                self.send_response(status)
+                self.send_header("Api-Version", API_VERSION)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                if payload and self.command != "HEAD":
+                    try:
+                        self.wfile.write(payload)
+                    except (BrokenPipeError, ConnectionResetError):
+                        # El cliente cerró la conexión (ej. timeout); como dockerd, se ignora
+                        self.close_connection = True
+
+            do_GET = do_POST = do_DELETE = do_HEAD = _serve
+
+            def address_string(self):
+                return "fake-docker"
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "FakeDockerDaemon":
+        """Crea el socket y atiende peticiones en un hilo."""
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._server = _UnixServer(self.socket_path, self._handler())
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            kwargs={"poll_interval": 0.05},
+            name="fake-docker",
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Detiene el servidor y elimina el socket."""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def __enter__(self) -> "FakeDockerDaemon":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
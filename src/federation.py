@@ -0,0 +1,109 @@
+"""Inventario federado: varios daemons de Docker escaneados en paralelo y combinados."""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+HOSTS_ENV = "EPHEMERAL_DOCKER_HOSTS"
+KINDS = ("containers", "volumes", "networks")
+
+
+def parse_hosts(spec: Optional[str] = None) -> Dict[str, str]:
+    """
+    Lista de endpoints `nombre=unix:///ruta,...` -> `{nombre: docker_host}`.
+
+    El nombre es opcional (se usa el endpoint). Sin `spec` se lee
+    `EPHEMERAL_DOCKER_HOSTS`; una lista vacía significa un solo host local.
+    """
+    spec = spec if spec is not None else os.environ.get(HOSTS_ENV, "")
+    hosts: Dict[str, str] = {}
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        name, sep, endpoint = entry.partition("=")
+        if not sep:
+            name, endpoint = entry, entry
+        name, endpoint = name.strip(), endpoint.strip()
+        if not endpoint.startswith("unix://"):
+            raise ValueError(f"Endpoint inválido para {name}: {endpoint} (se espera unix://)")
+        if name in hosts:
+            raise ValueError(f"Host duplicado: {name}")
+        hosts[name] = endpoint
+    return hosts
+
+
+def scan_hosts(
+    scanners: Dict[str, Callable[[], Dict[str, List[Dict]]]],
+    max_workers: Optional[int] = None,
+) -> Dict:
+    """
+    Ejecuta el escaneo de cada host en paralelo y combina los inventarios.
+
+    Cada recurso queda marcado con `host`; `hosts` informa por host el
+    estado (`ok`/`error`), el error y la duración del escaneo. Un host que
+    falla no aporta recursos pero no interrumpe el escaneo de los demás.
+    """
+
+    def run(name: str) -> Dict:
+        start = time.monotonic()
+        try:
+            resources, status, error = scanners[name](), "ok", None
+        except Exception as e:  # noqa: BLE001 - cualquier fallo queda asociado al host
+            resources, status, error = {}, "error", f"{type(e).__name__}: {e}"
+        return {
+            "resources": resources,
+            "status": status,
+            "error": error,
+            "scan_seconds": round(time.monotonic() - start, 3),
+        }
+
+    merged: Dict = {kind: [] for kind in KINDS}
+    merged["hosts"] = {}
+    if not scanners:
+        return merged
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(scanners)) as pool:
+        results = dict(zip(scanners, pool.map(run, scanners)))
+
+    for name, result in results.items():
+        for kind in KINDS:
+            for resource in result["resources"].get(kind, []):
+                resource["host"] = name
+                merged[kind].append(resource)
+        merged["hosts"][name] = {
+            "status": result["status"],
+            "error": result["error"],
+            "scan_seconds": result["scan_seconds"],
+            **{kind: len(result["resources"].get(kind, [])) for kind in KINDS},
+        }
+    return merged
+
+
+def split_by_host(resources: Dict) -> Dict[str, Dict[str, List[Dict]]]:
+    """Inventario federado -> un inventario por host (incluye hosts sin recursos)."""
+    split = {name: {kind: [] for kind in KINDS} for name in resources.get("hosts", {})}
+    for kind in KINDS:
+        for resource in resources.get(kind, []):
+            host = resource.get("host")
+            split.setdefault(host, {k: [] for k in KINDS})[kind].append(resource)
+    return split
+
+
+def candidates_by_host(candidates: Dict, hosts: Iterable[str]) -> Dict[str, Dict]:
+    """Desglose por host de los candidatos de `analyze_cleanup_needs`."""
+    breakdown = {
+        name: {**{kind: 0 for kind in KINDS}, "pr_numbers": set()} for name in hosts
+    }
+    for kind in KINDS:
+        for resource in candidates.get(kind, []):
+            entry = breakdown.setdefault(
+                resource.get("host"), {**{k: 0 for k in KINDS}, "pr_numbers": set()}
+            )
+            entry[kind] += 1
+            if resource.get("pr_number") is not None:
+                entry["pr_numbers"].add(resource["pr_number"])
+    for entry in breakdown.values():
+        entry["pr_numbers"] = sorted(entry["pr_numbers"])
+    return breakdown
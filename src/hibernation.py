@@ -0,0 +1,235 @@
+"""Hibernación de stacks efímeros inactivos y despertar bajo demanda."""
+
+import json
+import os
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+HIBERNATE_MODES = ("stop", "pause")
+
+# El proxy queda activo para recibir la petición que despierta al stack
+HIBERNATED_COMPONENTS = ("app", "db")
+
+DOCKER_TS_RE = re.compile(
+    r"^(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})(?:\.\d+)?(Z|[+-]\d{2}:\d{2})\s"
+)
+NGINX_TS_RE = re.compile(r"\[(\d{2}/\w{3}/\d{4}:\d{2}:\d{2}:\d{2} [+-]\d{4})\]")
+PR_RE = re.compile(r"ephemeral-pr-(\d+)")
+# Peticiones internas que no cuentan como actividad de usuario
+IGNORED_PATHS_RE = re.compile(r'"[A-Z]+ /health[ ?/]')
+
+
+def parse_request_time(line: str) -> Optional[datetime]:
+    """
+    Extrae la hora de una línea de access log.
+
+    Acepta el prefijo de `docker logs --timestamps` o el formato combinado
+    de nginx (`[19/Oct/2026:10:00:00 +0000]`).
+
+    Args:
+        line: Línea de log
+
+    Returns:
+        datetime: Hora en UTC, o None si la línea no tiene timestamp
+    """
+    match = DOCKER_TS_RE.match(line)
+    if match:
+        offset = "+00:00" if match.group(2) == "Z" else match.group(2)
+        parsed = datetime.fromisoformat(match.group(1) + offset)
+        return parsed.astimezone(timezone.utc)
+
+    match = NGINX_TS_RE.search(line)
+    if match:
+        parsed = datetime.strptime(match.group(1), "%d/%b/%Y:%H:%M:%S %z")
+        return parsed.astimezone(timezone.utc)
+
+    return None
+
+
+def _to_utc(value: datetime) -> datetime:
+    """Normaliza un datetime a UTC (los naive se asumen en UTC)."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+class ActivityTracker:
+    """Registra la última petición recibida y el estado de hibernación por stack."""
+
+    def __init__(self, state_file: str = "metrics/hibernation.json"):
+        self.state_file = state_file
+        self.stacks = self._load_state()
+
+    def _load_state(self) -> Dict[str, Dict]:
+        """Carga el estado persistido desde archivo JSON."""
+        if not os.path.exists(self.state_file):
+            return {}
+
+        try:
+            with open(self.state_file, "r") as f:
+                return json.load(f).get("stacks", {})
+        except (json.JSONDecodeError, OSError):
+            return {}
+
+    def save(self):
+        """Persiste el estado en disco."""
+        directory = os.path.dirname(self.state_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_file = f"{self.state_file}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump({"stacks": self.stacks}, f, indent=2, sort_keys=True)
+        os.replace(tmp_file, self.state_file)
+
+    def _entry(self, pr_number: int) -> Dict:
+        return self.stacks.setdefault(
+            str(pr_number), {"last_request": None, "hibernated_at": None}
+        )
+
+    def record_request(self, pr_number: int, when: datetime):
+        """Registra una petición si es más reciente que la última conocida."""
+        when = _to_utc(when)
+        last = self.last_request(pr_number)
+        if last is None or when > last:
+            self._entry(pr_number)["last_request"] = when.isoformat()
+
+    def last_request(self, pr_number: int) -> Optional[datetime]:
+        """Obtiene la hora de la última petición registrada para un PR."""
+        value = self.stacks.get(str(pr_number), {}).get("last_request")
+        return datetime.fromisoformat(value) if value else None
+
+    def ingest_log_lines(
+        self, lines: Iterable[str], pr_number: Optional[int] = None
+    ) -> int:
+        """
+        Procesa líneas de access log y actualiza la última petición.
+
+        Args:
+            lines: Líneas de log del proxy o del ingress compartido
+            pr_number: PR al que pertenecen las líneas; si es None se
+                extrae de cada línea (`ephemeral-pr-N` en host o upstream)
+
+        Returns:
+            int: Número de peticiones registradas
+        """
+        recorded = 0
+        for line in lines:
+            if not line or IGNORED_PATHS_RE.search(line):
+                continue
+
+            when = parse_request_time(line)
+            if when is None:
+                continue
+
+            target = pr_number
+            if target is None:
+                match = PR_RE.search(line)
+                if not match:
+                    continue
+                target = int(match.group(1))
+
+            self.record_request(target, when)
+            recorded += 1
+
+        return recorded
+
+    def mark_hibernated(self, pr_number: int, when: datetime, mode: str):
+        """Marca un stack como hibernado."""
+        entry = self._entry(pr_number)
+        entry["hibernated_at"] = _to_utc(when).isoformat()
+        entry["mode"] = mode
+
+    def mark_awake(self, pr_number: int):
+        """Marca un stack como despierto."""
+        entry = self._entry(pr_number)
+        entry["hibernated_at"] = None
+        entry.pop("mode", None)
+
+    def hibernated_at(self, pr_number: int) -> Optional[datetime]:
+        """Obtiene la hora en que se hibernó un stack, o None si está activo."""
+        value = self.stacks.get(str(pr_number), {}).get("hibernated_at")
+        return datetime.fromisoformat(value) if value else None
+
+    def hibernation_mode(self, pr_number: int) -> Optional[str]:
+        """Obtiene el modo con el que se hibernó un stack."""
+        return self.stacks.get(str(pr_number), {}).get("mode")
+
+    def forget(self, pr_numbers: Iterable[int]):
+        """Elimina el estado de stacks que ya no existen."""
+        for pr_number in pr_numbers:
+            self.stacks.pop(str(pr_number), None)
+
+
+class HibernationPolicy:
+    """Decide qué stacks hibernar y cuáles despertar según su inactividad."""
+
+    def __init__(self, idle_minutes: int = 30, mode: str = "stop"):
+        if mode not in HIBERNATE_MODES:
+            raise ValueError(
+                f"Modo de hibernación inválido: {mode} (usar {', '.join(HIBERNATE_MODES)})"
+            )
+        if idle_minutes <= 0:
+            raise ValueError("idle_minutes debe ser positivo")
+
+        self.idle_window = timedelta(minutes=idle_minutes)
+        self.mode = mode
+
+    def plan(
+        self,
+        stacks: Dict[int, datetime],
+        tracker: ActivityTracker,
+        now: Optional[datetime] = None,
+    ) -> Dict[str, List[int]]:
+        """
+        Calcula las transiciones de hibernación.
+
+        Args:
+            stacks: PR -> hora de creación del stack (actividad mínima)
+            tracker: Registro de actividad por stack
+            now: Hora de referencia (default: ahora en UTC)
+
+        Returns:
+            Dict con listas ordenadas de PRs en `hibernate` y `wake`
+        """
+        now = _to_utc(now or datetime.now(timezone.utc))
+        to_hibernate = []
+        to_wake = []
+
+        for pr_number, created_at in stacks.items():
+            last_request = tracker.last_request(pr_number)
+            hibernated_at = tracker.hibernated_at(pr_number)
+
+            if hibernated_at is not None:
+                if last_request is not None and last_request > hibernated_at:
+                    to_wake.append(pr_number)
+                continue
+
+            last_activity = _to_utc(created_at)
+            if last_request is not None and last_request > last_activity:
+                last_activity = last_request
+
+            if now - last_activity > self.idle_window:
+                to_hibernate.append(pr_number)
+
+        return {"hibernate": sorted(to_hibernate), "wake": sorted(to_wake)}
+
+    def hibernate_command(self, pr_number: int) -> List[str]:
+        """Comando Docker para hibernar los componentes de un stack."""
+        return ["docker", self.mode] + container_names(pr_number)
+
+    @staticmethod
+    def wake_command(pr_number: int, mode: str = "stop") -> List[str]:
+        """Comando Docker para despertar un stack hibernado con `mode`."""
+        action = "unpause" if mode == "pause" else "start"
+        # La base de datos arranca antes que la aplicación que depende de ella
+        return ["docker", action] + list(reversed(container_names(pr_number)))
+
+
+def container_names(pr_number: int) -> List[str]:
+    """Nombres de los contenedores que se hibernan para un PR."""
+    return [
+        f"ephemeral-pr-{pr_number}-{component}"
+        for component in HIBERNATED_COMPONENTS
+    ]
@@ -0,0 +1,82 @@
+"""Cache en memoria del inventario de recursos efímeros con refresco en segundo plano."""
+
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+Inventory = Dict[str, List[Dict]]
+
+
+class InventoryCache:
+    """
+    Mantiene el último inventario de recursos efímeros.
+
+    Un único hilo refresca el inventario cada `interval` segundos; las
+    lecturas devuelven la copia en memoria sin tocar el daemon de Docker.
+    Si un escaneo falla se conserva el inventario anterior.
+    """
+
+    def __init__(self, scan: Callable[[], Inventory], interval: float = 30):
+        self.scan = scan
+        self.interval = interval
+        self.inventory: Optional[Inventory] = None
+        self.version = 0
+        self.last_refresh: Optional[float] = None
+        self.last_duration = 0.0
+        self.refresh_count = 0
+        self.refresh_errors = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self) -> Optional[Inventory]:
+        """Ejecuta un escaneo y reemplaza el inventario en memoria."""
+        start = time.monotonic()
+        try:
+            inventory = self.scan()
+        except Exception:
+            with self._lock:
+                self.refresh_errors += 1
+            return self.inventory
+
+        with self._lock:
+            self.inventory = inventory
+            self.version += 1
+            self.last_refresh = time.time()
+            self.last_duration = time.monotonic() - start
+            self.refresh_count += 1
+        return inventory
+
+    def get(self) -> Inventory:
+        """Obtiene el inventario actual (escanea solo si nunca se ha escaneado)."""
+        if self.inventory is None:
+            self.refresh()
+        return self.inventory or {"containers": [], "volumes": [], "networks": []}
+
+    def age_seconds(self) -> Optional[float]:
+        """Segundos desde el último refresco exitoso."""
+        return time.time() - self.last_refresh if self.last_refresh else None
+
+    def _run(self):
+        # Si ya hay inventario (refresh previo a start) se espera al siguiente intervalo
+        if self.inventory is not None:
+            self._stop.wait(self.interval)
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Inicia el hilo de refresco."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="inventory-refresher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5):
+        """Detiene el hilo de refresco."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
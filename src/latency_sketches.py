@@ -0,0 +1,122 @@
+"""Sketches diarios de duración de operaciones, persistidos entre ejecuciones."""
+
+import json
+import os
+from typing import Dict, Optional, Tuple
+
+from src.dashboard_shards import day_key
+from src.quantile_sketch import DDSketch
+
+STATE_FORMAT = 1
+
+
+class DailySketches:
+    """
+    Un `DDSketch` de duración por (operación, día) de las operaciones exitosas.
+
+    Como `RegressionMonitor`, `update(data)` procesa solo las operaciones
+    nuevas desde la última llamada (si el historial se acorta, se recalcula
+    desde cero) y el estado se guarda con `save`, así que cada ejecución
+    solo lee lo agregado desde la anterior y cualquier ventana de días se
+    responde fusionando sketches.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self._reset()
+
+    def _reset(self) -> None:
+        self.sketches: Dict[Tuple[str, str], DDSketch] = {}
+        self.seen = 0
+
+    def observe(self, op: Dict) -> None:
+        """Suma la duración de `op` a su sketch diario (sin avanzar `seen`)."""
+        # Solo operaciones exitosas con duración y un día al que asignarlas
+        if op.get("status") != "success" or op.get("duration_seconds") is None:
+            return
+        if not op.get("timestamp"):
+            return
+        key = (op["operation"], day_key(op))
+        sketch = self.sketches.get(key)
+        if sketch is None:
+            sketch = self.sketches[key] = DDSketch(self.relative_accuracy)
+        sketch.add(float(op["duration_seconds"]))
+
+    def add(self, op: Dict) -> None:
+        """Procesa una operación recién agregada al final del historial."""
+        self.observe(op)
+        self.seen += 1
+
+    def update(self, data: Dict) -> int:
+        """
+        Procesa las operaciones nuevas de `data`. Retorna cuántas procesó.
+
+        `seen` cuenta posiciones lógicas: si `data["archived"]` indica que la
+        lista empieza más adelante, se descuenta ese offset. Las operaciones
+        archivadas que no se vieron deben venir en `data`
+        (`load_metrics(..., since_seq={"operations": sketches.seen, ...})`).
+        """
+        offset = (data.get("archived") or {}).get("operations", 0)
+        operations = data.get("operations", [])
+        total = offset + len(operations)
+        if total < self.seen:
+            self._reset()
+
+        fresh = operations[max(self.seen - offset, 0):]
+        for op in fresh:
+            self.observe(op)
+        self.seen = total
+        return len(fresh)
+
+    def window(
+        self, operation: str, since: Optional[str] = None, until: Optional[str] = None
+    ) -> DDSketch:
+        """Sketch de `operation` entre dos fechas YYYY-MM-DD (inclusive)."""
+        merged = DDSketch(self.relative_accuracy)
+        for (name, day), sketch in self.sketches.items():
+            if name == operation and (since is None or day >= since) and (
+                until is None or day <= until
+            ):
+                merged.merge(sketch)
+        return merged
+
+    def to_dict(self) -> Dict:
+        sketches: Dict[str, Dict[str, Dict]] = {}
+        for (name, day), sketch in sorted(self.sketches.items()):
+            sketches.setdefault(name, {})[day] = sketch.to_dict()
+        return {
+            "format": STATE_FORMAT,
+            "relative_accuracy": self.relative_accuracy,
+            "seen": self.seen,
+            "sketches": sketches,
+        }
+
+    def save(self, path: str) -> None:
+        """Guarda el estado para continuar incrementalmente en la próxima ejecución."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, relative_accuracy: float = 0.01) -> "DailySketches":
+        """Estado guardado con `save`; empieza de cero si no existe o cambió la precisión."""
+        daily = cls(relative_accuracy)
+        try:
+            with open(path, "r") as f:
+                state = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return daily
+        if (
+            state.get("format") != STATE_FORMAT
+            or state.get("relative_accuracy") != relative_accuracy
+        ):
+            return daily
+        daily.seen = state["seen"]
+        daily.sketches = {
+            (name, day): DDSketch.from_dict(sketch)
+            for name, days in state["sketches"].items()
+            for day, sketch in days.items()
+        }
+        return daily
@@ -0,0 +1,587 @@
+"""
+Archivo por niveles del historial de métricas.
+
+`operations.json` conserva solo los eventos recientes (nivel caliente). Los
+más antiguos se compactan en segmentos columnares: cada campo es un arreglo
+de ancho fijo comprimido con zlib y los strings se codifican contra un
+diccionario del segmento. Los segmentos se abren con mmap y solo se
+descomprimen las columnas que la consulta necesita.
+"""
+
+import array
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+KINDS = ("operations", "drift_checks")
+DEFAULT_ARCHIVE_DIR = "metrics/archive"
+MANIFEST_FILE = "manifest.json"
+SEGMENT_MAGIC = b"EPHSEG1\n"
+ARCHIVE_FORMAT = 1
+
+# Campos con columna propia; lo que no encaja en su tipo va a la columna `extra`
+SCHEMAS = {
+    "operations": {
+        "operation": "str",
+        "status": "str",
+        "commit": "str",
+        "pr_number": "int",
+        "duration_seconds": "float",
+        "resource_count": "int",
+    },
+    "drift_checks": {
+        "status": "str",
+        "commit": "str",
+        "pr_number": "int",
+        "drift_percent": "float",
+        "check_duration_seconds": "float",
+    },
+}
+# Offset de un timestamp sin zona horaria
+NAIVE = -32768
+# Tipo original del valor en las columnas numéricas (`<campo>:type`)
+ABSENT, INT, FLOAT = 0, 1, 2
+INT64 = (-(1 << 63), (1 << 63) - 1)
+
+
+def read_metrics(metrics_file: str) -> Dict:
+    """`operations.json` (vacío si no existe o es inválido)."""
+    try:
+        with open(metrics_file, "r") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {kind: [] for kind in KINDS}
+    return data if isinstance(data, dict) else {kind: [] for kind in KINDS}
+
+
+def _write_json(path: str, payload: Dict, indent: Optional[int] = None) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(payload, f, indent=indent)
+    os.replace(tmp, path)
+
+
+def _day_number(day: Optional[str]) -> int:
+    """YYYY-MM-DD -> YYYYMMDD (0 si no es una fecha)."""
+    if not isinstance(day, str) or len(day) < 10 or not day[:10].replace("-", "").isdigit():
+        return 0
+    return int(day[:10].replace("-", ""))
+
+
+def _day_string(number: int) -> Optional[str]:
+    if not number:
+        return None
+    text = f"{number:08d}"
+    return f"{text[:4]}-{text[4:6]}-{text[6:]}"
+
+
+def _parse_time(timestamp) -> Optional[Tuple[float, int]]:
+    """(epoch, offset en minutos o NAIVE) de un timestamp ISO."""
+    if not isinstance(timestamp, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    offset = parsed.utcoffset()
+    if offset is None:
+        return parsed.timestamp(), NAIVE
+    return parsed.timestamp(), int(offset.total_seconds() // 60)
+
+
+def _format_time(epoch: float, offset: int) -> str:
+    if offset == NAIVE:
+        return datetime.fromtimestamp(epoch).isoformat()
+    return datetime.fromtimestamp(epoch, timezone(timedelta(minutes=offset))).isoformat()
+
+
+def _little_endian(values: array.array) -> bytes:
+    if sys.byteorder == "big":
+        values = array.array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def encode_segment(kind: str, rows: Iterable[Tuple[int, Dict]]) -> Tuple[bytes, Dict]:
+    """
+    Codifica eventos `(seq, evento)` como segmento columnar.
+
+    Columnas fijas: `seq` (posición en el historial), `day` (YYYYMMDD del
+    timestamp, como `day_key`), `epoch` y `offset`. Cada campo del schema
+    tiene su columna; un valor de otro tipo, un timestamp que no se
+    reconstruye igual y los campos fuera del schema van como JSON en `extra`.
+
+    Returns:
+        (bytes del segmento, header)
+    """
+    schema = SCHEMAS[kind]
+    columns: Dict[str, array.array] = {
+        "seq": array.array("q"),
+        "day": array.array("i"),
+        "epoch": array.array("d"),
+        "offset": array.array("h"),
+    }
+    dictionaries: Dict[str, Dict] = {}
+    for field, field_type in schema.items():
+        if field_type == "str":
+            dictionaries[field] = {}
+            columns[field] = array.array("I")
+        else:
+            columns[field] = array.array("q" if field_type == "int" else "d")
+            columns[f"{field}:type"] = array.array("B")
+    extra = []
+
+    count = 0
+    for seq, event in rows:
+        rest = dict(event)
+        columns["seq"].append(seq)
+        timestamp = rest.pop("timestamp", None)
+        parsed = _parse_time(timestamp)
+        columns["day"].append(_day_number(timestamp) if parsed else 0)
+        columns["epoch"].append(parsed[0] if parsed else math.nan)
+        columns["offset"].append(parsed[1] if parsed else NAIVE)
+        if "timestamp" in event and (parsed is None or _format_time(*parsed) != timestamp):
+            rest["timestamp"] = timestamp
+
+        for field, field_type in schema.items():
+            value = rest.get(field)
+            stored = field in rest
+            if field_type == "str":
+                stored = stored and (value is None or isinstance(value, str))
+                codes = dictionaries[field]
+                columns[field].append(codes.setdefault(value, len(codes) + 1) if stored else 0)
+            elif field_type == "int":
+                stored = stored and type(value) is int and INT64[0] <= value <= INT64[1]
+                columns[field].append(value if stored else 0)
+                columns[f"{field}:type"].append(INT if stored else ABSENT)
+            else:
+                stored = stored and type(value) in (int, float) and float(value) == value
+                columns[field].append(float(value) if stored else 0.0)
+                columns[f"{field}:type"].append(
+                    (INT if type(value) is int else FLOAT) if stored else ABSENT
+                )
+            if stored:
+                del rest[field]
+        if rest:
+            extra.append([count, rest])
+        count += 1
+
+    blobs = []
+    specs = {}
+    offset = 0
+    for name, values in columns.items():
+        if values.typecode == "I" and max(values, default=0) < 1 << 16:
+            values = array.array("H", values)
+        blob = zlib.compress(_little_endian(values), 6)
+        specs[name] = {"type": values.typecode, "offset": offset, "size": len(blob)}
+        blobs.append(blob)
+        offset += len(blob)
+    blob = zlib.compress(json.dumps(extra, separators=(",", ":")).encode(), 6)
+    specs["extra"] = {"type": "json", "offset": offset, "size": len(blob)}
+    blobs.append(blob)
+
+    days = [d for d in columns["day"] if d]
+    header = {
+        "format": ARCHIVE_FORMAT,
+        "kind": kind,
+        "count": count,
+        "seq": [min(columns["seq"], default=None), max(columns["seq"], default=None)],
+        "days": [_day_string(min(days)), _day_string(max(days))] if days else None,
+        "dictionaries": {field: list(codes) for field, codes in dictionaries.items()},
+        "columns": specs,
+    }
+    encoded = json.dumps(header, separators=(",", ":")).encode()
+    return SEGMENT_MAGIC + struct.pack("<I", len(encoded)) + encoded + b"".join(blobs), header
+
+
+class Segment:
+    """Segmento abierto con mmap; las columnas se descomprimen al pedirlas."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[: len(SEGMENT_MAGIC)] != SEGMENT_MAGIC:
+            self._map.close()
+            raise ValueError(f"No es un segmento de métricas: {path}")
+        start = len(SEGMENT_MAGIC)
+        (length,) = struct.unpack_from("<I", self._map, start)
+        self.header = json.loads(self._map[start + 4:start + 4 + length])
+        self.kind = self.header["kind"]
+        self.count = self.header["count"]
+        self._data = start + 4 + length
+        self._columns: Dict[str, object] = {}
+
+    def column(self, name: str):
+        """Columna decodificada: `array` de ancho fijo (o la lista `extra`)."""
+        if name not in self._columns:
+            spec = self.header["columns"][name]
+            start = self._data + spec["offset"]
+            raw = zlib.decompress(self._map[start:start + spec["size"]])
+            if spec["type"] == "json":
+                self._columns[name] = json.loads(raw)
+            else:
+                values = array.array(spec["type"])
+                values.frombytes(raw)
+                if sys.byteorder == "big":
+                    values.byteswap()
+                self._columns[name] = values
+        return self._columns[name]
+
+    def values(self, field: str, rows: Optional[List[int]] = None) -> List:
+        """Valores de un campo (None si el evento no lo tiene en su columna)."""
+        rows = range(self.count) if rows is None else rows
+        if field in ("seq", "epoch"):
+            column = self.column(field)
+            return [column[i] for i in rows]
+        if field == "day":
+            column = self.column("day")
+            return [_day_string(column[i]) for i in rows]
+        field_type = SCHEMAS[self.kind][field]
+        column = self.column(field)
+        if field_type == "str":
+            dictionary = [None] + self.header["dictionaries"][field]
+            return [dictionary[column[i]] for i in rows]
+        types = self.column(f"{field}:type")
+        if field_type == "int":
+            return [column[i] if types[i] else None for i in rows]
+        return [
+            None if not types[i] else int(column[i]) if types[i] == INT else column[i]
+            for i in rows
+        ]
+
+    def select(
+        self,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        where: Optional[Dict[str, object]] = None,
+    ) -> List[int]:
+        """Filas con día en [since, until] y campos str iguales a `where`."""
+        rows: Iterable[int] = range(self.count)
+        for field, expected in (where or {}).items():
+            codes = self.header["dictionaries"][field]
+            if expected not in codes:
+                return []
+            code, column = codes.index(expected) + 1, self.column(field)
+            rows = [i for i in rows if column[i] == code]
+        if since or until:
+            low, high = _day_number(since) or 1, _day_number(until) or 99999999
+            days = self.column("day")
+            rows = [i for i in rows if low <= days[i] <= high]
+        return list(rows)
+
+    def events(self, rows: Optional[List[int]] = None) -> Iterator[Tuple[int, Dict]]:
+        """Eventos `(seq, evento)` reconstruidos."""
+        rows = list(range(self.count)) if rows is None else rows
+        schema = SCHEMAS[self.kind]
+        epochs, offsets = self.column("epoch"), self.column("offset")
+        seqs = self.values("seq", rows)
+        fields = {
+            field: self.values(field, rows)
+            for field in schema
+            if schema[field] != "str" or self.header["dictionaries"][field]
+        }
+        present = {
+            field: self.column(f"{field}:type") if schema[field] != "str" else self.column(field)
+            for field in fields
+        }
+        extra = dict((index, rest) for index, rest in self.column("extra"))
+        for position, i in enumerate(rows):
+            event = {}
+            if not math.isnan(epochs[i]):
+                event["timestamp"] = _format_time(epochs[i], offsets[i])
+            for field, values in fields.items():
+                if present[field][i]:
+                    event[field] = values[position]
+            event.update(extra.get(i, {}))
+            yield seqs[position], event
+
+    def close(self) -> None:
+        self._map.close()
+
+    def __enter__(self) -> "Segment":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class MetricsArchive:
+    """
+    Segmentos archivados del historial, con un manifest por directorio.
+
+    Cada compactación mueve a un segmento nuevo (nivel 0) el prefijo de
+    eventos anteriores a la ventana caliente. Cuando se juntan `fanout`
+    segmentos consecutivos del mismo nivel se fusionan en uno del nivel
+    siguiente, así que la cantidad de archivos crece de forma logarítmica.
+
+    `operations.json` registra en `archived` cuántos eventos de cada tipo se
+    movieron: la posición lógica de un evento caliente es `archived + índice`,
+    la misma que guarda la columna `seq` de los segmentos.
+    """
+
+    def __init__(self, root: str = DEFAULT_ARCHIVE_DIR, fanout: int = 4):
+        self.root = root
+        self.fanout = fanout
+        self.manifest = self._load_manifest()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def _load_manifest(self) -> Dict:
+        try:
+            with open(self._path(MANIFEST_FILE), "r") as f:
+                manifest = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            manifest = {}
+        if manifest.get("format") != ARCHIVE_FORMAT:
+            manifest = {
+                "format": ARCHIVE_FORMAT,
+                "archived": {kind: 0 for kind in KINDS},
+                "segments": {kind: [] for kind in KINDS},
+            }
+        return manifest
+
+    def segments(
+        self,
+        kind: str,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        since_seq: int = 0,
+        until_seq: Optional[int] = None,
+    ) -> List[Dict]:
+        """Entradas del manifest que pueden tener eventos en el rango pedido."""
+        selected = []
+        for entry in self.manifest["segments"][kind]:
+            first, last = entry["seq"]
+            if last < since_seq or (until_seq is not None and first >= until_seq):
+                continue
+            if since or until:
+                days = entry["days"]
+                if days is None or (since and days[1] < since) or (until and days[0] > until):
+                    continue
+            selected.append(entry)
+        return selected
+
+    def events(
+        self,
+        kind: str,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        since_seq: int = 0,
+        until_seq: Optional[int] = None,
+    ) -> Iterator[Dict]:
+        """Eventos archivados en orden de `seq`, filtrados por día (inclusive) y posición."""
+        for entry in self.segments(kind, since, until, since_seq, until_seq):
+            with Segment(self._path(entry["file"])) as segment:
+                rows = segment.select(since, until) if since or until else None
+                for seq, event in segment.events(rows):
+                    if seq >= since_seq and (until_seq is None or seq < until_seq):
+                        yield event
+
+    def scan(
+        self,
+        kind: str,
+        fields: Iterable[str],
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        where: Optional[Dict[str, object]] = None,
+    ) -> Dict[str, List]:
+        """
+        Columnas de los eventos archivados sin reconstruir los eventos.
+
+        Args:
+            fields: Campos del schema, `day`, `epoch` o `seq`
+            since, until: Días YYYY-MM-DD (inclusive)
+            where: Igualdad sobre campos str, p. ej. `{"operation": "deploy"}`
+
+        Returns:
+            `{campo: [valores]}` alineados por fila (None si falta el valor)
+        """
+        fields = list(fields)
+        result: Dict[str, List] = {field: [] for field in fields}
+        for entry in self.segments(kind, since, until):
+            with Segment(self._path(entry["file"])) as segment:
+                rows = segment.select(since, until, where)
+                for field in fields:
+                    result[field].extend(segment.values(field, rows))
+        return result
+
+    def _write_segment(self, kind: str, rows: List[Tuple[int, Dict]], tier: int) -> Dict:
+        payload, header = encode_segment(kind, rows)
+        name = f"{kind}-{header['seq'][0]:012d}-{header['seq'][1]:012d}-t{tier}.seg"
+        path = self._path(name)
+        os.makedirs(self.root, exist_ok=True)
+        with open(f"{path}.tmp", "wb") as f:
+            f.write(payload)
+        os.replace(f"{path}.tmp", path)
+        return {
+            "file": name,
+            "tier": tier,
+            "count": header["count"],
+            "seq": header["seq"],
+            "days": header["days"],
+            "bytes": len(payload),
+        }
+
+    def _merge_tiers(self, kind: str) -> int:
+        """Fusiona los grupos de `fanout` segmentos del mismo nivel al final de la lista."""
+        merged = 0
+        entries = self.manifest["segments"][kind]
+        while entries:
+            tier = entries[-1]["tier"]
+            group = 0
+            while group < len(entries) and entries[-1 - group]["tier"] == tier:
+                group += 1
+            if group < self.fanout:
+                break
+            rows = []
+            for entry in entries[-group:]:
+                with Segment(self._path(entry["file"])) as segment:
+                    rows.extend(segment.events())
+            entries[-group:] = [self._write_segment(kind, rows, tier + 1)]
+            merged += group
+        return merged
+
+    def _save_manifest(self) -> None:
+        _write_json(self._path(MANIFEST_FILE), self.manifest)
+        referenced = {e["file"] for entries in self.manifest["segments"].values() for e in entries}
+        for name in os.listdir(self.root):
+            if name.endswith(".seg") and name not in referenced:
+                os.unlink(self._path(name))
+
+    def compact(
+        self, metrics_file: str, hot_days: int = 30, now: Optional[datetime] = None
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        Mueve al archivo los eventos con más de `hot_days` días.
+
+        Se archiva el prefijo de cada lista cuyos días (`timestamp[:10]`) son
+        anteriores al corte; un evento reciente detiene el prefijo para que
+        las posiciones lógicas sigan siendo contiguas. Primero se escriben
+        los segmentos y el manifest y después `operations.json`: si el
+        proceso se interrumpe entre ambos, la próxima compactación descarta
+        del nivel caliente los eventos que ya estaban archivados.
+
+        Returns:
+            Por tipo: eventos `archived` en esta corrida, `hot` restantes y
+            segmentos `merged`
+        """
+        data = read_metrics(metrics_file)
+        cutoff = ((now or datetime.now()) - timedelta(days=hot_days)).strftime("%Y-%m-%d")
+        offsets = dict(data.get("archived") or {})
+        dirty = False
+        stats = {}
+        for kind in KINDS:
+            events = data.get(kind, [])
+            base = offsets.get(kind, 0)
+            stale = self.manifest["archived"][kind] - base
+            if stale < 0:
+                raise ValueError(
+                    f"{metrics_file} registra {base} {kind} archivados pero el archivo tiene "
+                    f"{self.manifest['archived'][kind]}"
+                )
+            events, base = events[stale:], base + stale
+
+            count = 0
+            while count < len(events):
+                timestamp = events[count].get("timestamp")
+                if not isinstance(timestamp, str) or timestamp[:10] >= cutoff:
+                    break
+                count += 1
+            if count:
+                rows = [(base + i, event) for i, event in enumerate(events[:count])]
+                self.manifest["segments"][kind].append(self._write_segment(kind, rows, 0))
+                self.manifest["archived"][kind] = base + count
+            merged = self._merge_tiers(kind)
+
+            dirty = dirty or bool(stale or count)
+            data[kind] = events[count:]
+            offsets[kind] = base + count
+            stats[kind] = {"archived": count, "hot": len(data[kind]), "merged": merged}
+
+        if dirty:
+            self._save_manifest()
+            data["archived"] = offsets
+            _write_json(metrics_file, data, indent=2)
+        return stats
+
+    def info(self) -> Dict:
+        """Eventos, segmentos por nivel, bytes y rango de días por tipo."""
+        summary = {}
+        for kind, entries in self.manifest["segments"].items():
+            tiers: Dict[int, int] = {}
+            for entry in entries:
+                tiers[entry["tier"]] = tiers.get(entry["tier"], 0) + 1
+            days = [entry["days"] for entry in entries if entry["days"]]
+            summary[kind] = {
+                "events": sum(entry["count"] for entry in entries),
+                "segments": len(entries),
+                "tiers": {str(tier): n for tier, n in sorted(tiers.items())},
+                "bytes": sum(entry["bytes"] for entry in entries),
+                "days": [min(d[0] for d in days), max(d[1] for d in days)] if days else None,
+            }
+        return summary
+
+
+def load_metrics(
+    metrics_file: str,
+    archive_dir: Optional[str] = None,
+    since: Optional[str] = None,
+    since_seq: Optional[Dict[str, int]] = None,
+) -> Dict:
+    """
+    Historial caliente más los eventos archivados que se pidan.
+
+    Sin `archive_dir` (o sin manifest) retorna `operations.json` tal cual.
+
+    Args:
+        since: Día YYYY-MM-DD desde el cual incluir eventos archivados. Se
+            extiende al día más antiguo del nivel caliente, así que cada día
+            presente en el resultado está completo (`complete_since`)
+        since_seq: Por tipo, posición lógica desde la cual leer (para
+            consumidores incrementales)
+
+    Returns:
+        Dict con `operations` y `drift_checks`. Sin `since`, `archived` tiene
+        la posición lógica del primer evento de cada lista
+    """
+    data = read_metrics(metrics_file)
+    if not archive_dir or not os.path.exists(os.path.join(archive_dir, MANIFEST_FILE)):
+        return data
+
+    archive = MetricsArchive(archive_dir)
+    offsets = data.get("archived") or {}
+    if since is not None:
+        hot_days = [
+            e["timestamp"][:10]
+            for kind in KINDS
+            for e in data.get(kind, [])
+            if isinstance(e.get("timestamp"), str) and _day_number(e["timestamp"])
+        ]
+        since = min([since] + hot_days)
+
+    result: Dict = {} if since is not None else {"archived": {}}
+    for kind in KINDS:
+        base = offsets.get(kind, 0)
+        start = (since_seq or {}).get(kind, 0)
+        archived = (
+            list(archive.events(kind, since=since, since_seq=start, until_seq=base))
+            if start < base
+            else []
+        )
+        hot = data.get(kind, [])
+        result[kind] = archived + hot[max(start - base, 0):]
+        if since is None:
+            # Posición del primer evento retornado; más allá del final, el total
+            result["archived"][kind] = min(start, base + len(hot))
+    if since is not None:
+        result["complete_since"] = since
+    return result
@@ -0,0 +1,328 @@
+"""Exportador Prometheus/OpenMetrics de stacks efímeros y métricas de operaciones."""
+
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.inventory_cache import InventoryCache
+from src.metrics_archive import MetricsArchive
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+DURATION_BUCKETS = (5, 10, 30, 60, 120, 300, 600)
+DRIFT_CHECK_BUCKETS = (1, 5, 10, 30, 60, 120)
+AGE_BUCKETS_HOURS = (1, 6, 12, 24, 48, 72, 168)
+RESOURCE_KINDS = ("containers", "volumes", "networks")
+
+EMPTY_METRICS = {"operations": [], "drift_checks": []}
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    items = ",".join(
+        '{}="{}"'.format(key, str(value).replace("\\", r"\\").replace('"', r"\""))
+        for key, value in labels.items()
+    )
+    return "{" + items + "}"
+
+
+class Histogram:
+    """Histograma acumulativo con buckets fijos (semántica Prometheus)."""
+
+    def __init__(self, buckets: Iterable[float]):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        """Registra una observación."""
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+    def samples(self, name: str, labels: Dict[str, str]) -> List[str]:
+        """Líneas `_bucket`, `_sum` y `_count` del histograma."""
+        lines = []
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts + [self.count]):
+            bucket_labels = dict(labels, le=_format_value(bound))
+            lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {count}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(self.sum)}")
+        lines.append(f"{name}_count{_format_labels(labels)} {self.count}")
+        return lines
+
+
+class OperationsIngestor:
+    """
+    Ingiere incrementalmente `metrics/operations.json`.
+
+    El archivo solo crece por `+=` desde metrics-collector.sh, así que se
+    recuerdan cuántas operaciones y verificaciones ya se observaron y solo
+    las nuevas alimentan los histogramas. El archivo se relee únicamente si
+    cambian su mtime o tamaño; si se trunca, los contadores se reinician.
+
+    Las posiciones son lógicas: una compactación que mueve eventos al
+    archivo (`archived` en el JSON) no cuenta como truncado, y con
+    `archive_dir` los eventos archivados que no se llegaron a ver se leen
+    de los segmentos.
+    """
+
+    def __init__(
+        self,
+        metrics_file: str,
+        loader: Callable[[str], Dict],
+        archive_dir: Optional[str] = None,
+    ):
+        self.metrics_file = metrics_file
+        self.loader = loader
+        self.archive_dir = archive_dir
+        self.version = 0
+        self._signature: Optional[Tuple[int, int]] = None
+        self._reset()
+
+    def _reset(self):
+        self.operations_seen = 0
+        self.drift_checks_seen = 0
+        self.durations: Dict[Tuple[str, str], Histogram] = {}
+        self.drift_latency = Histogram(DRIFT_CHECK_BUCKETS)
+        self.drift_checks: Dict[str, int] = {}
+        self.last_drift_percent: Dict[str, float] = {}
+
+    def refresh(self) -> bool:
+        """Procesa las entradas nuevas. Retorna True si hubo cambios."""
+        try:
+            stat = os.stat(self.metrics_file)
+        except OSError:
+            return False
+
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == self._signature:
+            return False
+        self._signature = signature
+
+        data = self.loader(self.metrics_file) or EMPTY_METRICS
+        offsets = data.get("archived") or {}
+        totals = {
+            kind: offsets.get(kind, 0) + len(data.get(kind, []))
+            for kind in ("operations", "drift_checks")
+        }
+        if (
+            totals["operations"] < self.operations_seen
+            or totals["drift_checks"] < self.drift_checks_seen
+        ):
+            self._reset()
+
+        operations = self._unseen(data, "operations", offsets, self.operations_seen)
+        drift_checks = self._unseen(data, "drift_checks", offsets, self.drift_checks_seen)
+        for op in operations:
+            key = (str(op.get("operation", "unknown")), str(op.get("status", "unknown")))
+            histogram = self.durations.setdefault(key, Histogram(DURATION_BUCKETS))
+            histogram.observe(float(op.get("duration_seconds", 0) or 0))
+
+        for check in drift_checks:
+            status = str(check.get("status", "unknown"))
+            self.drift_checks[status] = self.drift_checks.get(status, 0) + 1
+            self.drift_latency.observe(float(check.get("check_duration_seconds", 0) or 0))
+            if check.get("pr_number") is not None:
+                self.last_drift_percent[str(check["pr_number"])] = float(
+                    check.get("drift_percent", 0) or 0
+                )
+
+        self.operations_seen = totals["operations"]
+        self.drift_checks_seen = totals["drift_checks"]
+        self.version += 1
+        return True
+
+    def _unseen(self, data: Dict, kind: str, offsets: Dict, seen: int) -> List[Dict]:
+        """Eventos desde la posición lógica `seen`, incluidos los ya archivados."""
+        base = offsets.get(kind, 0)
+        fresh = data.get(kind, [])[max(seen - base, 0):]
+        if seen < base and self.archive_dir:
+            archive = MetricsArchive(self.archive_dir)
+            fresh = list(archive.events(kind, since_seq=seen, until_seq=base)) + fresh
+        return fresh
+
+
+def _stack_ages(inventory: Dict[str, List[Dict]]) -> Dict[int, float]:
+    """Edad de cada stack: la del recurso más antiguo con ese PR."""
+    ages: Dict[int, float] = {}
+    for kind in RESOURCE_KINDS:
+        for resource in inventory.get(kind, []):
+            pr_number = resource.get("pr_number")
+            if pr_number is None:
+                continue
+            age = resource.get("age_hours") or 0.0
+            ages[pr_number] = max(ages.get(pr_number, 0.0), age)
+    return ages
+
+
+class MetricsExporter:
+    """
+    Renderiza métricas a partir del inventario en caché y del archivo de métricas.
+
+    El texto renderizado se memoriza por versión de inventario y de
+    operaciones: un scrape nunca ejecuta comandos de Docker.
+    """
+
+    def __init__(self, cache: InventoryCache, ingestor: OperationsIngestor):
+        self.cache = cache
+        self.ingestor = ingestor
+        self._lock = threading.Lock()
+        self._rendered: Dict[bool, Tuple[Tuple, str]] = {}
+
+    def refresh_operations(self):
+        """Refresca solo las operaciones; es barato y no toca Docker."""
+        with self._lock:
+            self.ingestor.refresh()
+
+    def render(self, openmetrics: bool = False) -> str:
+        """Texto de exposición en formato Prometheus 0.0.4 u OpenMetrics."""
+        self.refresh_operations()
+        key = (self.cache.version, self.ingestor.version, self.cache.refresh_errors)
+        with self._lock:
+            cached = self._rendered.get(openmetrics)
+            if cached is None or cached[0] != key:
+                cached = (key, self._render(openmetrics))
+                self._rendered[openmetrics] = cached
+            return cached[1]
+
+    def _render(self, openmetrics: bool) -> str:
+        inventory = self.cache.inventory or {kind: [] for kind in RESOURCE_KINDS}
+        lines: List[str] = []
+
+        def family(name: str, metric_type: str, help_text: str):
+            # OpenMetrics nombra la familia del counter sin el sufijo _total
+            if metric_type == "counter" and not openmetrics:
+                name += "_total"
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+
+        ages = _stack_ages(inventory)
+        family("ephemeral_stacks_alive", "gauge", "Stacks efimeros con algun recurso")
+        lines.append(f"ephemeral_stacks_alive {len(ages)}")
+
+        family("ephemeral_resources", "gauge", "Recursos efimeros por tipo")
+        for kind in RESOURCE_KINDS:
+            lines.append(
+                f'ephemeral_resources{{kind="{kind}"}} {len(inventory.get(kind, []))}'
+            )
+
+        running = sum(
+            1 for c in inventory.get("containers", []) if c.get("status", "").startswith("Up")
+        )
+        family("ephemeral_containers_running", "gauge", "Contenedores efimeros en ejecucion")
+        lines.append(f"ephemeral_containers_running {running}")
+
+        age_histogram = Histogram(AGE_BUCKETS_HOURS)
+        for age in ages.values():
+            age_histogram.observe(age)
+        family("ephemeral_stack_age_hours", "histogram", "Edad de los stacks en horas")
+        lines.extend(age_histogram.samples("ephemeral_stack_age_hours", {}))
+
+        family(
+            "ephemeral_operation_duration_seconds",
+            "histogram",
+            "Duracion de deploy/destroy registrada por metrics-collector",
+        )
+        for (operation, status), histogram in sorted(self.ingestor.durations.items()):
+            lines.extend(
+                histogram.samples(
+                    "ephemeral_operation_duration_seconds",
+                    {"operation": operation, "status": status},
+                )
+            )
+
+        family(
+            "ephemeral_drift_check_duration_seconds",
+            "histogram",
+            "Latencia de las verificaciones de drift",
+        )
+        lines.extend(
+            self.ingestor.drift_latency.samples("ephemeral_drift_check_duration_seconds", {})
+        )
+
+        family("ephemeral_drift_checks", "counter", "Verificaciones de drift por estado")
+        for status, count in sorted(self.ingestor.drift_checks.items()):
+            labels = _format_labels({"status": status})
+            lines.append(f"ephemeral_drift_checks_total{labels} {count}")
+
+        family("ephemeral_drift_percent", "gauge", "Ultimo porcentaje de drift por PR")
+        for pr_number, percent in sorted(self.ingestor.last_drift_percent.items()):
+            lines.append(
+                f'ephemeral_drift_percent{{pr_number="{pr_number}"}} {_format_value(percent)}'
+            )
+
+        # Timestamp y no "edad": el texto memorizado sigue siendo válido entre scrapes
+        family(
+            "ephemeral_exporter_last_scan_timestamp_seconds",
+            "gauge",
+            "Momento del ultimo escaneo exitoso de Docker",
+        )
+        last_scan = self.cache.last_refresh
+        lines.append(
+            "ephemeral_exporter_last_scan_timestamp_seconds "
+            f"{_format_value(round(last_scan, 3)) if last_scan is not None else 'NaN'}"
+        )
+        family(
+            "ephemeral_exporter_scan_duration_seconds",
+            "gauge",
+            "Duracion del ultimo escaneo de Docker",
+        )
+        lines.append(
+            "ephemeral_exporter_scan_duration_seconds "
+            f"{_format_value(round(self.cache.last_duration, 6))}"
+        )
+        family("ephemeral_exporter_scan_errors", "counter", "Escaneos de Docker fallidos")
+        lines.append(f"ephemeral_exporter_scan_errors_total {self.cache.refresh_errors}")
+
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+def wants_openmetrics(accept: Optional[str]) -> bool:
+    """Indica si el cliente negoció el formato OpenMetrics."""
+    return "application/openmetrics-text" in (accept or "")
+
+
+def make_handler(exporter: MetricsExporter):
+    """Crea el handler HTTP que sirve `/metrics` desde la caché."""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404, "Solo se expone /metrics")
+                return
+
+            openmetrics = wants_openmetrics(self.headers.get("Accept"))
+            payload = exporter.render(openmetrics).encode("utf-8")
+            content_type = OPENMETRICS_CONTENT_TYPE if openmetrics else PROMETHEUS_CONTENT_TYPE
+
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return MetricsHandler
+
+
+def create_server(exporter: MetricsExporter, host: str = "0.0.0.0", port: int = 9108):
+    """Crea el servidor HTTP del exportador (sin iniciarlo)."""
+    return ThreadingHTTPServer((host, port), make_handler(exporter))
@@ -0,0 +1,366 @@
+"""Backend SQLite opcional del historial de métricas, indexado para consultas por PR."""
+
+import os
+import sqlite3
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from src.metrics_archive import KINDS, load_metrics
+
+DEFAULT_DB = "metrics/metrics.db"
+# Versión del schema: cambiarla descarta la base y la reconstruye
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS operations (
+    seq INTEGER PRIMARY KEY,
+    timestamp TEXT,
+    epoch REAL,
+    day TEXT,
+    operation TEXT,
+    status TEXT,
+    pr_number INTEGER,
+    duration_seconds REAL,
+    resource_count INTEGER,
+    commit_sha TEXT,
+    fail_run INTEGER
+);
+CREATE INDEX IF NOT EXISTS operations_day ON operations(day);
+CREATE INDEX IF NOT EXISTS operations_pr ON operations(pr_number, epoch);
+CREATE INDEX IF NOT EXISTS operations_kind ON operations(operation, status, duration_seconds);
+CREATE INDEX IF NOT EXISTS operations_failures ON operations(fail_run)
+    WHERE fail_run IS NOT NULL;
+CREATE TABLE IF NOT EXISTS failure_runs (
+    start_seq INTEGER PRIMARY KEY,
+    pr_number INTEGER,
+    length INTEGER,
+    last_seq INTEGER,
+    last_day TEXT
+);
+CREATE INDEX IF NOT EXISTS failure_runs_length ON failure_runs(length, last_seq);
+CREATE INDEX IF NOT EXISTS failure_runs_pr ON failure_runs(pr_number, length);
+CREATE TABLE IF NOT EXISTS drift_checks (
+    seq INTEGER PRIMARY KEY,
+    timestamp TEXT,
+    epoch REAL,
+    day TEXT,
+    status TEXT,
+    pr_number INTEGER,
+    drift_percent REAL,
+    check_duration_seconds REAL,
+    commit_sha TEXT
+);
+CREATE INDEX IF NOT EXISTS drift_checks_day ON drift_checks(day);
+CREATE INDEX IF NOT EXISTS drift_checks_pr ON drift_checks(pr_number, epoch);
+CREATE INDEX IF NOT EXISTS drift_checks_status ON drift_checks(status, day);
+"""
+
+# Columnas de cada tabla además de seq/timestamp/epoch/day (campo del evento -> columna)
+COLUMNS = {
+    "operations": {
+        "operation": "operation",
+        "status": "status",
+        "pr_number": "pr_number",
+        "duration_seconds": "duration_seconds",
+        "resource_count": "resource_count",
+        "commit": "commit_sha",
+    },
+    "drift_checks": {
+        "status": "status",
+        "pr_number": "pr_number",
+        "drift_percent": "drift_percent",
+        "check_duration_seconds": "check_duration_seconds",
+        "commit": "commit_sha",
+    },
+}
+EVENT_KIND = {"operations": "operation", "drift_checks": "drift_check"}
+
+
+def _epoch(timestamp) -> Optional[float]:
+    if not isinstance(timestamp, str):
+        return None
+    try:
+        return datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def _scalar(value):
+    """Valor apto para SQLite; listas, dicts y booleanos quedan fuera del índice."""
+    return value if isinstance(value, (str, int, float)) and not isinstance(value, bool) else None
+
+
+class MetricsStore:
+    """
+    Índice SQLite de `operations.json` y del archivo de segmentos.
+
+    Cada evento conserva su posición lógica (`seq`, la misma del archivo),
+    así que `sync` solo inserta lo nuevo. Índices por día, por PR (ordenado
+    por tiempo) y por operación/estado/duración. Para las rachas de fallos
+    cada operación fallida guarda en `fail_run` el `seq` del primer fallo
+    consecutivo de su PR, y `failure_runs` mantiene el largo de cada racha
+    al sincronizar: consultarlas no agrupa la tabla de operaciones.
+
+    La base es un índice de consulta: guarda las columnas del schema y se
+    puede borrar y reconstruir desde el JSON y el archivo.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self.db.execute("PRAGMA journal_mode=WAL")
+        if self.db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self._drop()
+        self.db.executescript(SCHEMA)
+        self.db.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def _drop(self) -> None:
+        for table in (*KINDS, "failure_runs"):
+            self.db.execute(f"DROP TABLE IF EXISTS {table}")
+
+    def close(self) -> None:
+        self.db.close()
+
+    def __enter__(self) -> "MetricsStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def counts(self) -> Dict[str, int]:
+        """Posición lógica siguiente a la última sincronizada, por tipo."""
+        return {
+            kind: self.db.execute(f"SELECT COALESCE(MAX(seq) + 1, 0) FROM {kind}").fetchone()[0]
+            for kind in KINDS
+        }
+
+    def sync(self, metrics_file: str, archive_dir: Optional[str] = None) -> Dict[str, int]:
+        """
+        Inserta los eventos nuevos de `operations.json` (y del archivo).
+
+        Si el historial tiene menos eventos que la base (se rotó o
+        reemplazó), la base se reconstruye.
+
+        Returns:
+            Eventos insertados por tipo
+        """
+        stored = self.counts()
+        data = load_metrics(metrics_file, archive_dir, since_seq=stored)
+        offsets = data.get("archived") or {}
+        if any(offsets.get(k, 0) + len(data.get(k, [])) < stored[k] for k in KINDS):
+            with self.db:
+                self._drop()
+                self.db.executescript(SCHEMA)
+            return self.sync(metrics_file, archive_dir)
+
+        inserted = {}
+        with self.db:
+            for kind in KINDS:
+                start = offsets.get(kind, 0)
+                skip = max(stored[kind] - start, 0)
+                events = data.get(kind, [])[skip:]
+                self._insert(kind, start + skip, events)
+                inserted[kind] = len(events)
+        return inserted
+
+    def _insert(self, kind: str, first_seq: int, events: List[Dict]) -> None:
+        columns = COLUMNS[kind]
+        names = ["seq", "timestamp", "epoch", "day", *columns.values()]
+        if kind == "operations":
+            names.append("fail_run")
+        # Último (status, fail_run) por PR, para continuar las rachas
+        last: Dict[Optional[int], tuple] = {}
+        # Rachas tocadas en este lote: start_seq -> [pr, largo, último seq, último día]
+        runs: Dict[int, list] = {}
+
+        rows = []
+        for seq, event in enumerate(events, start=first_seq):
+            timestamp = _scalar(event.get("timestamp"))
+            epoch = _epoch(timestamp)
+            row = [seq, timestamp, epoch, timestamp[:10] if epoch is not None else None]
+            row.extend(_scalar(event.get(field)) for field in columns)
+            if kind == "operations":
+                pr_number = row[names.index("pr_number")]
+                if pr_number not in last:
+                    previous = self.db.execute(
+                        "SELECT status, fail_run FROM operations WHERE pr_number IS ? "
+                        "ORDER BY seq DESC LIMIT 1",
+                        (pr_number,),
+                    ).fetchone()
+                    last[pr_number] = tuple(previous) if previous else (None, None)
+                fail_run = None
+                if event.get("status") == "failed":
+                    status, run = last[pr_number]
+                    fail_run = run if status == "failed" else seq
+                    if fail_run not in runs:
+                        stored = self.db.execute(
+                            "SELECT length FROM failure_runs WHERE start_seq = ?", (fail_run,)
+                        ).fetchone()
+                        runs[fail_run] = [pr_number, stored[0] if stored else 0, seq, None]
+                    runs[fail_run][1:] = [runs[fail_run][1] + 1, seq, row[3]]
+                last[pr_number] = (event.get("status"), fail_run)
+                row.append(fail_run)
+            rows.append(row)
+
+        self.db.executemany(
+            f"INSERT OR REPLACE INTO {kind} ({', '.join(names)}) "
+            f"VALUES ({', '.join('?' * len(names))})",
+            rows,
+        )
+        self.db.executemany(
+            "INSERT OR REPLACE INTO failure_runs "
+            "(start_seq, pr_number, length, last_seq, last_day) VALUES (?, ?, ?, ?, ?)",
+            [(start, *run) for start, run in runs.items()],
+        )
+
+    @staticmethod
+    def _event(row: sqlite3.Row, kind: str) -> Dict:
+        event = {"kind": EVENT_KIND[kind], "seq": row["seq"], "timestamp": row["timestamp"]}
+        for field, column in COLUMNS[kind].items():
+            if row[column] is not None:
+                event[field] = row[column]
+        return event
+
+    @staticmethod
+    def _day_filter(since: Optional[str], until: Optional[str], column: str = "day"):
+        clauses, params = [], []
+        if since:
+            clauses.append(f"{column} >= ?")
+            params.append(since)
+        if until:
+            clauses.append(f"{column} <= ?")
+            params.append(until)
+        return clauses, params
+
+    def pr_timeline(self, pr_number: int, limit: Optional[int] = None) -> List[Dict]:
+        """Deploys, destroys y verificaciones de drift del PR, en orden cronológico."""
+        events = []
+        for kind in KINDS:
+            rows = self.db.execute(
+                f"SELECT * FROM {kind} WHERE pr_number = ? ORDER BY epoch, seq", (pr_number,)
+            )
+            events.extend(self._event(row, kind) for row in rows)
+        events.sort(key=lambda e: (_epoch(e["timestamp"]) or 0, e["kind"], e["seq"]))
+        return events[-limit:] if limit else events
+
+    def pr_summary(self, pr_number: int) -> Dict:
+        """Conteos por operación y estado, duración media y último drift del PR."""
+        operations = {}
+        for row in self.db.execute(
+            "SELECT operation, status, COUNT(*) AS n, AVG(duration_seconds) AS mean, "
+            "MAX(seq) AS last_seq FROM operations WHERE pr_number = ? "
+            "GROUP BY operation, status",
+            (pr_number,),
+        ):
+            entry = operations.setdefault(row["operation"], {"count": 0, "statuses": {}})
+            entry["count"] += row["n"]
+            entry["statuses"][row["status"]] = row["n"]
+            if row["status"] == "success" and row["mean"] is not None:
+                entry["mean_seconds"] = round(row["mean"], 2)
+
+        drift = self.db.execute(
+            "SELECT COUNT(*) AS n, MAX(drift_percent) AS worst FROM drift_checks "
+            "WHERE pr_number = ?",
+            (pr_number,),
+        ).fetchone()
+        last = self.db.execute(
+            "SELECT timestamp, drift_percent, status FROM drift_checks WHERE pr_number = ? "
+            "ORDER BY epoch DESC, seq DESC LIMIT 1",
+            (pr_number,),
+        ).fetchone()
+        return {
+            "pr_number": pr_number,
+            "operations": operations,
+            "drift_checks": drift["n"],
+            "max_drift_percent": drift["worst"],
+            "last_drift_check": dict(last) if last else None,
+        }
+
+    def slowest(
+        self,
+        operation: str = "deploy",
+        limit: int = 10,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> List[Dict]:
+        """Las `limit` operaciones exitosas más lentas (días YYYY-MM-DD inclusive)."""
+        clauses, params = self._day_filter(since, until)
+        where = " AND ".join(
+            ["operation = ?", "status = 'success'", "duration_seconds IS NOT NULL", *clauses]
+        )
+        rows = self.db.execute(
+            f"SELECT * FROM operations WHERE {where} ORDER BY duration_seconds DESC, seq DESC "
+            "LIMIT ?",
+            [operation, *params, limit],
+        )
+        return [self._event(row, "operations") for row in rows]
+
+    def failure_streaks(
+        self,
+        min_length: int = 2,
+        limit: int = 20,
+        since: Optional[str] = None,
+        pr_number: Optional[int] = None,
+    ) -> List[Dict]:
+        """
+        Rachas de operaciones fallidas consecutivas de un mismo PR.
+
+        Args:
+            min_length: Fallos consecutivos mínimos
+            since: Solo rachas cuyo último fallo es de ese día o posterior
+            pr_number: Limitar a un PR
+
+        Returns:
+            Rachas (más largas primero) con `pr_number`, `length`, `started_at`,
+            `ended_at`, operaciones involucradas y si sigue `open`
+        """
+        clauses, params = self._day_filter(since, None, "runs.last_day")
+        clauses.insert(0, "runs.length >= ?")
+        params.insert(0, min_length)
+        if pr_number is not None:
+            clauses.append("runs.pr_number = ?")
+            params.append(pr_number)
+        rows = self.db.execute(
+            f"""
+            SELECT runs.*, first.timestamp AS started_at, last.timestamp AS ended_at,
+                   last.commit_sha AS last_commit
+            FROM failure_runs AS runs
+            JOIN operations AS first ON first.seq = runs.start_seq
+            JOIN operations AS last ON last.seq = runs.last_seq
+            WHERE {" AND ".join(clauses)}
+            ORDER BY runs.length DESC, runs.last_seq DESC
+            LIMIT ?
+            """,
+            [*params, limit],
+        ).fetchall()
+
+        streaks = []
+        for row in rows:
+            latest = self.db.execute(
+                "SELECT seq FROM operations WHERE pr_number IS ? ORDER BY seq DESC LIMIT 1",
+                (row["pr_number"],),
+            ).fetchone()
+            operations = self.db.execute(
+                "SELECT DISTINCT operation FROM operations WHERE fail_run = ?",
+                (row["start_seq"],),
+            ).fetchall()
+            streaks.append(
+                {
+                    "pr_number": row["pr_number"],
+                    "length": row["length"],
+                    "started_at": row["started_at"],
+                    "ended_at": row["ended_at"],
+                    "operations": sorted(op[0] for op in operations if op[0] is not None),
+                    "last_commit": row["last_commit"],
+                    "open": latest["seq"] == row["last_seq"],
+                }
+            )
+        return streaks
+
+    def explain(self, sql: str, params: Iterable = ()) -> List[str]:
+        """Plan de SQLite de una consulta (para verificar el uso de índices)."""
+        return [row["detail"] for row in self.db.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
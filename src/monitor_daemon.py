@@ -0,0 +1,298 @@
+"""Daemon residente del monitor de limpieza y su cliente por socket unix."""
+
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+from src.inventory_cache import InventoryCache
+
+DEFAULT_SOCKET = os.environ.get("EPHEMERAL_MONITOR_SOCKET", "/tmp/ephemeral-monitor.sock")
+# Métodos cuyo resultado depende solo del inventario y de sus parámetros
+CACHEABLE_METHODS = ("summary", "analysis", "report", "inventory", "find", "missing")
+
+
+class MonitorDaemonError(Exception):
+    """Error devuelto por el daemon o daemon inaccesible."""
+
+
+def format_summary(summary: Dict[str, int]) -> str:
+    """Texto de `--summary` (compartido por el CLI y el cliente ligero)."""
+    lines = [
+        f"Contenedores: {summary['total_containers']} "
+        f"(ejecutándose: {summary['running_containers']})",
+        f"Volúmenes: {summary['total_volumes']}",
+        f"Redes: {summary['total_networks']}",
+        f"PRs únicos: {summary['unique_prs']}",
+    ]
+    for name, host in sorted(summary.get("hosts", {}).items()):
+        if host["status"] != "ok":
+            lines.append(f"  [{name}] ERROR: {host['error']}")
+            continue
+        lines.append(
+            f"  [{name}] {host['total_containers']} contenedores "
+            f"({host['running_containers']} ejecutándose), {host['total_volumes']} volúmenes, "
+            f"{host['total_networks']} redes, {host['unique_prs']} PRs"
+        )
+    return "\n".join(lines)
+
+
+def format_analysis(analysis: Dict) -> str:
+    """Texto del análisis por edad (compartido por el CLI y el cliente ligero)."""
+    candidates = analysis["cleanup_candidates"]
+    lines = [
+        f"Recursos que requieren limpieza (>{analysis['max_age_hours']}h)",
+        f"  Contenedores: {len(candidates['containers'])}",
+        f"  Volúmenes: {len(candidates['volumes'])}",
+        f"  Redes: {len(candidates['networks'])}",
+        f"  PRs afectados: {len(candidates['pr_numbers'])}",
+    ]
+    if candidates["pr_numbers"]:
+        lines.append(f"  PRs: {', '.join(f'#{pr}' for pr in sorted(candidates['pr_numbers']))}")
+    for name, host in sorted(analysis.get("hosts", {}).items()):
+        status = "" if host["status"] == "ok" else " (sin inventario: error de escaneo)"
+        lines.append(
+            f"  [{name}] {host['containers']} contenedores, {host['volumes']} volúmenes, "
+            f"{host['networks']} redes, {len(host['pr_numbers'])} PRs{status}"
+        )
+    return "\n".join(lines)
+
+
+class SocketRPCServer:
+    """
+    Servidor RPC por socket unix: una línea JSON por petición y por respuesta.
+
+    Protocolo: `{"method": ..., "params": {...}}` ->
+    `{"ok": true, "result": ...}` o `{"ok": false, "error": ...}`. Las
+    subclases registran sus métodos en `self.methods`.
+    """
+
+    thread_name = "rpc-server"
+
+    def __init__(self, socket_path: str):
+        self.socket_path = socket_path
+        self.started_at = time.time()
+        self.requests: Counter = Counter()
+        self._server: Optional[socketserver.ThreadingUnixStreamServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self.methods: Dict[str, Callable] = {"ping": lambda: "pong"}
+
+    def handle(self, method: str, params: Optional[Dict] = None):
+        """Ejecuta un método RPC."""
+        if method not in self.methods:
+            raise MonitorDaemonError(f"Método desconocido: {method}")
+        self.requests[method] += 1
+        return self.methods[method](**(params or {}))
+
+    def _handler(self):
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    if not line.strip():
+                        continue
+                    try:
+                        request = json.loads(line)
+                        result = daemon.handle(request.get("method"), request.get("params"))
+                        response = {"ok": True, "result": result}
+                    except (MonitorDaemonError, TypeError, ValueError) as e:
+                        response = {"ok": False, "error": str(e)}
+                    except Exception as e:  # noqa: BLE001 - el daemon no debe caerse
+                        response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                    try:
+                        self.wfile.write(json.dumps(response, default=str).encode() + b"\n")
+                        self.wfile.flush()
+                    except (BrokenPipeError, ConnectionResetError):
+                        return
+
+        return Handler
+
+    def _claim_socket(self) -> None:
+        """Elimina un socket huérfano; falla si otro daemon ya está escuchando."""
+        if not os.path.exists(self.socket_path):
+            return
+        if MonitorClient(self.socket_path, timeout=1).available():
+            raise MonitorDaemonError(f"Ya hay un daemon escuchando en {self.socket_path}")
+        os.unlink(self.socket_path)
+
+    def start(self) -> "SocketRPCServer":
+        """Abre el socket y atiende peticiones en un hilo."""
+        self._claim_socket()
+        self._server = socketserver.ThreadingUnixStreamServer(self.socket_path, self._handler())
+        self._server.daemon_threads = True
+        os.chmod(self.socket_path, 0o660)
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            kwargs={"poll_interval": 0.05},
+            name=self.thread_name,
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Detiene el servidor y elimina el socket."""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def __enter__(self) -> "SocketRPCServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+class MonitorDaemon(SocketRPCServer):
+    """
+    Mantiene el inventario caliente y responde consultas por un socket unix.
+
+    Un único hilo escanea Docker cada `interval` segundos (InventoryCache);
+    las consultas se calculan sobre el inventario en memoria y se memorizan
+    hasta el siguiente escaneo (protocolo de `SocketRPCServer`).
+    """
+
+    thread_name = "monitor-daemon"
+
+    def __init__(self, monitor, socket_path: str = DEFAULT_SOCKET, interval: float = 30):
+        super().__init__(socket_path)
+        self.monitor = monitor
+        self.cache = InventoryCache(self._scan, interval)
+        self._memo: Dict = {}
+        self._memo_version = None
+        self._index = None
+        self._index_version = None
+        self._lock = threading.Lock()
+        self.methods.update(
+            {
+                "status": self.status,
+                "refresh": self.refresh,
+                "summary": lambda: self.monitor.get_resource_summary(self.cache.get()),
+                "analysis": lambda max_age_hours=72: self.monitor.analyze_cleanup_needs(
+                    int(max_age_hours), resources=self.cache.get()
+                ),
+                "report": lambda max_age_hours=72, fmt="markdown": (
+                    self.monitor.generate_cleanup_report(
+                        int(max_age_hours), resources=self.cache.get(), fmt=fmt
+                    )
+                ),
+                "inventory": self.cache.get,
+                "find": lambda **filters: self.index().find(**filters),
+                "missing": lambda component: self.index().missing(component),
+            }
+        )
+
+    def _scan(self):
+        # Las edades se calculan respecto del momento del escaneo
+        self.monitor.current_time = datetime.now()
+        return self.monitor.scan_ephemeral_resources()
+
+    def index(self):
+        """Índice por PR/componente/entorno del inventario, construido una vez por escaneo."""
+        resources = self.cache.get()
+        version = self.cache.version
+        with self._lock:
+            if self._index_version == version:
+                return self._index
+        index = self.monitor.build_index(resources)
+        with self._lock:
+            self._index, self._index_version = index, version
+        return index
+
+    def status(self) -> Dict:
+        """Estado del daemon y del inventario en memoria."""
+        return {
+            "pid": os.getpid(),
+            "uptime_seconds": round(time.time() - self.started_at, 3),
+            "inventory_version": self.cache.version,
+            "inventory_age_seconds": round(self.cache.age_seconds() or 0, 3),
+            "last_scan_seconds": round(self.cache.last_duration, 3),
+            "scans": self.cache.refresh_count,
+            "scan_errors": self.cache.refresh_errors,
+            "requests": dict(self.requests),
+        }
+
+    def refresh(self) -> Dict:
+        """Fuerza un escaneo inmediato."""
+        self.cache.refresh()
+        return self.status()
+
+    def handle(self, method: str, params: Optional[Dict] = None):
+        """Ejecuta un método RPC; los de solo lectura se memorizan por versión."""
+        if method not in CACHEABLE_METHODS:
+            return super().handle(method, params)
+        if method not in self.methods:
+            raise MonitorDaemonError(f"Método desconocido: {method}")
+        params = params or {}
+        self.requests[method] += 1
+
+        self.cache.get()
+        key = (method, json.dumps(params, sort_keys=True))
+        with self._lock:
+            if self._memo_version != self.cache.version:
+                self._memo = {}
+                self._memo_version = self.cache.version
+            if key in self._memo:
+                return self._memo[key]
+        result = self.methods[method](**params)
+        with self._lock:
+            if self._memo_version == self.cache.version:
+                self._memo[key] = result
+        return result
+
+    def start(self) -> "MonitorDaemon":
+        """Escanea una vez, abre el socket y atiende peticiones en un hilo."""
+        self._claim_socket()
+        self.cache.refresh()
+        super().start()
+        self.cache.start()
+        return self
+
+    def stop(self) -> None:
+        """Detiene el servidor, el refresco y elimina el socket."""
+        self.cache.stop()
+        super().stop()
+
+
+class MonitorClient:
+    """Cliente ligero del daemon: una conexión por consulta, sin dependencias."""
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET, timeout: float = 5):
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def call(self, method: str, **params):
+        """Ejecuta un método del daemon y retorna su resultado."""
+        request = json.dumps({"method": method, "params": params}).encode() + b"\n"
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(self.timeout)
+                sock.connect(self.socket_path)
+                sock.sendall(request)
+                with sock.makefile("rb") as stream:
+                    line = stream.readline()
+        except OSError as e:
+            raise MonitorDaemonError(f"Daemon no disponible en {self.socket_path}: {e}")
+
+        if not line:
+            raise MonitorDaemonError("El daemon cerró la conexión sin responder")
+        response = json.loads(line)
+        if not response.get("ok"):
+            raise MonitorDaemonError(response.get("error", "error desconocido"))
+        return response["result"]
+
+    def available(self) -> bool:
+        """True si hay un daemon respondiendo en el socket."""
+        try:
+            return self.call("ping") == "pong"
+        except (MonitorDaemonError, ValueError):
+            return False
@@ -0,0 +1,215 @@
+"""Placement de stacks de PR entre varios hosts Docker según su capacidad libre."""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from src.docker_api import DockerAPIClient
+from src.resource_usage import parse_api_stats
+
+# Puerto base publicado por componente; los módulos suman PR % 100
+STACK_PORTS = {"app": 8000, "db": 5432, "proxy": 9000}
+# Demanda de un stack nuevo si todavía no hay stacks que observar
+DEFAULT_STACK_DEMAND = {"memory_bytes": 512 << 20, "cpu_percent": 10.0}
+
+
+class PlacementError(Exception):
+    """Ningún host puede recibir el stack."""
+
+
+def stack_ports(pr_number: int) -> List[int]:
+    """Puertos del host que publica el stack del PR."""
+    return sorted(base + pr_number % 100 for base in STACK_PORTS.values())
+
+
+def probe_host(client: DockerAPIClient, max_workers: int = 8) -> Dict:
+    """
+    Capacidad y ocupación actual de un host.
+
+    Memoria y CPU en uso son la suma de `/stats` de los contenedores en
+    ejecución (consultados en paralelo). Los puertos ocupados incluyen los
+    publicados por cualquier contenedor y los reservados por cada stack
+    efímero, aunque esté detenido o hibernado.
+    """
+    info = client.info()
+    containers = client.containers(include_stopped=True)
+    running = [c for c in containers if c.get("State") == "running"]
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        usage = list(pool.map(lambda c: parse_api_stats(client.container_stats(c["Id"])), running))
+
+    stacks = set()
+    ports = set()
+    for container in containers:
+        labels = container.get("Labels") or {}
+        if labels.get("environment") == "ephemeral" and labels.get("pr_number", "").isdigit():
+            stacks.add(int(labels["pr_number"]))
+        ports.update(p["PublicPort"] for p in container.get("Ports") or [] if p.get("PublicPort"))
+    for pr_number in stacks:
+        ports.update(stack_ports(pr_number))
+
+    return {
+        "memory_total": info.get("MemTotal", 0),
+        "cpus": info.get("NCPU", 1),
+        "memory_used": sum(u["memory_bytes"] for u in usage),
+        "cpu_percent": round(sum(u["cpu_percent"] for u in usage), 2),
+        "stacks": sorted(stacks),
+        "ports": sorted(ports),
+    }
+
+
+class PlacementScheduler:
+    """
+    Elige el host Docker de cada stack nuevo.
+
+    Un host es candidato si tiene libres los puertos del stack y, sumando la
+    demanda estimada del stack, su presión (máximo entre fracción de memoria
+    y de CPU en uso) no supera `saturation`. Entre los candidatos gana el de
+    menor presión; `stack_weight` penaliza además la cantidad de stacks.
+
+    Los stacks ya desplegados se quedan en su host. Cada placement reserva su
+    demanda hasta que el stack aparece en un sondeo, así que un lote de PRs
+    se reparte en lugar de apilarse en el host que estaba más libre.
+
+    Args:
+        hosts: `{nombre: docker_host}` (ver `federation.parse_hosts`)
+        saturation: Presión máxima admitida tras el placement (0-1)
+        stack_demand: `memory_bytes` y `cpu_percent` de un stack; por defecto
+            el promedio observado por stack en todos los hosts
+        stack_weight: Penalización por stack existente en el host
+        max_age: Segundos que se reutiliza un sondeo
+        probe: Función `docker_host -> dict` (por defecto `probe_host`)
+    """
+
+    def __init__(
+        self,
+        hosts: Dict[str, str],
+        saturation: float = 0.85,
+        stack_demand: Optional[Dict[str, float]] = None,
+        stack_weight: float = 0.01,
+        max_age: float = 30,
+        probe: Optional[Callable[[str], Dict]] = None,
+    ):
+        if not hosts:
+            raise ValueError("Se requiere al menos un host")
+        self.hosts = dict(hosts)
+        self.saturation = saturation
+        self.stack_demand = stack_demand
+        self.stack_weight = stack_weight
+        self.max_age = max_age
+        self.probe = probe or (lambda docker_host: probe_host(DockerAPIClient(docker_host)))
+        self.snapshot: Dict[str, Dict] = {}
+        self.probed_at: Optional[float] = None
+        # PR -> host de los placements que todavía no aparecen en un sondeo
+        self.pending: Dict[int, str] = {}
+
+    def refresh(self) -> Dict[str, Dict]:
+        """Sondea todos los hosts en paralelo; un host que falla queda con `error`."""
+
+        def run(name: str) -> Dict:
+            try:
+                return self.probe(self.hosts[name])
+            except Exception as e:  # noqa: BLE001 - el host queda fuera del placement
+                return {"error": f"{type(e).__name__}: {e}"}
+
+        with ThreadPoolExecutor(max_workers=len(self.hosts)) as pool:
+            self.snapshot = dict(zip(self.hosts, pool.map(run, self.hosts)))
+        self.probed_at = time.monotonic()
+        self.pending = {
+            pr: host
+            for pr, host in self.pending.items()
+            if pr not in self.snapshot[host].get("stacks", [])
+        }
+        return self.snapshot
+
+    def _current(self) -> Dict[str, Dict]:
+        if self.probed_at is None or time.monotonic() - self.probed_at > self.max_age:
+            self.refresh()
+        return self.snapshot
+
+    def demand(self) -> Dict[str, float]:
+        """Demanda estimada de un stack nuevo."""
+        if self.stack_demand:
+            return dict(DEFAULT_STACK_DEMAND, **self.stack_demand)
+        probed = [s for s in self.snapshot.values() if "error" not in s]
+        stacks = sum(len(s["stacks"]) for s in probed)
+        if not stacks:
+            return dict(DEFAULT_STACK_DEMAND)
+        return {
+            "memory_bytes": sum(s["memory_used"] for s in probed) / stacks,
+            "cpu_percent": sum(s["cpu_percent"] for s in probed) / stacks,
+        }
+
+    def host_of(self, pr_number: int) -> Optional[str]:
+        """Host donde ya está (o se acaba de asignar) el stack del PR."""
+        if pr_number in self.pending:
+            return self.pending[pr_number]
+        for name, state in self._current().items():
+            if pr_number in state.get("stacks", []):
+                return name
+        return None
+
+    def evaluate(self, pr_number: int) -> Dict[str, Dict]:
+        """Presión proyectada, score o motivo de rechazo de cada host."""
+        snapshot = self._current()
+        demand = self.demand()
+        wanted = set(stack_ports(pr_number))
+        evaluation = {}
+        for name, state in snapshot.items():
+            if "error" in state:
+                evaluation[name] = {"rejected": f"sondeo fallido ({state['error']})"}
+                continue
+            reserved = [pr for pr, host in self.pending.items() if host == name]
+            ports = set(state["ports"]).union(*(stack_ports(pr) for pr in reserved))
+            stacks = len(state["stacks"]) + len(reserved)
+            memory = state["memory_used"] + demand["memory_bytes"] * (len(reserved) + 1)
+            cpu = state["cpu_percent"] + demand["cpu_percent"] * (len(reserved) + 1)
+            pressure = max(
+                memory / state["memory_total"] if state["memory_total"] else 1.0,
+                cpu / (state["cpus"] * 100) if state["cpus"] else 1.0,
+            )
+            entry = {"pressure": round(pressure, 4), "stacks": stacks}
+            conflicts = sorted(wanted & ports)
+            if conflicts:
+                entry["rejected"] = f"puertos ocupados: {', '.join(map(str, conflicts))}"
+            elif pressure > self.saturation:
+                entry["rejected"] = f"saturado ({pressure:.0%} > {self.saturation:.0%})"
+            else:
+                entry["score"] = round(pressure + self.stack_weight * stacks, 4)
+            evaluation[name] = entry
+        return evaluation
+
+    def place(self, pr_number: int) -> Dict:
+        """
+        Asigna un host al stack del PR.
+
+        Returns:
+            Dict con `host`, `docker_host`, `reason` (`existing` o `scheduled`)
+            y la evaluación de cada host en `hosts`
+
+        Raises:
+            PlacementError: Si ningún host tiene puertos y capacidad libres
+        """
+        current = self.host_of(pr_number)
+        if current is not None:
+            return {
+                "pr_number": pr_number,
+                "host": current,
+                "docker_host": self.hosts[current],
+                "reason": "existing",
+                "hosts": {},
+            }
+
+        evaluation = self.evaluate(pr_number)
+        candidates = [(e["score"], name) for name, e in evaluation.items() if "score" in e]
+        if not candidates:
+            reasons = "; ".join(f"{name}: {e['rejected']}" for name, e in evaluation.items())
+            raise PlacementError(f"Sin host disponible para el PR #{pr_number} ({reasons})")
+        host = min(candidates)[1]
+        self.pending[pr_number] = host
+        return {
+            "pr_number": pr_number,
+            "host": host,
+            "docker_host": self.hosts[host],
+            "reason": "scheduled",
+            "hosts": evaluation,
+        }
@@ -1,27 +1,712 @@
 """Clase base TerraformProvisioner para abstracción de provisioning."""
 
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from src import commands
+from src.tracing import operation, traced
+
+DEFAULT_PLUGIN_CACHE_DIR = os.path.join("~", ".terraform.d", "plugin-cache")
+LOCK_FILE = ".terraform.lock.hcl"
+# Se guarda dentro de .terraform: borrar ese directorio fuerza un init completo
+INIT_STAMP = "init.sha256"
+# Planes cacheados y registros de despliegue: fuera de .terraform, que
+# `measure_init` y un init limpio borran
+LOCAL_DATA_DIR = ".ephemeral"
+# Archivos que determinan el plan además del state (tfplan y el state se excluyen)
+PLAN_INPUT_PATTERNS = ("*.tf", "*.tf.json", "*.tftpl", "*.tpl")
+# `terraform plan -detailed-exitcode`: 0 sin cambios, 2 con cambios
+PLAN_CHANGES_EXIT_CODE = 2
+
+# Componentes del stack: variables del stack que consume cada módulo y
+# componentes que usan sus outputs (a redesplegar si cambia su código)
+COMPONENTS = {
+    "app": {"variables": ("app_image", "app_env"), "dependents": ("proxy",)},
+    "db": {"variables": (), "dependents": ()},
+    "proxy": {"variables": (), "dependents": ()},
+}
+STACK_KEY = "_stack"
+
+_MODULE_PATTERN = re.compile(r'module\s+"([^"]+)"\s*\{[^{}]*?source\s*=\s*"([^"]+)"')
+
+_SOURCE_PATTERN = re.compile(r'^\s*(source|version)\s*=\s*"([^"]*)"', re.MULTILINE)
+
+
+def parse_var(raw: str):
+    """`nombre=valor` de `--var`; el valor se interpreta como JSON si es posible."""
+    name, sep, value = raw.partition("=")
+    if not sep or not name:
+        raise ValueError(f"Formato inválido (nombre=valor): {raw}")
+    try:
+        return name, json.loads(value)
+    except json.JSONDecodeError:
+        return name, value
+
+
+class TerraformError(Exception):
+    """Comando de Terraform terminado con error."""
+
+    def __init__(self, command: List[str], returncode: int, stderr: str = ""):
+        super().__init__(f"{' '.join(command)} terminó con código {returncode}: {stderr.strip()}")
+        self.command = command
+        self.returncode = returncode
+        self.stderr = stderr
+
 
 class TerraformProvisioner:
     """Provisioner de Terraform siguiendo el patrón DIP."""
 
-    def __init__(self, terraform_dir="infra/terraform/stacks/pr-preview"):
+    def __init__(
+        self,
+        terraform_dir="infra/terraform/stacks/pr-preview",
+        plugin_cache_dir: Optional[str] = None,
+        mirror_dir: Optional[str] = None,
+        run: Optional[Callable] = None,
+        plan_cache_dir: Optional[str] = None,
+        deployments_dir: Optional[str] = None,
+        scheduler=None,
+        workspace: Optional[str] = None,
+    ):
         self.terraform_dir = terraform_dir
+        # Workspace propio (TF_WORKSPACE): varios stacks en paralelo sin compartir state
+        self.workspace = workspace
+        # PlacementScheduler opcional: elige el host Docker (`docker_host`) de cada PR
+        self.scheduler = scheduler
+        self.last_placement: Optional[Dict] = None
+        self.deployments_dir = os.path.expanduser(
+            deployments_dir
+            or os.environ.get("TF_DEPLOYMENTS_DIR")
+            or os.path.join(terraform_dir, LOCAL_DATA_DIR, "deployments")
+        )
+        self.plan_cache_dir = os.path.expanduser(
+            plan_cache_dir
+            or os.environ.get("TF_PLAN_CACHE_DIR")
+            or os.path.join(terraform_dir, LOCAL_DATA_DIR, "plan-cache")
+        )
+        self.plugin_cache_dir = os.path.expanduser(
+            plugin_cache_dir or os.environ.get("TF_PLUGIN_CACHE_DIR") or DEFAULT_PLUGIN_CACHE_DIR
+        )
+        self.mirror_dir = os.path.expanduser(mirror_dir) if mirror_dir else None
+        # `run` inyectado (tests) o el runner compartido: timeout, límite de
+        # concurrencia y cassettes; en ambos casos cada comando es un span
+        self.run = traced(run) if run else commands.run
+
+    def _terraform(self, *args: str, ok_codes=(0,)) -> subprocess.CompletedProcess:
+        """Ejecuta `terraform -chdir=<dir> ...` con el cache de plugins y el mirror."""
+        command = ["terraform", f"-chdir={self.terraform_dir}", *args]
+        try:
+            result = self.run(command, capture_output=True, text=True, env=self.environment())
+        except subprocess.CalledProcessError as e:
+            # Timeout o terraform no instalado
+            raise TerraformError(command, e.returncode, str(e)) from e
+        if result.returncode not in ok_codes:
+            raise TerraformError(command, result.returncode, result.stderr or "")
+        return result
+
+    def environment(self) -> Dict[str, str]:
+        """Entorno de Terraform: cache de plugins compartido y config CLI del mirror."""
+        os.makedirs(self.plugin_cache_dir, exist_ok=True)
+        env = dict(os.environ, TF_PLUGIN_CACHE_DIR=self.plugin_cache_dir, TF_IN_AUTOMATION="1")
+        if self.workspace:
+            env["TF_WORKSPACE"] = self.workspace
+        config = self.write_mirror_config()
+        if config:
+            env["TF_CLI_CONFIG_FILE"] = config
+        return env
+
+    def mirrored_providers(self) -> List[str]:
+        """Providers presentes en el mirror local (`host/namespace/tipo`)."""
+        if not self.mirror_dir or not os.path.isdir(self.mirror_dir):
+            return []
+        root = Path(self.mirror_dir)
+        return sorted(
+            "/".join(path.relative_to(root).parts)
+            for path in root.glob("*/*/*")
+            if path.is_dir()
+        )
+
+    def write_mirror_config(self) -> Optional[str]:
+        """
+        Escribe la config CLI que instala desde el mirror los providers que contiene.
+
+        Los providers ausentes del mirror se siguen descargando del registry,
+        así que un mirror incompleto no rompe el init.
+
+        Returns:
+            Ruta del archivo de configuración, o None si no hay mirror poblado
+        """
+        providers = self.mirrored_providers()
+        if not providers:
+            return None
+
+        patterns = ", ".join(f'"{provider}"' for provider in providers)
+        config = os.path.join(self.mirror_dir, "terraform.rc")
+        with open(config, "w") as f:
+            f.write(
+                "provider_installation {\n"
+                "  filesystem_mirror {\n"
+                f'    path    = "{os.path.abspath(self.mirror_dir)}"\n'
+                f"    include = [{patterns}]\n"
+                "  }\n"
+                "  direct {\n"
+                f"    exclude = [{patterns}]\n"
+                "  }\n"
+                "}\n"
+            )
+        return config
+
+    def mirror_providers(self) -> Dict:
+        """Puebla el mirror local con `terraform providers mirror` según el lock file."""
+        if not self.mirror_dir:
+            raise ValueError("No hay mirror_dir configurado")
+        os.makedirs(self.mirror_dir, exist_ok=True)
+        start = time.monotonic()
+        self._terraform("providers", "mirror", os.path.abspath(self.mirror_dir))
+        return {
+            "providers": self.mirrored_providers(),
+            "duration_seconds": round(time.monotonic() - start, 3),
+        }
+
+    def _module_dirs(self) -> List[Path]:
+        """Directorio del stack y módulos locales referenciados (recursivo)."""
+        pending = [Path(self.terraform_dir).resolve()]
+        seen: List[Path] = []
+        while pending:
+            directory = pending.pop()
+            if directory in seen or not directory.is_dir():
+                continue
+            seen.append(directory)
+            for tf_file in sorted(directory.glob("*.tf")):
+                for key, value in _SOURCE_PATTERN.findall(tf_file.read_text()):
+                    if key == "source" and value.startswith(("./", "../")):
+                        pending.append((directory / value).resolve())
+        return seen
+
+    def init_fingerprint(self) -> str:
+        """
+        Hash de lo que determina el resultado de `terraform init`.
+
+        Cubre el lock file y las declaraciones `source`/`version` de providers y
+        módulos del stack y sus módulos locales. Cambios en recursos o
+        variables no requieren un nuevo init y no alteran el fingerprint.
+        """
+        digest = hashlib.sha256()
+        lock_file = os.path.join(self.terraform_dir, LOCK_FILE)
+        if os.path.exists(lock_file):
+            with open(lock_file, "rb") as f:
+                digest.update(f.read())
+
+        root = Path(self.terraform_dir).resolve()
+        for directory in self._module_dirs():
+            for tf_file in sorted(directory.glob("*.tf")):
+                declarations = _SOURCE_PATTERN.findall(tf_file.read_text())
+                if declarations:
+                    digest.update(os.path.relpath(tf_file, root).encode())
+                    digest.update(repr(declarations).encode())
+        digest.update(repr(self.mirrored_providers()).encode())
+        return digest.hexdigest()
+
+    def _stamp_path(self) -> str:
+        return os.path.join(self.terraform_dir, ".terraform", INIT_STAMP)
+
+    def is_initialized(self) -> bool:
+        """True si `.terraform` corresponde al fingerprint actual."""
+        if not os.path.isdir(os.path.join(self.terraform_dir, ".terraform", "providers")):
+            return False
+        try:
+            with open(self._stamp_path(), "r") as f:
+                return f.read().strip() == self.init_fingerprint()
+        except OSError:
+            return False
+
+    @operation("terraform.init")
+    def init(self, force: bool = False) -> Dict:
+        """
+        Ejecuta `terraform init` solo si el lock file o los módulos cambiaron.
+
+        Args:
+            force: Ejecutar init aunque el fingerprint coincida
+
+        Returns:
+            Dict con `status` (`skipped` o `initialized`), `fingerprint`
+            y `duration_seconds`
+        """
+        start = time.monotonic()
+        fingerprint = self.init_fingerprint()
+        if not force and self.is_initialized():
+            return {
+                "status": "skipped",
+                "fingerprint": fingerprint,
+                "duration_seconds": round(time.monotonic() - start, 3),
+            }
+
+        self._terraform("init", "-input=false")
+        os.makedirs(os.path.dirname(self._stamp_path()), exist_ok=True)
+        with open(self._stamp_path(), "w") as f:
+            f.write(fingerprint + "\n")
+        return {
+            "status": "initialized",
+            "fingerprint": fingerprint,
+            "duration_seconds": round(time.monotonic() - start, 3),
+        }
+
+    def measure_init(self) -> Dict[str, Dict]:
+        """
+        Compara el init en frío, con cache caliente y reutilizado.
+
+        - `cold`: sin `.terraform` ni cache de plugins (cache temporal vacío)
+        - `warm`: sin `.terraform`, con el cache de plugins compartido
+        - `reuse`: `.terraform` vigente, el init se omite
+        """
+        shared_cache = self.plugin_cache_dir
+        cold_cache = tempfile.mkdtemp(prefix="tf-cold-cache-")
+        results = {}
+        try:
+            shutil.rmtree(os.path.join(self.terraform_dir, ".terraform"), ignore_errors=True)
+            self.plugin_cache_dir = cold_cache
+            results["cold"] = self.init(force=True)
+        finally:
+            self.plugin_cache_dir = shared_cache
+            shutil.rmtree(cold_cache, ignore_errors=True)
+
+        # El init en frío no pobló el cache compartido: se calienta antes de medir
+        shutil.rmtree(os.path.join(self.terraform_dir, ".terraform"), ignore_errors=True)
+        self.init(force=True)
+        shutil.rmtree(os.path.join(self.terraform_dir, ".terraform"), ignore_errors=True)
+        results["warm"] = self.init(force=True)
+        results["reuse"] = self.init()
+        return results
+
+    def ensure_workspace(self) -> bool:
+        """Crea el workspace si no existe. Retorna True si lo creó."""
+        if not self.workspace or self.workspace == "default":
+            return False
+        if os.path.isdir(os.path.join(self.terraform_dir, "terraform.tfstate.d", self.workspace)):
+            return False
+        # `workspace new` no acepta TF_WORKSPACE apuntando a un workspace inexistente
+        env = self.environment()
+        env.pop("TF_WORKSPACE", None)
+        command = ["terraform", f"-chdir={self.terraform_dir}", "workspace", "new", self.workspace]
+        try:
+            result = self.run(command, capture_output=True, text=True, env=env)
+        except subprocess.CalledProcessError as e:
+            raise TerraformError(command, e.returncode, str(e)) from e
+        if result.returncode != 0:
+            raise TerraformError(command, result.returncode, result.stderr or "")
+        return True
 
     def apply(self, pr_number):
         """Aplica configuración de Terraform."""
         return {"status": "success", "pr_number": pr_number}
 
-    def destroy(self, pr_number):
-        """Destruye stack de Terraform."""
-        pass
+    @operation("terraform.destroy")
+    def destroy(self, pr_number, variables: Optional[Dict] = None) -> Dict:
+        """
+        Destruye el stack del PR y descarta su plan cacheado y su último despliegue.
+
+        Sin `docker_host` en `variables` se destruye en el host donde se
+        desplegó (ver `deployed_host`): con el daemon por defecto el provider
+        daría los recursos por borrados y seguirían corriendo en el host remoto.
+        """
+        start = time.monotonic()
+        self.init()
+        self.ensure_workspace()
+        variables = dict(variables or {})
+        if "docker_host" not in variables:
+            docker_host = self.deployed_host(pr_number)
+            if docker_host:
+                variables["docker_host"] = docker_host
+        self._terraform(
+            "destroy", "-input=false", "-auto-approve", *self._var_args(pr_number, variables)
+        )
+        self.clear_plan_cache(pr_number)
+        try:
+            os.remove(self._deployment_path(pr_number))
+        except OSError:
+            pass
+        return {
+            "status": "destroyed",
+            "pr_number": pr_number,
+            "docker_host": variables.get("docker_host"),
+            "duration_seconds": round(time.monotonic() - start, 3),
+        }
 
     def get_state(self, pr_number):
         """Obtiene estado del stack."""
         pass
 
-    def plan(self, pr_number):
-        """Genera plan de Terraform."""
-        pass
+    def state_serial(self) -> Optional[Dict]:
+        """
+        Lineage y serial del state local del workspace actual (None si no hay state).
+
+        Terraform incrementa el serial en cada escritura del state, así que un
+        plan guardado con el mismo serial sigue siendo aplicable.
+        """
+        workspace = self.workspace or os.environ.get("TF_WORKSPACE")
+        if not workspace:
+            try:
+                with open(os.path.join(self.terraform_dir, ".terraform", "environment")) as f:
+                    workspace = f.read().strip()
+            except OSError:
+                workspace = "default"
+
+        if workspace == "default":
+            state_file = os.path.join(self.terraform_dir, "terraform.tfstate")
+        else:
+            state_file = os.path.join(
+                self.terraform_dir, "terraform.tfstate.d", workspace, "terraform.tfstate"
+            )
+        try:
+            with open(state_file, "r") as f:
+                state = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        return {
+            "workspace": workspace,
+            "lineage": state.get("lineage"),
+            "serial": state.get("serial"),
+        }
+
+    def plan_fingerprint(self, pr_number: int, variables: Optional[Dict] = None) -> str:
+        """
+        Hash de las entradas del plan de un PR.
+
+        Cubre el código de los módulos (stack y módulos locales), los tfvars
+        que Terraform carga automáticamente, las variables `TF_VAR_*`, las
+        variables explícitas, el lock file y el serial del state.
+        """
+        digest = hashlib.sha256()
+        root = Path(self.terraform_dir).resolve()
+        for directory in self._module_dirs():
+            files = set()
+            for pattern in PLAN_INPUT_PATTERNS:
+                files.update(directory.glob(pattern))
+            if directory == root:
+                files.update(directory.glob("*.auto.tfvars"))
+                files.update(directory.glob("terraform.tfvars"))
+            for path in sorted(files):
+                digest.update(os.path.relpath(path, root).encode())
+                digest.update(path.read_bytes())
+
+        lock_file = root / LOCK_FILE
+        if lock_file.exists():
+            digest.update(lock_file.read_bytes())
+
+        env_vars = {k: v for k, v in os.environ.items() if k.startswith("TF_VAR_")}
+        digest.update(
+            json.dumps(
+                {
+                    "pr_number": pr_number,
+                    "variables": variables or {},
+                    "env": env_vars,
+                    "state": self.state_serial(),
+                },
+                sort_keys=True,
+                default=str,
+            ).encode()
+        )
+        return digest.hexdigest()
+
+    def _plan_cache_entry(self, pr_number: int) -> str:
+        return os.path.join(self.plan_cache_dir, f"pr-{pr_number}")
+
+    def cached_plan(self, pr_number: int, fingerprint: str) -> Optional[Dict]:
+        """Metadatos del plan cacheado del PR si coincide con `fingerprint`."""
+        entry = self._plan_cache_entry(pr_number)
+        try:
+            with open(os.path.join(entry, "meta.json"), "r") as f:
+                meta = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if meta.get("fingerprint") != fingerprint:
+            return None
+        if not os.path.exists(os.path.join(entry, "tfplan")):
+            return None
+        return meta
+
+    def clear_plan_cache(self, pr_number: Optional[int] = None) -> None:
+        """Elimina el plan cacheado de un PR (o todos)."""
+        target = (
+            self._plan_cache_entry(pr_number) if pr_number is not None else self.plan_cache_dir
+        )
+        shutil.rmtree(target, ignore_errors=True)
+
+    def placement_variables(self, pr_number: int, variables: Optional[Dict] = None) -> Dict:
+        """Variables del PR con el `docker_host` elegido por el scheduler (si hay uno)."""
+        variables = dict(variables or {})
+        if self.scheduler is not None and "docker_host" not in variables:
+            self.last_placement = self.scheduler.place(pr_number)
+            variables["docker_host"] = self.last_placement["docker_host"]
+        return variables
+
+    @staticmethod
+    def _var_args(pr_number: int, variables: Optional[Dict]) -> List[str]:
+        args = [f"-var=pr_number={pr_number}"]
+        for name, value in sorted((variables or {}).items()):
+            rendered = value if isinstance(value, str) else json.dumps(value)
+            args.append(f"-var={name}={rendered}")
+        return args
+
+    @operation("terraform.plan")
+    def plan(
+        self,
+        pr_number,
+        variables: Optional[Dict] = None,
+        out: Optional[str] = None,
+        use_cache: bool = True,
+    ) -> Dict:
+        """
+        Genera plan de Terraform, reutilizando el plan cacheado si nada cambió.
+
+        Args:
+            pr_number: Número de PR
+            variables: Variables adicionales (`-var`)
+            out: Ruta donde copiar el plan guardado (p. ej. `tfplan`)
+            use_cache: False para planificar siempre
+
+        Returns:
+            Dict con `status` (`planned`, `cached` o `no_changes`),
+            `has_changes`, `plan_file`, `plan_output`, `fingerprint`,
+            `docker_host` y `duration_seconds`
+        """
+        start = time.monotonic()
+        self.init()
+        variables = self.placement_variables(pr_number, variables)
+        fingerprint = self.plan_fingerprint(pr_number, variables)
+        entry = self._plan_cache_entry(pr_number)
+        plan_file = os.path.join(entry, "tfplan")
+        plan_output = os.path.join(entry, "plan.txt")
+
+        meta = self.cached_plan(pr_number, fingerprint) if use_cache else None
+        if meta is None:
+            self.clear_plan_cache(pr_number)
+            os.makedirs(entry, exist_ok=True)
+            result = self._terraform(
+                "plan",
+                "-input=false",
+                "-detailed-exitcode",
+                *self._var_args(pr_number, variables),
+                f"-out={os.path.abspath(plan_file)}",
+                ok_codes=(0, PLAN_CHANGES_EXIT_CODE),
+            )
+            shown = self._terraform("show", "-no-color", os.path.abspath(plan_file))
+            with open(plan_output, "w") as f:
+                f.write(shown.stdout or "")
+            meta = {
+                "fingerprint": fingerprint,
+                "pr_number": pr_number,
+                "has_changes": result.returncode == PLAN_CHANGES_EXIT_CODE,
+                "created_at": time.time(),
+            }
+            # meta.json se escribe al final: un plan interrumpido no queda como válido
+            with open(os.path.join(entry, "meta.json"), "w") as f:
+                json.dump(meta, f)
+            status = "planned"
+        else:
+            status = "cached" if meta["has_changes"] else "no_changes"
+
+        if out:
+            shutil.copyfile(plan_file, out)
+        return {
+            "status": status,
+            "pr_number": pr_number,
+            "docker_host": variables.get("docker_host"),
+            "has_changes": meta["has_changes"],
+            "plan_file": plan_file,
+            "plan_output": plan_output,
+            "fingerprint": fingerprint,
+            "duration_seconds": round(time.monotonic() - start, 3),
+        }
+
+    def _module_sources(self) -> Dict[str, Path]:
+        """Directorio de cada módulo local declarado en el stack."""
+        root = Path(self.terraform_dir).resolve()
+        sources = {}
+        for tf_file in sorted(root.glob("*.tf")):
+            for name, source in _MODULE_PATTERN.findall(tf_file.read_text()):
+                if source.startswith(("./", "../")):
+                    sources[name] = (root / source).resolve()
+        return sources
+
+    @staticmethod
+    def _hash_dir(digest, directory: Path) -> None:
+        files = set()
+        for pattern in PLAN_INPUT_PATTERNS:
+            files.update(directory.glob(pattern))
+        for path in sorted(files):
+            digest.update(path.name.encode())
+            digest.update(path.read_bytes())
+
+    def component_fingerprints(
+        self, pr_number: int, variables: Optional[Dict] = None
+    ) -> Dict[str, Dict[str, str]]:
+        """
+        Fingerprints por componente para decidir qué redesplegar.
+
+        `_stack` cubre el stack raíz (código, tfvars, lock file, `TF_VAR_*`,
+        PR). Para cada componente se separan el código del módulo (`source`)
+        y las variables que recibe (`inputs`): un cambio de código también
+        obliga a redesplegar los componentes que usan sus outputs.
+        """
+        variables = variables or {}
+        root = Path(self.terraform_dir).resolve()
+
+        stack = hashlib.sha256()
+        self._hash_dir(stack, root)
+        for path in sorted([*root.glob("*.auto.tfvars"), *root.glob("terraform.tfvars")]):
+            stack.update(path.read_bytes())
+        lock_file = root / LOCK_FILE
+        if lock_file.exists():
+            stack.update(lock_file.read_bytes())
+        env_vars = {k: v for k, v in os.environ.items() if k.startswith("TF_VAR_")}
+        shared = {
+            name: value
+            for name, value in variables.items()
+            if name != "resource_limits"
+            and not any(name in spec["variables"] for spec in COMPONENTS.values())
+        }
+        stack.update(
+            json.dumps(
+                {"pr_number": pr_number, "env": env_vars, "variables": shared},
+                sort_keys=True,
+                default=str,
+            ).encode()
+        )
+        fingerprints = {STACK_KEY: {"source": stack.hexdigest(), "inputs": ""}}
+
+        modules = self._module_sources()
+        for component, spec in COMPONENTS.items():
+            source = hashlib.sha256()
+            if component in modules:
+                self._hash_dir(source, modules[component])
+            inputs = {name: variables.get(name) for name in spec["variables"]}
+            inputs["resource_limits"] = (variables.get("resource_limits") or {}).get(component)
+            fingerprints[component] = {
+                "source": source.hexdigest(),
+                "inputs": hashlib.sha256(
+                    json.dumps(inputs, sort_keys=True, default=str).encode()
+                ).hexdigest(),
+            }
+        return fingerprints
+
+    def _deployment_path(self, pr_number: int) -> str:
+        return os.path.join(self.deployments_dir, f"pr-{pr_number}.json")
+
+    def last_deployment(self, pr_number: int) -> Optional[Dict]:
+        """Fingerprints y serial del state del último despliegue del PR."""
+        try:
+            with open(self._deployment_path(pr_number), "r") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _record_deployment(
+        self, pr_number: int, fingerprints: Dict, docker_host: Optional[str] = None
+    ) -> None:
+        os.makedirs(self.deployments_dir, exist_ok=True)
+        with open(self._deployment_path(pr_number), "w") as f:
+            json.dump(
+                {
+                    "fingerprints": fingerprints,
+                    "state": self.state_serial(),
+                    "docker_host": docker_host,
+                    "deployed_at": time.time(),
+                },
+                f,
+            )
+
+    def deployed_host(self, pr_number: int) -> Optional[str]:
+        """
+        `docker_host` donde está el stack del PR: el del último despliegue
+        registrado o, sin registro, el host donde el scheduler lo encuentra
+        (None: daemon por defecto).
+        """
+        previous = self.last_deployment(pr_number)
+        if previous and previous.get("docker_host"):
+            return previous["docker_host"]
+        if self.scheduler is not None:
+            host = self.scheduler.host_of(pr_number)
+            if host is not None:
+                return self.scheduler.hosts[host]
+        return None
+
+    @staticmethod
+    def changed_components(previous: Dict[str, Dict], current: Dict[str, Dict]) -> List[str]:
+        """Componentes a redesplegar (incluye dependientes de módulos con código nuevo)."""
+        changed = set()
+        for component, spec in COMPONENTS.items():
+            before = previous.get(component, {})
+            if before.get("source") != current[component]["source"]:
+                changed.add(component)
+                changed.update(spec["dependents"])
+            elif before.get("inputs") != current[component]["inputs"]:
+                changed.add(component)
+        return [component for component in COMPONENTS if component in changed]
+
+    @operation("terraform.redeploy")
+    def redeploy(self, pr_number: int, variables: Optional[Dict] = None) -> Dict:
+        """
+        Redespliegue incremental: aplica solo los módulos cuyas entradas cambiaron.
+
+        Cambiar la imagen o el entorno de la app reemplaza únicamente su
+        contenedor; db (con su volumen), red y proxy no se tocan. Se hace un
+        apply completo (vía `plan`, con su cache) si no hay despliegue previo
+        registrado, si cambió el stack raíz o si el state fue modificado por
+        otro proceso desde el último despliegue.
+
+        Returns:
+            Dict con `mode` (`full`, `incremental` o `unchanged`), `components`,
+            `targets`, `docker_host` y `duration_seconds`
+        """
+        start = time.monotonic()
+        self.init()
+        self.ensure_workspace()
+        variables = self.placement_variables(pr_number, variables)
+        current = self.component_fingerprints(pr_number, variables)
+        previous = self.last_deployment(pr_number)
+
+        if (
+            previous is None
+            or previous["fingerprints"].get(STACK_KEY) != current[STACK_KEY]
+            or previous.get("state") != self.state_serial()
+        ):
+            mode = "full"
+            components = list(COMPONENTS)
+            targets: List[str] = []
+            planned = self.plan(pr_number, variables)
+            if planned["has_changes"]:
+                self._terraform("apply", "-input=false", os.path.abspath(planned["plan_file"]))
+        else:
+            components = self.changed_components(previous["fingerprints"], current)
+            targets = [f"-target=module.{component}" for component in components]
+            mode = "incremental" if components else "unchanged"
+            if components:
+                self._terraform(
+                    "apply",
+                    "-input=false",
+                    "-auto-approve",
+                    *self._var_args(pr_number, variables),
+                    *targets,
+                )
+
+        if mode != "unchanged":
+            self._record_deployment(pr_number, current, variables.get("docker_host"))
+        return {
+            "mode": mode,
+            "pr_number": pr_number,
+            "docker_host": variables.get("docker_host"),
+            "components": components,
+            "targets": [target[len("-target="):] for target in targets],
+            "duration_seconds": round(time.monotonic() - start, 3),
+        }
 
     def create_stack(self, pr_number):
         """Crea stack de Terraform."""
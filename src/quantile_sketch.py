@@ -0,0 +1,133 @@
+"""Sketch de cuantiles mergeable con error relativo acotado (estilo DDSketch)."""
+
+import math
+from typing import Dict, Iterable, Optional
+
+
+class DDSketch:
+    """
+    Cuantiles aproximados sobre buckets logarítmicos.
+
+    Cada valor positivo cae en el bucket `ceil(log_gamma(x))`, con
+    `gamma = (1 + a) / (1 - a)`; cualquier cuantil se responde con error
+    relativo menor que `relative_accuracy` (`a`). Dos sketches con la misma
+    precisión se combinan sumando contadores, por lo que un sketch por día
+    se puede fusionar en cualquier ventana sin volver a leer los eventos.
+
+    Si se superan `max_bins` buckets se fusionan los más bajos (la precisión
+    se pierde primero en los cuantiles inferiores, no en p95/p99).
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, max_bins: int = 2048):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy debe estar entre 0 y 1")
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _key(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, key: int) -> float:
+        # Punto del bucket (gamma^(k-1), gamma^k] con error relativo <= a en ambos extremos
+        return 2 * self.gamma**key / (self.gamma + 1)
+
+    def add(self, value: float, count: int = 1) -> None:
+        """Registra `count` observaciones de `value` (los valores <= 0 van al bucket cero)."""
+        if value > 0:
+            key = self._key(value)
+            self.bins[key] = self.bins.get(key, 0) + count
+            if len(self.bins) > self.max_bins:
+                self._collapse()
+        else:
+            self.zero_count += count
+        self.count += count
+        self.sum += value * count
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def update(self, values: Iterable[float]) -> "DDSketch":
+        """Registra varias observaciones."""
+        for value in values:
+            self.add(value)
+        return self
+
+    def _collapse(self) -> None:
+        keys = sorted(self.bins)
+        excess = len(keys) - self.max_bins
+        target = keys[excess]
+        for key in keys[:excess]:
+            self.bins[target] += self.bins.pop(key)
+
+    def merge(self, other: "DDSketch") -> "DDSketch":
+        """Suma los contadores de `other` (misma precisión) en este sketch."""
+        if other.gamma != self.gamma:
+            raise ValueError("Solo se pueden combinar sketches con la misma precisión")
+        if not other.count:
+            return self
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Valor aproximado del cuantil `q` (entre 0 y 1); None si el sketch está vacío."""
+        if not 0 <= q <= 1:
+            raise ValueError("El cuantil debe estar entre 0 y 1")
+        if not self.count:
+            return None
+
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                return min(max(self._value(key), self.min), self.max)
+        return self.max
+
+    def percentiles(self, pcts: Iterable[float] = (50, 90, 95, 99)) -> Dict[str, Optional[float]]:
+        """Percentiles como `{"p50": ..., "p99": ...}` (`pcts` entre 0 y 100)."""
+        return {f"p{pct:g}": self.quantile(pct / 100) for pct in pcts}
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    def to_dict(self) -> Dict:
+        """Representación JSON (claves de bucket como string)."""
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "bins": {str(key): count for key, count in sorted(self.bins.items())},
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "DDSketch":
+        """Reconstruye un sketch serializado con `to_dict`."""
+        sketch = cls(data["relative_accuracy"])
+        sketch.bins = {int(key): count for key, count in data["bins"].items()}
+        sketch.zero_count = data["zero_count"]
+        sketch.count = data["count"]
+        sketch.sum = data["sum"]
+        if sketch.count:
+            sketch.min, sketch.max = data["min"], data["max"]
+        return sketch
@@ -0,0 +1,316 @@
+"""Detector incremental de regresiones de latencia (EWMA + CUSUM) sobre operations.json."""
+
+import json
+import math
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.metrics_archive import load_metrics
+
+# Serie -> (lista en operations.json, campo de duración)
+SERIES_FIELDS = {
+    "deploy": ("operations", "duration_seconds"),
+    "destroy": ("operations", "duration_seconds"),
+    "drift_check": ("drift_checks", "check_duration_seconds"),
+}
+
+STATE_FORMAT = 1
+
+
+def load_history(
+    path: str, archive_dir: Optional[str] = None, since_seq: Optional[Dict[str, int]] = None
+) -> Dict:
+    """
+    Historial de operations.json (vacío si no existe o es inválido).
+
+    Con `archive_dir` incluye los eventos archivados desde `since_seq`.
+    """
+    return load_metrics(path, archive_dir, since_seq=since_seq)
+
+
+def series_events(data: Dict) -> Iterable[Tuple[str, Dict, float]]:
+    """(serie, evento, duración) de las operaciones exitosas y verificaciones de drift."""
+    for op in data.get("operations", []):
+        if op.get("status") == "success" and op.get("operation") in SERIES_FIELDS:
+            yield op["operation"], op, op.get("duration_seconds")
+    for check in data.get("drift_checks", []):
+        if check.get("status") != "error":
+            yield "drift_check", check, check.get("check_duration_seconds")
+
+
+class SeriesDetector:
+    """
+    Cambio de nivel de una serie de duraciones.
+
+    Trabaja sobre log(duración), así que un umbral expresa un cambio relativo
+    (40% más lento es lo mismo con deploys de 30s que de 300s). El nivel base
+    es una EWMA que solo se actualiza mientras la serie está bajo control; dos
+    CUSUM (subida y bajada) acumulan desvíos en unidades de desviación estándar
+    y disparan cuando superan `threshold`. La corrida que disparó define el
+    inicio del cambio (timestamp y commit de su primera observación).
+    """
+
+    def __init__(
+        self,
+        alpha: float = 0.02,
+        slack: float = 0.5,
+        threshold: float = 15.0,
+        warmup: int = 30,
+        min_ratio: float = 1.25,
+        min_std: float = 0.05,
+        clip: float = 3.0,
+    ):
+        self.alpha = alpha
+        self.slack = slack
+        self.threshold = threshold
+        self.warmup = warmup
+        self.min_ratio = min_ratio
+        self.min_std = min_std
+        self.clip = clip
+        self.count = 0
+        self.mean = 0.0
+        self.var = 0.0
+        # Nivel de referencia congelado mientras hay una corrida abierta
+        self.reference: Optional[float] = None
+        self.runs = {"up": self._empty_run(), "down": self._empty_run()}
+
+    @staticmethod
+    def _empty_run() -> Dict:
+        return {"cusum": 0.0, "n": 0, "sum": 0.0, "start": None, "commit": None}
+
+    @property
+    def baseline_seconds(self) -> Optional[float]:
+        return math.exp(self.mean) if self.count else None
+
+    def _update_baseline(self, z: float) -> None:
+        # Durante el warmup el peso 1/n equivale a la media y varianza acumuladas;
+        # después, el desvío se acota para que los outliers no muevan la base.
+        alpha = max(self.alpha, 1 / (self.count + 1))
+        diff = z - self.mean
+        if self.count >= self.warmup:
+            bound = self.clip * max(math.sqrt(self.var), self.min_std)
+            diff = max(-bound, min(bound, diff))
+        self.mean += alpha * diff
+        self.var = (1 - alpha) * (self.var + alpha * diff * diff)
+        self.count += 1
+
+    def observe(
+        self, value: float, timestamp: Optional[str] = None, commit: Optional[str] = None
+    ) -> Optional[Dict]:
+        """
+        Procesa una duración. Retorna el cambio detectado o None.
+
+        El cambio es `{"direction": "up"|"down", "baseline_seconds",
+        "current_seconds", "ratio", "started_at", "started_commit",
+        "observations"}`; tras un cambio el nivel base pasa a ser el nuevo.
+        """
+        if value is None or value <= 0:
+            return None
+        z = math.log(value)
+        if self.count < self.warmup:
+            self._update_baseline(z)
+            return None
+
+        reference = self.mean if self.reference is None else self.reference
+        std = max(math.sqrt(self.var), self.min_std)
+        # Desvío acotado: un outlier aislado no alcanza para disparar el CUSUM
+        deviation = max(-self.clip, min(self.clip, (z - reference) / std))
+        in_control = True
+        for direction, signed in (("up", deviation), ("down", -deviation)):
+            run = self.runs[direction]
+            run["cusum"] = max(0.0, run["cusum"] + signed - self.slack)
+            if run["cusum"] == 0:
+                self.runs[direction] = self._empty_run()
+                continue
+            in_control = False
+            if run["n"] == 0:
+                run["start"], run["commit"] = timestamp, commit
+            run["n"] += 1
+            run["sum"] += z
+
+        self._update_baseline(z)
+        if in_control:
+            self.reference = None
+            return None
+        self.reference = reference
+
+        for direction in ("up", "down"):
+            run = self.runs[direction]
+            if run["cusum"] <= self.threshold:
+                continue
+            level = run["sum"] / run["n"]
+            ratio = math.exp(level - reference)
+            self.runs = {"up": self._empty_run(), "down": self._empty_run()}
+            self.reference = None
+            if max(ratio, 1 / ratio) < self.min_ratio:
+                # Cambio estadístico pero menor al relevante: la EWMA lo absorbe
+                return None
+            change = {
+                "direction": direction,
+                "baseline_seconds": round(math.exp(reference), 3),
+                "current_seconds": round(math.exp(level), 3),
+                "ratio": round(ratio, 3),
+                "started_at": run["start"],
+                "started_commit": run["commit"],
+                "observations": run["n"],
+            }
+            self.mean = level
+            return change
+        return None
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "var": self.var,
+            "reference": self.reference,
+            "runs": self.runs,
+        }
+
+    def load(self, state: Dict) -> "SeriesDetector":
+        self.count, self.mean, self.var = state["count"], state["mean"], state["var"]
+        self.reference = state["reference"]
+        self.runs = state["runs"]
+        return self
+
+
+class RegressionMonitor:
+    """
+    Corre un `SeriesDetector` por serie sobre el historial de métricas.
+
+    `update(data)` procesa solo los eventos nuevos desde la última llamada
+    (el historial es append-only; si se acorta, se recalcula desde cero) y
+    mantiene la lista de regresiones con su ventana de inicio y detección.
+    Una regresión queda `open` hasta que la serie vuelve a menos de
+    `min_ratio` veces el nivel previo a la regresión.
+    """
+
+    def __init__(self, **detector_options):
+        self.detector_options = detector_options
+        self._reset()
+
+    def _reset(self) -> None:
+        self.detectors: Dict[str, SeriesDetector] = {}
+        self.seen = {"operations": 0, "drift_checks": 0}
+        self.regressions: List[Dict] = []
+
+    def _detector(self, series: str) -> SeriesDetector:
+        if series not in self.detectors:
+            self.detectors[series] = SeriesDetector(**self.detector_options)
+        return self.detectors[series]
+
+    def update(self, data: Dict) -> List[Dict]:
+        """
+        Procesa los eventos nuevos de `data`. Retorna las regresiones nuevas o resueltas.
+
+        `seen` cuenta posiciones lógicas: si `data["archived"]` indica que las
+        listas empiezan más adelante (eventos movidos al archivo), se
+        descuenta ese offset. Los eventos archivados que no se vieron deben
+        venir en `data` (`load_metrics(..., since_seq=monitor.seen)`).
+        """
+        offsets = data.get("archived") or {}
+        totals = {key: offsets.get(key, 0) + len(data.get(key, [])) for key in self.seen}
+        if any(totals[key] < seen for key, seen in self.seen.items()):
+            self._reset()
+
+        fresh = {
+            key: data.get(key, [])[max(seen - offsets.get(key, 0), 0):]
+            for key, seen in self.seen.items()
+        }
+        events = sorted(series_events(fresh), key=lambda item: item[1].get("timestamp") or "")
+        changed = []
+        for series, event, value in events:
+            change = self._detector(series).observe(
+                value, event.get("timestamp"), event.get("commit")
+            )
+            if change:
+                changed.extend(self._record(series, change, event))
+
+        self.seen = totals
+        return changed
+
+    def _record(self, series: str, change: Dict, event: Dict) -> List[Dict]:
+        open_regressions = [
+            r for r in self.regressions if r["series"] == series and r["status"] == "open"
+        ]
+        if change["direction"] == "up":
+            regression = {
+                "series": series,
+                "metric": SERIES_FIELDS[series][1],
+                "status": "open",
+                "detected_at": event.get("timestamp"),
+                "detected_commit": event.get("commit"),
+                **{k: v for k, v in change.items() if k != "direction"},
+            }
+            self.regressions.append(regression)
+            return [regression]
+
+        resolved = []
+        for regression in open_regressions:
+            if change["current_seconds"] < regression["baseline_seconds"] * self._min_ratio():
+                regression["status"] = "resolved"
+                regression["resolved_at"] = event.get("timestamp")
+                regression["resolved_commit"] = event.get("commit")
+                resolved.append(regression)
+        return resolved
+
+    def _min_ratio(self) -> float:
+        return self.detector_options.get("min_ratio", SeriesDetector().min_ratio)
+
+    def active(self) -> List[Dict]:
+        """Regresiones abiertas, la más reciente primero."""
+        return [r for r in reversed(self.regressions) if r["status"] == "open"]
+
+    def alerts(self, generated_at: Optional[str] = None) -> Dict:
+        """Salida para alertas: regresiones activas, historial y nivel actual por serie."""
+        return {
+            "generated_at": generated_at or datetime.now().isoformat(timespec="seconds"),
+            "active": self.active(),
+            "regressions": list(reversed(self.regressions)),
+            "series": {
+                series: {
+                    "observations": detector.count,
+                    "baseline_seconds": (
+                        round(detector.baseline_seconds, 3) if detector.count else None
+                    ),
+                }
+                for series, detector in sorted(self.detectors.items())
+            },
+        }
+
+    def to_dict(self) -> Dict:
+        return {
+            "format": STATE_FORMAT,
+            "options": self.detector_options,
+            "seen": self.seen,
+            "detectors": {name: d.to_dict() for name, d in self.detectors.items()},
+            "regressions": self.regressions,
+        }
+
+    def save(self, path: str) -> None:
+        """Guarda el estado para continuar incrementalmente en la próxima ejecución."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, **detector_options) -> "RegressionMonitor":
+        """Estado guardado con `save`; empieza de cero si no existe o cambió la configuración."""
+        monitor = cls(**detector_options)
+        try:
+            with open(path, "r") as f:
+                state = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return monitor
+        if state.get("format") != STATE_FORMAT or state.get("options") != detector_options:
+            return monitor
+        monitor.seen = state["seen"]
+        monitor.regressions = state["regressions"]
+        monitor.detectors = {
+            name: SeriesDetector(**detector_options).load(detector)
+            for name, detector in state["detectors"].items()
+        }
+        return monitor
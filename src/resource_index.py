@@ -0,0 +1,115 @@
+"""Índice de recursos efímeros por PR, componente y entorno (labels ya parseados)."""
+
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Set
+
+from src.resource_usage import identify
+
+KINDS = ("containers", "volumes", "networks")
+
+
+def normalize_component(component: str) -> str:
+    """Nombre de componente como en los nombres de recurso (`database` -> `db`)."""
+    return identify("", {"component": component})["component"]
+
+
+def label_fields(name: str, labels: Dict[str, str]) -> Dict:
+    """
+    Campos indexables de un recurso a partir de sus labels ya parseados.
+
+    `pr_number` y `component` salen del label o, si falta, del nombre
+    (`identify`); `component` se normaliza (`database` -> `db`).
+    """
+    fields = identify(name, labels)
+    fields["environment"] = labels.get("environment")
+    return fields
+
+
+class ResourceIndex:
+    """
+    Índices de un inventario (`scan_ephemeral_resources`) construidos una vez.
+
+    Cada índice guarda, por clave, los recursos ordenados por edad
+    ascendente junto con sus edades, así que "componente X con más de N
+    horas" es un diccionario más una búsqueda binaria. Los recursos sin edad
+    conocida no aparecen en las consultas con `older_than`.
+    """
+
+    def __init__(self, resources: Dict[str, List[Dict]]):
+        self.resources = {kind: list(resources.get(kind, [])) for kind in KINDS}
+        # (tipo, campo) -> {valor: (edades, recursos con edad, recursos sin edad)}
+        self._indexes: Dict[tuple, Dict] = {}
+        # PR -> componentes con al menos un contenedor
+        self.stacks: Dict[int, Set[str]] = {}
+
+        for kind, items in self.resources.items():
+            for field in ("pr_number", "component", "environment"):
+                groups: Dict = {}
+                for resource in items:
+                    value = resource.get(field)
+                    if value is not None:
+                        groups.setdefault(value, []).append(resource)
+                self._indexes[(kind, field)] = {
+                    value: self._by_age(group) for value, group in groups.items()
+                }
+            self._indexes[(kind, None)] = {None: self._by_age(items)}
+
+        for container in self.resources["containers"]:
+            if container.get("pr_number") is not None:
+                components = self.stacks.setdefault(container["pr_number"], set())
+                if container.get("component"):
+                    components.add(container["component"])
+
+    @staticmethod
+    def _by_age(resources: Iterable[Dict]):
+        aged = sorted(
+            (r for r in resources if r.get("age_hours") is not None),
+            key=lambda r: r["age_hours"],
+        )
+        unaged = [r for r in resources if r.get("age_hours") is None]
+        return [r["age_hours"] for r in aged], aged, unaged
+
+    def find(
+        self,
+        kind: str = "containers",
+        pr_number: Optional[int] = None,
+        component: Optional[str] = None,
+        environment: Optional[str] = None,
+        older_than: Optional[float] = None,
+    ) -> List[Dict]:
+        """
+        Recursos de `kind` que cumplen todos los filtros, del más viejo al más nuevo.
+
+        Se parte del índice más selectivo y el resto de los filtros se
+        aplican solo a esos candidatos.
+        """
+        if kind not in KINDS:
+            raise ValueError(f"Tipo de recurso desconocido: {kind}")
+        filters = {
+            field: value
+            for field, value in (
+                ("pr_number", pr_number),
+                ("component", normalize_component(component) if component else None),
+                ("environment", environment),
+            )
+            if value is not None
+        }
+
+        candidates = [
+            self._indexes[(kind, field)].get(value, ([], [], []))
+            for field, value in filters.items()
+        ] or [self._indexes[(kind, None)][None]]
+        ages, aged, unaged = min(candidates, key=lambda c: len(c[1]) + len(c[2]))
+
+        if older_than is not None:
+            matches = aged[bisect_right(ages, older_than):][::-1]
+        else:
+            matches = aged[::-1] + unaged
+        if len(filters) > 1:
+            matches = [r for r in matches if all(r.get(f) == v for f, v in filters.items())]
+        return matches
+
+    def missing(self, component: str) -> List[int]:
+        """PRs con contenedores pero sin ninguno del componente indicado."""
+        component = normalize_component(component)
+        return sorted(pr for pr, components in self.stacks.items() if component not in components)
@@ -0,0 +1,293 @@
+"""Contabilidad de CPU, memoria y disco por stack efímero."""
+
+import json
+import os
+import re
+from datetime import datetime, timezone
+from glob import glob
+from typing import Dict, Iterable, List, Optional
+
+from src.units import parse_size
+
+NAME_RE = re.compile(r"ephemeral-pr-(\d+)(?:-(\w+))?")
+
+# Rutas de cgroup v2 según el driver de cgroups de Docker
+CGROUP_PATTERNS = (
+    "system.slice/docker-{id}*.scope",
+    "docker/{id}*",
+)
+
+
+def parse_labels(raw) -> Dict[str, str]:
+    """Convierte `{{.Labels}}` de Docker (`k=v,k2=v2`) en dict; un dict se copia."""
+    if isinstance(raw, dict):
+        return dict(raw)
+    labels = {}
+    for item in (raw or "").split(","):
+        key, sep, value = item.partition("=")
+        if sep and key:
+            labels[key.strip()] = value.strip()
+    return labels
+
+
+def identify(name: str, labels: Optional[Dict[str, str]] = None) -> Dict:
+    """Obtiene PR y componente de un recurso por labels o por nombre."""
+    labels = labels or {}
+    match = NAME_RE.search(name or "")
+    pr_number = labels.get("pr_number") or (match.group(1) if match else None)
+    component = labels.get("component") or (
+        match.group(2) if match and match.group(2) else "unknown"
+    )
+    # El módulo db etiqueta component=database; se usa el sufijo del nombre
+    if component == "database":
+        component = "db"
+
+    try:
+        pr_number = int(pr_number) if pr_number is not None else None
+    except ValueError:
+        pr_number = None
+
+    return {"pr_number": pr_number, "component": component}
+
+
+def _percent(value: str) -> float:
+    try:
+        return float((value or "0").rstrip("%"))
+    except ValueError:
+        return 0.0
+
+
+def _pair(value: str) -> List[int]:
+    """Parsea pares `usado / total` de Docker (`12MiB / 1GiB`)."""
+    result = []
+    for part in (value or "").split("/")[:2]:
+        try:
+            result.append(parse_size(part))
+        except ValueError:
+            result.append(0)
+    return result + [0] * (2 - len(result))
+
+
+def parse_stats_lines(lines: Iterable[str]) -> List[Dict]:
+    """
+    Parsea la salida de `docker stats --no-stream --format '{{json .}}'`.
+
+    Se procesa línea a línea para no retener la salida completa en memoria.
+    """
+    stats = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            raw = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+
+        memory, memory_limit = _pair(raw.get("MemUsage"))
+        block_read, block_write = _pair(raw.get("BlockIO"))
+        net_rx, net_tx = _pair(raw.get("NetIO"))
+        stats.append(
+            {
+                "name": raw.get("Name", ""),
+                "cpu_percent": _percent(raw.get("CPUPerc")),
+                "memory_bytes": memory,
+                "memory_limit_bytes": memory_limit,
+                "block_read_bytes": block_read,
+                "block_write_bytes": block_write,
+                "net_rx_bytes": net_rx,
+                "net_tx_bytes": net_tx,
+            }
+        )
+    return stats
+
+
+def parse_api_stats(raw: Dict) -> Dict:
+    """
+    Memoria y CPU de una muestra de `GET /containers/{id}/stats`.
+
+    Igual que `docker stats`: la memoria descuenta el page cache inactivo y
+    el % de CPU es relativo a un CPU (4 CPUs saturados = 400%).
+    """
+    memory = raw.get("memory_stats") or {}
+    cache = (memory.get("stats") or {}).get("inactive_file", 0)
+    cpu, precpu = raw.get("cpu_stats") or {}, raw.get("precpu_stats") or {}
+    cpu_delta = (cpu.get("cpu_usage") or {}).get("total_usage", 0) - (
+        precpu.get("cpu_usage") or {}
+    ).get("total_usage", 0)
+    system_delta = cpu.get("system_cpu_usage", 0) - precpu.get("system_cpu_usage", 0)
+    cpu_percent = 0.0
+    if cpu_delta > 0 and system_delta > 0:
+        cpu_percent = cpu_delta / system_delta * cpu.get("online_cpus", 1) * 100
+    return {
+        "memory_bytes": max(memory.get("usage", 0) - cache, 0),
+        "cpu_percent": round(cpu_percent, 2),
+    }
+
+
+def parse_system_df(output: str) -> Dict[str, Dict[str, int]]:
+    """
+    Parsea `docker system df -v --format '{{json .}}'`.
+
+    Returns:
+        Dict con `containers` (nombre -> bytes de capa escribible) y
+        `volumes` (nombre -> bytes)
+    """
+    usage = {"containers": {}, "volumes": {}}
+    try:
+        data = json.loads(output or "{}")
+    except json.JSONDecodeError:
+        return usage
+
+    for container in data.get("Containers") or []:
+        name = container.get("Names", "")
+        try:
+            # "2B (virtual 187MB)" -> solo la capa propia
+            usage["containers"][name] = parse_size(
+                str(container.get("Size", "0B")).split("(")[0]
+            )
+        except ValueError:
+            continue
+
+    for volume in data.get("Volumes") or []:
+        try:
+            usage["volumes"][volume.get("Name", "")] = parse_size(
+                str(volume.get("Size", "0B"))
+            )
+        except ValueError:
+            continue
+
+    return usage
+
+
+def find_cgroup_dir(container_id: str, cgroup_root: str = "/sys/fs/cgroup") -> Optional[str]:
+    """Localiza el directorio cgroup v2 de un contenedor."""
+    for pattern in CGROUP_PATTERNS:
+        matches = glob(os.path.join(cgroup_root, pattern.format(id=container_id)))
+        if matches:
+            return matches[0]
+    return None
+
+
+def read_cgroup_sample(cgroup_dir: str) -> Optional[Dict[str, int]]:
+    """Lee memoria actual y CPU acumulada (µs) de un cgroup v2."""
+    try:
+        with open(os.path.join(cgroup_dir, "memory.current")) as f:
+            memory = int(f.read().strip())
+        usage_usec = 0
+        with open(os.path.join(cgroup_dir, "cpu.stat")) as f:
+            for line in f:
+                key, _, value = line.partition(" ")
+                if key == "usage_usec":
+                    usage_usec = int(value)
+                    break
+    except (OSError, ValueError):
+        return None
+
+    return {"memory_bytes": memory, "cpu_usage_usec": usage_usec}
+
+
+def cgroup_stats(
+    first: Dict[str, Dict[str, int]],
+    second: Dict[str, Dict[str, int]],
+    elapsed_seconds: float,
+) -> List[Dict]:
+    """Calcula stats por contenedor a partir de dos muestras de cgroup."""
+    stats = []
+    for name, sample in second.items():
+        previous = first.get(name, sample)
+        delta = max(0, sample["cpu_usage_usec"] - previous["cpu_usage_usec"])
+        cpu_percent = (
+            delta / (elapsed_seconds * 1_000_000) * 100 if elapsed_seconds > 0 else 0.0
+        )
+        stats.append(
+            {
+                "name": name,
+                "cpu_percent": round(cpu_percent, 2),
+                "memory_bytes": sample["memory_bytes"],
+            }
+        )
+    return stats
+
+
+def _empty_stack(pr_number: int) -> Dict:
+    return {
+        "pr_number": pr_number,
+        "containers": 0,
+        "cpu_percent": 0.0,
+        "memory_bytes": 0,
+        "block_read_bytes": 0,
+        "block_write_bytes": 0,
+        "container_disk_bytes": 0,
+        "volume_bytes": 0,
+        "disk_bytes": 0,
+        "components": {},
+    }
+
+
+def aggregate_by_pr(
+    containers: List[Dict],
+    stats: List[Dict],
+    disk: Optional[Dict[str, Dict[str, int]]] = None,
+) -> Dict:
+    """
+    Agrega stats de contenedores y uso de disco por `pr_number`.
+
+    Args:
+        containers: Contenedores escaneados (`name`, `labels` como dict o crudos)
+        stats: Stats por contenedor (`parse_stats_lines` o `cgroup_stats`)
+        disk: Salida de `parse_system_df`
+
+    Returns:
+        Dict con `stacks` (ordenados por memoria) y `totals`
+    """
+    disk = disk or {"containers": {}, "volumes": {}}
+    identity = {
+        c["name"]: identify(c["name"], parse_labels(c.get("labels", "")))
+        for c in containers
+    }
+    stacks: Dict[int, Dict] = {}
+
+    for container_name, info in identity.items():
+        if info["pr_number"] is None:
+            continue
+        stack = stacks.setdefault(info["pr_number"], _empty_stack(info["pr_number"]))
+        stack["containers"] += 1
+        stack["container_disk_bytes"] += disk["containers"].get(container_name, 0)
+
+    for sample in stats:
+        info = identity.get(sample["name"]) or identify(sample["name"])
+        if info["pr_number"] is None:
+            continue
+        stack = stacks.setdefault(info["pr_number"], _empty_stack(info["pr_number"]))
+        for key in ("cpu_percent", "memory_bytes", "block_read_bytes", "block_write_bytes"):
+            stack[key] += sample.get(key, 0)
+        component = stack["components"].setdefault(
+            info["component"], {"cpu_percent": 0.0, "memory_bytes": 0}
+        )
+        component["cpu_percent"] += sample.get("cpu_percent", 0)
+        component["memory_bytes"] += sample.get("memory_bytes", 0)
+
+    for volume_name, size in disk["volumes"].items():
+        info = identify(volume_name)
+        if info["pr_number"] is None:
+            continue
+        stack = stacks.setdefault(info["pr_number"], _empty_stack(info["pr_number"]))
+        stack["volume_bytes"] += size
+
+    for stack in stacks.values():
+        stack["cpu_percent"] = round(stack["cpu_percent"], 2)
+        stack["disk_bytes"] = stack["container_disk_bytes"] + stack["volume_bytes"]
+
+    ordered = sorted(stacks.values(), key=lambda s: (-s["memory_bytes"], s["pr_number"]))
+    totals = {
+        key: sum(s[key] for s in ordered)
+        for key in ("containers", "memory_bytes", "disk_bytes", "volume_bytes")
+    }
+    totals["cpu_percent"] = round(sum(s["cpu_percent"] for s in ordered), 2)
+
+    return {
+        "collected_at": datetime.now(timezone.utc).isoformat(),
+        "stacks": ordered,
+        "totals": totals,
+    }
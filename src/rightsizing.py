@@ -0,0 +1,135 @@
+"""Propuesta de límites de CPU/memoria por componente a partir del uso medido."""
+
+import json
+import math
+import os
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional
+
+COMPONENTS = ("app", "db", "proxy")
+MIB = 1024**2
+
+
+def usage_samples(usage: Dict) -> Iterator[Dict]:
+    """
+    Convierte un snapshot de `aggregate_by_pr` en muestras por componente.
+
+    Cada muestra tiene `timestamp`, `pr_number`, `component`, `cpu_percent`
+    y `memory_bytes`, lista para agregarse a un historial NDJSON.
+    """
+    timestamp = usage.get("collected_at") or datetime.now(timezone.utc).isoformat()
+    for stack in usage.get("stacks", []):
+        for component, values in sorted(stack.get("components", {}).items()):
+            yield {
+                "timestamp": timestamp,
+                "pr_number": stack["pr_number"],
+                "component": component,
+                "cpu_percent": values.get("cpu_percent", 0.0),
+                "memory_bytes": values.get("memory_bytes", 0),
+            }
+
+
+def append_samples(path: str, samples: Iterable[Dict]) -> int:
+    """Agrega muestras al historial NDJSON y retorna cuántas se escribieron."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    written = 0
+    with open(path, "a") as f:
+        for sample in samples:
+            f.write(json.dumps(sample) + "\n")
+            written += 1
+    return written
+
+
+def load_samples(path: str) -> Iterator[Dict]:
+    """Lee el historial NDJSON ignorando líneas corruptas."""
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentil con interpolación lineal (`pct` entre 0 y 100)."""
+    if not values:
+        raise ValueError("No hay valores para calcular el percentil")
+
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    lower = math.floor(rank)
+    upper = math.ceil(rank)
+    if lower == upper:
+        return float(ordered[lower])
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def _round_up(value: float, step: float) -> float:
+    return math.ceil(round(value / step, 6)) * step
+
+
+def propose_limits(
+    samples: Iterable[Dict],
+    pct: float = 95,
+    headroom: float = 1.3,
+    min_memory_mb: int = 32,
+    min_cpus: float = 0.1,
+    min_samples: int = 10,
+) -> Dict[str, Dict]:
+    """
+    Propone límites por componente.
+
+    La memoria es el percentil `pct` × `headroom`, redondeado a 16 MB; la
+    CPU es el percentil de `cpu_percent` × `headroom`, redondeado a 0.05.
+
+    Returns:
+        Dict componente -> `memory_mb`, `cpus`, `samples` y las
+        observaciones usadas (`memory_p_mb`, `memory_max_mb`, `cpu_p_percent`)
+    """
+    memory: Dict[str, List[float]] = {}
+    cpu: Dict[str, List[float]] = {}
+    for sample in samples:
+        component = sample.get("component")
+        if component not in COMPONENTS:
+            continue
+        memory.setdefault(component, []).append(sample.get("memory_bytes", 0) / MIB)
+        cpu.setdefault(component, []).append(sample.get("cpu_percent", 0.0))
+
+    limits = {}
+    for component in COMPONENTS:
+        values = memory.get(component, [])
+        if len(values) < min_samples:
+            continue
+
+        memory_p = percentile(values, pct)
+        cpu_p = percentile(cpu[component], pct)
+        memory_mb = max(min_memory_mb, int(_round_up(memory_p * headroom, 16)))
+        cpus = max(min_cpus, _round_up(cpu_p / 100 * headroom, 0.05))
+
+        limits[component] = {
+            "memory_mb": memory_mb,
+            "cpus": f"{cpus:.2f}",
+            "samples": len(values),
+            "memory_p_mb": round(memory_p, 1),
+            "memory_max_mb": round(max(values), 1),
+            "cpu_p_percent": round(cpu_p, 2),
+        }
+
+    return limits
+
+
+def render_tfvars(limits: Dict[str, Dict], comment: Optional[str] = None) -> str:
+    """Genera el bloque `resource_limits` para terraform.tfvars."""
+    lines = [f"# {comment}"] if comment else []
+    lines.append("resource_limits = {")
+    width = max((len(name) for name in limits), default=0)
+    for component, values in limits.items():
+        lines.append(
+            f"  {component.ljust(width)} = "
+            f'{{ memory_mb = {values["memory_mb"]}, cpus = "{values["cpus"]}" }}'
+        )
+    lines.append("}")
+    return "\n".join(lines) + "\n"
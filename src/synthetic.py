@@ -0,0 +1,243 @@
+"""Generadores de datos sintéticos: flotas de recursos Docker e historiales de métricas."""
+
+import json
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional
+
+from src.placement import STACK_PORTS
+
+COMPONENTS = ("app", "db", "proxy")
+# Uso típico por componente en ejecución: (memoria en bytes, % de CPU)
+COMPONENT_USAGE = {"app": (128 << 20, 2.0), "db": (256 << 20, 4.0), "proxy": (32 << 20, 0.5)}
+OPERATIONS = ("deploy", "destroy")
+
+
+def synthetic_fleet(
+    resources: int,
+    now: Optional[datetime] = None,
+    max_age_hours: float = 240,
+    seed: int = 0,
+    first_pr: int = 1,
+) -> Dict[str, List[Dict]]:
+    """
+    Genera una flota de stacks efímeros con aproximadamente `resources` recursos.
+
+    Los PRs se numeran desde `first_pr` (flotas disjuntas para varios hosts).
+
+    Cada stack aporta tres contenedores (app/db/proxy), un volumen de datos
+    y una red, con la misma fecha de creación. La salida es un modelo neutro
+    que luego se serializa como salida del CLI o de la Engine API.
+    """
+    rng = random.Random(seed)
+    now = now or datetime.now(timezone.utc)
+    fleet = {"containers": [], "volumes": [], "networks": []}
+    per_stack = len(COMPONENTS) + 2
+    stacks = max(1, resources // per_stack)
+
+    for index in range(stacks):
+        pr_number = first_pr + index
+        created = now - timedelta(hours=rng.uniform(0, max_age_hours))
+        prefix = f"ephemeral-pr-{pr_number}"
+        for component in COMPONENTS:
+            running = rng.random() > 0.1
+            fleet["containers"].append(
+                {
+                    "id": f"{pr_number:08x}{COMPONENTS.index(component):04x}".ljust(64, "0"),
+                    "name": f"{prefix}-{component}",
+                    "image": f"ephemeral-{component}:latest",
+                    "state": "running" if running else "exited",
+                    "created": created,
+                    "network": f"{prefix}-network",
+                    "volumes": [f"{prefix}-db-data"] if component == "db" else [],
+                    "ports": [STACK_PORTS[component] + pr_number % 100],
+                    "usage": COMPONENT_USAGE[component],
+                    "labels": {
+                        "environment": "ephemeral",
+                        "pr_number": str(pr_number),
+                        "component": "database" if component == "db" else component,
+                        "managed_by": "terraform",
+                    },
+                }
+            )
+        fleet["volumes"].append(
+            {
+                "name": f"{prefix}-db-data",
+                "driver": "local",
+                "created": created,
+                "labels": {"environment": "ephemeral", "pr_number": str(pr_number)},
+            }
+        )
+        fleet["networks"].append(
+            {
+                "id": f"{pr_number:012x}".ljust(64, "f"),
+                "name": f"{prefix}-network",
+                "driver": "bridge",
+                "created": created,
+                "labels": {"environment": "ephemeral", "pr_number": str(pr_number)},
+            }
+        )
+
+    return fleet
+
+
+def _cli_time(when: datetime) -> str:
+    return when.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M:%S +0000 UTC")
+
+
+def _status(container: Dict, now: datetime) -> str:
+    if container["state"] == "running":
+        hours = int((now - container["created"]).total_seconds() // 3600)
+        return f"Up {hours} hours"
+    return "Exited (0) 5 minutes ago"
+
+
+def cli_outputs(fleet: Dict[str, List[Dict]], now: Optional[datetime] = None) -> Dict[str, str]:
+    """
+    Serializa la flota como stdout de los comandos que usa CleanupMonitor.
+
+    Returns:
+        Dict con `ps`, `volume` y `network` (formatos de `_scan_*`)
+    """
+    now = now or datetime.now(timezone.utc)
+    ps_lines = [
+        "\t".join(
+            [
+                c["name"],
+                _status(c, now),
+                _cli_time(c["created"]),
+                ",".join(f"{k}={v}" for k, v in c["labels"].items()),
+            ]
+        )
+        for c in fleet["containers"]
+    ]
+    volume_lines = [
+        f"{v['name']}\t{v['driver']}\t{_cli_time(v['created'])}" for v in fleet["volumes"]
+    ]
+    network_lines = [
+        f"{n['name']}\t{n['driver']}\t{_cli_time(n['created'])}" for n in fleet["networks"]
+    ]
+    return {
+        "ps": "\n".join(ps_lines) + "\n",
+        "volume": "\n".join(volume_lines) + "\n",
+        "network": "\n".join(network_lines) + "\n",
+    }
+
+
+def api_containers(fleet: Dict[str, List[Dict]], now: Optional[datetime] = None) -> List[Dict]:
+    """Contenedores en el formato de `GET /containers/json` de la Engine API."""
+    now = now or datetime.now(timezone.utc)
+    return [
+        {
+            "Id": c["id"],
+            "Names": [f"/{c['name']}"],
+            "Image": c["image"],
+            "Created": int(c["created"].timestamp()),
+            "State": c["state"],
+            "Status": _status(c, now),
+            "Labels": dict(c["labels"]),
+            "Mounts": [
+                {"Type": "volume", "Name": name, "Destination": "/var/lib/postgresql/data"}
+                for name in c.get("volumes", [])
+            ],
+            "NetworkSettings": {"Networks": {c["network"]: {}} if c.get("network") else {}},
+            "Ports": [
+                {"IP": "0.0.0.0", "PrivatePort": port, "PublicPort": port, "Type": "tcp"}
+                for port in c.get("ports", [])
+            ]
+            if c["state"] == "running"
+            else [],
+        }
+        for c in fleet["containers"]
+    ]
+
+
+def api_volumes(fleet: Dict[str, List[Dict]]) -> Dict:
+    """Volúmenes en el formato de `GET /volumes`."""
+    return {
+        "Volumes": [
+            {
+                "Name": v["name"],
+                "Driver": v["driver"],
+                "CreatedAt": v["created"].astimezone(timezone.utc).strftime(
+                    "%Y-%m-%dT%H:%M:%SZ"
+                ),
+                "Labels": dict(v["labels"]),
+                "Mountpoint": f"/var/lib/docker/volumes/{v['name']}/_data",
+                "Scope": "local",
+            }
+            for v in fleet["volumes"]
+        ],
+        "Warnings": None,
+    }
+
+
+def api_networks(fleet: Dict[str, List[Dict]]) -> List[Dict]:
+    """Redes en el formato de `GET /networks`."""
+    return [
+        {
+            "Id": n["id"],
+            "Name": n["name"],
+            "Driver": n["driver"],
+            "Created": n["created"].astimezone(timezone.utc).isoformat(),
+            "Scope": "local",
+            "Labels": dict(n["labels"]),
+        }
+        for n in fleet["networks"]
+    ]
+
+
+def operation_events(
+    count: int, days: int = 30, now: Optional[datetime] = None, seed: int = 0
+) -> Iterator[Dict]:
+    """Operaciones deploy/destroy con el esquema de metrics-collector.sh."""
+    rng = random.Random(seed)
+    now = now or datetime.now(timezone.utc)
+    span = days * 86400
+    for index in range(count):
+        operation = OPERATIONS[index % 2]
+        base = 90 if operation == "deploy" else 25
+        yield {
+            "timestamp": (now - timedelta(seconds=span * (count - index) / count)).isoformat(
+                timespec="seconds"
+            ),
+            "operation": operation,
+            "pr_number": rng.randint(1, 500),
+            "duration_seconds": max(1, int(rng.gauss(base, base / 4))),
+            "status": "failed" if rng.random() < 0.03 else "success",
+            "resource_count": 7,
+        }
+
+
+def drift_events(
+    count: int, days: int = 30, now: Optional[datetime] = None, seed: int = 1
+) -> Iterator[Dict]:
+    """Verificaciones de drift con el esquema de metrics-collector.sh."""
+    rng = random.Random(seed)
+    now = now or datetime.now(timezone.utc)
+    span = days * 86400
+    for index in range(count):
+        drifted = rng.random() < 0.08
+        yield {
+            "timestamp": (now - timedelta(seconds=span * (count - index) / count)).isoformat(
+                timespec="seconds"
+            ),
+            "pr_number": rng.randint(1, 500),
+            "drift_percent": round(rng.uniform(1, 30), 2) if drifted else 0,
+            "check_duration_seconds": max(1, int(rng.gauss(12, 3))),
+            "status": "drift_detected" if drifted else "no_changes",
+        }
+
+
+def write_metrics_history(
+    path: str, operations: int, drift_checks: int, days: int = 30, seed: int = 0
+) -> None:
+    """Escribe un `operations.json` sintético sin armar el documento completo en memoria."""
+    with open(path, "w") as f:
+        f.write('{"operations": [')
+        for index, event in enumerate(operation_events(operations, days, seed=seed)):
+            f.write(("," if index else "") + json.dumps(event))
+        f.write('], "drift_checks": [')
+        for index, event in enumerate(drift_events(drift_checks, days, seed=seed + 1)):
+            f.write(("," if index else "") + json.dumps(event))
+        f.write("]}")
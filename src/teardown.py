@@ -0,0 +1,242 @@
+"""Plan de teardown por capas, en lotes, para muchos PRs a la vez."""
+
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from src import commands
+from src.docker_api import DockerAPIClient, DockerAPIError
+from src.tracing import traced
+
+KINDS = ("containers", "volumes", "networks")
+# Errores que indican que el recurso ya no existe: cuenta como eliminado
+GONE_MARKERS = ("No such", "not found", "no such")
+
+Node = Tuple[str, str]
+
+
+def _chunks(items: List[str], size: int) -> Iterable[List[str]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class TeardownPlan:
+    """
+    Grafo de dependencias de los recursos a eliminar de todos los PRs condenados.
+
+    Volúmenes y redes dependen de los contenedores de su PR (o de todos los
+    contenedores del plan si su PR es desconocido): Docker rechaza borrar un
+    volumen montado o una red con endpoints activos.
+    """
+
+    def __init__(self):
+        self.pr_numbers: Dict[Node, Optional[int]] = {}
+        self.depends_on: Dict[Node, Set[Node]] = {}
+
+    def add(self, kind: str, name: str, pr_number: Optional[int] = None) -> None:
+        """Agrega un recurso al plan."""
+        if kind not in KINDS:
+            raise ValueError(f"Tipo de recurso inválido: {kind}")
+        self.pr_numbers[(kind, name)] = pr_number
+
+    @classmethod
+    def from_resources(
+        cls, resources: Dict[str, List[Dict]], pr_numbers: Optional[Iterable[int]] = None
+    ) -> "TeardownPlan":
+        """Construye el plan desde un inventario de `scan_ephemeral_resources`."""
+        wanted = set(pr_numbers) if pr_numbers is not None else None
+        plan = cls()
+        for kind in KINDS:
+            for resource in resources.get(kind, []):
+                pr_number = resource.get("pr_number")
+                if wanted is None or pr_number in wanted:
+                    plan.add(kind, resource["name"], pr_number)
+        return plan
+
+    def link(self) -> None:
+        """Calcula las dependencias de volúmenes y redes sobre contenedores."""
+        containers_by_pr: Dict[Optional[int], Set[Node]] = {}
+        for node, pr_number in self.pr_numbers.items():
+            if node[0] == "containers":
+                containers_by_pr.setdefault(pr_number, set()).add(node)
+        all_containers = set().union(*containers_by_pr.values()) if containers_by_pr else set()
+
+        for node, pr_number in self.pr_numbers.items():
+            if node[0] == "containers":
+                self.depends_on[node] = set()
+            elif pr_number is None:
+                self.depends_on[node] = set(all_containers)
+            else:
+                self.depends_on[node] = set(containers_by_pr.get(pr_number, ()))
+
+    def __len__(self) -> int:
+        return len(self.pr_numbers)
+
+    def layers(self) -> List[Tuple[str, List[str]]]:
+        """
+        Orden topológico agrupado en capas de un solo tipo.
+
+        Cada nivel del grafo se divide por tipo en el orden de `KINDS`, así
+        que un plan típico queda en contenedores -> volúmenes -> redes.
+        """
+        self.link()
+        remaining = {node: set(deps) for node, deps in self.depends_on.items()}
+        layers = []
+        while remaining:
+            level = [node for node, deps in remaining.items() if not deps]
+            if not level:
+                raise ValueError("Dependencias cíclicas en el plan de teardown")
+            for kind in KINDS:
+                names = sorted(name for k, name in level if k == kind)
+                if names:
+                    layers.append((kind, names))
+            done = set(level)
+            for node in level:
+                del remaining[node]
+            for deps in remaining.values():
+                deps -= done
+        return layers
+
+    def dependents(self, failed: Set[Node]) -> Set[Node]:
+        """Recursos que no se pueden eliminar porque dependen de `failed`."""
+        return {node for node, deps in self.depends_on.items() if deps & failed}
+
+
+class CLIRemover:
+    """Elimina recursos con un comando del CLI de Docker por lote."""
+
+    COMMANDS = {
+        "containers": ["docker", "rm", "-f"],
+        "volumes": ["docker", "volume", "rm"],
+        "networks": ["docker", "network", "rm"],
+    }
+
+    def __init__(self, run: Optional[Callable] = None):
+        # `run` inyectado (tests) o el runner compartido: timeout, límite de
+        # concurrencia y cassettes; en ambos casos cada comando es un span
+        self.run = traced(run) if run else commands.run
+        self.commands = 0
+
+    def remove(self, kind: str, names: List[str]) -> Tuple[List[str], Dict[str, str]]:
+        """Retorna `(eliminados, errores por nombre)`."""
+        self.commands += 1
+        try:
+            result = self.run(self.COMMANDS[kind] + names, capture_output=True, text=True)
+        except (subprocess.CalledProcessError, OSError) as e:
+            return [], {name: str(e) for name in names}
+
+        if result.returncode == 0:
+            return list(names), {}
+
+        # Docker imprime en stdout cada recurso eliminado y en stderr cada error
+        printed = set((result.stdout or "").split())
+        stderr_lines = (result.stderr or "").splitlines()
+        removed, errors = [], {}
+        for name in names:
+            if name in printed:
+                removed.append(name)
+                continue
+            message = next((line for line in stderr_lines if name in line), "")
+            if any(marker in message for marker in GONE_MARKERS):
+                removed.append(name)
+            else:
+                errors[name] = message or f"exit code {result.returncode}"
+        return removed, errors
+
+
+class APIRemover:
+    """Elimina recursos por la Engine API, con peticiones concurrentes por lote."""
+
+    def __init__(self, client: DockerAPIClient, workers: int = 8):
+        self.client = client
+        self.workers = workers
+        self.commands = 0
+
+    def _remove_one(self, kind: str, name: str) -> Optional[str]:
+        try:
+            if kind == "containers":
+                self.client.remove_container(name, force=True)
+            elif kind == "volumes":
+                self.client.remove_volume(name)
+            else:
+                self.client.remove_network(name)
+        except DockerAPIError as e:
+            return None if e.status == 404 else e.message or str(e)
+        except OSError as e:
+            return str(e)
+        return None
+
+    def remove(self, kind: str, names: List[str]) -> Tuple[List[str], Dict[str, str]]:
+        """Retorna `(eliminados, errores por nombre)`."""
+        self.commands += len(names)
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            outcomes = list(pool.map(lambda name: self._remove_one(kind, name), names))
+
+        removed = [name for name, error in zip(names, outcomes) if error is None]
+        errors = {name: error for name, error in zip(names, outcomes) if error is not None}
+        return removed, errors
+
+
+def execute_plan(
+    plan: TeardownPlan,
+    remover,
+    batch_size: int = 100,
+    retries: int = 2,
+    backoff: float = 0.5,
+    sleep: Callable[[float], None] = time.sleep,
+) -> Dict:
+    """
+    Ejecuta el plan capa por capa; reintenta solo los recursos fallidos.
+
+    Los recursos que dependen de uno que no se pudo eliminar se omiten
+    (`blocked`) en lugar de provocar errores previsibles del daemon.
+
+    Returns:
+        Dict con `removed` por tipo, `failed`, `blocked`, `commands`,
+        `elapsed_seconds` e `items_per_second`
+    """
+    start = time.monotonic()
+    removed = {kind: 0 for kind in KINDS}
+    failed: Dict[str, str] = {}
+    failed_nodes: Set[Node] = set()
+    blocked: List[str] = []
+    layers_report = []
+
+    for kind, names in plan.layers():
+        skip = {name for k, name in plan.dependents(failed_nodes) if k == kind}
+        blocked.extend(sorted(skip))
+        pending = [name for name in names if name not in skip]
+        attempts = 0
+
+        for attempt in range(retries + 1):
+            if not pending:
+                break
+            if attempt:
+                sleep(backoff * attempt)
+            attempts += 1
+            errors: Dict[str, str] = {}
+            for batch in _chunks(pending, batch_size):
+                done, batch_errors = remover.remove(kind, batch)
+                removed[kind] += len(done)
+                errors.update(batch_errors)
+            pending = list(errors)
+
+        for name in pending:
+            failed[name] = errors[name]
+            failed_nodes.add((kind, name))
+        layers_report.append(
+            {"kind": kind, "items": len(names), "attempts": attempts, "failed": len(pending)}
+        )
+
+    elapsed = time.monotonic() - start
+    total = sum(removed.values())
+    return {
+        "removed": removed,
+        "failed": failed,
+        "blocked": blocked,
+        "layers": layers_report,
+        "commands": getattr(remover, "commands", None),
+        "elapsed_seconds": round(elapsed, 3),
+        "items_per_second": round(total / elapsed, 1) if elapsed > 0 else float(total),
+    }
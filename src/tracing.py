@@ -0,0 +1,437 @@
+"""
+Tracing de los comandos externos (docker, terraform, gh, jq) como spans.
+
+Cada comando queda registrado como un span con argv, duración, código de
+salida, bytes de salida y la operación que lo lanzó (`operation`). La traza se
+exporta en formato Chrome trace (chrome://tracing, Perfetto) u OTLP-JSON.
+
+Los procesos hijos (scripts de shell con `scripts/lib/trace.sh`, otros
+scripts de Python) agregan sus spans a un NDJSON compartido (TRACE_SPANS)
+colgando del span que los lanzó (TRACE_PARENT), y el proceso que pidió la
+traza los incorpora al escribirla.
+"""
+
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+SPANS_ENV = "TRACE_SPANS"
+PARENT_ENV = "TRACE_PARENT"
+TRACE_ID_ENV = "TRACE_ID"
+FORMATS = ("chrome", "otlp")
+SERVICE_NAME = "ephemeral-stacks"
+
+# Tracer activo del proceso (None: tracing desactivado, sin costo)
+_tracer: Optional["Tracer"] = None
+
+
+def new_id(nbytes: int = 8) -> str:
+    """Id aleatorio en hex (8 bytes para spans, 16 para trazas, como OTLP)."""
+    return os.urandom(nbytes).hex()
+
+
+def command_name(argv: List[str]) -> str:
+    """Nombre del span de un comando: binario y primer subcomando (`terraform plan`)."""
+    if not argv:
+        return "?"
+    words = [os.path.basename(argv[0])]
+    for arg in argv[1:]:
+        if not arg.startswith("-"):
+            words.append(arg)
+            break
+    return " ".join(words)
+
+
+def output_bytes(output) -> Optional[int]:
+    """Bytes de stdout/stderr capturados (None si no se capturaron)."""
+    if isinstance(output, str):
+        return len(output.encode())
+    if isinstance(output, bytes):
+        return len(output)
+    return None
+
+
+class Tracer:
+    """Spans de las operaciones y comandos de un proceso."""
+
+    def __init__(self, trace_id: Optional[str] = None, parent_id: Optional[str] = None):
+        self.trace_id = trace_id or new_id(16)
+        # Padre de los spans sin operación en curso en su hilo: la raíz del
+        # proceso o, si la traza viene de otro proceso, el span que lo lanzó
+        self.parent_id = parent_id
+        self.spans: List[Dict] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self) -> List[Dict]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def current(self) -> Optional[Dict]:
+        """Operación en curso en el hilo actual."""
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    def start_span(self, name: str, kind: str, attributes: Optional[Dict] = None) -> Dict:
+        """Abre un span hijo de la operación en curso (no lo apila)."""
+        parent = self.current()
+        return {
+            "trace_id": self.trace_id,
+            "span_id": new_id(),
+            "parent_id": parent["span_id"] if parent else self.parent_id,
+            "name": name,
+            "kind": kind,
+            "start_ns": time.time_ns(),
+            "end_ns": None,
+            "status": "ok",
+            "attributes": dict(attributes or {}),
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+        }
+
+    def end_span(self, span: Dict, error: Optional[BaseException] = None) -> None:
+        span["end_ns"] = time.time_ns()
+        if error is not None:
+            span["status"] = "error"
+            span["attributes"]["error"] = f"{type(error).__name__}: {error}"
+        with self._lock:
+            self.spans.append(span)
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Dict]:
+        """Operación: los comandos lanzados dentro (en este hilo) cuelgan de ella."""
+        span = self.start_span(name, "operation", attributes)
+        stack = self._stack()
+        stack.append(span)
+        error = None
+        try:
+            yield span
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            stack.remove(span)
+            self.end_span(span, error)
+
+    @contextmanager
+    def command(self, argv: List[str]) -> Iterator[Dict]:
+        """
+        Span de un comando externo; el llamador completa `command.exit_code`
+        y los bytes de salida en los atributos que se le entregan.
+        """
+        argv = [str(arg) for arg in argv]
+        span = self.start_span(command_name(argv), "command", {"command.argv": argv})
+        error = None
+        try:
+            yield span["attributes"]
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            exit_code = span["attributes"].get("command.exit_code")
+            if isinstance(exit_code, int) and exit_code != 0:
+                span["status"] = "error"
+            self.end_span(span, error)
+
+    def run(self, run: Callable, cmd, **kwargs):
+        """Ejecuta `run(cmd, **kwargs)` (firma de `subprocess.run`) dentro de un span."""
+        argv = cmd.split() if isinstance(cmd, str) else list(cmd)
+        with self.command(argv) as attributes:
+            result = run(cmd, **kwargs)
+            record_result(attributes, result)
+            return result
+
+
+def record_result(attributes: Dict, result) -> None:
+    """Completa los atributos de un span de comando con su resultado."""
+    returncode = getattr(result, "returncode", None)
+    if isinstance(returncode, int):
+        attributes["command.exit_code"] = returncode
+    for stream in ("stdout", "stderr"):
+        size = output_bytes(getattr(result, stream, None))
+        if size is not None:
+            attributes[f"command.{stream}_bytes"] = size
+
+
+def get_tracer() -> Optional[Tracer]:
+    return _tracer
+
+
+def set_tracer(tracer: Optional[Tracer]) -> Optional[Tracer]:
+    """Activa `tracer` (None lo desactiva). Retorna el tracer anterior."""
+    global _tracer
+    previous, _tracer = _tracer, tracer
+    return previous
+
+
+def traced(run: Callable) -> Callable:
+    """Envuelve una función con la firma de `subprocess.run` para registrar spans."""
+
+    @wraps(run)
+    def wrapper(cmd, **kwargs):
+        if _tracer is None:
+            return run(cmd, **kwargs)
+        return _tracer.run(run, cmd, **kwargs)
+
+    return wrapper
+
+
+@contextmanager
+def command(argv: List[str]) -> Iterator[Dict]:
+    """`Tracer.command` del tracer activo (un dict descartable si no hay)."""
+    if _tracer is None:
+        yield {}
+        return
+    with _tracer.command(argv) as attributes:
+        yield attributes
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Optional[Dict]]:
+    """`Tracer.span` del tracer activo (no hace nada si no hay)."""
+    if _tracer is None:
+        yield None
+        return
+    with _tracer.span(name, **attributes) as current:
+        yield current
+
+
+def operation(name: str) -> Callable:
+    """Decorador: registra cada llamada a la función como la operación `name`."""
+
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return func(*args, **kwargs)
+            with _tracer.span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def read_spans(path: str) -> List[Dict]:
+    """Spans de un NDJSON (ignora líneas incompletas)."""
+    spans = []
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                try:
+                    spans.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    except OSError:
+        pass
+    return spans
+
+
+def load_trace(path: str) -> List[Dict]:
+    """Spans de un NDJSON de spans o de una traza ya exportada en formato chrome."""
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return read_spans(path)
+    if not isinstance(data, dict) or "traceEvents" not in data:
+        return read_spans(path)
+    spans = []
+    for event in data["traceEvents"]:
+        args = dict(event.get("args", {}))
+        start_ns = int(event["ts"] * 1000)
+        spans.append(
+            {
+                "trace_id": args.pop("trace_id", None),
+                "span_id": args.pop("span_id", None),
+                "parent_id": args.pop("parent_id", None),
+                "status": args.pop("status", "ok"),
+                "name": event["name"],
+                "kind": event.get("cat", "operation"),
+                "start_ns": start_ns,
+                "end_ns": start_ns + int(event.get("dur", 0) * 1000),
+                "attributes": args,
+                "pid": event.get("pid", 0),
+                "tid": event.get("tid", 0),
+            }
+        )
+    return spans
+
+
+def append_spans(path: str, spans: Iterable[Dict]) -> None:
+    """Agrega spans al NDJSON compartido (una escritura por proceso)."""
+    payload = "".join(json.dumps(s, separators=(",", ":")) + "\n" for s in spans)
+    if payload:
+        with open(path, "a") as f:
+            f.write(payload)
+
+
+def chrome_trace(spans: Iterable[Dict]) -> Dict:
+    """Formato Chrome trace: un evento completo ("X") por span, tiempos en µs."""
+    events = []
+    for s in sorted(spans, key=lambda s: s["start_ns"]):
+        args = dict(s.get("attributes", {}))
+        args.update(
+            trace_id=s.get("trace_id"),
+            span_id=s["span_id"],
+            parent_id=s.get("parent_id"),
+            status=s["status"],
+        )
+        events.append(
+            {
+                "name": s["name"],
+                "cat": s["kind"],
+                "ph": "X",
+                "ts": s["start_ns"] / 1000,
+                "dur": (s["end_ns"] - s["start_ns"]) / 1000,
+                "pid": s.get("pid", 0),
+                "tid": s.get("tid", 0),
+                "args": args,
+            }
+        )
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def _otlp_value(value) -> Dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_otlp_value(v) for v in value]}}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict) -> List[Dict]:
+    return [
+        {"key": key, "value": _otlp_value(value)}
+        for key, value in attributes.items()
+        if value is not None
+    ]
+
+
+def otlp_json(spans: Iterable[Dict], service: str = SERVICE_NAME) -> Dict:
+    """
+    Formato OTLP-JSON (ExportTraceServiceRequest). Los comandos son spans
+    CLIENT y las operaciones INTERNAL; un comando con exit code distinto de
+    0 o una excepción marcan el span con status ERROR.
+    """
+    otlp_spans = [
+        {
+            "traceId": s["trace_id"],
+            "spanId": s["span_id"],
+            "parentSpanId": s.get("parent_id") or "",
+            "name": s["name"],
+            "kind": 3 if s["kind"] == "command" else 1,
+            "startTimeUnixNano": str(s["start_ns"]),
+            "endTimeUnixNano": str(s["end_ns"]),
+            "attributes": _otlp_attributes(
+                dict(s.get("attributes", {}), **{"process.pid": s.get("pid")})
+            ),
+            "status": {"code": 2 if s["status"] == "error" else 1},
+        }
+        for s in sorted(spans, key=lambda s: s["start_ns"])
+    ]
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": _otlp_attributes({"service.name": service})},
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": otlp_spans}],
+            }
+        ]
+    }
+
+
+def summarize(spans: Iterable[Dict]) -> List[Dict]:
+    """Tiempo por comando (`docker ps`, `terraform apply`...), del más costoso al menos."""
+    totals: Dict[str, Dict] = {}
+    for s in spans:
+        if s["kind"] != "command":
+            continue
+        seconds = (s["end_ns"] - s["start_ns"]) / 1e9
+        entry = totals.setdefault(
+            s["name"], {"command": s["name"], "calls": 0, "total_seconds": 0.0,
+                        "max_seconds": 0.0, "errors": 0}
+        )
+        entry["calls"] += 1
+        entry["total_seconds"] += seconds
+        entry["max_seconds"] = max(entry["max_seconds"], seconds)
+        entry["errors"] += s["status"] == "error"
+    return sorted(totals.values(), key=lambda e: e["total_seconds"], reverse=True)
+
+
+def write_trace(path: str, spans: Iterable[Dict], fmt: str = "chrome") -> None:
+    """Escribe la traza en `fmt` (chrome u otlp) de forma atómica."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato de traza desconocido: {fmt}")
+    payload = chrome_trace(spans) if fmt == "chrome" else otlp_json(spans)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(payload, f)
+    os.replace(tmp, path)
+
+
+def start(path: Optional[str] = None, fmt: str = "chrome", name: Optional[str] = None):
+    """
+    Activa el tracing del proceso con una operación raíz `name`.
+
+    Con `path` la traza (con los spans de los procesos hijos) se escribe ahí
+    al salir. Sin `path` pero con TRACE_SPANS en el entorno (proceso lanzado
+    por un script con traza activa) los spans se agregan a ese NDJSON. Sin
+    ninguno de los dos no hace nada y retorna None.
+    """
+    inherited = os.environ.get(SPANS_ENV)
+    if not path and not inherited:
+        return None
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato de traza desconocido: {fmt}")
+
+    if path:
+        tracer = Tracer()
+        sink = f"{path}.spans.ndjson"
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        open(sink, "w").close()
+    else:
+        tracer = Tracer(os.environ.get(TRACE_ID_ENV), os.environ.get(PARENT_ENV) or None)
+        sink = inherited
+
+    name = name or os.path.basename(sys.argv[0])
+    root = tracer.start_span(name, "operation", {"argv": sys.argv[1:]})
+    tracer.parent_id = root["span_id"]
+    os.environ.update({SPANS_ENV: sink, PARENT_ENV: root["span_id"], TRACE_ID_ENV: tracer.trace_id})
+    set_tracer(tracer)
+
+    def finish():
+        tracer.end_span(root)
+        if path:
+            spans = tracer.spans + read_spans(sink)
+            write_trace(path, spans, fmt)
+            os.remove(sink)
+        else:
+            append_spans(sink, tracer.spans)
+
+    atexit.register(finish)
+    return tracer
+
+
+def add_arguments(parser) -> None:
+    """Flags --trace y --trace-format de los scripts."""
+    parser.add_argument(
+        "--trace", metavar="PATH", help="Escribir la traza de comandos externos en PATH"
+    )
+    parser.add_argument(
+        "--trace-format",
+        choices=FORMATS,
+        default=os.environ.get("TRACE_FORMAT", "chrome"),
+        help="Formato de la traza: chrome (chrome://tracing, Perfetto) u otlp (OTLP-JSON)",
+    )
@@ -0,0 +1,50 @@
+"""Conversión de tamaños reportados por Docker."""
+
+import re
+
+_SIZE_RE = re.compile(r"^\s*([\d.]+)\s*([kKMGTP]?i?B?)\s*$")
+
+_MULTIPLIERS = {
+    "": 1,
+    "B": 1,
+    "kB": 1000,
+    "KB": 1000,
+    "MB": 1000**2,
+    "GB": 1000**3,
+    "TB": 1000**4,
+    "PB": 1000**5,
+    "KiB": 1024,
+    "kiB": 1024,
+    "MiB": 1024**2,
+    "GiB": 1024**3,
+    "TiB": 1024**4,
+    "PiB": 1024**5,
+}
+
+
+def parse_size(value: str) -> int:
+    """
+    Convierte un tamaño de Docker (`12.5MiB`, `1.2GB`, `0B`) a bytes.
+
+    Args:
+        value: Tamaño con unidad opcional
+
+    Returns:
+        int: Bytes
+
+    Raises:
+        ValueError: Si el formato no es reconocido
+    """
+    match = _SIZE_RE.match(value or "")
+    if not match or match.group(2) not in _MULTIPLIERS:
+        raise ValueError(f"Tamaño inválido: {value!r}")
+
+    return int(float(match.group(1)) * _MULTIPLIERS[match.group(2)])
+
+
+def format_size(num_bytes: float) -> str:
+    """Formatea bytes con unidades binarias (`1.5GiB`)."""
+    for unit in ("B", "KiB", "MiB", "GiB", "TiB"):
+        if abs(num_bytes) < 1024 or unit == "TiB":
+            return f"{num_bytes:.0f}{unit}" if unit == "B" else f"{num_bytes:.1f}{unit}"
+        num_bytes /= 1024
@@ -1,8 +1,123 @@
+import fcntl
+import importlib.util
+import os
+import socket
 import pytest
+from pathlib import Path
 from unittest.mock import create_autospec
 
+from src.placement import STACK_PORTS
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+SCRIPTS_DIR = ROOT_DIR / "scripts"
+TERRAFORM_DIR = ROOT_DIR / "infra" / "terraform" / "stacks" / "pr-preview"
+# PRs de prueba. Los puertos son base + PR % 100, así que el PR 900 + i comparte
+# puertos con los PRs reales i, 100 + i, ...: antes de desplegar se verifica que
+# estén libres. Con TEST_STACK_PR_BASE se mueven los slots a otro rango.
+TEST_STACK_PR_BASE = int(os.environ.get("TEST_STACK_PR_BASE", "900"))
+
+
+def load_script(filename, module_name):
+    """Carga un script de scripts/ (nombre con guiones) como módulo"""
+    spec = importlib.util.spec_from_file_location(module_name, SCRIPTS_DIR / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def worker_index() -> int:
+    """Índice del worker de pytest-xdist (`gw3` -> 3); 0 sin xdist"""
+    worker = os.environ.get("PYTEST_XDIST_WORKER", "")
+    return int(worker[2:]) if worker.startswith("gw") else 0
+
+
+def worker_pr_number() -> int:
+    """
+    PR de pruebas del worker actual.
+
+    Los puertos del stack son base + PR % 100, así que con hasta 100 workers
+    cada uno tiene PR y puertos propios.
+    """
+    workers = int(os.environ.get("PYTEST_XDIST_WORKER_COUNT", "1"))
+    if workers > 100:
+        raise pytest.UsageError(
+            f"Con {workers} workers los puertos de los stacks colisionan (máximo 100)"
+        )
+    return TEST_STACK_PR_BASE + worker_index()
+
+
+def busy_ports(ports, host: str = "127.0.0.1"):
+    """Puertos de `ports` que ya están en uso en el host local"""
+    busy = []
+    for port in ports:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            try:
+                sock.bind((host, port))
+            except OSError:
+                busy.append(port)
+    return busy
+
+
+@pytest.fixture(scope="session")
+def stack_slot():
+    """PR y puertos reservados para el worker durante toda la sesión"""
+    pr_number = worker_pr_number()
+    return {
+        "worker": os.environ.get("PYTEST_XDIST_WORKER", "master"),
+        "pr_number": pr_number,
+        "ports": {component: base + pr_number % 100 for component, base in STACK_PORTS.items()},
+    }
+
 
 @pytest.fixture(scope="session")
+def ephemeral_stack(stack_slot, tmp_path_factory):
+    """
+    Stack del worker, compartido por todos sus tests de la sesión.
+
+    Con STACK_APP_URL/STACK_PROXY_URL se usa un stack ya desplegado. Con
+    TEST_PROVISION_STACKS=1 se despliega en un workspace propio
+    (`test-pr-<PR>`) y se destruye al terminar la sesión. Si no, solo se
+    calculan las URLs del slot y los tests saltan si el stack no responde.
+    """
+    pr_number = stack_slot["pr_number"]
+    ports = stack_slot["ports"]
+    stack = dict(
+        stack_slot,
+        app=os.environ.get("STACK_APP_URL", f"http://localhost:{ports['app']}"),
+        proxy=os.environ.get("STACK_PROXY_URL", f"http://localhost:{ports['proxy']}"),
+        provisioned=False,
+    )
+    external = os.environ.get("STACK_APP_URL") or os.environ.get("STACK_PROXY_URL")
+    if external or os.environ.get("TEST_PROVISION_STACKS") != "1":
+        yield stack
+        return
+
+    busy = busy_ports(ports.values())
+    if busy:
+        pytest.fail(
+            f"Puertos {busy} del slot del PR {pr_number} ocupados (¿stack de un PR real?); "
+            "usa TEST_STACK_PR_BASE para elegir otro rango",
+            pytrace=False,
+        )
+
+    from src.provisioner import TerraformProvisioner
+
+    provisioner = TerraformProvisioner(str(TERRAFORM_DIR), workspace=f"test-pr-{pr_number}")
+    # init y `workspace new` escriben en el .terraform compartido: un worker a la vez
+    lock_path = tmp_path_factory.getbasetemp().parent / "terraform-init.lock"
+    with open(lock_path, "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        provisioner.init()
+        provisioner.ensure_workspace()
+    provisioner.redeploy(pr_number)
+    stack["provisioned"] = True
+    try:
+        yield stack
+    finally:
+        provisioner.destroy(pr_number)
+
+
+@pytest.fixture
 def terraform_provisioner():
     """Mock del provisioner de Terraform con autospec"""
     from src.provisioner import TerraformProvisioner
@@ -10,10 +125,22 @@ def terraform_provisioner():
     return create_autospec(TerraformProvisioner)
 
 
+@pytest.fixture(scope="session")
+def cleanup_monitor_module():
+    """Módulo scripts/cleanup-monitor.py"""
+    return load_script("cleanup-monitor.py", "cleanup_monitor")
+
+
+@pytest.fixture(scope="session")
+def dashboard_module():
+    """Módulo scripts/generate-dashboard.py"""
+    return load_script("generate-dashboard.py", "generate_dashboard")
+
+
 @pytest.fixture(scope="function")
 def pr_environment(monkeypatch):
-    """Fixture para configurar environment de PR"""
-    monkeypatch.setenv("PR_NUMBER", "123")
+    """Fixture para configurar environment de PR (el PR del worker)"""
+    monkeypatch.setenv("PR_NUMBER", str(worker_pr_number()))
     yield
     # Cleanup automático
 
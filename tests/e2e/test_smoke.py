@@ -1,26 +1,16 @@
 
-import os
 import pytest
 import requests
 from typing import Dict
 
 
 @pytest.fixture(scope="module")
-def stack_urls() -> Dict[str, str]:
-    """Obtiene URLs del stack desde variables de entorno o usa defaults basados en PR_NUMBER."""
-    pr_number = os.getenv("PR_NUMBER", "123")
-
-    # Puertos dinámicos: 80XX proxy, 81XX app (XX = PR % 100)
-    proxy_port = 8000 + (int(pr_number) % 100)
-    app_port = 8100 + (int(pr_number) % 100)
-
-    app_url = os.getenv("STACK_APP_URL", f"http://localhost:{app_port}")
-    proxy_url = os.getenv("STACK_PROXY_URL", f"http://localhost:{proxy_port}")
-
+def stack_urls(ephemeral_stack) -> Dict[str, str]:
+    """URLs del stack del worker (puertos app 8000+XX, proxy 9000+XX; XX = PR % 100)."""
     return {
-        "app": app_url,
-        "proxy": proxy_url,
-        "pr_number": pr_number
+        "app": ephemeral_stack["app"],
+        "proxy": ephemeral_stack["proxy"],
+        "pr_number": str(ephemeral_stack["pr_number"]),
     }
 
 
@@ -32,7 +22,10 @@ def verify_stack_deployed(stack_urls):
         return True
     except requests.exceptions.RequestException:
         pr_num = stack_urls['pr_number']
-        pytest.skip(f"Stack no desplegado. Ejecuta 'terraform apply' para PR #{pr_num}")
+        pytest.skip(
+            f"Stack no desplegado. Ejecuta 'terraform apply' para PR #{pr_num} "
+            "o usa TEST_PROVISION_STACKS=1"
+        )
 
 
 class TestSmokeE2E:
@@ -8,6 +8,9 @@ import subprocess
 from unittest.mock import Mock, patch
 from typing import List, Dict
 
+from src import commands
+from src.teardown import CLIRemover, TeardownPlan, execute_plan
+
 
 class CleanupVerifier:
     """Verificador de limpieza de recursos huérfanos."""
@@ -25,7 +28,7 @@ class CleanupVerifier:
                 "--format",
                 "{{.Names}}",
             ]
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            result = commands.run(cmd, capture_output=True, text=True, check=True)
             containers = (
                 result.stdout.strip().split("\n") if result.stdout.strip() else []
             )
@@ -46,7 +49,7 @@ class CleanupVerifier:
                 "--format",
                 "{{.Name}}",
             ]
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            result = commands.run(cmd, capture_output=True, text=True, check=True)
             volumes = result.stdout.strip().split("\n") if result.stdout.strip() else []
             return [v for v in volumes if v]
         except subprocess.CalledProcessError:
@@ -57,8 +60,8 @@ class CleanupVerifier:
         """Verifica que el state de Terraform esté vacío."""
         try:
             cmd = ["terraform", "state", "list"]
-            result = subprocess.run(
-                cmd, cwd=terraform_dir, capture_output=True, text=True
+            result = commands.run(
+                cmd, cwd=terraform_dir, capture_output=True, text=True, check=True
             )
             return len(result.stdout.strip()) == 0
         except subprocess.CalledProcessError:
@@ -67,25 +70,17 @@ class CleanupVerifier:
     @staticmethod
     def cleanup_orphaned_resources(pr_number: int) -> Dict[str, int]:
         """Limpia recursos huérfanos y retorna conteo."""
-        cleaned = {"containers": 0, "volumes": 0}
-
-        containers = CleanupVerifier.get_orphaned_containers(pr_number)
-        for container in containers:
-            try:
-                subprocess.run(["docker", "rm", "-f", container], capture_output=True)
-                cleaned["containers"] += 1
-            except subprocess.CalledProcessError:
-                pass
-
-        volumes = CleanupVerifier.get_orphaned_volumes(pr_number)
-        for volume in volumes:
-            try:
-                subprocess.run(["docker", "volume", "rm", volume], capture_output=True)
-                cleaned["volumes"] += 1
-            except subprocess.CalledProcessError:
-                pass
+        plan = TeardownPlan()
+        for container in CleanupVerifier.get_orphaned_containers(pr_number):
+            plan.add("containers", container, pr_number)
+        for volume in CleanupVerifier.get_orphaned_volumes(pr_number):
+            plan.add("volumes", volume, pr_number)
 
-        return cleaned
+        report = execute_plan(plan, CLIRemover(), retries=1, backoff=0.1)
+        return {
+            "containers": report["removed"]["containers"],
+            "volumes": report["removed"]["volumes"],
+        }
 
 
 @pytest.mark.parametrize(
@@ -217,9 +212,9 @@ class TestCleanupIdempotency:
 class TestCleanupIntegration:
     """Tests de integración para flujo completo de cleanup."""
 
-    def test_full_cleanup_verification_flow(self):
+    def test_full_cleanup_verification_flow(self, stack_slot):
         """Test del flujo completo de verificación de cleanup."""
-        pr_number = 123
+        pr_number = stack_slot["pr_number"]
         terraform_dir = "/fake/terraform/dir"
 
         with patch("subprocess.run") as mock_run:
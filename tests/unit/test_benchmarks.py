@@ -0,0 +1,135 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+from src.benchmarks import (
+    compare,
+    fake_docker_cli,
+    load_baseline,
+    measure,
+    monitor_cases,
+    run_suite,
+    save_baseline,
+    trends_cases,
+)
+from src.synthetic import (
+    api_containers,
+    api_networks,
+    api_volumes,
+    cli_outputs,
+    synthetic_fleet,
+    write_metrics_history,
+)
+
+
+def test_synthetic_fleet_shape():
+    fleet = synthetic_fleet(50, seed=3)
+
+    assert len(fleet["containers"]) == 30
+    assert len(fleet["volumes"]) == len(fleet["networks"]) == 10
+    # Misma semilla, misma flota
+    again = synthetic_fleet(50, seed=3)
+    assert [c["state"] for c in again["containers"]] == [c["state"] for c in fleet["containers"]]
+    assert api_containers(fleet)[0]["Names"] == ["/ephemeral-pr-1-app"]
+    assert api_volumes(fleet)["Volumes"][0]["Name"] == "ephemeral-pr-1-db-data"
+    assert api_networks(fleet)[0]["Labels"]["pr_number"] == "1"
+
+
+def test_cli_outputs_parse_in_monitor(cleanup_monitor_module):
+    now = datetime.now(timezone.utc)
+    fleet = synthetic_fleet(100, now=now, max_age_hours=48)
+
+    with fake_docker_cli(cli_outputs(fleet, now=now)):
+        resources = cleanup_monitor_module.CleanupMonitor().scan_ephemeral_resources()
+
+    assert len(resources["containers"]) == 60
+    assert len(resources["volumes"]) == 20
+    assert all(0 <= c["age_hours"] <= 48.1 for c in resources["containers"])
+    assert resources["networks"][0]["pr_number"] == 1
+
+
+def test_metrics_history_is_valid_json(tmp_path, dashboard_module):
+    path = tmp_path / "operations.json"
+    write_metrics_history(str(path), 200, 20, days=10)
+
+    data = json.loads(path.read_text())
+    assert len(data["operations"]) == 200
+    assert len(data["drift_checks"]) == 20
+
+    # Timestamps con offset (como `date -Iseconds`) no deben romper el análisis
+    trends = dashboard_module.TrendsAnalyzer(str(path)).get_operation_trends(30)
+    assert trends["total_operations"] == 200
+
+
+def test_trends_accept_offset_timestamps(tmp_path, dashboard_module):
+    stamp = (datetime.now(timezone.utc) - timedelta(hours=1)).isoformat()
+    path = tmp_path / "operations.json"
+    path.write_text(
+        json.dumps(
+            {
+                "operations": [
+                    {
+                        "timestamp": stamp,
+                        "operation": "deploy",
+                        "duration_seconds": 10,
+                        "status": "success",
+                    }
+                ],
+                "drift_checks": [
+                    {"timestamp": stamp, "drift_percent": 0, "status": "no_changes"}
+                ],
+            }
+        )
+    )
+    analyzer = dashboard_module.TrendsAnalyzer(str(path))
+
+    assert analyzer.get_operation_trends(2)["total_operations"] == 1
+    assert analyzer.get_drift_trends(1)["total_checks"] == 1
+
+
+def test_measure():
+    calls = []
+    result = measure(lambda: calls.append(1), repeat=3, warmup=1)
+    assert len(calls) == 4
+    assert result["min"] <= result["median"] <= result["max"]
+
+
+def test_compare_flags_regressions():
+    baseline = {"a": {"min": 0.100}, "b": {"min": 0.100}, "c": {"min": 0.001}}
+    results = {
+        "a": {"min": 0.110},
+        "b": {"min": 0.200},
+        "c": {"min": 0.003},
+        "nuevo": {"min": 1.0},
+    }
+
+    comparisons = {c["name"]: c for c in compare(results, baseline, threshold=0.25)}
+
+    assert not comparisons["a"]["regression"]
+    assert comparisons["b"]["regression"]
+    # Bajo el piso de ruido no se reporta aunque el ratio sea alto
+    assert not comparisons["c"]["regression"]
+    assert "nuevo" not in comparisons
+
+
+def test_baseline_roundtrip(tmp_path):
+    path = str(tmp_path / "bench" / "baseline.json")
+    assert load_baseline(path) == {}
+
+    save_baseline(path, {"a": {"median": 1.0}})
+    save_baseline(path, {"b": {"median": 2.0}}, load_baseline(path))
+
+    assert load_baseline(path) == {"a": {"median": 1.0}, "b": {"median": 2.0}}
+
+
+def test_run_small_suite(tmp_path, cleanup_monitor_module, dashboard_module):
+    cases = monitor_cases(cleanup_monitor_module, 25)
+    cases.update(trends_cases(dashboard_module, 50, str(tmp_path)))
+    seen = []
+
+    results = run_suite(
+        cases, repeat=1, progress=lambda name, r: seen.append(name), warmup=0
+    )
+
+    assert seen == list(cases)
+    assert "generate_html_dashboard[50]" in results
+    assert (tmp_path / "trends-50.html").exists()
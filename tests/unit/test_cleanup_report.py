@@ -0,0 +1,108 @@
+import csv
+import io
+import json
+import tracemalloc
+
+import pytest
+
+from src.cleanup_report import candidate_rows, write_report
+
+
+def inventory(stacks, age_hours=100):
+    resources = {"containers": [], "volumes": [], "networks": []}
+    for pr in range(1, stacks + 1):
+        common = {"age_hours": age_hours if pr % 2 else 1, "pr_number": pr}
+        for component in ("app", "db"):
+            resources["containers"].append(
+                {"name": f"ephemeral-pr-{pr}-{component}", "status": "Up 4 days", **common}
+            )
+        resources["volumes"].append(
+            {"name": f"ephemeral-pr-{pr}-db-data", "driver": "local", **common}
+        )
+        resources["networks"].append(
+            {"name": f"ephemeral-pr-{pr}-network", "driver": "bridge", **common}
+        )
+    return resources
+
+
+class CountingSink:
+    """Destino que descarta la salida y cuenta caracteres"""
+
+    def __init__(self):
+        self.chars = 0
+
+    def write(self, text):
+        self.chars += len(text)
+
+
+def test_rows_cover_volumes_and_networks():
+    rows = list(candidate_rows(inventory(3), 72))
+
+    kinds = [row["kind"] for row in rows]
+    assert kinds == ["containers"] * 4 + ["volumes"] * 2 + ["networks"] * 2
+    assert {row["pr_number"] for row in rows} == {1, 3}
+    assert rows[4]["state"] == "local"
+
+
+def test_markdown_has_one_table_per_kind():
+    out = io.StringIO()
+    written = write_report(out, inventory(3), 72, analysis_time="2026-10-19T10:00:00")
+    text = out.getvalue()
+
+    assert written == 8
+    assert "- **Contenedores antiguos**: 4\n" in text
+    assert "- **Redes antiguas**: 2\n" in text
+    assert "### Volúmenes para Limpiar" in text
+    assert "| ephemeral-pr-3-network | bridge |  100.0 | #3 |" in text
+    assert "No se encontraron" not in text
+
+
+def test_empty_report():
+    out = io.StringIO()
+    write_report(out, inventory(2, age_hours=1), 72)
+    assert out.getvalue().endswith("**No se encontraron recursos que requieran limpieza.**\n")
+
+
+@pytest.mark.parametrize("fmt", ["csv", "ndjson", "html"])
+def test_machine_formats_share_rows(fmt):
+    out = io.StringIO()
+    resources = inventory(3)
+    resources["containers"][0]["name"] = "ephemeral-pr-1-<app>"
+
+    write_report(out, resources, 72, fmt)
+    text = out.getvalue()
+
+    if fmt == "csv":
+        rows = list(csv.DictReader(io.StringIO(text)))
+        assert len(rows) == 8 and rows[0]["name"] == "ephemeral-pr-1-<app>"
+    elif fmt == "ndjson":
+        rows = [json.loads(line) for line in text.splitlines()]
+        assert len(rows) == 8 and rows[-1]["kind"] == "networks"
+    else:
+        assert text.count("<tr><td>") == 3 + 8
+        assert "ephemeral-pr-1-&lt;app&gt;" in text
+        assert text.endswith("</html>\n")
+
+
+def test_invalid_format():
+    with pytest.raises(ValueError):
+        write_report(io.StringIO(), inventory(1), 72, "pdf")
+
+
+def peak_memory(resources, fmt):
+    sink = CountingSink()
+    tracemalloc.start()
+    write_report(sink, resources, 72, fmt)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, sink.chars
+
+
+@pytest.mark.parametrize("fmt", ["csv", "ndjson"])
+def test_streaming_memory_does_not_grow_with_output(fmt):
+    small_peak, small_chars = peak_memory(inventory(1_000), fmt)
+    large_peak, large_chars = peak_memory(inventory(10_000), fmt)
+
+    assert large_chars > 10 * small_chars - 1_000
+    assert large_peak < small_peak * 1.2 + 4096
+    assert large_peak < large_chars / 4
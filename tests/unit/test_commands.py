@@ -0,0 +1,160 @@
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+
+from src import commands
+from src.benchmarks import cassette_cases, fake_docker_cli
+from src.commands import CommandNotFound, CommandNotRecorded, CommandRunner, CommandTimeout
+from src.synthetic import cli_outputs, synthetic_fleet
+
+PYTHON = sys.executable
+
+
+@pytest.fixture
+def use_runner():
+    """Instala un runner como el del proceso y restaura el anterior al terminar."""
+    previous = commands.get_runner()
+    yield commands.set_runner
+    commands.set_runner(previous)
+
+
+def test_timeout_kills_hung_command_and_is_a_called_process_error():
+    runner = CommandRunner(timeouts={"python": 0.2})
+    sleeper = [PYTHON, "-c", "import time; time.sleep(30)"]
+
+    started = time.monotonic()
+    with pytest.raises(subprocess.CalledProcessError) as raised:
+        runner.run(sleeper, capture_output=True, timeout=0.2)
+    assert isinstance(raised.value, CommandTimeout)
+    assert "timeout de 0.2s" in str(raised.value)
+
+    with pytest.raises(CommandTimeout):
+        with runner.stream(sleeper, timeout=0.2) as lines:
+            list(lines)
+    assert time.monotonic() - started < 5
+
+    with pytest.raises(CommandNotFound) as missing:
+        runner.run(["no-such-tool-xyz", "ps"], capture_output=True)
+    assert missing.value.returncode == 127 and isinstance(missing.value, FileNotFoundError)
+
+    with pytest.raises(subprocess.CalledProcessError):
+        runner.run([PYTHON, "-c", "raise SystemExit(3)"], check=True)
+    assert runner.active == 0
+
+
+def test_failed_stream_raises_after_the_block(tmp_path):
+    failing = [PYTHON, "-c", "print('partial'); raise SystemExit(3)"]
+    cassette = str(tmp_path / "cli.json")
+
+    recorder = CommandRunner("record", cassette)
+    with pytest.raises(subprocess.CalledProcessError) as raised:
+        with recorder.stream(failing) as lines:
+            assert list(lines) == ["partial\n"]
+    assert raised.value.returncode == 3
+    recorder.save()
+
+    with pytest.raises(subprocess.CalledProcessError):
+        with CommandRunner().stream(failing) as lines:
+            list(lines)
+    with pytest.raises(subprocess.CalledProcessError):
+        with CommandRunner("replay", cassette).stream(failing) as lines:
+            assert list(lines) == ["partial\n"]
+
+
+def test_semaphore_limits_concurrent_commands():
+    runner = CommandRunner(max_concurrency=2)
+    sleeper = [PYTHON, "-c", "import time; time.sleep(0.3)"]
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        results = list(pool.map(lambda _: runner.run(sleeper).returncode, range(6)))
+
+    assert results == [0] * 6
+    assert runner.peak == 2
+
+
+def test_record_then_replay_without_running_anything(tmp_path):
+    cassette = str(tmp_path / "cassettes" / "cli.json")
+    echo = [PYTHON, "-c", "import sys; print(sys.argv[1]); sys.stderr.write('w')", "v1"]
+    failing = [PYTHON, "-c", "raise SystemExit(2)"]
+
+    recorder = CommandRunner("record", cassette)
+    recorded = recorder.run(echo, capture_output=True, text=True)
+    recorder.run(failing)
+    with recorder.stream(echo) as lines:
+        assert list(lines) == ["v1\n"]
+    with pytest.raises(CommandNotFound):
+        recorder.run(["no-such-tool-xyz"])
+    recorder.save()
+
+    player = CommandRunner("replay", cassette)
+    with patch("subprocess.run", side_effect=AssertionError("no debe ejecutar")):
+        with patch("subprocess.Popen", side_effect=AssertionError("no debe ejecutar")):
+            replayed = player.run(echo, capture_output=True, text=True)
+            assert (replayed.returncode, replayed.stdout, replayed.stderr) == (
+                recorded.returncode, recorded.stdout, recorded.stderr,
+            )
+            assert player.run(echo, capture_output=True).stdout == b"v1\n"
+            assert player.run(echo).stdout is None
+            with player.stream(echo) as lines:
+                assert list(lines) == ["v1\n"]
+            with pytest.raises(subprocess.CalledProcessError):
+                player.run(failing, check=True)
+            with pytest.raises(CommandNotFound):
+                player.run(["no-such-tool-xyz"])
+            with pytest.raises(CommandNotRecorded):
+                player.run([PYTHON, "-c", "pass"])
+
+    with pytest.raises(ValueError):
+        CommandRunner("replay")
+
+
+def test_monitor_replays_a_recorded_scan(tmp_path, cleanup_monitor_module, use_runner):
+    now = datetime.now(timezone.utc)
+    fleet = synthetic_fleet(200, now=now, seed=5)
+    cassette = str(tmp_path / "fleet.json")
+
+    recorder = CommandRunner("record", cassette)
+    use_runner(recorder)
+    with fake_docker_cli(cli_outputs(fleet, now)):
+        live = cleanup_monitor_module.CleanupMonitor().scan_ephemeral_resources()
+    recorder.save()
+
+    use_runner(CommandRunner("replay", cassette))
+    with patch("subprocess.run", side_effect=AssertionError("no debe ejecutar")):
+        replayed = cleanup_monitor_module.CleanupMonitor().scan_ephemeral_resources()
+        assert [c["name"] for c in replayed["containers"]] == [
+            c["name"] for c in live["containers"]
+        ]
+        assert len(replayed["volumes"]) == len(live["volumes"]) > 0
+
+        cases = cassette_cases(cleanup_monitor_module, cassette)
+        scanned = cases["scan_ephemeral_resources[fleet]"]()
+        assert len(scanned["containers"]) == len(live["containers"])
+        first, second = (cases["analyze_cleanup_needs[fleet]"]() for _ in range(2))
+        assert first["total_resources"] == second["total_resources"]
+        assert sorted(first["cleanup_candidates"]["pr_numbers"]) == sorted(
+            second["cleanup_candidates"]["pr_numbers"]
+        )
+
+
+def test_hung_docker_does_not_block_the_monitor(
+    tmp_path, cleanup_monitor_module, use_runner, monkeypatch
+):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    docker = bin_dir / "docker"
+    docker.write_text("#!/bin/sh\nexec sleep 30\n")
+    docker.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}:/usr/bin:/bin")
+    use_runner(CommandRunner(timeouts={"docker": 0.3}))
+
+    started = time.monotonic()
+    resources = cleanup_monitor_module.CleanupMonitor().scan_ephemeral_resources()
+
+    assert resources == {"containers": [], "volumes": [], "networks": []}
+    assert time.monotonic() - started < 5
@@ -0,0 +1,127 @@
+import json
+
+from src.dashboard_shards import ShardWriter
+
+
+def op(timestamp, operation="deploy", status="success", duration=60):
+    return {
+        "timestamp": timestamp,
+        "operation": operation,
+        "status": status,
+        "duration_seconds": duration,
+        "pr_number": 1,
+    }
+
+
+def check(timestamp, drift=0):
+    return {
+        "timestamp": timestamp,
+        "drift_percent": drift,
+        "status": "no_changes" if drift == 0 else "drift_detected",
+    }
+
+
+OPERATIONS = [
+    op("2026-09-30T23:00:00"),
+    op("2026-10-01T10:00:00", duration=40),
+    op("2026-10-01T09:00:00", duration=80),
+    op("2026-10-01T11:00:00", "destroy", "failed"),
+    op("2026-10-02T08:00:00"),
+]
+CHECKS = [check("2026-10-01T12:00:00"), check("2026-10-01T13:00:00", drift=5)]
+
+
+def read(path):
+    return json.loads(path.read_text())
+
+
+def test_shards_by_day_and_month(tmp_path):
+    stats = ShardWriter(str(tmp_path)).write(OPERATIONS, CHECKS)
+
+    assert stats == {"written": 5, "unchanged": 0, "removed": 0}
+    index = read(tmp_path / "index.json")
+    assert [m["month"] for m in index["months"]] == ["2026-10", "2026-09"]
+    assert index["months"][0] == {
+        "month": "2026-10",
+        "days": 2,
+        "operations": 4,
+        "failures": 1,
+        "drift_checks": 2,
+    }
+
+    october = read(tmp_path / "months" / "2026-10.json")
+    first = october["days"][0]
+    assert first["date"] == "2026-10-01"
+    assert (first["deploys"], first["destroys"], first["failures"]) == (2, 1, 1)
+    assert first["deploy_mean_seconds"] == 60
+    assert first["compliance_rate"] == 50
+    assert october["days"][1]["compliance_rate"] is None
+
+    day = read(tmp_path / "days" / "2026-10-01.json")
+    assert [e["timestamp"][11:13] for e in day["operations"]] == ["09", "10", "11"]
+    assert len(day["drift_checks"]) == 2
+
+
+def test_only_changed_shards_are_rewritten(tmp_path):
+    writer = ShardWriter(str(tmp_path))
+    writer.write(OPERATIONS, CHECKS)
+    september = tmp_path / "days" / "2026-09-30.json"
+    mtime = september.stat().st_mtime_ns
+
+    assert writer.write(OPERATIONS, CHECKS)["written"] == 0
+
+    # Un evento nuevo reescribe solo su día y su mes
+    stats = writer.write(OPERATIONS + [op("2026-10-02T09:00:00")], CHECKS)
+    assert stats == {"written": 2, "unchanged": 3, "removed": 0}
+    assert september.stat().st_mtime_ns == mtime
+
+    # Un día sin eventos (historial recortado) elimina su shard y el del mes
+    stats = writer.write(OPERATIONS[1:], CHECKS)
+    assert stats["removed"] == 2
+    assert not september.exists()
+    assert [m["month"] for m in read(tmp_path / "index.json")["months"]] == ["2026-10"]
+
+
+def test_force_and_missing_shards(tmp_path):
+    writer = ShardWriter(str(tmp_path))
+    writer.write(OPERATIONS, CHECKS)
+    (tmp_path / "days" / "2026-10-02.json").unlink()
+
+    assert writer.write(OPERATIONS, CHECKS)["written"] == 1
+    assert writer.write(OPERATIONS, CHECKS, force=True)["written"] == 5
+
+
+def test_archived_days_keep_their_shards(tmp_path):
+    writer = ShardWriter(str(tmp_path))
+    writer.write(OPERATIONS, CHECKS)
+    september = tmp_path / "days" / "2026-09-30.json"
+    mtime = september.stat().st_mtime_ns
+
+    # Solo se cargaron los días desde el 2026-10-01; el 30/09 quedó en el archivo
+    stats = writer.write(OPERATIONS[1:], CHECKS, keep_before="2026-10-01")
+
+    assert stats == {"written": 0, "unchanged": 5, "removed": 0}
+    assert september.stat().st_mtime_ns == mtime
+    index = read(tmp_path / "index.json")
+    assert [m["month"] for m in index["months"]] == ["2026-10", "2026-09"]
+    assert read(tmp_path / "months" / "2026-09.json")["days"][0]["deploys"] == 1
+
+
+def test_dashboard_is_a_shell_over_shards(dashboard_module, tmp_path):
+    metrics = tmp_path / "operations.json"
+    metrics.write_text(json.dumps({"operations": OPERATIONS, "drift_checks": CHECKS}))
+    generator = dashboard_module.DashboardGenerator(
+        dashboard_module.TrendsAnalyzer(str(metrics))
+    )
+
+    (tmp_path / "site").mkdir()
+
+    output = generator.generate_html_dashboard(
+        str(tmp_path / "site" / "trends.html"), days=30, data_dir=str(tmp_path / "shards")
+    )
+
+    html = open(output).read()
+    assert 'data-url="../shards"' in html
+    assert "2026-10-01" not in html
+    assert (tmp_path / "shards" / "months" / "2026-10.json").exists()
+    assert generator.shard_stats["written"] == 5
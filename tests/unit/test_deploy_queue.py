@@ -0,0 +1,184 @@
+import sys
+import threading
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from src.deploy_queue import DeployQueue, DeployQueueDaemon
+from src.monitor_daemon import MonitorClient
+from tests.conftest import load_script
+
+
+class Recorder:
+    """Handlers que registran el orden y la concurrencia; `gate` retiene las ejecuciones."""
+
+    def __init__(self, fail=()):
+        self.calls = []
+        self.active = set()
+        self.max_active = 0
+        self.overlaps = 0
+        self.fail = set(fail)
+        self.gate = threading.Event()
+        self.gate.set()
+        self.lock = threading.Lock()
+
+    def handler(self, action):
+        def run(pr_number, variables):
+            with self.lock:
+                self.overlaps += pr_number in self.active
+                self.active.add(pr_number)
+                self.max_active = max(self.max_active, len(self.active))
+                self.calls.append((action, pr_number, variables))
+            self.gate.wait(5)
+            time.sleep(0.01)
+            with self.lock:
+                self.active.discard(pr_number)
+            if pr_number in self.fail:
+                raise RuntimeError("apply falló")
+            return {"pr_number": pr_number}
+
+        return run
+
+    def handlers(self):
+        return {"deploy": self.handler("deploy"), "destroy": self.handler("destroy")}
+
+
+def wait_running(queue, count, timeout=5):
+    deadline = time.monotonic() + timeout
+    while len(queue.running) < count and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+
+def test_rapid_pushes_coalesce_into_latest_deploy():
+    recorder = Recorder()
+    with DeployQueue(recorder.handlers(), debounce=0.2) as queue:
+        receipts = [queue.submit(7, variables={"app_image": f"app:{i}"}) for i in range(4)]
+        assert queue.wait_idle(5)
+
+    assert [r["status"] for r in receipts] == ["queued"] + ["coalesced"] * 3
+    assert recorder.calls == [("deploy", 7, {"app_image": "app:3"})]
+    assert queue.history[0]["requests"] == 4
+    assert queue.history[0]["wait_seconds"] >= 0.2
+    assert queue.metrics()["counters"]["coalesced"] == 3
+
+
+def test_push_during_apply_waits_for_it():
+    recorder = Recorder()
+    recorder.gate.clear()
+    with DeployQueue(recorder.handlers(), max_concurrent=3, debounce=0) as queue:
+        queue.submit(7)
+        wait_running(queue, 1)
+        queue.submit(7, variables={"app_image": "app:2"})
+        time.sleep(0.05)
+        assert queue.metrics()["running"] == [7] and queue.metrics()["depth"] == 1
+        recorder.gate.set()
+        assert queue.wait_idle(5)
+
+    assert len(recorder.calls) == 2
+    assert recorder.overlaps == 0
+
+
+def test_concurrency_cap_and_destroys_first():
+    recorder = Recorder()
+    recorder.gate.clear()
+    with DeployQueue(recorder.handlers(), max_concurrent=2, debounce=0) as queue:
+        queue.submit(1)
+        queue.submit(2)
+        wait_running(queue, 2)
+        for pr_number in (3, 4):
+            queue.submit(pr_number)
+        queue.submit(5, "destroy")
+        # Un destroy reemplaza el deploy pendiente del mismo PR
+        queue.submit(4, "destroy")
+        assert queue.metrics()["depth_by_action"] == {"deploy": 1, "destroy": 2}
+        recorder.gate.set()
+        assert queue.wait_idle(5)
+
+    assert recorder.max_active == 2
+    order = [(action, pr) for action, pr, _ in recorder.calls[2:]]
+    assert order == [("destroy", 4), ("destroy", 5), ("deploy", 3)]
+
+
+def test_admission_control_rejects_new_deploys_when_full():
+    recorder = Recorder()
+    recorder.gate.clear()
+    with DeployQueue(recorder.handlers(), max_concurrent=1, debounce=0, max_pending=2) as queue:
+        queue.submit(1)
+        wait_running(queue, 1)
+        statuses = [queue.submit(pr)["status"] for pr in (2, 3, 4)]
+        assert statuses == ["queued", "queued", "rejected"]
+        assert queue.submit(2)["status"] == "coalesced"
+        assert queue.submit(9, "destroy")["status"] == "queued"
+        recorder.gate.set()
+
+    assert queue.metrics()["counters"] == {
+        "submitted": 6,
+        "coalesced": 1,
+        "rejected": 1,
+        "completed": 4,
+        "failed": 0,
+    }
+
+
+def test_failures_and_wait_metrics():
+    recorder = Recorder(fail={2})
+    with DeployQueue(recorder.handlers(), max_concurrent=1, debounce=0.05) as queue:
+        for pr_number in range(1, 6):
+            queue.submit(pr_number)
+        assert queue.wait_idle(5)
+        metrics = queue.metrics()
+
+    assert metrics["counters"]["failed"] == 1
+    assert [h["error"] for h in queue.history if h["error"]] == ["RuntimeError: apply falló"]
+    wait = metrics["wait_seconds"]["deploy"]
+    assert wait["count"] == 5
+    assert wait["p50"] >= 0.05 and wait["p99"] >= wait["p50"]
+    assert metrics["wait_seconds"]["destroy"]["count"] == 0
+
+
+def test_provisioner_handlers_use_one_provisioner_per_pr():
+    provisioners = {}
+
+    def provisioner_for(pr):
+        return provisioners.setdefault(pr, Mock())
+
+    host = {"docker_host": "unix:///tmp/runner-a.sock"}
+    with DeployQueue.for_provisioner(provisioner_for, debounce=0) as queue:
+        queue.submit(7, "destroy", host)
+        queue.submit(8, "deploy", host)
+        assert queue.wait_idle(5)
+
+    provisioners[7].destroy.assert_called_once_with(7, host)
+    provisioners[8].redeploy.assert_called_once_with(8, host)
+    provisioners[7].redeploy.assert_not_called()
+    provisioners[8].destroy.assert_not_called()
+
+
+def test_daemon_and_cli(tmp_path, monkeypatch, capsys):
+    recorder = Recorder()
+    socket_path = str(tmp_path / "deploy.sock")
+    queue = DeployQueue(recorder.handlers(), debounce=0)
+    cli = load_script("deploy-queue.py", "deploy_queue_cli")
+
+    with DeployQueueDaemon(queue, socket_path):
+        monkeypatch.setattr(
+            sys,
+            "argv",
+            ["deploy-queue.py", "submit", "--pr", "12", "--var", "app_image=app:9",
+             "--socket", socket_path],
+        )
+        cli.main()
+        assert "PR #12 (deploy): queued" in capsys.readouterr().out
+        assert queue.wait_idle(5)
+
+        monkeypatch.setattr(sys, "argv", ["deploy-queue.py", "metrics", "--socket", socket_path])
+        cli.main()
+        assert "Completados: 1" in capsys.readouterr().out
+        history = MonitorClient(socket_path).call("history")
+
+    assert recorder.calls == [("deploy", 12, {"app_image": "app:9"})]
+    assert history[0]["pr_number"] == 12
+
+    with pytest.raises(ValueError):
+        queue.submit(1, "restart")
@@ -0,0 +1,179 @@
+import pytest
+from unittest.mock import patch
+
+from src.eviction import (
+    AgePolicy,
+    EvictionEngine,
+    EvictionPolicy,
+    freed_capacity,
+    parse_weights,
+)
+from src.units import format_size, parse_size
+
+GIB = 1024**3
+
+
+def make_stack(pr_number, age=1.0, idle=None, state="OPEN", memory=0, disk=0):
+    return {
+        "pr_number": pr_number,
+        "age_hours": age,
+        "idle_hours": age if idle is None else idle,
+        "pr_state": state,
+        "memory_bytes": memory,
+        "disk_bytes": disk,
+    }
+
+
+@pytest.mark.parametrize(
+    "raw,expected",
+    [
+        ("0B", 0),
+        ("12.5MiB", int(12.5 * 1024**2)),
+        ("1.2GB", 1_200_000_000),
+        (" 2kB ", 2000),
+        ("8GiB", 8 * GIB),
+    ],
+)
+def test_parse_size(raw, expected):
+    """Convierte tamaños de Docker a bytes"""
+    assert parse_size(raw) == expected
+
+
+@pytest.mark.parametrize("raw", ["", "abc", "12XB", None])
+def test_parse_size_invalid(raw):
+    with pytest.raises(ValueError):
+        parse_size(raw)
+
+
+@pytest.mark.parametrize(
+    "num_bytes,expected", [(512, "512B"), (1536, "1.5KiB"), (3 * GIB, "3.0GiB")]
+)
+def test_format_size(num_bytes, expected):
+    assert format_size(num_bytes) == expected
+
+
+def test_parse_weights():
+    assert parse_weights("lru=2, age=0.5") == {"lru": 2.0, "age": 0.5}
+    with pytest.raises(ValueError):
+        parse_weights("random=1")
+
+
+class TestEvictionEngine:
+    """Tests del motor de desalojo"""
+
+    def test_dead_prs_always_evicted(self):
+        engine = EvictionEngine()
+        stacks = [make_stack(1, state="MERGED"), make_stack(2), make_stack(3, age=100)]
+
+        result = engine.select(stacks)
+
+        assert sorted(result["evict"]) == [1, 3]
+        assert result["reasons"][1] == "PR MERGED"
+        assert result["reasons"][3].startswith("edad")
+
+    def test_no_budget_no_pressure_evictions(self):
+        engine = EvictionEngine(max_age_hours=None)
+        result = engine.select([make_stack(1, age=500), make_stack(2)])
+        assert result["evict"] == []
+        assert result["pressure_before"] == 0
+
+    def test_evicts_until_within_memory_budget(self):
+        engine = EvictionEngine(memory_budget=4 * GIB)
+        stacks = [
+            make_stack(1, idle=10, memory=1 * GIB),
+            make_stack(2, idle=1, memory=3 * GIB),
+            make_stack(3, idle=5, memory=2 * GIB),
+        ]
+
+        result = engine.select(stacks)
+
+        assert result["pressure_before"] == 1.5
+        assert result["pressure_after"] <= 1.0
+        # Un solo desalojo basta si se elige el stack que más libera
+        assert len(result["evict"]) == 1
+        assert freed_capacity(stacks, result["evict"])[0] >= 2 * GIB
+
+    def test_disk_budget(self):
+        engine = EvictionEngine(disk_budget=10 * GIB)
+        stacks = [make_stack(1, disk=8 * GIB), make_stack(2, disk=6 * GIB, idle=9)]
+
+        result = engine.select(stacks)
+
+        assert len(result["evict"]) == 1
+        assert result["pressure_after"] <= 1.0
+
+    def test_rank_orders_by_score(self):
+        engine = EvictionEngine(weights={"lru": 1.0})
+        ranked = engine.rank([make_stack(1, idle=1), make_stack(2, idle=8)])
+        assert [s["pr_number"] for s in ranked] == [2, 1]
+        assert ranked[0]["scores"] == {"lru": 1.0}
+
+    def test_custom_policy(self):
+        class OddPolicy(EvictionPolicy):
+            name = "odd"
+
+            def score(self, stack):
+                return float(stack["pr_number"] % 2)
+
+        engine = EvictionEngine(weights={"odd": 1.0}, policies=[OddPolicy(), AgePolicy()])
+        ranked = engine.rank([make_stack(2), make_stack(3)])
+        assert ranked[0]["pr_number"] == 3
+
+
+class TestMonitorEviction:
+    """Tests de la integración con CleanupMonitor"""
+
+    RESOURCES = {
+        "containers": [
+            {"name": "ephemeral-pr-1-app", "pr_number": 1, "age_hours": 2.0},
+            {"name": "ephemeral-pr-2-app", "pr_number": 2, "age_hours": 3.0},
+            {"name": "huérfano", "pr_number": None, "age_hours": 90.0},
+        ],
+        "volumes": [
+            {"name": "ephemeral-pr-2-db-data", "pr_number": 2, "age_hours": 3.0}
+        ],
+        "networks": [],
+    }
+
+    USAGE = {
+        "stacks": [
+            {"pr_number": 1, "memory_bytes": 100 * 1024**2, "disk_bytes": 2},
+            {"pr_number": 2, "memory_bytes": 3 * GIB, "disk_bytes": 0},
+        ]
+    }
+
+    def test_build_stack_profiles(self, cleanup_monitor_module):
+        monitor = cleanup_monitor_module.CleanupMonitor()
+        with patch.object(monitor, "collect_resource_usage", return_value=self.USAGE):
+            footprints = monitor._collect_footprints()
+
+        profiles = monitor.build_stack_profiles(self.RESOURCES, footprints=footprints)
+
+        assert [p["pr_number"] for p in profiles] == [1, 2]
+        assert profiles[0]["memory_bytes"] == 100 * 1024**2
+        assert profiles[0]["disk_bytes"] == 2
+        assert profiles[1]["age_hours"] == 3.0
+
+    def test_analyze_with_engine(self, cleanup_monitor_module):
+        monitor = cleanup_monitor_module.CleanupMonitor()
+        engine = EvictionEngine(memory_budget=1 * GIB)
+
+        with patch.object(monitor, "scan_ephemeral_resources", return_value=self.RESOURCES):
+            with patch.object(monitor, "collect_resource_usage", return_value=self.USAGE):
+                analysis = monitor.analyze_cleanup_needs(72, engine)
+
+        candidates = analysis["cleanup_candidates"]
+        assert candidates["pr_numbers"] == [2]
+        assert [c["name"] for c in candidates["containers"]] == ["ephemeral-pr-2-app"]
+        assert len(candidates["volumes"]) == 1
+        assert analysis["eviction"]["freed_memory_bytes"] == 3 * GIB
+
+    def test_flat_analysis_unchanged(self, cleanup_monitor_module):
+        monitor = cleanup_monitor_module.CleanupMonitor()
+        with patch.object(monitor, "scan_ephemeral_resources", return_value=self.RESOURCES):
+            analysis = monitor.analyze_cleanup_needs(72)
+
+        assert "eviction" not in analysis
+        assert [c["name"] for c in analysis["cleanup_candidates"]["containers"]] == [
+            "huérfano"
+        ]
@@ -0,0 +1,125 @@
+import time
+
+import pytest
+
+from src.docker_api import DockerAPIClient, DockerAPIError
+from src.fake_docker import FakeDockerDaemon
+from src.synthetic import synthetic_fleet
+
+EPHEMERAL = {"label": ["environment=ephemeral"]}
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    with FakeDockerDaemon(str(tmp_path / "docker.sock"), synthetic_fleet(50, seed=1)) as d:
+        yield d
+
+
+@pytest.fixture
+def client(daemon):
+    return DockerAPIClient(daemon.docker_host, timeout=5)
+
+
+def test_ping_and_listing(client):
+    assert client.ping()
+    assert len(client.containers(filters=EPHEMERAL)) == 30
+    assert len(client.containers(filters={"label": ["pr_number=3"]})) == 3
+    assert len(client.containers(filters={"label": ["component=database"]})) == 10
+    assert len(client.volumes(filters={"name": ["ephemeral-pr-1-"]})) == 1
+    assert len(client.networks(filters={"name": ["ephemeral-pr-"]})) == 10
+
+
+def test_running_filter(client):
+    running = client.containers(include_stopped=False)
+    assert running and all(c["State"] == "running" for c in running)
+
+    client.container_action("ephemeral-pr-1-app", "stop")
+    names = [c["Names"][0] for c in client.containers(include_stopped=False)]
+    assert "/ephemeral-pr-1-app" not in names
+
+
+def test_removal_respects_dependencies(client, daemon):
+    with pytest.raises(DockerAPIError) as exc:
+        client.remove_volume("ephemeral-pr-1-db-data")
+    assert exc.value.status == 409
+
+    with pytest.raises(DockerAPIError) as exc:
+        client.remove_network("ephemeral-pr-1-network")
+    assert exc.value.status == 403
+
+    client.container_action("ephemeral-pr-1-app", "stop")
+    with pytest.raises(DockerAPIError):
+        client.remove_container("ephemeral-pr-1-db", force=False)
+
+    for component in ("app", "db", "proxy"):
+        client.remove_container(f"ephemeral-pr-1-{component}")
+    client.remove_volume("ephemeral-pr-1-db-data")
+    client.remove_network("ephemeral-pr-1-network")
+
+    assert len(daemon.containers) == 27
+    with pytest.raises(DockerAPIError) as exc:
+        client.remove_container("ephemeral-pr-1-app")
+    assert exc.value.status == 404
+
+
+def test_scripted_failures(client, daemon):
+    daemon.inject_failure("DELETE", r"^/containers/", times=2)
+
+    for _ in range(2):
+        with pytest.raises(DockerAPIError) as exc:
+            client.remove_container("ephemeral-pr-2-app")
+        assert exc.value.status == 500
+    client.remove_container("ephemeral-pr-2-app")
+
+    assert daemon.failures_injected == 2
+    assert daemon.requests[("DELETE", "/containers")] == 3
+
+
+def test_random_failures_are_deterministic(tmp_path):
+    def failures(seed):
+        with FakeDockerDaemon(
+            str(tmp_path / f"d{seed}.sock"), failure_rate=0.5, seed=seed
+        ) as d:
+            client = DockerAPIClient(d.docker_host)
+            return [client.ping() for _ in range(20)]
+
+    assert failures(7) == failures(7)
+    assert not all(failures(7))
+
+
+def test_latency(tmp_path):
+    with FakeDockerDaemon(str(tmp_path / "slow.sock"), latency=0.05) as d:
+        client = DockerAPIClient(d.docker_host)
+        start = time.perf_counter()
+        client.ping()
+        assert time.perf_counter() - start >= 0.05
+
+
+def test_client_rejects_tcp_hosts():
+    with pytest.raises(ValueError):
+        DockerAPIClient("tcp://localhost:2375")
+
+
+def test_monitor_scans_through_api(daemon, cleanup_monitor_module):
+    monitor = cleanup_monitor_module.CleanupMonitor(daemon.docker_host)
+
+    resources = monitor.scan_ephemeral_resources()
+
+    assert len(resources["containers"]) == 30
+    assert len(resources["volumes"]) == 10
+    assert len(resources["networks"]) == 10
+    container = resources["containers"][0]
+    assert container["pr_number"] == 1
+    assert container["labels"]["environment"] == "ephemeral"
+    assert container["component"] == "app"
+    assert all(r["age_hours"] is not None for r in resources["networks"])
+    assert monitor.get_resource_summary()["unique_prs"] == 10
+
+
+def test_monitor_api_unreachable(tmp_path, cleanup_monitor_module):
+    monitor = cleanup_monitor_module.CleanupMonitor(f"unix://{tmp_path}/missing.sock")
+    assert monitor.scan_ephemeral_resources() == {
+        "containers": [],
+        "volumes": [],
+        "networks": [],
+    }
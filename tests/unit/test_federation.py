@@ -0,0 +1,137 @@
+import csv
+import io
+import json
+import sys
+import time
+
+import pytest
+
+from src.fake_docker import FakeDockerDaemon
+from src.federation import parse_hosts
+from src.monitor_daemon import format_analysis, format_summary
+from src.synthetic import synthetic_fleet
+
+
+@pytest.fixture
+def dockers(tmp_path):
+    # Tres hosts con flotas disjuntas: PRs 1-10, 101-110 y 201-210
+    daemons = [
+        FakeDockerDaemon(
+            str(tmp_path / f"host{i}.sock"),
+            synthetic_fleet(50, seed=i, first_pr=100 * i + 1),
+            latency=0.1,
+        ).start()
+        for i in range(3)
+    ]
+    yield {f"host{i}": d for i, d in enumerate(daemons)}
+    for daemon in daemons:
+        daemon.stop()
+
+
+@pytest.fixture
+def monitor(dockers, cleanup_monitor_module):
+    hosts = {name: d.docker_host for name, d in dockers.items()}
+    return cleanup_monitor_module.CleanupMonitor(docker_hosts=hosts)
+
+
+def test_parse_hosts(monkeypatch):
+    assert parse_hosts("a=unix:///tmp/a.sock, unix:///tmp/b.sock") == {
+        "a": "unix:///tmp/a.sock",
+        "unix:///tmp/b.sock": "unix:///tmp/b.sock",
+    }
+    monkeypatch.setenv("EPHEMERAL_DOCKER_HOSTS", "x=unix:///tmp/x.sock")
+    assert parse_hosts() == {"x": "unix:///tmp/x.sock"}
+    assert parse_hosts("") == {}
+
+    with pytest.raises(ValueError):
+        parse_hosts("a=tcp://10.0.0.1:2375")
+    with pytest.raises(ValueError):
+        parse_hosts("a=unix:///tmp/a.sock,a=unix:///tmp/b.sock")
+
+
+def test_hosts_are_scanned_concurrently_and_merged(monitor, dockers):
+    start = time.monotonic()
+    resources = monitor.scan_ephemeral_resources()
+    elapsed = time.monotonic() - start
+
+    # 3 peticiones por host con 0.1s de latencia: en serie serían ~0.9s
+    assert elapsed < 0.6
+    assert len(resources["containers"]) == 90
+    assert {r["host"] for r in resources["networks"]} == set(dockers)
+    assert all(h["status"] == "ok" for h in resources["hosts"].values())
+
+    summary = monitor.get_resource_summary(resources)
+    assert summary["unique_prs"] == 30
+    assert summary["hosts"]["host1"]["total_volumes"] == 10
+    assert "[host2] 30 contenedores" in format_summary(summary)
+
+    analysis = monitor.analyze_cleanup_needs(0, resources=resources)
+    assert len(analysis["cleanup_candidates"]["pr_numbers"]) == 30
+    assert analysis["hosts"]["host2"]["pr_numbers"] == list(range(201, 211))
+    assert "[host0] 30 contenedores" in format_analysis(analysis)
+
+
+def test_failed_host_is_reported_without_hiding_the_rest(monitor, dockers):
+    dockers["host1"].stop()
+    dockers["host2"].inject_failure("GET", "^/volumes")
+
+    resources = monitor.scan_ephemeral_resources()
+    summary = monitor.get_resource_summary(resources)
+
+    assert summary["total_containers"] == 30
+    assert summary["hosts"]["host0"]["status"] == "ok"
+    assert summary["hosts"]["host1"]["status"] == "error"
+    assert summary["hosts"]["host2"]["error"].startswith("DockerAPIError")
+    assert "[host1] ERROR" in format_summary(summary)
+    assert monitor.analyze_cleanup_needs(0, resources=resources)["hosts"]["host1"]["status"] == (
+        "error"
+    )
+
+
+def test_teardown_is_routed_to_each_host(monitor, dockers):
+    resources = monitor.scan_ephemeral_resources()
+
+    plan = monitor.teardown([1, 2, 201], resources, dry_run=True)
+    assert [(layer["kind"], layer["items"]) for layer in plan["layers"]] == [
+        ("containers", 9),
+        ("volumes", 3),
+        ("networks", 3),
+    ]
+    assert set(plan["hosts"]) == {"host0", "host2"}
+
+    report = monitor.teardown([1, 2, 201], resources)
+    assert report["removed"] == {"containers": 9, "volumes": 3, "networks": 3}
+    assert report["failed"] == {}
+    assert [len(d.containers) for d in dockers.values()] == [24, 30, 27]
+
+
+def test_cli_federated_summary_and_report(
+    dockers, monkeypatch, capsys, tmp_path, cleanup_monitor_module
+):
+    hosts = ",".join(f"{name}={d.docker_host}" for name, d in dockers.items())
+    output = tmp_path / "report.csv"
+    monkeypatch.setattr(
+        sys, "argv", ["cleanup-monitor.py", "--docker-hosts", hosts, "--summary", "--json"]
+    )
+    cleanup_monitor_module.main()
+    summary = json.loads(capsys.readouterr().out)
+    assert sorted(summary["hosts"]) == ["host0", "host1", "host2"]
+
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "cleanup-monitor.py", "--docker-hosts", hosts, "--report",
+            "--report-format", "csv", "--max-age", "0", "--output", str(output),
+        ],
+    )
+    cleanup_monitor_module.main()
+    rows = list(csv.DictReader(io.StringIO(output.read_text())))
+    assert len(rows) == 150
+    assert {row["host"] for row in rows} == set(dockers)
+
+    monkeypatch.setattr(
+        sys, "argv", ["cleanup-monitor.py", "--docker-hosts", hosts, "--usage"]
+    )
+    with pytest.raises(SystemExit):
+        cleanup_monitor_module.main()
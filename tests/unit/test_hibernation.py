@@ -0,0 +1,172 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import Mock, patch
+
+from src.hibernation import (
+    ActivityTracker,
+    HibernationPolicy,
+    container_names,
+    parse_request_time,
+)
+
+NOW = datetime(2026, 10, 19, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def tracker(tmp_path):
+    return ActivityTracker(str(tmp_path / "hibernation.json"))
+
+
+@pytest.mark.parametrize(
+    "line,expected",
+    [
+        (
+            "2026-10-19T11:30:00.123456789Z 172.18.0.1 - - "
+            '[19/Oct/2026:11:30:00 +0000] "GET / HTTP/1.1" 200',
+            datetime(2026, 10, 19, 11, 30, tzinfo=timezone.utc),
+        ),
+        (
+            '10.0.0.1 - - [19/Oct/2026:13:30:00 +0200] "GET / HTTP/1.1" 200 ephemeral-pr-5',
+            datetime(2026, 10, 19, 11, 30, tzinfo=timezone.utc),
+        ),
+        ("línea sin timestamp", None),
+    ],
+)
+def test_parse_request_time(line, expected):
+    """Extrae la hora de logs de docker y de nginx"""
+    assert parse_request_time(line) == expected
+
+
+class TestActivityTracker:
+    """Tests del registro de actividad por stack"""
+
+    def test_ingest_ignores_health_checks(self, tracker):
+        lines = [
+            '2026-10-19T11:00:00Z 1.1.1.1 - - "GET /health HTTP/1.1" 200',
+            '2026-10-19T11:05:00Z 1.1.1.1 - - "GET /index.html HTTP/1.1" 200',
+            "",
+        ]
+        assert tracker.ingest_log_lines(lines, pr_number=7) == 1
+        assert tracker.last_request(7) == datetime(
+            2026, 10, 19, 11, 5, tzinfo=timezone.utc
+        )
+
+    def test_ingest_shared_log_extracts_pr(self, tracker):
+        lines = [
+            '1.1.1.1 - - [19/Oct/2026:11:00:00 +0000] "GET / HTTP/1.1" 200 ephemeral-pr-12-proxy',
+            '1.1.1.1 - - [19/Oct/2026:11:01:00 +0000] "GET / HTTP/1.1" 200 otro-host',
+        ]
+        assert tracker.ingest_log_lines(lines) == 1
+        assert tracker.last_request(12) is not None
+
+    def test_record_keeps_latest(self, tracker):
+        tracker.record_request(1, NOW)
+        tracker.record_request(1, NOW - timedelta(hours=1))
+        assert tracker.last_request(1) == NOW
+
+    def test_state_roundtrip(self, tracker):
+        tracker.record_request(3, NOW)
+        tracker.mark_hibernated(3, NOW, "pause")
+        tracker.save()
+
+        reloaded = ActivityTracker(tracker.state_file)
+        assert reloaded.hibernated_at(3) == NOW
+        assert reloaded.hibernation_mode(3) == "pause"
+
+        reloaded.mark_awake(3)
+        assert reloaded.hibernated_at(3) is None
+        assert reloaded.hibernation_mode(3) is None
+
+    def test_corrupt_state_file(self, tmp_path):
+        state_file = tmp_path / "hibernation.json"
+        state_file.write_text("{no json")
+        assert ActivityTracker(str(state_file)).stacks == {}
+
+
+class TestHibernationPolicy:
+    """Tests de decisiones de hibernación"""
+
+    @pytest.mark.parametrize("mode,idle", [("kill", 30), ("stop", 0)])
+    def test_invalid_parameters(self, mode, idle):
+        with pytest.raises(ValueError):
+            HibernationPolicy(idle, mode)
+
+    def test_plan_hibernates_idle_stacks(self, tracker):
+        policy = HibernationPolicy(idle_minutes=30)
+        stacks = {1: NOW - timedelta(hours=2), 2: NOW - timedelta(hours=2)}
+        tracker.record_request(2, NOW - timedelta(minutes=5))
+
+        plan = policy.plan(stacks, tracker, NOW)
+
+        assert plan == {"hibernate": [1], "wake": []}
+
+    def test_new_stack_not_hibernated(self, tracker):
+        policy = HibernationPolicy(idle_minutes=30)
+        plan = policy.plan({1: NOW - timedelta(minutes=10)}, tracker, NOW)
+        assert plan["hibernate"] == []
+
+    def test_plan_wakes_on_new_request(self, tracker):
+        policy = HibernationPolicy(idle_minutes=30)
+        tracker.mark_hibernated(1, NOW - timedelta(hours=1), "stop")
+        tracker.mark_hibernated(2, NOW - timedelta(hours=1), "stop")
+        tracker.record_request(1, NOW - timedelta(seconds=10))
+
+        plan = policy.plan(
+            {1: NOW - timedelta(hours=5), 2: NOW - timedelta(hours=5)}, tracker, NOW
+        )
+
+        assert plan == {"hibernate": [], "wake": [1]}
+
+    @pytest.mark.parametrize(
+        "mode,action", [("stop", "start"), ("pause", "unpause")]
+    )
+    def test_commands(self, mode, action):
+        policy = HibernationPolicy(mode=mode)
+        assert policy.hibernate_command(9) == ["docker", mode] + container_names(9)
+        assert policy.wake_command(9, mode) == [
+            "docker",
+            action,
+            "ephemeral-pr-9-db",
+            "ephemeral-pr-9-app",
+        ]
+
+
+class TestMonitorHibernation:
+    """Tests de la integración con CleanupMonitor"""
+
+    def test_apply_hibernation(self, cleanup_monitor_module, tracker):
+        monitor = cleanup_monitor_module.CleanupMonitor()
+        containers = [
+            {"name": f"ephemeral-pr-1-{c}", "pr_number": 1, "age_hours": 5.0}
+            for c in ("app", "db", "proxy")
+        ]
+        tracker.mark_hibernated(2, NOW, "pause")
+        calls = []
+
+        def fake_run(cmd, **kwargs):
+            calls.append(cmd)
+            return Mock(returncode=0, stdout="")
+
+        with patch.object(monitor, "_scan_containers", return_value=containers):
+            with patch("subprocess.run", side_effect=fake_run):
+                plan = monitor.apply_hibernation(HibernationPolicy(30), tracker)
+
+        assert plan["hibernate"] == [1]
+        assert ["docker", "logs", "--timestamps", "ephemeral-pr-1-proxy"] in calls
+        assert calls[-1] == ["docker", "stop", "ephemeral-pr-1-app", "ephemeral-pr-1-db"]
+        assert ActivityTracker(tracker.state_file).hibernated_at(1) is not None
+        # El PR 2 ya no existe y su estado se descarta
+        assert "2" not in tracker.stacks
+
+    def test_dry_run_does_not_execute(self, cleanup_monitor_module, tracker):
+        monitor = cleanup_monitor_module.CleanupMonitor()
+        containers = [{"name": "ephemeral-pr-1-app", "pr_number": 1, "age_hours": 5.0}]
+
+        with patch.object(monitor, "_scan_containers", return_value=containers):
+            with patch("subprocess.run") as mock_run:
+                plan = monitor.apply_hibernation(
+                    HibernationPolicy(30), tracker, dry_run=True
+                )
+
+        assert plan["hibernate"] == [1]
+        mock_run.assert_not_called()
@@ -0,0 +1,188 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from src.metrics_archive import MetricsArchive, Segment, encode_segment, load_metrics
+from src.metrics_exporter import OperationsIngestor
+from src.regression import RegressionMonitor, load_history
+from src.synthetic import drift_events, operation_events
+
+NOW = datetime(2026, 10, 19, 12, 0)
+
+
+def write_history(path, operations, drift_checks=()):
+    data = {"operations": list(operations), "drift_checks": list(drift_checks)}
+    path.write_text(json.dumps(data))
+
+
+@pytest.fixture
+def history(tmp_path):
+    """120 días de historial; el último evento es del 2026-10-19."""
+    path = tmp_path / "operations.json"
+    operations = list(operation_events(3000, 120, now=NOW))
+    checks = list(drift_events(300, 120, now=NOW))
+    write_history(path, operations, checks)
+    return path, operations, checks
+
+
+def test_segment_round_trip_is_lossless(tmp_path):
+    events = [
+        {"timestamp": "2026-01-01T10:00:00+00:00", "operation": "deploy", "status": "success",
+         "pr_number": 7, "duration_seconds": 41, "resource_count": 5, "commit": "abc123"},
+        {"timestamp": "2026-01-01T11:30:00-03:00", "operation": "destroy", "status": "failed",
+         "pr_number": 8, "duration_seconds": 12.5},
+        {"timestamp": "2026-01-02T08:00:00", "operation": "deploy", "status": "success",
+         "commit": None, "duration_seconds": None},
+        {"timestamp": "2026-01-02T09:00:00Z", "operation": "deploy", "pr_number": "9",
+         "resource_count": True, "duration_seconds": 2 ** 60 + 1, "note": {"retry": 2}},
+        {"operation": "deploy", "status": "success", "timestamp": "ayer"},
+        {"status": "success"},
+    ]
+    payload, header = encode_segment("operations", enumerate(events, start=100))
+    path = tmp_path / "segment.seg"
+    path.write_bytes(payload)
+
+    with Segment(str(path)) as segment:
+        assert [seq for seq, _ in segment.events()] == list(range(100, 106))
+        assert [event for _, event in segment.events()] == events
+        assert segment.values("duration_seconds") == [41, 12.5, None, None, None, None]
+        assert segment.values("day")[:4] == ["2026-01-01", "2026-01-01", "2026-01-02", "2026-01-02"]
+        assert segment.select(since="2026-01-02", where={"operation": "deploy"}) == [2, 3]
+        assert segment.select(where={"operation": "restart"}) == []
+
+    assert header["days"] == ["2026-01-01", "2026-01-02"]
+    assert header["columns"]["duration_seconds"]["type"] == "d"
+    assert header["columns"]["operation"]["type"] == "H"
+
+
+def test_compaction_keeps_recent_events_hot(history, tmp_path):
+    path, operations, checks = history
+    archive = MetricsArchive(str(tmp_path / "archive"))
+
+    stats = archive.compact(str(path), hot_days=30, now=NOW)
+
+    hot = json.loads(path.read_text())
+    assert stats["operations"]["archived"] == hot["archived"]["operations"] > 2000
+    assert all(op["timestamp"][:10] >= "2026-09-19" for op in hot["operations"])
+    assert hot["operations"] == operations[stats["operations"]["archived"]:]
+
+    full = load_metrics(str(path), str(tmp_path / "archive"))
+    assert full["operations"] == operations
+    assert full["drift_checks"] == checks
+    assert full["archived"] == {"operations": 0, "drift_checks": 0}
+
+    # Sin eventos nuevos fuera de la ventana no se reescribe nada
+    mtime = path.stat().st_mtime_ns
+    assert archive.compact(str(path), hot_days=30, now=NOW)["operations"]["archived"] == 0
+    assert path.stat().st_mtime_ns == mtime
+
+
+def test_since_loads_only_complete_days(history, tmp_path):
+    path, operations, _ = history
+    MetricsArchive(str(tmp_path / "archive")).compact(str(path), hot_days=30, now=NOW)
+
+    window = load_metrics(str(path), str(tmp_path / "archive"), since="2026-09-01")
+
+    assert window["complete_since"] == "2026-09-01"
+    assert "archived" not in window
+    assert window["operations"] == [op for op in operations if op["timestamp"][:10] >= "2026-09-01"]
+
+
+def test_interrupted_compaction_does_not_duplicate(history, tmp_path):
+    path, operations, _ = history
+    before = path.read_text()
+    MetricsArchive(str(tmp_path / "archive")).compact(str(path), hot_days=30, now=NOW)
+    # El manifest quedó escrito pero operations.json no llegó a recortarse
+    path.write_text(before)
+
+    MetricsArchive(str(tmp_path / "archive")).compact(str(path), hot_days=30, now=NOW)
+
+    assert load_metrics(str(path), str(tmp_path / "archive"))["operations"] == operations
+
+
+def test_segments_merge_by_tier(tmp_path):
+    path = tmp_path / "operations.json"
+    operations = list(operation_events(800, 80, now=NOW))
+    write_history(path, [])
+    archive = MetricsArchive(str(tmp_path / "archive"), fanout=2)
+
+    # Un lote de 100 eventos por corrida, cada uno fuera de la ventana caliente
+    for batch in range(8):
+        data = json.loads(path.read_text())
+        data["operations"] += operations[batch * 100:(batch + 1) * 100]
+        path.write_text(json.dumps(data))
+        archive.compact(str(path), hot_days=0, now=datetime(2027, 1, 1))
+
+    info = archive.info()["operations"]
+    assert info["events"] == 800
+    assert info["tiers"] == {"3": 1}
+    assert len(list((tmp_path / "archive").glob("*.seg"))) == 1
+    assert list(archive.events("operations")) == operations
+    assert list(archive.events("operations", since_seq=250, until_seq=260)) == operations[250:260]
+
+    deploys = archive.scan(
+        "operations", ["duration_seconds", "pr_number"], where={"operation": "deploy"}
+    )
+    expected = [op for op in operations if op["operation"] == "deploy"]
+    assert deploys["duration_seconds"] == [op["duration_seconds"] for op in expected]
+    assert deploys["pr_number"] == [op["pr_number"] for op in expected]
+
+
+def test_incremental_consumers_survive_compaction(history, tmp_path):
+    path, operations, checks = history
+    archive_dir = str(tmp_path / "archive")
+    full = RegressionMonitor()
+    full.update({"operations": operations, "drift_checks": checks})
+
+    # El detector procesó la mitad antes de la compactación
+    write_history(path, operations[:1500], checks[:150])
+    monitor = RegressionMonitor()
+    monitor.update(load_history(str(path)))
+    ingestor = OperationsIngestor(str(path), load_metrics)
+    ingestor.refresh()
+
+    write_history(path, operations, checks)
+    MetricsArchive(archive_dir).compact(str(path), hot_days=30, now=NOW)
+    monitor.update(load_history(str(path), archive_dir, monitor.seen))
+    assert monitor.seen == {"operations": 3000, "drift_checks": 300}
+    assert monitor.to_dict()["detectors"] == full.to_dict()["detectors"]
+
+    # Sin archive_dir el ingestor salta lo archivado sin reiniciarse; con él lo lee
+    ingestor.refresh()
+    assert ingestor.operations_seen == 3000
+    counted = sum(h.count for h in ingestor.durations.values())
+    assert 1500 < counted < 3000
+
+    cold = OperationsIngestor(str(path), load_metrics, archive_dir)
+    cold.refresh()
+    assert sum(h.count for h in cold.durations.values()) == 3000
+
+
+def test_dashboard_reads_only_the_window(dashboard_module, history, tmp_path):
+    path, operations, checks = history
+    archive_dir = str(tmp_path / "archive")
+    MetricsArchive(archive_dir).compact(str(path), hot_days=30, now=NOW)
+    days = {e["timestamp"][:10] for e in operations + checks}
+    (tmp_path / "site").mkdir()
+
+    def generate():
+        analyzer = dashboard_module.TrendsAnalyzer(
+            str(path), archive_dir=archive_dir, since="2026-10-01"
+        )
+        generator = dashboard_module.DashboardGenerator(analyzer)
+        generator.generate_html_dashboard(
+            str(tmp_path / "site" / "trends.html"), days=30, data_dir=str(tmp_path / "shards")
+        )
+        return analyzer, generator
+
+    analyzer, generator = generate()
+    assert analyzer.complete_since == "2026-09-19"
+    assert len(analyzer.data["operations"]) < len(operations)
+    # Sin shards previos se escribe el historial completo; después se conservan
+    assert generator.shard_stats["written"] > len(days)
+    assert generator.regressions["series"]["deploy"]["observations"] > 1000
+
+    _, generator = generate()
+    assert generator.shard_stats["written"] == 0
+    assert len(list((tmp_path / "shards" / "days").glob("*.json"))) == len(days)
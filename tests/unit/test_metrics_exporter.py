@@ -0,0 +1,196 @@
+import json
+import threading
+import urllib.request
+
+import pytest
+
+from src.inventory_cache import InventoryCache
+from src.metrics_exporter import (
+    Histogram,
+    MetricsExporter,
+    OperationsIngestor,
+    create_server,
+)
+
+INVENTORY = {
+    "containers": [
+        {"name": "ephemeral-pr-1-app", "pr_number": 1, "age_hours": 2.0, "status": "Up 2h"},
+        {"name": "ephemeral-pr-1-db", "pr_number": 1, "age_hours": 2.0, "status": "Up 2h"},
+        {"name": "ephemeral-pr-2-app", "pr_number": 2, "age_hours": 30.0, "status": "Exited"},
+    ],
+    "volumes": [{"name": "ephemeral-pr-2-db-data", "pr_number": 2, "age_hours": 50.0}],
+    "networks": [],
+}
+
+
+def write_metrics(path, operations, drift_checks=()):
+    path.write_text(
+        json.dumps({"operations": list(operations), "drift_checks": list(drift_checks)})
+    )
+
+
+def op(operation, duration, status="success"):
+    return {"operation": operation, "duration_seconds": duration, "status": status}
+
+
+@pytest.fixture
+def metrics_file(tmp_path):
+    path = tmp_path / "operations.json"
+    write_metrics(
+        path,
+        [op("deploy", 45), op("destroy", 8)],
+        [{"pr_number": 1, "drift_percent": 0, "check_duration_seconds": 3, "status": "no_changes"}],
+    )
+    return path
+
+
+@pytest.fixture
+def scans():
+    return []
+
+
+@pytest.fixture
+def exporter(metrics_file, scans):
+    def scan():
+        scans.append(1)
+        return INVENTORY
+
+    ingestor = OperationsIngestor(str(metrics_file), lambda p: json.load(open(p)))
+    return MetricsExporter(InventoryCache(scan), ingestor)
+
+
+def test_histogram_cumulative_buckets():
+    histogram = Histogram([1, 10])
+    for value in (0.5, 5, 50):
+        histogram.observe(value)
+
+    assert histogram.samples("x", {"a": "b"}) == [
+        'x_bucket{a="b",le="1"} 1',
+        'x_bucket{a="b",le="10"} 2',
+        'x_bucket{a="b",le="+Inf"} 3',
+        'x_sum{a="b"} 55.5',
+        'x_count{a="b"} 3',
+    ]
+
+
+def test_render_gauges_and_histograms(exporter):
+    exporter.cache.refresh()
+    text = exporter.render()
+
+    assert "ephemeral_stacks_alive 2" in text
+    assert 'ephemeral_resources{kind="containers"} 3' in text
+    assert "ephemeral_containers_running 2" in text
+    assert 'ephemeral_stack_age_hours_bucket{le="48"} 1' in text
+    assert (
+        'ephemeral_operation_duration_seconds_bucket{operation="deploy",status="success",le="60"} 1'
+        in text
+    )
+    assert "ephemeral_drift_check_duration_seconds_count 1" in text
+    assert "# TYPE ephemeral_drift_checks_total counter" in text
+    assert not text.endswith("# EOF\n")
+
+
+def test_drift_status_label_is_escaped(exporter, metrics_file):
+    write_metrics(
+        metrics_file,
+        [],
+        [{"pr_number": 1, "check_duration_seconds": 3, "status": 'bad"\\status'}],
+    )
+    text = exporter.render()
+    assert 'ephemeral_drift_checks_total{status="bad\\"\\\\status"} 1' in text
+
+
+def test_openmetrics_format(exporter):
+    text = exporter.render(openmetrics=True)
+    assert "# TYPE ephemeral_drift_checks counter" in text
+    assert text.endswith("# EOF\n")
+
+
+def test_scrapes_do_not_scan_docker(exporter, scans):
+    exporter.cache.refresh()
+    first = exporter.render()
+    for _ in range(5):
+        assert exporter.render() is first
+    assert len(scans) == 1
+
+
+def test_operations_ingested_incrementally(exporter, metrics_file):
+    exporter.render()
+    write_metrics(metrics_file, [op("deploy", 45), op("destroy", 8), op("deploy", 200)])
+
+    text = exporter.render()
+
+    assert exporter.ingestor.operations_seen == 3
+    assert (
+        'ephemeral_operation_duration_seconds_count{operation="deploy",status="success"} 2'
+        in text
+    )
+
+    # Un archivo truncado reinicia los histogramas
+    write_metrics(metrics_file, [op("deploy", 1, "failed")])
+    exporter.render()
+    assert list(exporter.ingestor.durations) == [("deploy", "failed")]
+
+
+def test_failed_scan_keeps_previous_inventory():
+    calls = []
+
+    def scan():
+        calls.append(1)
+        if len(calls) > 1:
+            raise RuntimeError("docker no disponible")
+        return INVENTORY
+
+    cache = InventoryCache(scan)
+    cache.refresh()
+    cache.refresh()
+
+    assert cache.get() is INVENTORY
+    assert cache.refresh_errors == 1
+    assert cache.version == 1
+
+
+def test_http_endpoint(exporter):
+    server = create_server(exporter, "127.0.0.1", 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+    try:
+        request = urllib.request.Request(
+            url, headers={"Accept": "application/openmetrics-text"}
+        )
+        with urllib.request.urlopen(request) as response:
+            body = response.read().decode()
+            content_type = response.headers["Content-Type"]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert content_type.startswith("application/openmetrics-text")
+    assert body.endswith("# EOF\n")
+
+
+def test_script_builds_on_monitor_and_analyzer(metrics_file):
+    from tests.conftest import load_script
+
+    module = load_script("metrics-exporter.py", "metrics_exporter_script")
+    exporter = module.build_exporter(str(metrics_file), interval=60)
+
+    exporter.ingestor.refresh()
+    assert exporter.ingestor.operations_seen == 2
+
+
+def test_background_refresh_thread():
+    scanned = threading.Event()
+
+    def scan():
+        scanned.set()
+        return INVENTORY
+
+    cache = InventoryCache(scan, interval=60)
+    cache.start()
+    try:
+        assert scanned.wait(5)
+    finally:
+        cache.stop()
+    assert cache.age_seconds() is not None
@@ -0,0 +1,168 @@
+import json
+import sys
+import time
+from datetime import datetime
+
+from src.metrics_archive import MetricsArchive
+from src.metrics_store import MetricsStore
+from src.synthetic import drift_events, operation_events
+from tests.conftest import load_script
+
+NOW = datetime(2026, 10, 19, 12, 0)
+
+
+def write_history(path, operations, drift_checks=()):
+    data = {"operations": list(operations), "drift_checks": list(drift_checks)}
+    path.write_text(json.dumps(data))
+
+
+def op(hour, pr_number, status="success", operation="deploy", duration=60.0):
+    return {
+        "timestamp": f"2026-10-19T{hour:02d}:00:00",
+        "operation": operation,
+        "status": status,
+        "pr_number": pr_number,
+        "duration_seconds": duration,
+        "commit": f"c{hour}",
+    }
+
+
+def expected_streaks(operations):
+    """Largos de las rachas de fallos, calculados recorriendo todo el historial."""
+    runs, last = {}, {}
+    for seq, event in enumerate(operations):
+        pr_number = event.get("pr_number")
+        if event["status"] == "failed":
+            status, start = last.get(pr_number, (None, None))
+            start = start if status == "failed" else seq
+            runs[start] = runs.get(start, 0) + 1
+            last[pr_number] = ("failed", start)
+        else:
+            last[pr_number] = (event["status"], None)
+    return sorted(runs.values(), reverse=True)
+
+
+def test_timeline_slowest_and_streaks(tmp_path):
+    path = tmp_path / "operations.json"
+    operations = [
+        op(1, 7, duration=40),
+        op(2, 7, "failed"),
+        op(3, 8, "failed"),
+        op(4, 7, "failed", "destroy"),
+        op(5, 7, duration=95),
+        op(6, 8, "failed"),
+        op(7, 8, "failed"),
+        op(8, 9, duration=300, operation="destroy"),
+    ]
+    checks = [{"timestamp": "2026-10-19T03:30:00", "status": "drift_detected",
+               "pr_number": 7, "drift_percent": 4.5}]
+    write_history(path, operations, checks)
+
+    with MetricsStore(str(tmp_path / "metrics.db")) as store:
+        assert store.sync(str(path)) == {"operations": 8, "drift_checks": 1}
+        timeline = store.pr_timeline(7)
+        summary = store.pr_summary(7)
+        slowest = store.slowest("deploy", limit=2)
+        streaks = store.failure_streaks()
+
+    assert [(e["kind"], e["timestamp"][11:13]) for e in timeline] == [
+        ("operation", "01"), ("operation", "02"), ("drift_check", "03"),
+        ("operation", "04"), ("operation", "05"),
+    ]
+    assert timeline[0] == {"kind": "operation", "seq": 0, **operations[0]}
+    assert summary["operations"]["deploy"]["statuses"] == {"success": 2, "failed": 1}
+    assert summary["operations"]["deploy"]["mean_seconds"] == 67.5
+    assert summary["max_drift_percent"] == 4.5
+    assert [e["duration_seconds"] for e in slowest] == [95, 40]
+    assert [(s["pr_number"], s["length"], s["open"]) for s in streaks] == [
+        (8, 3, True), (7, 2, False),
+    ]
+    assert streaks[1]["operations"] == ["deploy", "destroy"]
+
+
+def test_incremental_sync_matches_full_rebuild(tmp_path):
+    path = tmp_path / "operations.json"
+    archive_dir = str(tmp_path / "archive")
+    operations = list(operation_events(3000, 120, now=NOW))
+    checks = list(drift_events(300, 120, now=NOW))
+
+    # Primera mitad indexada, luego el resto y una compactación
+    write_history(path, operations[:1500], checks[:150])
+    store = MetricsStore(str(tmp_path / "metrics.db"))
+    store.sync(str(path), archive_dir)
+    write_history(path, operations, checks)
+    MetricsArchive(archive_dir).compact(str(path), hot_days=30, now=NOW)
+    assert store.sync(str(path), archive_dir) == {"operations": 1500, "drift_checks": 150}
+    assert store.sync(str(path), archive_dir) == {"operations": 0, "drift_checks": 0}
+
+    pr_number = operations[-1]["pr_number"]
+    timeline = [e for e in store.pr_timeline(pr_number) if e["kind"] == "operation"]
+    assert [e["seq"] for e in timeline] == [
+        seq for seq, e in enumerate(operations) if e["pr_number"] == pr_number
+    ]
+    streaks = store.failure_streaks(min_length=1, limit=10000)
+    assert [s["length"] for s in streaks] == expected_streaks(operations)
+
+    # Un historial más corto que la base (reemplazado) fuerza la reconstrucción
+    write_history(tmp_path / "fresh.json", operations[:10])
+    assert store.sync(str(tmp_path / "fresh.json")) == {"operations": 10, "drift_checks": 0}
+    assert store.counts() == {"operations": 10, "drift_checks": 0}
+    store.close()
+
+
+def test_queries_use_indexes_on_large_history(tmp_path):
+    path = tmp_path / "operations.json"
+    operations = list(operation_events(100_000, 365, now=NOW))
+    write_history(path, operations)
+    store = MetricsStore(str(tmp_path / "metrics.db"))
+    store.sync(str(path))
+
+    plan = " ".join(store.explain(
+        "SELECT * FROM operations WHERE operation = 'deploy' AND status = 'success' "
+        "AND duration_seconds IS NOT NULL ORDER BY duration_seconds DESC LIMIT 10"
+    ))
+    assert "operations_kind" in plan and "TEMP B-TREE" not in plan
+    assert "operations_pr" in " ".join(
+        store.explain("SELECT * FROM operations WHERE pr_number = 7 ORDER BY epoch")
+    )
+
+    started = time.perf_counter()
+    for pr_number in range(1, 21):
+        store.pr_timeline(pr_number)
+    store.slowest("deploy", since="2026-10-01")
+    store.failure_streaks()
+    # Holgado para CI: sin índices, cada consulta recorre las 100k filas
+    assert time.perf_counter() - started < 1.0
+    store.close()
+
+
+def test_pr_history_and_dashboard_sections(dashboard_module, tmp_path, monkeypatch, capsys):
+    path = tmp_path / "operations.json"
+    operations = [op(1, 7), op(2, 7, "failed"), op(3, 7, "failed"), op(4, 8, duration=500)]
+    write_history(path, operations)
+
+    plain = dashboard_module.TrendsAnalyzer(str(path))
+    store = MetricsStore(str(tmp_path / "metrics.db"))
+    store.sync(str(path))
+    indexed = dashboard_module.TrendsAnalyzer(str(path), store=store)
+    assert plain.pr_history(7) == indexed.pr_history(7)
+    assert plain.get_pr_insights() is None
+
+    generator = dashboard_module.DashboardGenerator(indexed, regressions={})
+    content = generator._generate_html_template({}, {}, 30)
+    assert content.count("<h2>Deploys Más Lentos</h2>") == 0
+    generator.pr_insights = indexed.get_pr_insights(days=36500)
+    content = generator._generate_html_template({}, {}, 30)
+    assert "<h2>Rachas de Fallos por PR</h2>" in content
+    assert "500.0s" in content and "abierta" in content
+    store.close()
+
+    cli = load_script("metrics-db.py", "metrics_db_cli")
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["metrics-db.py", "streaks", "--metrics-file", str(path),
+         "--db", str(tmp_path / "cli.db")],
+    )
+    cli.main()
+    assert "PR #7: 2 fallos seguidos (deploy)" in capsys.readouterr().out
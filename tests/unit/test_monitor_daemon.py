@@ -0,0 +1,73 @@
+import pytest
+
+from src.fake_docker import FakeDockerDaemon
+from src.monitor_daemon import MonitorClient, MonitorDaemon, MonitorDaemonError
+from src.synthetic import synthetic_fleet
+
+
+@pytest.fixture
+def docker(tmp_path):
+    with FakeDockerDaemon(str(tmp_path / "docker.sock"), synthetic_fleet(50, seed=1)) as d:
+        yield d
+
+
+@pytest.fixture
+def daemon(tmp_path, docker, cleanup_monitor_module):
+    monitor = cleanup_monitor_module.CleanupMonitor(docker.docker_host)
+    with MonitorDaemon(monitor, str(tmp_path / "monitor.sock"), interval=60) as d:
+        yield d
+
+
+@pytest.fixture
+def client(daemon):
+    return MonitorClient(daemon.socket_path, timeout=5)
+
+
+def scans(docker):
+    return docker.requests[("GET", "/containers")]
+
+
+def test_queries_are_served_from_one_scan(client, docker):
+    summary = client.call("summary")
+    analysis = client.call("analysis", max_age_hours=1)
+    report = client.call("report", max_age_hours=1)
+    for _ in range(20):
+        client.call("summary")
+
+    assert summary["total_containers"] == 30
+    assert summary["unique_prs"] == 10
+    assert analysis["max_age_hours"] == 1
+    assert analysis["total_resources"]["volumes"] == 10
+    assert report.startswith("# Reporte de Análisis de Limpieza")
+    assert scans(docker) == 1
+
+
+def test_results_are_memoized_until_refresh(client, daemon, docker):
+    first = client.call("summary")
+    daemon.monitor.api.remove_container("ephemeral-pr-1-app")
+
+    assert client.call("summary") == first
+    status = client.call("refresh")
+    assert status["scans"] == 2
+    assert client.call("summary")["total_containers"] == 29
+    assert scans(docker) == 2
+
+
+def test_errors_are_reported_to_the_client(client):
+    with pytest.raises(MonitorDaemonError, match="Método desconocido"):
+        client.call("destroy_everything")
+    with pytest.raises(MonitorDaemonError):
+        client.call("analysis", bogus=1)
+    assert client.call("ping") == "pong"
+
+
+def test_socket_is_exclusive_and_cleaned_up(tmp_path, daemon, cleanup_monitor_module):
+    second = MonitorDaemon(cleanup_monitor_module.CleanupMonitor(), daemon.socket_path)
+    with pytest.raises(MonitorDaemonError, match="Ya hay un daemon"):
+        second.start()
+
+    daemon.stop()
+
+    assert not MonitorClient(daemon.socket_path, timeout=1).available()
+    with pytest.raises(MonitorDaemonError, match="no disponible"):
+        MonitorClient(daemon.socket_path, timeout=1).call("summary")
@@ -0,0 +1,83 @@
+import pytest
+
+from src.docker_api import DockerAPIClient
+from src.fake_docker import FakeDockerDaemon
+from src.placement import PlacementError, PlacementScheduler, probe_host, stack_ports
+from src.synthetic import COMPONENT_USAGE, synthetic_fleet
+
+STACK_MEMORY = sum(memory for memory, _ in COMPONENT_USAGE.values())
+
+
+@pytest.fixture
+def dockers(tmp_path):
+    # host0 con 20 stacks, host1 con 5 y host2 vacío; 16 GiB y 4 CPUs cada uno
+    fleets = {
+        "host0": synthetic_fleet(100, seed=1),
+        "host1": synthetic_fleet(25, seed=2, first_pr=101),
+        "host2": {"containers": [], "volumes": [], "networks": []},
+    }
+    daemons = {
+        name: FakeDockerDaemon(str(tmp_path / f"{name}.sock"), fleet, mem_total=16 << 30).start()
+        for name, fleet in fleets.items()
+    }
+    yield daemons
+    for daemon in daemons.values():
+        daemon.stop()
+
+
+def scheduler_for(dockers, **options):
+    return PlacementScheduler({name: d.docker_host for name, d in dockers.items()}, **options)
+
+
+def test_probe_reports_live_usage_and_ports(dockers):
+    docker = dockers["host1"]
+    running = [c for c in docker.containers.values() if c["State"] == "running"]
+    probe = probe_host(DockerAPIClient(docker.docker_host))
+
+    assert probe["memory_total"] == 16 << 30 and probe["cpus"] == 4
+    assert probe["memory_used"] == sum(docker.usage[c["Id"]][0] for c in running)
+    assert probe["cpu_percent"] == pytest.approx(sum(docker.usage[c["Id"]][1] for c in running))
+    assert probe["stacks"] == list(range(101, 106))
+    assert set(stack_ports(105)) <= set(probe["ports"])
+
+
+def test_new_stacks_go_to_the_least_loaded_host_and_spread(dockers):
+    scheduler = scheduler_for(dockers)
+
+    first = scheduler.place(500)
+    assert first["host"] == "host2"
+    assert first["reason"] == "scheduled"
+    assert first["hosts"]["host0"]["pressure"] > first["hosts"]["host1"]["pressure"]
+
+    # Las reservas pendientes reparten un lote entre los hosts con capacidad
+    hosts = [scheduler.place(pr)["host"] for pr in range(501, 531)]
+    assert {"host1", "host2"} <= set(hosts)
+    assert scheduler.place(503)["reason"] == "existing"
+    assert scheduler.place(3)["host"] == "host0"
+
+
+def test_ports_and_saturation_reject_hosts(dockers):
+    scheduler = scheduler_for(dockers, saturation=0.5)
+    evaluation = scheduler.evaluate(205)
+
+    # PR 205 publica los mismos puertos que los PRs 5 y 105
+    assert "puertos" in evaluation["host0"]["rejected"]
+    assert "puertos" in evaluation["host1"]["rejected"]
+    assert scheduler.place(205)["host"] == "host2"
+
+    # Un stack pesado satura el host vacío: no queda ningún candidato
+    heavy = scheduler_for(dockers, stack_demand={"memory_bytes": 15 << 30})
+    with pytest.raises(PlacementError) as exc:
+        heavy.place(999)
+    assert "saturado" in str(exc.value)
+
+
+def test_unreachable_host_is_skipped(dockers):
+    dockers["host2"].stop()
+    scheduler = scheduler_for(dockers)
+
+    placement = scheduler.place(500)
+
+    assert placement["host"] == "host1"
+    assert "sondeo fallido" in placement["hosts"]["host2"]["rejected"]
+    assert scheduler.demand()["memory_bytes"] < STACK_MEMORY
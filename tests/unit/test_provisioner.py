@@ -0,0 +1,354 @@
+import json
+import os
+from unittest.mock import Mock
+
+import pytest
+
+from src.placement import PlacementScheduler
+from src.provisioner import TerraformError, TerraformProvisioner
+
+
+class FakeTerraform:
+    """subprocess.run falso que simula los efectos de terraform en disco"""
+
+    def __init__(self, returncode=0, plan_returncode=2):
+        self.calls = []
+        self.envs = []
+        self.returncode = returncode
+        self.plan_returncode = plan_returncode
+
+    def __call__(self, cmd, **kwargs):
+        self.calls.append(cmd[2:])
+        self.envs.append(kwargs.get("env", {}))
+        chdir = cmd[1][len("-chdir="):]
+        if self.returncode == 0 and cmd[2] == "init":
+            os.makedirs(os.path.join(chdir, ".terraform", "providers"), exist_ok=True)
+        if self.returncode == 0 and cmd[2:4] == ["providers", "mirror"]:
+            os.makedirs(os.path.join(cmd[4], "registry.terraform.io", "kreuzwerker", "docker"))
+        if self.returncode == 0 and cmd[2] == "plan":
+            out = next(arg for arg in cmd if arg.startswith("-out="))[len("-out="):]
+            with open(out, "w") as f:
+                f.write("plan binario")
+            return Mock(returncode=self.plan_returncode, stdout="", stderr="")
+        workspace = kwargs.get("env", {}).get("TF_WORKSPACE")
+        if self.returncode == 0 and cmd[2:4] == ["workspace", "new"]:
+            os.makedirs(os.path.join(chdir, "terraform.tfstate.d", cmd[4]))
+        if self.returncode == 0 and cmd[2] == "apply":
+            state_file = os.path.join(chdir, "terraform.tfstate")
+            if workspace:
+                state_file = os.path.join(
+                    chdir, "terraform.tfstate.d", workspace, "terraform.tfstate"
+                )
+            serial = 0
+            if os.path.exists(state_file):
+                serial = json.load(open(state_file))["serial"]
+            with open(state_file, "w") as f:
+                json.dump({"lineage": "abc", "serial": serial + 1}, f)
+        if self.returncode == 0 and cmd[2] == "show":
+            return Mock(returncode=0, stdout="Plan: 7 to add, 0 to change, 0 to destroy.")
+        return Mock(returncode=self.returncode, stdout="", stderr="Error: registry caído")
+
+
+@pytest.fixture
+def stack(tmp_path):
+    """Stack con un módulo local y lock file, como infra/terraform/stacks/pr-preview"""
+    for component in ("app", "db", "proxy"):
+        module = tmp_path / "modules" / component
+        module.mkdir(parents=True)
+        (module / "main.tf").write_text(
+            f'resource "docker_container" "{component}" {{\n  name = "{component}"\n}}\n'
+        )
+    stack_dir = tmp_path / "stacks" / "pr-preview"
+    stack_dir.mkdir(parents=True)
+    (stack_dir / "main.tf").write_text(
+        "terraform {\n  required_providers {\n    docker = {\n"
+        '      source  = "kreuzwerker/docker"\n      version = "~> 3.0"\n    }\n  }\n}\n\n'
+        + "".join(
+            f'module "{component}" {{\n  source    = "../../modules/{component}"\n'
+            "  pr_number = var.pr_number\n}\n"
+            for component in ("app", "db", "proxy")
+        )
+    )
+    (stack_dir / ".terraform.lock.hcl").write_text('provider "docker" { version = "3.6.2" }\n')
+    return stack_dir
+
+
+def provisioner(stack, run, **kwargs):
+    return TerraformProvisioner(
+        str(stack), plugin_cache_dir=str(stack.parent / "cache"), run=run, **kwargs
+    )
+
+
+def test_init_runs_once_and_is_reused(stack):
+    run = FakeTerraform()
+    tf = provisioner(stack, run)
+
+    first = tf.init()
+    second = tf.init()
+
+    assert first["status"] == "initialized"
+    assert second["status"] == "skipped"
+    assert run.calls == [["init", "-input=false"]]
+    assert run.envs[0]["TF_PLUGIN_CACHE_DIR"] == str(stack.parent / "cache")
+
+
+def test_lock_file_or_module_source_change_forces_init(stack):
+    run = FakeTerraform()
+    tf = provisioner(stack, run)
+    tf.init()
+
+    (stack / ".terraform.lock.hcl").write_text('provider "docker" { version = "3.6.3" }\n')
+    assert tf.init()["status"] == "initialized"
+
+    main_tf = stack / "main.tf"
+    main_tf.write_text(main_tf.read_text().replace('"~> 3.0"', '"~> 3.6"'))
+    assert tf.init()["status"] == "initialized"
+    assert len(run.calls) == 3
+
+
+def test_resource_changes_keep_init(stack):
+    run = FakeTerraform()
+    tf = provisioner(stack, run)
+    tf.init()
+
+    module_tf = stack.parent.parent / "modules" / "app" / "main.tf"
+    module_tf.write_text(module_tf.read_text().replace('"app"\n', '"app-v2"\n'))
+    (stack / "variables.tf").write_text('variable "pr_number" {\n  type = number\n}\n')
+
+    assert tf.init()["status"] == "skipped"
+
+
+def test_mirror_config_routes_mirrored_providers(stack, tmp_path):
+    run = FakeTerraform()
+    tf = provisioner(stack, run, mirror_dir=str(tmp_path / "mirror"))
+    assert tf.write_mirror_config() is None
+
+    tf.mirror_providers()
+    tf.init()
+
+    config = run.envs[-1]["TF_CLI_CONFIG_FILE"]
+    content = open(config).read()
+    assert 'include = ["registry.terraform.io/kreuzwerker/docker"]' in content
+    assert 'exclude = ["registry.terraform.io/kreuzwerker/docker"]' in content
+
+
+def test_failed_init_raises_and_is_not_stamped(stack):
+    tf = provisioner(stack, FakeTerraform(returncode=1))
+
+    with pytest.raises(TerraformError, match="registry caído"):
+        tf.init()
+    assert not tf.is_initialized()
+
+
+def test_measure_init_reports_cold_warm_and_reuse(stack):
+    run = FakeTerraform()
+    tf = provisioner(stack, run)
+    tf.redeploy(42)
+    before = len(run.envs)
+
+    results = tf.measure_init()
+
+    assert [results[phase]["status"] for phase in ("cold", "warm", "reuse")] == [
+        "initialized",
+        "initialized",
+        "skipped",
+    ]
+    assert run.envs[before]["TF_PLUGIN_CACHE_DIR"] != tf.plugin_cache_dir
+    assert run.envs[-1]["TF_PLUGIN_CACHE_DIR"] == tf.plugin_cache_dir
+    assert not os.path.exists(run.envs[before]["TF_PLUGIN_CACHE_DIR"])
+    # Borrar .terraform no se lleva el plan cacheado ni el registro del despliegue
+    assert tf.last_deployment(42) is not None
+    assert os.listdir(tf.plan_cache_dir) == ["pr-42"]
+
+
+def plans(run):
+    return [call for call in run.calls if call[0] == "plan"]
+
+
+def test_plan_is_reused_while_inputs_are_unchanged(stack, tmp_path):
+    run = FakeTerraform()
+    tf = provisioner(stack, run)
+
+    first = tf.plan(42)
+    second = tf.plan(42, out=str(tmp_path / "tfplan"))
+
+    assert first["status"] == "planned"
+    assert second["status"] == "cached"
+    assert second["has_changes"] is True
+    assert len(plans(run)) == 1
+    assert "-var=pr_number=42" in plans(run)[0]
+    assert (tmp_path / "tfplan").read_text() == "plan binario"
+    assert "7 to add" in open(second["plan_output"]).read()
+
+
+def test_unchanged_plan_reports_no_changes(stack):
+    tf = provisioner(stack, FakeTerraform(plan_returncode=0))
+
+    tf.plan(42)
+
+    assert tf.plan(42)["status"] == "no_changes"
+
+
+def test_plan_inputs_invalidate_cache(stack):
+    run = FakeTerraform()
+    tf = provisioner(stack, run)
+    tf.plan(42)
+
+    # Código de la app fuera de los módulos: no afecta el plan
+    (stack.parent.parent / "modules" / "app" / "app.py").write_text("print('v2')\n")
+    assert tf.plan(42)["status"] == "cached"
+
+    module_tf = stack.parent.parent / "modules" / "app" / "main.tf"
+    module_tf.write_text(module_tf.read_text().replace('"app"\n', '"app-v2"\n'))
+    assert tf.plan(42)["status"] == "planned"
+
+    assert tf.plan(42, {"resource_limits": {"app": {"memory_mb": 256}}})["status"] == "planned"
+    assert '-var=resource_limits={"app": {"memory_mb": 256}}' in plans(run)[-1]
+
+    assert tf.plan(43)["status"] == "planned"
+    assert len(plans(run)) == 4
+
+
+def test_state_serial_invalidates_cache(stack):
+    run = FakeTerraform()
+    tf = provisioner(stack, run)
+    state = stack / "terraform.tfstate"
+    state.write_text(json.dumps({"lineage": "abc", "serial": 3}))
+    tf.plan(42)
+
+    state.write_text(json.dumps({"lineage": "abc", "serial": 4}))
+
+    assert tf.state_serial()["serial"] == 4
+    assert tf.plan(42)["status"] == "planned"
+    assert tf.plan(42, use_cache=False)["status"] == "planned"
+    assert len(plans(run)) == 3
+
+
+def applies(run):
+    return [call for call in run.calls if call[0] == "apply"]
+
+
+def test_redeploy_replaces_only_changed_app(stack):
+    run = FakeTerraform()
+    tf = provisioner(stack, run)
+
+    first = tf.redeploy(42)
+    second = tf.redeploy(42, {"app_image": "nginx:1.27-alpine"})
+    third = tf.redeploy(42, {"app_image": "nginx:1.27-alpine"})
+
+    assert first["mode"] == "full"
+    assert second["mode"] == "incremental"
+    assert second["targets"] == ["module.app"]
+    assert third["mode"] == "unchanged"
+    assert len(plans(run)) == 1
+    assert len(applies(run)) == 2
+    assert "-target=module.app" in applies(run)[1]
+    assert "-var=app_image=nginx:1.27-alpine" in applies(run)[1]
+    assert not any("-target=module.db" in call for call in run.calls)
+
+
+def test_redeploy_module_code_includes_dependents(stack):
+    run = FakeTerraform()
+    tf = provisioner(stack, run)
+    tf.redeploy(42)
+
+    app_tf = stack.parent.parent / "modules" / "app" / "main.tf"
+    app_tf.write_text(app_tf.read_text() + "# puerto nuevo\n")
+    result = tf.redeploy(42, {"resource_limits": {"db": {"memory_mb": 256}}})
+
+    assert result["mode"] == "incremental"
+    assert result["components"] == ["app", "db", "proxy"]
+
+
+def test_redeploy_falls_back_to_full_apply(stack):
+    run = FakeTerraform()
+    tf = provisioner(stack, run)
+    tf.redeploy(42)
+
+    (stack / "outputs.tf").write_text('output "stack_name" {\n  value = "x"\n}\n')
+    assert tf.redeploy(42)["mode"] == "full"
+
+    # Un apply externo cambia el state: el registro del último despliegue ya no sirve
+    state = stack / "terraform.tfstate"
+    state.write_text(json.dumps({"lineage": "abc", "serial": 99}))
+    assert tf.redeploy(42)["mode"] == "full"
+    assert tf.redeploy(43)["mode"] == "full"
+
+
+def test_scheduler_host_is_passed_to_the_stack(stack):
+    idle = {
+        "memory_total": 8 << 30,
+        "cpus": 4,
+        "memory_used": 0,
+        "cpu_percent": 0.0,
+        "stacks": [],
+        "ports": [],
+    }
+    busy = dict(idle, memory_used=6 << 30, stacks=[1, 2])
+    probes = {"unix:///a.sock": busy, "unix:///b.sock": idle}
+    scheduler = PlacementScheduler(
+        {"a": "unix:///a.sock", "b": "unix:///b.sock"}, probe=lambda host: probes[host]
+    )
+    run = FakeTerraform()
+    tf = provisioner(stack, run, scheduler=scheduler)
+
+    assert tf.plan(42)["docker_host"] == "unix:///b.sock"
+    assert "-var=docker_host=unix:///b.sock" in plans(run)[0]
+    # El mismo PR conserva su host; un host explícito no pasa por el scheduler
+    assert tf.redeploy(42)["docker_host"] == "unix:///b.sock"
+    assert tf.last_placement["reason"] == "existing"
+    assert tf.plan(43, {"docker_host": "unix:///a.sock"})["docker_host"] == "unix:///a.sock"
+
+
+def test_destroy_targets_the_host_the_stack_was_placed_on(stack):
+    stacks = {"unix:///a.sock": [], "unix:///b.sock": [7]}
+    scheduler = PlacementScheduler(
+        {"a": "unix:///a.sock", "b": "unix:///b.sock"},
+        probe=lambda host: {
+            "memory_total": 8 << 30,
+            "cpus": 4,
+            "memory_used": 0,
+            "cpu_percent": 0.0,
+            "stacks": stacks[host],
+            "ports": [],
+        },
+    )
+    run = FakeTerraform()
+    tf = provisioner(stack, run, scheduler=scheduler)
+    tf.redeploy(42, {"docker_host": "unix:///b.sock"})
+    assert tf.last_deployment(42)["docker_host"] == "unix:///b.sock"
+
+    # Sin scheduler ni variables: el host sale del registro del despliegue
+    plain = provisioner(stack, run)
+    assert plain.destroy(42)["docker_host"] == "unix:///b.sock"
+    assert "-var=docker_host=unix:///b.sock" in run.calls[-1]
+
+    # Sin registro: el host donde el scheduler encuentra el stack
+    assert tf.destroy(7)["docker_host"] == "unix:///b.sock"
+    assert "-var=docker_host=unix:///b.sock" in run.calls[-1]
+    assert plain.destroy(8)["docker_host"] is None
+    assert not any(arg.startswith("-var=docker_host") for arg in run.calls[-1])
+
+
+def test_workspaces_isolate_parallel_stacks(stack):
+    run = FakeTerraform()
+    gw0 = provisioner(stack, run, workspace="test-pr-900")
+    gw1 = provisioner(stack, run, workspace="test-pr-901")
+
+    assert gw0.redeploy(900)["mode"] == "full"
+    assert gw1.redeploy(901)["mode"] == "full"
+    created = [(call, env) for call, env in zip(run.calls, run.envs) if call[0] == "workspace"]
+    assert [call[2] for call, _ in created] == ["test-pr-900", "test-pr-901"]
+    assert all("TF_WORKSPACE" not in env for _, env in created)
+    assert [env["TF_WORKSPACE"] for call, env in zip(run.calls, run.envs)
+            if call[0] == "apply"] == ["test-pr-900", "test-pr-901"]
+    # El apply de un workspace no toca el state del otro
+    assert gw0.state_serial()["workspace"] == "test-pr-900"
+    assert gw0.redeploy(900)["mode"] == "unchanged"
+
+    assert gw0.destroy(900)["status"] == "destroyed"
+    assert run.calls[-1][:3] == ["destroy", "-input=false", "-auto-approve"]
+    assert "-var=pr_number=900" in run.calls[-1]
+    assert gw0.last_deployment(900) is None
+    assert gw1.last_deployment(901) is not None
+    assert len([call for call in run.calls if call[0] == "workspace"]) == 2
@@ -0,0 +1,149 @@
+import json
+import math
+import random
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from src.latency_sketches import DailySketches
+from src.metrics_archive import MetricsArchive
+from src.quantile_sketch import DDSketch
+
+
+def exact(values, q):
+    ordered = sorted(values)
+    return ordered[math.floor(q * (len(ordered) - 1))]
+
+
+@pytest.mark.parametrize("q", [0.0, 0.5, 0.9, 0.95, 0.99, 1.0])
+def test_quantiles_within_relative_accuracy(q):
+    rng = random.Random(7)
+    values = [rng.lognormvariate(4, 0.8) for _ in range(20_000)]
+    sketch = DDSketch(0.01).update(values)
+
+    assert sketch.quantile(q) == pytest.approx(exact(values, q), rel=0.01)
+    assert sketch.count == len(values)
+    assert len(sketch.bins) < 1000
+
+
+def test_merge_matches_single_sketch_and_roundtrips():
+    rng = random.Random(3)
+    days = [[rng.uniform(5, 600) for _ in range(500)] for _ in range(7)]
+
+    merged = DDSketch()
+    for values in days:
+        merged.merge(DDSketch().update(values))
+    whole = DDSketch().update(v for values in days for v in values)
+
+    assert merged.bins == whole.bins
+    assert merged.percentiles() == whole.percentiles()
+
+    restored = DDSketch.from_dict(json.loads(json.dumps(merged.to_dict())))
+    assert restored.percentiles() == merged.percentiles()
+    assert (restored.min, restored.max, restored.count) == (merged.min, merged.max, 3500)
+
+    with pytest.raises(ValueError):
+        merged.merge(DDSketch(0.05))
+
+
+def test_empty_zero_and_collapsed_sketches():
+    assert DDSketch().quantile(0.5) is None
+
+    sketch = DDSketch().update([0, 0, 0, 10])
+    assert sketch.quantile(0.5) == 0
+    assert sketch.quantile(1) == 10
+
+    # Al superar max_bins se pierden los buckets bajos, no la cola alta
+    bounded = DDSketch(0.01, max_bins=50).update(range(1, 10_001))
+    assert len(bounded.bins) == 50
+    assert bounded.quantile(0.99) == pytest.approx(9900, rel=0.01)
+
+
+def test_trends_percentiles_from_daily_sketches(dashboard_module, tmp_path):
+    now = datetime.now()
+    operations = [
+        {
+            "timestamp": (now - timedelta(days=day, minutes=i)).isoformat(timespec="seconds"),
+            "operation": "deploy",
+            "status": "success",
+            "duration_seconds": 10 + i,
+        }
+        for day in range(40)
+        for i in range(100)
+    ]
+    path = tmp_path / "operations.json"
+    path.write_text(json.dumps({"operations": operations, "drift_checks": []}))
+    analyzer = dashboard_module.TrendsAnalyzer(str(path))
+
+    days = {("deploy", op["timestamp"][:10]) for op in operations}
+    assert len(analyzer.latency.sketches) == len(days)
+    assert analyzer.latency_sketch("deploy").count == 4000
+
+    stats = analyzer.get_operation_trends(7)["deploy_stats"]
+    assert stats["p99"] == pytest.approx(108, rel=0.01)
+    assert stats["p50"] == pytest.approx(59, rel=0.01)
+    assert analyzer.latency_percentiles("destroy") == {}
+
+    analyzer.ingest(
+        {
+            "timestamp": now.isoformat(timespec="seconds"),
+            "operation": "deploy",
+            "status": "success",
+            "duration_seconds": 5000,
+        }
+    )
+    assert analyzer.latency_percentiles("deploy", 1)["p99"] > 100
+    assert analyzer.latency_sketch("deploy").max == 5000
+
+
+def test_daily_sketches_persist_and_read_only_new_operations(dashboard_module, tmp_path):
+    now = datetime.now()
+
+    def deploys(days, per_day, duration):
+        return [
+            {
+                "timestamp": (now - timedelta(days=day, minutes=i)).isoformat(timespec="seconds"),
+                "operation": "deploy",
+                "status": "success",
+                "duration_seconds": duration + i,
+            }
+            for day in reversed(range(days))
+            for i in reversed(range(per_day))
+        ]
+
+    path = tmp_path / "operations.json"
+    archive_dir = str(tmp_path / "archive")
+    state = str(tmp_path / "latency_sketches.json")
+    operations = deploys(40, 20, 10)
+    path.write_text(json.dumps({"operations": operations, "drift_checks": []}))
+    MetricsArchive(archive_dir).compact(str(path), hot_days=10, now=now)
+    since = (now - timedelta(days=7)).strftime("%Y-%m-%d")
+
+    first = dashboard_module.TrendsAnalyzer(
+        str(path), archive_dir=archive_dir, since=since, sketch_state=state
+    )
+    # Solo se cargó el período, pero los sketches cubren todo el historial
+    assert len(first.data["operations"]) < len(operations)
+    assert first.latency_sketch("deploy").count == 800
+
+    hot = json.loads(path.read_text())
+    hot["operations"].extend(deploys(1, 5, 1000))
+    path.write_text(json.dumps(hot))
+    with patch.object(
+        DailySketches, "observe", autospec=True, side_effect=DailySketches.observe
+    ) as observe:
+        second = dashboard_module.TrendsAnalyzer(
+            str(path), archive_dir=archive_dir, since=since, sketch_state=state
+        )
+    assert observe.call_count == 5
+    assert second.latency_sketch("deploy").count == 805
+    assert DailySketches.load(state).seen == 805
+
+    # Estadísticas y percentiles usan la misma ventana de días calendario
+    stats = second.get_operation_trends(7)["deploy_stats"]
+    assert stats["count"] == second.latency_sketch("deploy", since=second._window_start(7)).count
+    assert stats["p50"] == pytest.approx(stats["median"], rel=0.02)
+
+    # Con otra precisión el estado guardado no sirve y se recalcula
+    assert DailySketches.load(state, relative_accuracy=0.02).seen == 0
@@ -0,0 +1,135 @@
+import json
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.metrics_archive import MetricsArchive
+from src.regression import RegressionMonitor, SeriesDetector
+from src.synthetic import drift_events, operation_events
+from tests.conftest import load_script
+
+
+def history(seed=0, slowdown_from=None, recover_from=None, factor=1.4):
+    operations = list(operation_events(4000, 60, seed=seed))
+    for index, op in enumerate(operations):
+        op["commit"] = f"c{index // 100:03d}"
+        slow = slowdown_from is not None and slowdown_from <= index < (recover_from or 10**9)
+        if slow and op["operation"] == "deploy":
+            op["duration_seconds"] = int(op["duration_seconds"] * factor)
+    return {"operations": operations, "drift_checks": list(drift_events(400, 60, seed=seed))}
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_stationary_history_has_no_regressions(seed):
+    monitor = RegressionMonitor()
+    monitor.update(history(seed))
+
+    assert monitor.regressions == []
+    assert set(monitor.alerts()["series"]) == {"deploy", "destroy", "drift_check"}
+
+
+def test_slowdown_is_detected_with_its_start_window():
+    monitor = RegressionMonitor()
+    monitor.update(history(slowdown_from=3000))
+
+    assert [r["series"] for r in monitor.active()] == ["deploy"]
+    regression = monitor.active()[0]
+    assert regression["started_commit"] in ("c029", "c030")
+    assert "c030" <= regression["detected_commit"] <= "c031"
+    assert regression["started_at"] <= regression["detected_at"]
+    assert regression["ratio"] == pytest.approx(1.4, rel=0.15)
+
+
+def test_recovery_resolves_the_regression():
+    monitor = RegressionMonitor()
+    monitor.update(history(slowdown_from=2000, recover_from=3000))
+
+    deploy = [r for r in monitor.regressions if r["series"] == "deploy"]
+    assert [r["status"] for r in deploy] == ["resolved"]
+    assert deploy[0]["resolved_commit"] >= "c030"
+    assert monitor.active() == []
+
+
+def test_incremental_updates_match_full_pass(tmp_path):
+    data = history(slowdown_from=3000)
+    state = str(tmp_path / "state.json")
+
+    full = RegressionMonitor()
+    full.update(data)
+
+    for end in (1000, 2500, 3200, 4000):
+        monitor = RegressionMonitor.load(state)
+        monitor.update({"operations": data["operations"][:end], "drift_checks": []})
+        monitor.save(state)
+    monitor = RegressionMonitor.load(state)
+    monitor.update(data)
+
+    assert monitor.regressions == full.regressions
+    assert monitor.seen == {"operations": 4000, "drift_checks": 400}
+
+    # Un historial más corto (rotado) se recalcula desde cero
+    assert monitor.update({"operations": data["operations"][:10]}) == []
+    assert monitor.regressions == [] and monitor.seen["operations"] == 10
+    # Otra configuración del detector ignora el estado guardado
+    assert RegressionMonitor.load(state, threshold=5).seen == {"operations": 0, "drift_checks": 0}
+
+
+def test_isolated_outliers_do_not_trigger():
+    detector = SeriesDetector(warmup=10)
+    values = [60.0 + (i % 5) for i in range(200)]
+    values[100:103] = [3000.0, 1.0, 3000.0]
+
+    assert not any(detector.observe(value) for value in values)
+
+
+def test_cli_alerts_and_dashboard(tmp_path, monkeypatch, capsys, dashboard_module):
+    metrics = tmp_path / "operations.json"
+    metrics.write_text(json.dumps(history(slowdown_from=3000)))
+    alerts = tmp_path / "alerts.json"
+    cli = load_script("latency-regressions.py", "latency_regressions")
+    argv = [
+        "latency-regressions.py",
+        "--metrics-file", str(metrics),
+        "--state-file", str(tmp_path / "state.json"),
+        "--output", str(alerts),
+        "--fail-on-regression",
+    ]
+    monkeypatch.setattr(sys, "argv", argv)
+
+    with pytest.raises(SystemExit) as exit_info:
+        cli.main()
+
+    assert exit_info.value.code == 1
+    assert "[ACTIVA] deploy" in capsys.readouterr().out
+    assert json.loads(alerts.read_text())["active"][0]["series"] == "deploy"
+
+    analyzer = dashboard_module.TrendsAnalyzer(str(metrics))
+    generator = dashboard_module.DashboardGenerator(analyzer)
+    html = open(generator.generate_html_dashboard(str(tmp_path / "trends.html"))).read()
+    assert "Regresiones de Latencia" in html
+    assert "1 activas" in html
+
+
+def test_dashboard_recomputes_when_the_history_shrinks(tmp_path, dashboard_module):
+    metrics = tmp_path / "operations.json"
+    archive_dir = str(tmp_path / "archive")
+    state = str(tmp_path / "state.json")
+    metrics.write_text(json.dumps(history(slowdown_from=3000)))
+    MetricsArchive(archive_dir).compact(str(metrics), hot_days=10, now=datetime.now())
+    since = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
+
+    def active():
+        analyzer = dashboard_module.TrendsAnalyzer(
+            str(metrics), archive_dir=archive_dir, since=since
+        )
+        return [r["series"] for r in analyzer.get_latency_regressions(state)["active"]]
+
+    assert active() == ["deploy"]
+
+    # Se pierden los últimos eventos: se recalcula con el archivo y lo que queda
+    hot = json.loads(metrics.read_text())
+    hot["operations"] = hot["operations"][:-50]
+    metrics.write_text(json.dumps(hot))
+    assert active() == ["deploy"]
+    assert RegressionMonitor.load(state).seen == {"operations": 3950, "drift_checks": 400}
@@ -0,0 +1,116 @@
+import json
+import subprocess
+import sys
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+
+from src.fake_docker import FakeDockerDaemon
+from src.monitor_daemon import MonitorClient, MonitorDaemon
+from src.resource_index import ResourceIndex
+from src.synthetic import cli_outputs, synthetic_fleet
+
+NOW = datetime(2026, 10, 19, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def fleet():
+    fleet = synthetic_fleet(500, now=NOW, seed=3)
+    # Stacks 4 y 9 sin proxy; el 9 tampoco tiene base de datos
+    fleet["containers"] = [
+        c for c in fleet["containers"]
+        if c["name"] not in ("ephemeral-pr-4-proxy", "ephemeral-pr-9-proxy", "ephemeral-pr-9-db")
+    ]
+    return fleet
+
+
+@pytest.fixture
+def docker(tmp_path, fleet):
+    with FakeDockerDaemon(str(tmp_path / "docker.sock"), fleet) as d:
+        yield d
+
+
+def cli_scan(monitor, fleet):
+    outputs = cli_outputs(fleet, NOW)
+    result = subprocess.CompletedProcess([], 0, outputs["ps"])
+    with patch("subprocess.run", return_value=result):
+        return monitor._scan_containers()
+
+
+def test_cli_scan_parses_labels_once(cleanup_monitor_module, fleet):
+    monitor = cleanup_monitor_module.CleanupMonitor()
+    containers = cli_scan(monitor, fleet)
+
+    db = next(c for c in containers if c["name"] == "ephemeral-pr-1-db")
+    assert db["labels"] == {
+        "environment": "ephemeral",
+        "pr_number": "1",
+        "component": "database",
+        "managed_by": "terraform",
+    }
+    assert (db["pr_number"], db["component"], db["environment"]) == (1, "db", "ephemeral")
+
+
+def test_index_matches_linear_scan(docker, cleanup_monitor_module, fleet):
+    monitor = cleanup_monitor_module.CleanupMonitor(docker.docker_host)
+    resources = monitor.scan_ephemeral_resources()
+    index = monitor.build_index(resources)
+    containers = resources["containers"]
+
+    old_db = index.find(component="database", older_than=100)
+    expected = [c for c in containers if "db" in c["name"] and c["age_hours"] > 100]
+    assert {c["name"] for c in old_db} == {c["name"] for c in expected}
+    assert [c["age_hours"] for c in old_db] == sorted(
+        (c["age_hours"] for c in expected), reverse=True
+    )
+
+    assert index.missing("proxy") == [4, 9]
+    assert index.missing("db") == [9]
+    assert {c["name"] for c in index.find(pr_number=9)} == {"ephemeral-pr-9-app"}
+    assert index.find(pr_number=4, component="app", environment="ephemeral")[0]["name"] == (
+        "ephemeral-pr-4-app"
+    )
+    assert len(index.find("volumes", pr_number=4)) == 1
+    assert index.find(component="cache") == []
+
+    # El índice de la CLI y el de la API coinciden
+    cli_index = ResourceIndex({"containers": cli_scan(monitor, fleet)})
+    assert cli_index.missing("proxy") == [4, 9]
+    with pytest.raises(ValueError):
+        index.find("pods")
+
+
+def test_daemon_builds_one_index_per_scan(tmp_path, docker, cleanup_monitor_module, monkeypatch,
+                                          capsys):
+    monitor = cleanup_monitor_module.CleanupMonitor(docker.docker_host)
+    socket_path = str(tmp_path / "monitor.sock")
+    with MonitorDaemon(monitor, socket_path, interval=60) as daemon:
+        client = MonitorClient(socket_path)
+        with patch.object(monitor, "build_index", wraps=monitor.build_index) as build:
+            assert client.call("missing", component="proxy") == [4, 9]
+            old = client.call("find", component="db", older_than=100)
+            client.call("find", component="proxy")
+            assert build.call_count == 1
+            daemon.refresh()
+            client.call("find", component="proxy")
+            assert build.call_count == 2
+
+        monkeypatch.setattr(
+            sys, "argv", ["cleanup-monitor.py", "--missing", "proxy", "--socket", socket_path]
+        )
+        cleanup_monitor_module.main()
+        out = capsys.readouterr().out
+        assert "Stacks sin proxy: 2" in out and "PR #9" in out
+
+        # --prs con varios PRs: una consulta por PR, resultados combinados
+        monkeypatch.setattr(
+            sys, "argv",
+            ["cleanup-monitor.py", "--find", "--prs", "4,9", "--json", "--socket", socket_path],
+        )
+        cleanup_monitor_module.main()
+        found = json.loads(capsys.readouterr().out)
+        assert {c["pr_number"] for c in found} == {4, 9}
+        assert "ephemeral-pr-9-app" in {c["name"] for c in found}
+
+    assert old and all(c["component"] == "db" and c["age_hours"] > 100 for c in old)
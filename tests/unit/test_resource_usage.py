@@ -0,0 +1,173 @@
+import json
+import subprocess
+import pytest
+from unittest.mock import MagicMock, patch
+
+from src.resource_usage import (
+    aggregate_by_pr,
+    cgroup_stats,
+    find_cgroup_dir,
+    identify,
+    parse_labels,
+    parse_stats_lines,
+    parse_system_df,
+    read_cgroup_sample,
+)
+
+MIB = 1024**2
+
+STATS_LINES = [
+    json.dumps(
+        {
+            "Name": "ephemeral-pr-7-app",
+            "CPUPerc": "1.50%",
+            "MemUsage": "20MiB / 2GiB",
+            "BlockIO": "1MB / 2MB",
+            "NetIO": "1kB / 2kB",
+        }
+    ),
+    json.dumps({"Name": "ephemeral-pr-7-db", "CPUPerc": "0.50%", "MemUsage": "60MiB / 2GiB"}),
+    json.dumps({"Name": "ephemeral-pr-9-app", "CPUPerc": "--", "MemUsage": "10MiB / 2GiB"}),
+    "no es json",
+    "",
+]
+
+SYSTEM_DF = json.dumps(
+    {
+        "Containers": [
+            {"Names": "ephemeral-pr-7-app", "Size": "2kB (virtual 50MB)"},
+            {"Names": "ephemeral-pr-7-db", "Size": "invalid"},
+        ],
+        "Volumes": [
+            {"Name": "ephemeral-pr-7-db-data", "Size": "100MB"},
+            {"Name": "otro-volumen", "Size": "1GB"},
+        ],
+    }
+)
+
+CONTAINERS = [
+    {
+        "name": "ephemeral-pr-7-app",
+        "labels": "pr_number=7,environment=ephemeral",
+        "status": "Up 1 hour",
+    },
+    {
+        "name": "ephemeral-pr-7-db",
+        "labels": "component=database,pr_number=7",
+        "status": "Up 1 hour",
+    },
+    {"name": "ephemeral-pr-9-app", "labels": "", "status": "Exited (0)"},
+]
+
+
+def test_parse_labels():
+    assert parse_labels("a=1, b=x=y,sin_valor") == {"a": "1", "b": "x=y"}
+    assert parse_labels("") == {}
+
+
+@pytest.mark.parametrize(
+    "name,labels,expected",
+    [
+        ("ephemeral-pr-5-app", {}, {"pr_number": 5, "component": "app"}),
+        ("x", {"pr_number": "8", "component": "database"}, {"pr_number": 8, "component": "db"}),
+        ("ephemeral-pr-5-db-data", {}, {"pr_number": 5, "component": "db"}),
+        ("bridge", {}, {"pr_number": None, "component": "unknown"}),
+        ("x", {"pr_number": "abc"}, {"pr_number": None, "component": "unknown"}),
+    ],
+)
+def test_identify(name, labels, expected):
+    assert identify(name, labels) == expected
+
+
+def test_parse_stats_lines():
+    stats = parse_stats_lines(STATS_LINES)
+    assert len(stats) == 3
+    assert stats[0]["memory_bytes"] == 20 * MIB
+    assert stats[0]["block_write_bytes"] == 2_000_000
+    assert stats[2]["cpu_percent"] == 0.0
+
+
+def test_parse_system_df():
+    usage = parse_system_df(SYSTEM_DF)
+    assert usage["containers"] == {"ephemeral-pr-7-app": 2000}
+    assert usage["volumes"]["ephemeral-pr-7-db-data"] == 100_000_000
+    assert parse_system_df("roto") == {"containers": {}, "volumes": {}}
+
+
+def test_aggregate_by_pr():
+    usage = aggregate_by_pr(
+        CONTAINERS, parse_stats_lines(STATS_LINES), parse_system_df(SYSTEM_DF)
+    )
+
+    assert [s["pr_number"] for s in usage["stacks"]] == [7, 9]
+    stack = usage["stacks"][0]
+    assert stack["containers"] == 2
+    assert stack["cpu_percent"] == 2.0
+    assert stack["memory_bytes"] == 80 * MIB
+    assert stack["disk_bytes"] == 2000 + 100_000_000
+    assert stack["components"]["db"]["memory_bytes"] == 60 * MIB
+    assert usage["totals"]["memory_bytes"] == 90 * MIB
+
+
+class TestCgroup:
+    """Tests de lectura de cgroup v2"""
+
+    @pytest.fixture
+    def cgroup_root(self, tmp_path):
+        scope = tmp_path / "system.slice" / "docker-abc123def.scope"
+        scope.mkdir(parents=True)
+        (scope / "memory.current").write_text("1048576\n")
+        (scope / "cpu.stat").write_text("usage_usec 5000000\nuser_usec 1\n")
+        return tmp_path
+
+    def test_find_and_read(self, cgroup_root):
+        cgroup_dir = find_cgroup_dir("abc123", str(cgroup_root))
+        assert cgroup_dir.endswith("docker-abc123def.scope")
+        assert read_cgroup_sample(cgroup_dir) == {
+            "memory_bytes": 1048576,
+            "cpu_usage_usec": 5000000,
+        }
+        assert find_cgroup_dir("zzz", str(cgroup_root)) is None
+        assert read_cgroup_sample(str(cgroup_root / "missing")) is None
+
+    def test_cgroup_stats_cpu_percent(self):
+        first = {"c": {"memory_bytes": 1, "cpu_usage_usec": 0}}
+        second = {"c": {"memory_bytes": 2, "cpu_usage_usec": 250_000}}
+        assert cgroup_stats(first, second, 0.5) == [
+            {"name": "c", "cpu_percent": 50.0, "memory_bytes": 2}
+        ]
+
+
+class TestMonitorUsage:
+    """Tests de la integración con CleanupMonitor y el dashboard"""
+
+    def test_collect_resource_usage(self, cleanup_monitor_module):
+        monitor = cleanup_monitor_module.CleanupMonitor()
+        proc = MagicMock(returncode=0)
+        proc.stdout = iter(STATS_LINES)
+        system_df = subprocess.CompletedProcess([], 0, SYSTEM_DF)
+
+        with patch.object(monitor, "_scan_containers", return_value=CONTAINERS):
+            with patch("subprocess.Popen", return_value=proc) as mock_popen:
+                with patch("subprocess.run", return_value=system_df):
+                    usage = monitor.collect_resource_usage()
+
+        # Una sola llamada a docker stats, solo con contenedores en ejecución
+        cmd = mock_popen.call_args[0][0]
+        assert cmd[:2] == ["docker", "stats"]
+        assert "ephemeral-pr-9-app" not in cmd
+        assert usage["source"] == "stats"
+        assert usage["stacks"][0]["pr_number"] == 7
+        assert usage["stacks"][0]["memory_bytes"] > 0 and usage["stacks"][0]["volume_bytes"] > 0
+
+    def test_dashboard_usage_section(self, dashboard_module, tmp_path):
+        usage = aggregate_by_pr(CONTAINERS, parse_stats_lines(STATS_LINES))
+        analyzer = dashboard_module.TrendsAnalyzer(str(tmp_path / "missing.json"))
+        generator = dashboard_module.DashboardGenerator(analyzer, usage)
+
+        output = generator.generate_html_dashboard(str(tmp_path / "out.html"), days=3)
+
+        html = open(output).read()
+        assert "Consumo por Stack" in html
+        assert "#7" in html
+        assert "db: 60.0MiB" in html
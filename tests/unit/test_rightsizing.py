@@ -0,0 +1,117 @@
+import json
+import pytest
+from unittest.mock import patch
+
+from src.rightsizing import (
+    append_samples,
+    load_samples,
+    percentile,
+    propose_limits,
+    render_tfvars,
+    usage_samples,
+)
+
+MIB = 1024**2
+
+
+def make_samples(component, memory_mb, cpu_percent, count=20):
+    return [
+        {"component": component, "memory_bytes": memory_mb * MIB, "cpu_percent": cpu_percent}
+        for _ in range(count)
+    ]
+
+
+@pytest.mark.parametrize(
+    "values,pct,expected",
+    [([1, 2, 3, 4, 5], 50, 3), ([1, 2, 3, 4], 50, 2.5), ([10], 99, 10), ([1, 2], 100, 2)],
+)
+def test_percentile(values, pct, expected):
+    assert percentile(values, pct) == expected
+
+
+def test_percentile_empty():
+    with pytest.raises(ValueError):
+        percentile([], 95)
+
+
+def test_usage_samples_roundtrip(tmp_path):
+    usage = {
+        "collected_at": "2026-10-19T10:00:00+00:00",
+        "stacks": [
+            {
+                "pr_number": 3,
+                "components": {
+                    "db": {"cpu_percent": 1.0, "memory_bytes": 5},
+                    "app": {"cpu_percent": 0.5, "memory_bytes": 7},
+                },
+            }
+        ],
+    }
+    path = tmp_path / "nested" / "samples.jsonl"
+
+    assert append_samples(str(path), usage_samples(usage)) == 2
+    with open(path, "a") as f:
+        f.write("corrupta\n")
+
+    samples = list(load_samples(str(path)))
+    assert [s["component"] for s in samples] == ["app", "db"]
+    assert samples[0]["pr_number"] == 3
+
+
+class TestProposeLimits:
+    """Tests de propuesta de límites por componente"""
+
+    def test_limits_cover_percentile_with_headroom(self):
+        samples = make_samples("app", 40, 10) + make_samples("db", 200, 30)
+        limits = propose_limits(samples, pct=95, headroom=1.3)
+
+        assert limits["app"]["memory_mb"] == 64  # 40 * 1.3 = 52 -> múltiplo de 16
+        assert limits["app"]["cpus"] == "0.15"
+        assert limits["db"]["memory_mb"] == 272
+        assert limits["db"]["cpus"] == "0.40"
+
+    def test_minimums_and_insufficient_samples(self):
+        samples = make_samples("proxy", 2, 0.01) + make_samples("app", 100, 5, count=3)
+        samples.append({"component": "otro", "memory_bytes": 1, "cpu_percent": 1})
+
+        limits = propose_limits(samples)
+
+        assert limits == {
+            "proxy": {
+                "memory_mb": 32,
+                "cpus": "0.10",
+                "samples": 20,
+                "memory_p_mb": 2.0,
+                "memory_max_mb": 2.0,
+                "cpu_p_percent": 0.01,
+            }
+        }
+
+    def test_render_tfvars(self):
+        limits = propose_limits(make_samples("app", 40, 10) + make_samples("db", 200, 30))
+        tfvars = render_tfvars(limits, "comentario")
+
+        assert tfvars.splitlines() == [
+            "# comentario",
+            "resource_limits = {",
+            '  app = { memory_mb = 64, cpus = "0.15" }',
+            '  db  = { memory_mb = 272, cpus = "0.40" }',
+            "}",
+        ]
+
+
+def test_rightsize_cli_tfvars(tmp_path, capsys):
+    """El script genera el bloque tfvars desde el historial"""
+    from tests.conftest import load_script
+
+    samples_file = tmp_path / "samples.jsonl"
+    samples_file.write_text(
+        "\n".join(json.dumps(s) for s in make_samples("app", 40, 10)) + "\n"
+    )
+    module = load_script("rightsize-limits.py", "rightsize_limits")
+
+    argv = ["rightsize-limits.py", "--samples", str(samples_file), "--format", "tfvars"]
+    with patch("sys.argv", argv):
+        module.main()
+
+    assert 'app = { memory_mb = 64, cpus = "0.15" }' in capsys.readouterr().out
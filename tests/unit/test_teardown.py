@@ -0,0 +1,167 @@
+import subprocess
+from unittest.mock import Mock
+
+import pytest
+
+from src.docker_api import DockerAPIClient
+from src.fake_docker import FakeDockerDaemon
+from src.synthetic import synthetic_fleet
+from src.teardown import APIRemover, CLIRemover, TeardownPlan, execute_plan
+
+
+def inventory(*pr_numbers):
+    resources = {"containers": [], "volumes": [], "networks": []}
+    for pr in pr_numbers:
+        for component in ("app", "db"):
+            resources["containers"].append(
+                {"name": f"ephemeral-pr-{pr}-{component}", "pr_number": pr}
+            )
+        resources["volumes"].append({"name": f"ephemeral-pr-{pr}-db-data", "pr_number": pr})
+        resources["networks"].append({"name": f"ephemeral-pr-{pr}-network", "pr_number": pr})
+    return resources
+
+
+class FakeRun:
+    """subprocess.run falso que registra comandos y falla nombres configurados"""
+
+    def __init__(self, failing=None):
+        self.calls = []
+        self.failing = dict(failing or {})
+
+    def __call__(self, cmd, **kwargs):
+        self.calls.append(cmd)
+        names = [arg for arg in cmd if arg.startswith("ephemeral-")]
+        bad = [n for n in names if self.failing.get(n, 0) > 0]
+        for name in bad:
+            self.failing[name] -= 1
+        stdout = "\n".join(n for n in names if n not in bad)
+        stderr = "\n".join(f"Error response from daemon: {n} is busy" for n in bad)
+        return Mock(returncode=1 if bad else 0, stdout=stdout, stderr=stderr)
+
+
+def test_layers_span_all_prs():
+    plan = TeardownPlan.from_resources(inventory(1, 2, 3), pr_numbers=[1, 3])
+
+    layers = plan.layers()
+
+    assert [kind for kind, _ in layers] == ["containers", "volumes", "networks"]
+    assert layers[0][1] == [
+        "ephemeral-pr-1-app",
+        "ephemeral-pr-1-db",
+        "ephemeral-pr-3-app",
+        "ephemeral-pr-3-db",
+    ]
+    assert len(plan) == 8
+
+
+def test_one_command_per_layer():
+    run = FakeRun()
+    report = execute_plan(
+        TeardownPlan.from_resources(inventory(1, 2, 3)), CLIRemover(run)
+    )
+
+    assert [cmd[:3] for cmd in run.calls] == [
+        ["docker", "rm", "-f"],
+        ["docker", "volume", "rm"],
+        ["docker", "network", "rm"],
+    ]
+    assert report["removed"] == {"containers": 6, "volumes": 3, "networks": 3}
+    assert report["commands"] == 3
+    assert report["items_per_second"] > 0
+
+
+def test_batch_size_splits_commands():
+    run = FakeRun()
+    execute_plan(TeardownPlan.from_resources(inventory(1, 2, 3)), CLIRemover(run), batch_size=4)
+    assert len(run.calls) == 4
+
+
+def test_retries_only_failures():
+    run = FakeRun({"ephemeral-pr-2-db": 1})
+    sleeps = []
+
+    report = execute_plan(
+        TeardownPlan.from_resources(inventory(1, 2)), CLIRemover(run), sleep=sleeps.append
+    )
+
+    assert run.calls[1] == ["docker", "rm", "-f", "ephemeral-pr-2-db"]
+    assert sleeps == [0.5]
+    assert report["failed"] == {}
+    assert report["layers"][0]["attempts"] == 2
+
+
+def test_persistent_failure_blocks_dependents():
+    run = FakeRun({"ephemeral-pr-2-db": 10})
+
+    report = execute_plan(
+        TeardownPlan.from_resources(inventory(1, 2)),
+        CLIRemover(run),
+        retries=1,
+        sleep=lambda s: None,
+    )
+
+    assert list(report["failed"]) == ["ephemeral-pr-2-db"]
+    assert "is busy" in report["failed"]["ephemeral-pr-2-db"]
+    assert sorted(report["blocked"]) == ["ephemeral-pr-2-db-data", "ephemeral-pr-2-network"]
+    assert report["removed"] == {"containers": 3, "volumes": 1, "networks": 1}
+
+
+def test_cli_remover_treats_missing_as_removed():
+    run = Mock(
+        return_value=Mock(
+            returncode=1,
+            stdout="",
+            stderr="Error response from daemon: No such container: ephemeral-pr-1-app",
+        )
+    )
+    removed, errors = CLIRemover(run).remove("containers", ["ephemeral-pr-1-app"])
+    assert removed == ["ephemeral-pr-1-app"] and errors == {}
+
+    run.side_effect = subprocess.CalledProcessError(1, "docker")
+    removed, errors = CLIRemover(run).remove("volumes", ["v"])
+    assert removed == [] and "v" in errors
+
+
+def test_invalid_kind():
+    with pytest.raises(ValueError):
+        TeardownPlan().add("images", "x")
+
+
+def test_api_teardown_against_fake_daemon(tmp_path):
+    fleet = synthetic_fleet(100)
+    with FakeDockerDaemon(str(tmp_path / "docker.sock"), fleet) as daemon:
+        daemon.inject_failure("DELETE", r"/volumes/ephemeral-pr-4-", times=1)
+        resources = {
+            "containers": [
+                {"name": c["name"], "pr_number": int(c["labels"]["pr_number"])}
+                for c in fleet["containers"]
+            ],
+            "volumes": [{"name": v["name"], "pr_number": None} for v in fleet["volumes"]],
+            "networks": [
+                {"name": n["name"], "pr_number": int(n["labels"]["pr_number"])}
+                for n in fleet["networks"]
+            ],
+        }
+        # Volúmenes con PR desconocido dependen de todos los contenedores
+        plan = TeardownPlan.from_resources(resources)
+        remover = APIRemover(DockerAPIClient(daemon.docker_host), workers=4)
+
+        report = execute_plan(plan, remover, sleep=lambda s: None)
+
+        assert report["failed"] == {}
+        assert report["removed"] == {"containers": 60, "volumes": 20, "networks": 20}
+        assert not daemon.containers and not daemon.volumes and not daemon.networks
+        assert report["layers"][1]["attempts"] == 2
+
+
+def test_monitor_teardown(cleanup_monitor_module, tmp_path):
+    with FakeDockerDaemon(str(tmp_path / "docker.sock"), synthetic_fleet(50)) as daemon:
+        monitor = cleanup_monitor_module.CleanupMonitor(daemon.docker_host)
+
+        plan = monitor.teardown([1, 2], dry_run=True)
+        assert [layer["items"] for layer in plan["layers"]] == [6, 2, 2]
+        assert len(daemon.containers) == 30
+
+        report = monitor.teardown([1, 2])
+        assert report["removed"]["containers"] == 6
+        assert len(daemon.containers) == 24
@@ -0,0 +1,133 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from src import tracing
+from src.provisioner import TerraformProvisioner
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+
+
+@pytest.fixture
+def tracer():
+    tracer = tracing.Tracer()
+    previous = tracing.set_tracer(tracer)
+    yield tracer
+    tracing.set_tracer(previous)
+
+
+def by_name(spans):
+    return {s["name"]: s for s in spans}
+
+
+def test_commands_are_spans_of_their_operation(tracer, tmp_path):
+    def fake_run(cmd, **kwargs):
+        return Mock(returncode=2 if "plan" in cmd else 0, stdout="ñ" * 3, stderr=b"")
+
+    provisioner = TerraformProvisioner(str(tmp_path), run=fake_run)
+    with tracing.span("deploy", pr_number=7):
+        provisioner._terraform("-chdir=x", "plan", ok_codes=(0, 2))
+        with pytest.raises(FileNotFoundError):
+            with tracing.command(["jq", ".x"]):
+                raise FileNotFoundError("jq")
+
+    spans = by_name(tracer.spans)
+    plan, jq, deploy = spans["terraform plan"], spans["jq .x"], spans["deploy"]
+    assert plan["parent_id"] == jq["parent_id"] == deploy["span_id"]
+    assert deploy["attributes"] == {"pr_number": 7}
+    assert plan["attributes"]["command.argv"][-2:] == ["-chdir=x", "plan"]
+    assert plan["attributes"]["command.exit_code"] == 2
+    assert plan["attributes"]["command.stdout_bytes"] == 6
+    assert plan["status"] == "error"
+    assert jq["status"] == "error" and "FileNotFoundError" in jq["attributes"]["error"]
+    assert deploy["start_ns"] <= plan["start_ns"] <= plan["end_ns"] <= deploy["end_ns"]
+
+    chrome = tracing.chrome_trace(tracer.spans)["traceEvents"]
+    assert [e["name"] for e in chrome] == ["deploy", "terraform plan", "jq .x"]
+    assert chrome[1]["ph"] == "X" and chrome[1]["args"]["command.exit_code"] == 2
+
+    otlp = tracing.otlp_json(tracer.spans)["resourceSpans"][0]
+    otlp_spans = by_name(otlp["scopeSpans"][0]["spans"])
+    assert otlp["resource"]["attributes"][0]["value"] == {"stringValue": "ephemeral-stacks"}
+    assert otlp_spans["terraform plan"]["kind"] == 3
+    assert otlp_spans["terraform plan"]["status"] == {"code": 2}
+    assert otlp_spans["terraform plan"]["parentSpanId"] == deploy["span_id"]
+    assert {"key": "command.exit_code", "value": {"intValue": "2"}} in (
+        otlp_spans["terraform plan"]["attributes"]
+    )
+
+    assert [e["command"] for e in tracing.summarize(tracer.spans)] == ["terraform plan", "jq .x"]
+
+    # El resumen sale igual de la traza chrome ya exportada
+    tracing.write_trace(str(tmp_path / "trace.json"), tracer.spans)
+    assert tracing.summarize(tracing.load_trace(str(tmp_path / "trace.json"))) == (
+        tracing.summarize(tracer.spans)
+    )
+
+    # Y se convierte a OTLP conservando trace, span y padre
+    def ids(spans):
+        return sorted((s["traceId"], s["spanId"], s["parentSpanId"], s["name"]) for s in spans)
+
+    reloaded = tracing.otlp_json(tracing.load_trace(str(tmp_path / "trace.json")))
+    assert ids(reloaded["resourceSpans"][0]["scopeSpans"][0]["spans"]) == ids(
+        otlp["scopeSpans"][0]["spans"]
+    )
+
+
+def test_disabled_tracing_runs_commands_untouched():
+    assert tracing.get_tracer() is None
+    run = tracing.traced(subprocess.run)
+    result = run([sys.executable, "-c", "print('ok')"], capture_output=True, text=True)
+    assert result.stdout == "ok\n"
+    with tracing.command(["docker", "ps"]) as attributes:
+        attributes["command.exit_code"] = 0
+
+
+def test_shell_script_and_python_child_share_one_trace(tmp_path):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    docker = bin_dir / "docker"
+    docker.write_text('#!/bin/sh\n[ "$1" = "ps" ] && echo "ephemeral-pr-5-app"\nexit 0\n')
+    docker.chmod(0o755)
+    trace_file = tmp_path / "trace.json"
+    env = dict(os.environ, PATH=f"{bin_dir}:{os.environ['PATH']}", TRACE_FILE=str(trace_file),
+               TRACE_FORMAT="otlp")
+    for var in (tracing.SPANS_ENV, tracing.PARENT_ENV, tracing.TRACE_ID_ENV):
+        env.pop(var, None)
+
+    script = (
+        f'source "{ROOT}/scripts/lib/trace.sh"\n'
+        'names=$(docker ps -a --format "{{.Names}}")\n'
+        '[ "$names" = "ephemeral-pr-5-app" ]\n'
+        'docker -H \'unix:///tmp/"a"\\b.sock\' ps > /dev/null\n'
+        f'"{sys.executable}" "{ROOT}/scripts/cleanup-monitor.py" --summary --json > /dev/null\n'
+    )
+    subprocess.run(["bash", "-c", script], env=env, cwd=ROOT, check=True, timeout=60)
+
+    spans = json.loads(trace_file.read_text())["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert not Path(f"{trace_file}.spans.ndjson").exists()
+    assert len({s["traceId"] for s in spans}) == 1
+    shell = next(s for s in spans if s["name"] == "bash")
+    monitor = next(s for s in spans if s["name"] == "cleanup-monitor")
+    summary = next(s for s in spans if s["name"] == "summary")
+    scan = next(s for s in spans if s["name"] == "scan")
+    docker_calls = [s for s in spans if s["name"].startswith("docker ")]
+
+    assert monitor["parentSpanId"] == shell["spanId"]
+    assert summary["parentSpanId"] == monitor["spanId"]
+    assert docker_calls[0]["parentSpanId"] == shell["spanId"]
+    assert {"key": "command.exit_code", "value": {"intValue": "0"}} in (
+        docker_calls[0]["attributes"]
+    )
+    # Comillas y barras del argumento no rompen la línea NDJSON del span
+    assert 'docker unix:///tmp/"a"\\b.sock' in [s["name"] for s in docker_calls]
+    # docker ps, volume ls y network ls del escaneo cuelgan de su operación
+    assert scan["parentSpanId"] == summary["spanId"]
+    assert [s["name"] for s in docker_calls if s["parentSpanId"] == scan["spanId"]] == [
+        "docker ps", "docker volume", "docker network",
+    ]
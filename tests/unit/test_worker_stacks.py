@@ -0,0 +1,40 @@
+import socket
+
+import pytest
+
+from src.placement import stack_ports
+from tests.conftest import busy_ports, worker_pr_number
+
+
+def test_each_worker_gets_its_own_pr_and_ports(monkeypatch):
+    monkeypatch.setenv("PYTEST_XDIST_WORKER_COUNT", "100")
+    slots = {}
+    for index in range(100):
+        monkeypatch.setenv("PYTEST_XDIST_WORKER", f"gw{index}")
+        slots[index] = worker_pr_number()
+
+    ports = [port for pr_number in slots.values() for port in stack_ports(pr_number)]
+    assert len(set(slots.values())) == 100
+    assert len(set(ports)) == len(ports)
+    assert slots[0] == 900 and slots[7] == 907
+
+    monkeypatch.delenv("PYTEST_XDIST_WORKER")
+    monkeypatch.delenv("PYTEST_XDIST_WORKER_COUNT")
+    assert worker_pr_number() == 900
+
+    monkeypatch.setenv("PYTEST_XDIST_WORKER_COUNT", "101")
+    with pytest.raises(pytest.UsageError):
+        worker_pr_number()
+
+
+def test_slot_ports_follow_the_stack_scheme(stack_slot):
+    assert sorted(stack_slot["ports"].values()) == stack_ports(stack_slot["pr_number"])
+
+
+def test_busy_slot_ports_are_detected():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        sock.listen()
+        taken = sock.getsockname()[1]
+        assert busy_ports([taken]) == [taken]
+    assert busy_ports([taken]) == []